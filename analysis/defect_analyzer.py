@@ -1,17 +1,25 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
 import pandas as pd
-from config.mappings import REJ_GROUP_TO_MID_MAPPING
+from config.database import ANALYZER_CONFIG
+from modules.mid_lookup import mid_group_codes
+
+logger = logging.getLogger(__name__)
 
 
 def add_mid_group(df, rej_group):
     """
     AFT_BAD_RSN_CD를 기준으로 MID_GROUP 생성
-    매핑 정보는 mapping.py 에서 가져옴
+    매핑 정보는 mapping.py 에서 가져옴 (로드 시점에 이미 부여된 경우 그대로 사용)
     """
-    mapping = REJ_GROUP_TO_MID_MAPPING.get(rej_group, {})
+    if 'MID_GROUP' in df.columns:
+        return df
     df = df.copy()
-    df['MID_GROUP'] = df['AFT_BAD_RSN_CD'].map(mapping)
-    # 매핑되지 않은 것은 원래 값 유지
-    df['MID_GROUP'] = df['MID_GROUP'].fillna(df['AFT_BAD_RSN_CD'])
+    df['MID_GROUP'] = mid_group_codes(pd.Series(rej_group, index=df.index), df['AFT_BAD_RSN_CD'])
     return df
 
 def safe_convert_loss_qty(df, col_name='LOSS_QTY'):
@@ -21,24 +29,81 @@ def safe_convert_loss_qty(df, col_name='LOSS_QTY'):
     """
     if col_name not in df.columns:
         raise KeyError(f"컬럼 없음: {col_name}")
+    # 로드 시점에 이미 숫자형으로 변환된 경우 재변환 생략
+    if pd.api.types.is_numeric_dtype(df[col_name]):
+        return df
     df[col_name] = pd.to_numeric(df[col_name], errors='coerce')
     return df
 
 
-def analyze_flatness(df_lot, target_mids=None):
+# =========================================================
+# 공통 유틸 (분석 함수 공용)
+# =========================================================
+def _unknown(value):
+    """결측 → 'Unknown'"""
+    return value if pd.notna(value) else 'Unknown'
+
+
+def _top_n(df, by, n, value='LOSS_QTY'):
     """
-    FLATNESS 불량 분석 (디버그 포함)
+    by 그룹별 value 상위 n행 (nlargest와 동일하게 동률은 앞선 행 우선)
+    - 그룹마다 필터/정렬을 반복하지 않고 1회 정렬 + groupby head
     """
+    ranked = df.sort_values(value, ascending=False, kind='stable')
+    return ranked.groupby(by, observed=True, sort=False, dropna=False).head(n)
+
+
+def _top_keys(df, key, n=None, value='LOSS_QTY'):
+    """key별 value 합계 내림차순 key 목록 (n 지정 시 상위 n개)"""
+    keys = df.groupby(key, observed=True)[value].sum().sort_values(ascending=False, kind='stable')
+    return keys.index.tolist() if n is None else keys.index.tolist()[:n]
+
+
+def format_md(values):
+    """등록일시(YYYYMMDD... 문자열 / datetime) → 'M/D' (해석 불가 시 'Unknown')"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        text = values.dt.month.astype('Int64').astype(str) + '/' + values.dt.day.astype('Int64').astype(str)
+        return text.where(values.notna(), 'Unknown')
+    text = values.astype(str)
+    valid = (text.str.len() >= 8) & text.str[:8].str.isdigit()
+    out = pd.Series('Unknown', index=values.index, dtype=object)
+    if valid.any():
+        digits = text[valid]
+        out[valid] = (digits.str[4:6].astype(int).astype(str) + '/' + digits.str[6:8].astype(int).astype(str))
+    return out
+
+
+def _grade_label(cs, ps):
+    """CS/PS 등급 → Prime / Normal / Premium (그 외 CS 등급 그대로)"""
+    cs = cs.astype(object)
+    ps = ps.astype(object)
+    return np.select(
+        [(cs == 'Prime') & (ps == 'Prime'), (cs == 'Normal') & (ps == 'Normal'), (cs == 'Normal') & (ps == 'Prime')],
+        ['Prime', 'Normal', 'Premium'],
+        default=cs,
+    )
 
-    # 1. FLATNESS 데이터 필터링
-    df = df_lot[df_lot['REJ_GROUP'] == 'FLATNESS'].copy()
-    df = df[df['GRD_CD_NM_CS'] == 'Prime']
-    if df.empty:
-        return ["[FLATNESS 분석] 데이터 없음"]
 
-    # 숫자형 변환
+def prepare_group(df, rej_group, grade_col=None, mid=False):
+    """
+    단독 호출용 입력 준비: REJ_GROUP 필터 → (grade_col 지정 시) Prime 필터 → 숫자형 변환 → (옵션) MID_GROUP
+    (엔진 사용 시에는 DefectAnalyzerEngine이 1회 분할 후 동일한 slice를 만들어 전달)
+    """
+    df = df[df['REJ_GROUP'] == rej_group].copy()
+    if grade_col is not None:
+        df = df[df[grade_col] == 'Prime']
     df = safe_convert_loss_qty(df, 'LOSS_QTY')
-    df = add_mid_group(df, 'FLATNESS')
+    if mid:
+        df = add_mid_group(df, rej_group)
+    return df
+
+
+# =========================================================
+# 분석 함수 (입력: REJ_GROUP/Prime 필터 + 숫자형 변환 + MID_GROUP 매핑이 끝난 slice)
+# =========================================================
+def _flatness(df, target_mids=None):
+    if df.empty:
+        return ["[FLATNESS 분석] 데이터 없음"]
 
     #  target_mids 필터링
     if target_mids is not None and len(target_mids) > 0:
@@ -48,156 +113,105 @@ def analyze_flatness(df_lot, target_mids=None):
         after_filter = len(df)
         print(f"  - 필터 전: {before_filter} → 필터 후: {after_filter}")
         # 순서 유지
-        mid_list = [mid for mid in target_mids if mid in df['MID_GROUP'].unique()]
+        present = set(df['MID_GROUP'].unique())
+        mid_list = [mid for mid in target_mids if mid in present]
     else:
-        mid_list = df.groupby('MID_GROUP')['LOSS_QTY'].sum().sort_values(ascending=False).index.tolist()
+        mid_list = _top_keys(df, 'MID_GROUP')
 
     if not mid_list:
         return ["[FLATNESS 분석] 대상 MID_GROUP 없음"]
 
+    # MID_GROUP별 (코드, 제품, 등급) 합계 → 30장 이상 상위 3개
+    grouped = (df.groupby(['MID_GROUP', 'AFT_BAD_RSN_CD', 'PRODUCT_TYPE', 'GRD_CD_NM_CS', 'GRD_CD_NM_PS'],
+                          dropna=False, observed=True)['LOSS_QTY']
+               .sum()
+               .reset_index())
+    top = _top_n(grouped[grouped['LOSS_QTY'] >= 30], 'MID_GROUP', 3)
+    top = top.assign(GRADE=_grade_label(top['GRD_CD_NM_CS'], top['GRD_CD_NM_PS']))
+
     result = ["[FLATNESS 분석]"]
     for mid in mid_list:
-        df_mid = df[df['MID_GROUP'] == mid].copy()
-        grouped = (df_mid
-                   .groupby(['AFT_BAD_RSN_CD', 'PRODUCT_TYPE', 'GRD_CD_NM_CS', 'GRD_CD_NM_PS'], dropna=False)['LOSS_QTY']
-                   .sum()
-                   .reset_index())
-        grouped = grouped[grouped['LOSS_QTY'] >= 30].nlargest(3, 'LOSS_QTY')
-
-        if grouped.empty:
+        rows = top[top['MID_GROUP'] == mid]
+        if rows.empty:
             continue
-
-        parts = []
-        for _, row in grouped.iterrows():
-            cs, ps = row['GRD_CD_NM_CS'], row['GRD_CD_NM_PS']
-            grade = ('Prime' if (cs == 'Prime' and ps == 'Prime') else
-                     'Normal' if (cs == 'Normal' and ps == 'Normal') else
-                     'Premium' if (cs == 'Normal' and ps == 'Prime') else cs)
-            cust = row['PRODUCT_TYPE'] if pd.notna(row['PRODUCT_TYPE']) else 'Unknown'
-            qty = int(row['LOSS_QTY'])
-            parts.append(f" {cust} {grade} {qty}매")
-
-        if parts:
-            line = f"- {mid} - " + ", ".join(parts)
-            result.append(line)
+        parts = [f" {_unknown(cust)} {grade} {int(qty)}매"
+                 for cust, grade, qty in zip(rows['PRODUCT_TYPE'], rows['GRADE'], rows['LOSS_QTY'])]
+        result.append(f"- {mid} - " + ", ".join(parts))
 
     return result if len(result) > 1 else result + ["상위 30장 이상 없음"]
 
 
-def analyze_warp(df_wafer, target_mids=None):
-    """
-    Nano Warp 불량 분석 통합 함수 (디버그 모드 포함)
-    """
-    df = df_wafer[df_wafer['REJ_GROUP'] == 'WARP&BOW'].copy()
-    df = df[df['GRADE_CS'] == 'Prime']
-
-    df = safe_convert_loss_qty(df, 'LOSS_QTY')
+def _large_defect_lines(df, eqp_col, time_fmt_col):
+    """대량불량 (코드, BLK_ID, 장비, 날짜 합계 ≥ 100) 문장"""
+    large = (df.groupby(['AFT_BAD_RSN_CD', 'BLK_ID', eqp_col, time_fmt_col], dropna=False, observed=True)['LOSS_QTY']
+             .sum().reset_index())
+    large = large[large['LOSS_QTY'] >= 100]
+    return [f"{code} {blk}의 {int(qty)}매 ({eqp} {day})"
+            for code, blk, eqp, day, qty in zip(large['AFT_BAD_RSN_CD'], large['BLK_ID'], large[eqp_col],
+                                                 large[time_fmt_col], large['LOSS_QTY'])]
 
-    # 날짜 포맷팅
-    def format_date(val):
-        s = str(val)
-        return f"{int(s[4:6])}/{int(s[6:8])}" if len(s) >= 8 and s[:8].isdigit() else "Unknown"
 
-    df['REG_DTTM_3200_FMT'] = df['REG_DTTM_300_WF_3200'].apply(format_date)
+def _warp(df, target_mids=None):
+    df = df.assign(REG_DTTM_3200_FMT=format_md(df['REG_DTTM_300_WF_3200']))
 
     result = ["[WARP&BOW 분석]"]
 
     # --- 대량불량 ---
-    large = (df.groupby(['AFT_BAD_RSN_CD', 'BLK_ID', 'EQP_NM_300_WF_3200', 'REG_DTTM_3200_FMT'], dropna=False)['LOSS_QTY']
-             .sum().reset_index())
-
-    for _, row in large[large['LOSS_QTY'] >= 100].iterrows():
-        result.append(f"{row['AFT_BAD_RSN_CD']} {row['BLK_ID']}의 {int(row['LOSS_QTY'])}매 ({row['EQP_NM_300_WF_3200']} {row['REG_DTTM_3200_FMT']})")
+    result += _large_defect_lines(df, 'EQP_NM_300_WF_3200', 'REG_DTTM_3200_FMT')
 
     # --- 소량 불량 ---
-    df_minor = df[df['LOSS_QTY'] < 100].copy()
+    df_minor = df[df['LOSS_QTY'] < 100]
     if df_minor.empty:
         print("  - 소량불량 데이터 없음")
     else:
-        # add_mid_group 함수 확인 필요
-        if 'add_mid_group' not in globals() and 'add_mid_group' not in locals():
-            print("❌ add_mid_group 함수가 정의되지 않음")
-            return result + ["[오류] add_mid_group 없음"]
-
-        try:
-            df_minor = add_mid_group(df_minor, 'WARP&BOW')
-        except Exception as e:
-            print(f"❌ add_mid_group 실행 오류: {e}")
-            return result + ["[오류] MID_GROUP 생성 실패"]
-
         # target_mids 가 있으면 그 값만 분석 (상위 3 개)
         if target_mids and len(target_mids) > 0:
             analysis_mids = target_mids[:3]  #  최대 3 개만
+        elif 'MID_GROUP' in df_minor.columns:
+            analysis_mids = _top_keys(df_minor, 'MID_GROUP', 3)  # 상위 3 개
         else:
-            # 전체 MID_GROUP 분석 (기존 로직)
-            if 'MID_GROUP' in df_minor.columns:
-                mid_summary = df_minor.groupby('MID_GROUP')['LOSS_QTY'].sum().sort_values(ascending=False)
-                analysis_mids = mid_summary.index.tolist()[:3]  # 상위 3 개
-            else:
-                return result + ["소량분석: MID_GROUP 없음"]
-
-        # 각 MID_GROUP별 상위 3개 BLK_ID 분석
+            return result + ["소량분석: MID_GROUP 없음"]
+
+        # 각 MID_GROUP별 상위 3개 BLK_ID
+        grouped = (df_minor[df_minor['MID_GROUP'].isin(analysis_mids)]
+                   .groupby(['MID_GROUP', 'AFT_BAD_RSN_CD', 'BLK_ID', 'PRODUCT_TYPE', 'GRADE_CS'],
+                            dropna=False, observed=True)['LOSS_QTY']
+                   .sum().reset_index())
+        top = _top_n(grouped, 'MID_GROUP', 3)
         for mid in analysis_mids:
-            df_m = df_minor[df_minor['MID_GROUP'] == mid].copy()
-
-            grouped = (df_m.groupby(['AFT_BAD_RSN_CD', 'BLK_ID', 'PRODUCT_TYPE', 'GRADE_CS'], dropna=False)['LOSS_QTY']
-                       .sum().reset_index().nlargest(3, 'LOSS_QTY'))
-
-            if grouped.empty:
+            rows = top[top['MID_GROUP'] == mid]
+            if rows.empty:
                 continue
-
-            parts = [f"{r['PRODUCT_TYPE']} {r['GRADE_CS']} {r['BLK_ID']} {int(r['LOSS_QTY'])}매" for _, r in grouped.iterrows()]
+            parts = [f"{cust} {grade} {blk} {int(qty)}매"
+                     for cust, grade, blk, qty in zip(rows['PRODUCT_TYPE'], rows['GRADE_CS'], rows['BLK_ID'], rows['LOSS_QTY'])]
             result.append(f"- {mid} 열위 Lot - " + ", ".join(parts))
 
     return result if len(result) > 1 else result + ["대량/소량 없음"]
 
 
-def analyze_growing(df_lot):
-    """
-    GROWING 불량 분석 함수:
-    - AFT_BAD_RSN_CD 기준 상위 3개 코드 추출
-    - 각 코드별 IGOT_ID 기준 LOSS_QTY 합계 상위 3개 추출
-    입력: df_lot (DATA_LOT_3210_wafering_300 결과)
-    """
-    df_lot = df_lot[df_lot['REJ_GROUP'] == 'GROWING'].copy()
-    df_lot = df_lot[df_lot['GRD_CD_NM_CS'] == 'Prime']
-
-    if df_lot.empty:
+def _growing(df):
+    if df.empty:
         return ["[GROWING 분석] 데이터 없음"]
-    df_lot = safe_convert_loss_qty(df_lot, 'LOSS_QTY')
     result_lines = ["[GROWING 분석]"]
 
     # AFT_BAD_RSN_CD 기준 LOSS_QTY 합계 → 상위 3개 코드 추출
-    code_summary = (
-        df_lot.groupby('AFT_BAD_RSN_CD')['LOSS_QTY']
-        .sum()
-        .sort_values(ascending=False)
-        .head(3)
-    )
-
-    if code_summary.empty:
+    top3_codes = _top_keys(df, 'AFT_BAD_RSN_CD', 3)
+    if not top3_codes:
         result_lines.append("상위 불량 코드 없음")
         return result_lines
 
-    top3_codes = code_summary.index.tolist()
+    # 코드별 IGOT_ID 합계 상위 3개 (1회 groupby)
+    grouped = (df[df['AFT_BAD_RSN_CD'].isin(top3_codes)]
+               .groupby(['AFT_BAD_RSN_CD', 'IGOT_ID'], dropna=False, observed=True)['LOSS_QTY']
+               .sum().reset_index())
+    top = _top_n(grouped, 'AFT_BAD_RSN_CD', 3)
 
-    # 각 코드별 결과를 모았다가 한 줄로 병합
     for code in top3_codes:
-        df_code = df_lot[df_lot['AFT_BAD_RSN_CD'] == code].copy()
-        grouped = df_code.groupby('IGOT_ID', dropna=False)['LOSS_QTY'].sum().reset_index()
-        grouped = grouped.sort_values(by='LOSS_QTY', ascending=False).head(3)
-
-        if grouped.empty:
+        rows = top[top['AFT_BAD_RSN_CD'] == code]
+        if rows.empty:
             continue
-
-        content_parts = []
-        for _, row in grouped.iterrows():
-            igot = row['IGOT_ID'] if pd.notna(row['IGOT_ID']) else 'Unknown'
-            qty = int(row['LOSS_QTY'])
-            content_parts.append(f"{igot} {qty}매 폐기")
-        
-        if content_parts:
-            result_lines.append(f"- {code} - " + ", ".join(content_parts))
+        content_parts = [f"{_unknown(igot)} {int(qty)}매 폐기" for igot, qty in zip(rows['IGOT_ID'], rows['LOSS_QTY'])]
+        result_lines.append(f"- {code} - " + ", ".join(content_parts))
 
     if len(result_lines) == 1:
         result_lines.append("분석 결과 없음")
@@ -205,92 +219,53 @@ def analyze_growing(df_lot):
     return result_lines
 
 
-def analyze_broken(df_lot):
-    """
-    BROKEN 불량 분석:
-    1) AFT_BAD_RSN_CD 기준 상위 2개 추출
-    2) 'LAP', 'EP', 'FP', 'DSP' 포함 여부 → 'main공정' / '이외공정' 분류
-    3) 각 불량 코드별 EQP_ID 기준 LOSS_QTY 집계 및 몰림성 판단 (10매 이상 차이 시)
-    입력: df_lot (DATA_LOT_3210_wafering_300 결과)
-    """
-    df_lot = df_lot[df_lot['REJ_GROUP'] == 'BROKEN'].copy()
-    df_lot = df_lot[df_lot['GRD_CD_NM_CS'] == 'Prime']
-
-    if df_lot.empty:
+def _broken(df):
+    if df.empty:
         return ["[BROKEN 분석] 데이터 없음"]
-
-    df_lot = safe_convert_loss_qty(df_lot, 'LOSS_QTY')
     result = ["[BROKEN 분석]"]
 
-    # Step 1: 공정구분 - 'LAP', 'EP', 'FP', 'DSP' 포함 여부
-    main_keywords = ['LAP', 'EP', 'FP', 'DSP']
-    df_lot['공정구분'] = df_lot['AFT_BAD_RSN_CD'].apply(
-        lambda x: 'main공정' if any(k in str(x).upper() for k in main_keywords) else '이외공정'
-    )
-
-    # Step 2: AFT_BAD_RSN_CD 기준 LOSS_QTY 합계 → 상위 2개 추출
-    top2_codes = (
-        df_lot.groupby('AFT_BAD_RSN_CD')['LOSS_QTY']
-        .sum()
-        .sort_values(ascending=False)
-        .head(2)
-        .index.tolist()
-    )
-
+    # AFT_BAD_RSN_CD 기준 LOSS_QTY 합계 → 상위 2개 추출
+    top2_codes = _top_keys(df, 'AFT_BAD_RSN_CD', 2)
     if not top2_codes:
         result.append("상위 불량 코드 없음")
         return result
 
-    # Step 3: 각 상위 코드별 분석
-    for code in top2_codes:
-        df_code = df_lot[df_lot['AFT_BAD_RSN_CD'] == code].copy()
-        proc_type = df_code['공정구분'].iloc[0] if not df_code.empty else 'Unknown'
+    # 공정구분 - 'LAP', 'EP', 'FP', 'DSP' 포함 여부 (상위 코드에만 판정)
+    main_keywords = ['LAP', 'EP', 'FP', 'DSP']
 
-        # EQP_ID 기준 집계
-        grouped = (
-            df_code.groupby('EQP_NM', dropna=False)['LOSS_QTY']
-            .sum()
-            .sort_values(ascending=False)
-            .reset_index()
-        )
+    # 코드별 EQP_NM 합계 (1회 groupby)
+    grouped_all = (df[df['AFT_BAD_RSN_CD'].isin(top2_codes)]
+                   .groupby(['AFT_BAD_RSN_CD', 'EQP_NM'], dropna=False, observed=True)['LOSS_QTY']
+                   .sum().reset_index()
+                   .sort_values('LOSS_QTY', ascending=False, kind='stable'))
+
+    for code in top2_codes:
+        proc_type = 'main공정' if any(k in str(code).upper() for k in main_keywords) else '이외공정'
+        grouped = grouped_all[grouped_all['AFT_BAD_RSN_CD'] == code]
 
         if grouped.empty:
             result.append(f" - {code} ({proc_type}): 장비 데이터 없음")
             continue
 
         sub_reason = f"{code} ({proc_type})"
+        eqps = [_unknown(eqp) for eqp in grouped['EQP_NM'].iloc[:2]]
+        losses = [int(qty) for qty in grouped['LOSS_QTY'].iloc[:2]]
 
-        equip_list = []
-        for _, row in grouped.iterrows():
-            eqp = row['EQP_NM'] if pd.notna(row['EQP_NM']) else 'Unknown'
-            loss = int(row['LOSS_QTY'])
-            equip_list.append(f"{eqp}: {loss}매")
         # 판단 문구
         if len(grouped) == 1:
-            eqp = grouped.iloc[0]['EQP_NM']
-            loss = int(grouped.iloc[0]['LOSS_QTY'])
-            eqp_str = eqp if pd.notna(eqp) else 'Unknown'
-            final_line = f"{sub_reason} : {eqp_str}: {loss}매 → {eqp_str} 장비에 완전한 몰림성 (1개 장비)"
-            result.append(final_line)
+            result.append(f"{sub_reason} : {eqps[0]}: {losses[0]}매 → {eqps[0]} 장비에 완전한 몰림성 (1개 장비)")
             continue
 
         # 상위 2개 장비 비교
-        top1 = grouped.iloc[0]
-        top2 = grouped.iloc[1]
-        diff = int(top1['LOSS_QTY'] - top2['LOSS_QTY'])
-
-        top1_eqp = top1['EQP_NM'] if pd.notna(top1['EQP_NM']) else 'Unknown'
-        top2_eqp = top2['EQP_NM'] if pd.notna(top2['EQP_NM']) else 'Unknown'
-
-        details_str = f"{top1_eqp}: {int(top1['LOSS_QTY'])}매, {top2_eqp}: {int(top2['LOSS_QTY'])}매"
+        diff = int(grouped['LOSS_QTY'].iloc[0] - grouped['LOSS_QTY'].iloc[1])
+        details_str = f"{eqps[0]}: {losses[0]}매, {eqps[1]}: {losses[1]}매"
 
         if diff >= 10:
-            judgment = f" → {top1_eqp} 장비에 GR보증 존재 ({diff}매 차이)"
+            judgment = f" → {eqps[0]} 장비에 GR보증 존재 ({diff}매 차이)"
         else:
             judgment = f" → 몰림성 판단 어려움 ({diff}매 차이)"
 
-        final_line = f"{sub_reason} : {details_str}{judgment}"
-        result.append(final_line)
+        result.append(f"{sub_reason} : {details_str}{judgment}")
 
     if len(result) == 1:
         result.append("분석 결과 없음")
@@ -298,50 +273,20 @@ def analyze_broken(df_lot):
     return result
 
 
-def analyze_nano(df_wafer):
-    """
-    NANO 불량 분석 통합 함수:
-    1) 대량불량 (LOSS_QTY ≥ 100): 설비, 날짜 포함 문장 생성
-    2) 소량 반복 불량 (LOSS_QTY < 100): AFT_BAD_RSN_CD 기준 상위 3개 중, 각각 상위 3개 BLK_ID 추출
-    입력: df_wafer (DATA_WAF_3210_wafering_300 결과)
-    """
-    df_wafer = df_wafer[df_wafer['REJ_GROUP'] == 'NANO'].copy()
-    df_wafer = df_wafer[df_wafer['GRADE_CS'] == 'Prime']
-
-    if df_wafer.empty:
+def _nano(df):
+    if df.empty:
         return ["[NANO 분석] 데이터 없음"]
-    df_wafer = safe_convert_loss_qty(df_wafer, 'LOSS_QTY')
-
     result_lines = ["[NANO 분석]"]
 
     # 날짜 포맷 변경: YYYYMMDDHHMMSS → M/D
-    def format_date(val):
-        try:
-            val_str = str(val)
-            if len(val_str) >= 8 and val_str[:8].isdigit():
-                month = str(int(val_str[4:6]))
-                day = str(int(val_str[6:8]))
-                return f"{month}/{day}"
-            else:
-                return "Unknown"
-        except:
-            return "Unknown"
-
-    df_wafer['REG_DTTM_3200_FMT'] = df_wafer['REG_DTTM_300_WF_3200'].apply(format_date)
-
-    # 공통 그룹 컬럼 정의
-    group_cols = ['AFT_BAD_RSN_CD', 'BLK_ID', 'EQP_NM_300_WF_3200', 'REG_DTTM_3200_FMT']
-    grouped = df_wafer.groupby(group_cols, dropna=False)['LOSS_QTY'].sum().reset_index()
+    df = df.assign(REG_DTTM_3200_FMT=format_md(df['REG_DTTM_300_WF_3200']))
 
     # 대량불량: LOSS_QTY ≥ 100
-    large_defects = grouped[grouped['LOSS_QTY'] >= 100].copy()
-    for _, row in large_defects.iterrows():
-        line = f"{row['AFT_BAD_RSN_CD']} {row['BLK_ID']}의 {int(row['LOSS_QTY'])}매 ({row['EQP_NM_300_WF_3200']} {row['REG_DTTM_3200_FMT']})"
-        result_lines.append(line)
+    result_lines += _large_defect_lines(df, 'EQP_NM_300_WF_3200', 'REG_DTTM_3200_FMT')
 
     # 소량 반복 불량: LOSS_QTY < 100
     minor_group_cols = ['AFT_BAD_RSN_CD', 'BLK_ID', 'PRODUCT_TYPE', 'GRADE_CS']  #PRODUCT_TYPE CUST_SITE_NM
-    grouped_minor = df_wafer[df_wafer['LOSS_QTY'] < 100].groupby(minor_group_cols, dropna=False)['LOSS_QTY'].sum().reset_index()
+    grouped_minor = df[df['LOSS_QTY'] < 100].groupby(minor_group_cols, dropna=False, observed=True)['LOSS_QTY'].sum().reset_index()
 
     if grouped_minor.empty:
         if len(result_lines) == 1:
@@ -349,113 +294,49 @@ def analyze_nano(df_wafer):
         return result_lines
 
     # AFT_BAD_RSN_CD 기준 LOSS_QTY 합계 → 상위 3개 코드 추출
-    top3_codes = (
-        grouped_minor.groupby('AFT_BAD_RSN_CD')['LOSS_QTY']
-        .sum()
-        .sort_values(ascending=False)
-        .head(3)
-        .index.tolist()
-    )
-
+    top3_codes = _top_keys(grouped_minor, 'AFT_BAD_RSN_CD', 3)
     if not top3_codes:
         if len(result_lines) == 1:
             result_lines.append("소량 반복 불량 없음")
         return result_lines
 
-    # 각 상위 코드별로 상위 3개 BLK_ID 추출
+    # 각 상위 코드별 상위 3개 BLK_ID
+    top = _top_n(grouped_minor[grouped_minor['AFT_BAD_RSN_CD'].isin(top3_codes)], 'AFT_BAD_RSN_CD', 3)
     for code in top3_codes:
-        df_code = grouped_minor[grouped_minor['AFT_BAD_RSN_CD'] == code].copy()
-        # BLK_ID 기준으로 PRODUCT_TYPE, GRADE_CS, LOSS_QTY 합계
-        grouped_code = (df_code.groupby(['BLK_ID', 'PRODUCT_TYPE', 'GRADE_CS'], dropna=False)['LOSS_QTY']
-                        .sum().reset_index())
-        top3_blks = grouped_code.nlargest(3, 'LOSS_QTY')
-
-        # 각 항목 포맷팅
-        parts = []
-        for _, row in top3_blks.iterrows():
-            cust = row['PRODUCT_TYPE'] if pd.notna(row['PRODUCT_TYPE']) else 'Unknown'
-            grade = row['GRADE_CS'] if pd.notna(row['GRADE_CS']) else 'Unknown'
-            qty = int(row['LOSS_QTY'])
-            parts.append(f"{cust} {grade} {row['BLK_ID']} {qty}매")
-
+        rows = top[top['AFT_BAD_RSN_CD'] == code]
+        parts = [f"{_unknown(cust)} {_unknown(grade)} {blk} {int(qty)}매"
+                 for cust, grade, blk, qty in zip(rows['PRODUCT_TYPE'], rows['GRADE_CS'], rows['BLK_ID'], rows['LOSS_QTY'])]
         if parts:
-            line = f"- {code} 열위 Lot - " + ", ".join(parts)
-            result_lines.append(line)
+            result_lines.append(f"- {code} 열위 Lot - " + ", ".join(parts))
 
     if len(result_lines) == 1:
         result_lines.append("분석 결과 없음")
 
     return result_lines
 
-def analyze_pit(df_wafer):
-    """
-    PIT 불량 분석 함수:
-    1) AFT_BAD_RSN_CD 기준 LOSS_QTY 합계 상위 3개 코드 추출
-    2) 각 코드별 EQP_NM_3670 기준 LOSS_QTY 합계 상위 3개 장비 추출
-    3) 날짜 형식: REG_DTTM_3670 → M/D 변환 (옵션 포함)
-    입력: df_wafer (DATA_WAF_3210_wafering_300 결과)
-    """
-    df_wafer = df_wafer[df_wafer['REJ_GROUP'] == 'PIT'].copy()
-    df_wafer = df_wafer[df_wafer['GRADE_CS'] == 'Prime']
 
-    if df_wafer.empty:
+def _pit(df):
+    if df.empty:
         return ["[PIT 분석] 데이터 없음"]
-
-    df_wafer = safe_convert_loss_qty(df_wafer, 'LOSS_QTY')
-
     result_lines = ["[PIT 분석]"]
 
-    # 날짜 포맷 변경: YYYYMMDDHHMMSS → M/D
-    def format_date(val):
-        try:
-            val_str = str(val)
-            if len(val_str) >= 8 and val_str[:8].isdigit():
-                month = str(int(val_str[4:6]))
-                day = str(int(val_str[6:8]))
-                return f"{month}/{day}"
-            else:
-                return "Unknown"
-        except:
-            return "Unknown"
-
-    df_wafer['REG_DTTM_3670_FMT'] = df_wafer['REG_DTTM_300_WF_3670'].apply(format_date)
-
     # AFT_BAD_RSN_CD 기준 LOSS_QTY 합계 → 상위 3개 코드 추출
-    top3_codes = (
-        df_wafer.groupby('AFT_BAD_RSN_CD')['LOSS_QTY']
-        .sum()
-        .sort_values(ascending=False)
-        .head(3)
-        .index.tolist()
-    )
-
+    top3_codes = _top_keys(df, 'AFT_BAD_RSN_CD', 3)
     if not top3_codes:
         result_lines.append("상위 불량 코드 없음")
         return result_lines
 
-    # 각 상위 코드별 분석
-    for code in top3_codes:
-        df_code = df_wafer[df_wafer['AFT_BAD_RSN_CD'] == code].copy()
-
-        # EQP_NM_3670 기준 집계
-        grouped = (
-            df_code.groupby(['EQP_NM_300_WF_3670', 'REG_DTTM_3670_FMT'], dropna=False)['LOSS_QTY']
-            .sum()
-            .reset_index()
-            .sort_values('LOSS_QTY', ascending=False)
-            .head(3)  # 상위 3개 장비 + 날짜 조합
-        )
+    # 코드별 (EQP_NM_3670, 날짜) 합계 상위 3개 (1회 groupby, 날짜 포맷은 대상 코드 행에만)
+    df = df[df['AFT_BAD_RSN_CD'].isin(top3_codes)]
+    df = df.assign(REG_DTTM_3670_FMT=format_md(df['REG_DTTM_300_WF_3670']))
+    grouped = (df.groupby(['AFT_BAD_RSN_CD', 'EQP_NM_300_WF_3670', 'REG_DTTM_3670_FMT'], dropna=False, observed=True)['LOSS_QTY']
+               .sum().reset_index())
+    top = _top_n(grouped, 'AFT_BAD_RSN_CD', 3)
 
-        if grouped.empty:
-            continue
-
-        # 결과 추가
-        for _, row in grouped.iterrows():
-            eqp = row['EQP_NM_300_WF_3670'] if pd.notna(row['EQP_NM_300_WF_3670']) else 'Unknown'
-            qty = int(row['LOSS_QTY'])
-            date = row['REG_DTTM_3670_FMT']
-            line = f"{code} 열위 장비 - {eqp} {qty}매 ({date})"
-            result_lines.append(line)
+    for code in top3_codes:
+        rows = top[top['AFT_BAD_RSN_CD'] == code]
+        result_lines += [f"{code} 열위 장비 - {_unknown(eqp)} {int(qty)}매 ({day})"
+                         for eqp, qty, day in zip(rows['EQP_NM_300_WF_3670'], rows['LOSS_QTY'], rows['REG_DTTM_3670_FMT'])]
 
     if len(result_lines) == 1:
         result_lines.append("분석 결과 없음")
@@ -463,59 +344,30 @@ def analyze_pit(df_wafer):
     return result_lines
 
 
-def analyze_scratch(df_wafer):
-    """
-    SCRATCH 불량 분석 함수:
-    1) AFT_BAD_RSN_CD 기준 LOSS_QTY 합계 상위 3개 코드 추출
-    2) 각 코드별로 EQP_NM_6100 / EQP_NM_3670 공정에서의 최다 발생 장비 및 날짜 분석
-    3) 동일 수량일 경우 장비 병기 출력 (예: A장비 M/D / B장비 M/D)
-    입력: df_wafer (DATA_WAF_3210_wafering_300 결과)
-    """
-    df_wafer = df_wafer[df_wafer['REJ_GROUP'] == 'SCRATCH'].copy()
-    df_wafer = df_wafer[df_wafer['GRADE_CS'] == 'Prime']
-
-    if df_wafer.empty:
+def _scratch(df):
+    if df.empty:
         return ["[SCRATCH 분석] 데이터 없음"]
-
-    df_wafer = safe_convert_loss_qty(df_wafer, 'LOSS_QTY')
-    df_wafer = add_mid_group(df_wafer, 'SCRATCH')  # MID_GROUP 생성
-
     result = ["[SCRATCH 분석]"]
-    mid_results = {}
+    mid_names = ['Front Side', 'Back Side']
+    df = df[df['MID_GROUP'].isin(mid_names)]
 
-    # 분석 대상 공정 정의
-    process_list = [
-        {'eqp_col': 'EQP_NM_300_WF_6100', 'time_col': 'REG_DTTM_300_WF_6100'},
-        {'eqp_col': 'EQP_NM_300_WF_3670', 'time_col': 'REG_DTTM_300_WF_3670'}
-    ]
+    # 분석 대상 공정 (장비 컬럼) → MID_GROUP × 장비 합계 1회 groupby
+    eqp_cols = ['EQP_NM_300_WF_6100', 'EQP_NM_300_WF_3670']
+    totals = df.groupby('MID_GROUP', observed=True)['LOSS_QTY'].sum()
+    by_eqp = {eqp_col: df.groupby(['MID_GROUP', eqp_col], observed=True)['LOSS_QTY'].sum().reset_index()
+              for eqp_col in eqp_cols}
 
-    for mid_name in ['Front Side', 'Back Side']:
-        df_mid = df_wafer[df_wafer['MID_GROUP'] == mid_name].copy()
-        if df_mid.empty:
+    mid_results = {}
+    for mid_name in mid_names:
+        if mid_name not in totals.index:
             continue
-
-        total_qty = int(df_mid['LOSS_QTY'].sum())
+        total_qty = int(totals[mid_name])
         details = []
-
-        for proc in process_list:
-            eqp_col = proc['eqp_col']
-            time_col = proc['time_col']
-
+        for eqp_col in eqp_cols:
             # 컬럼명 끝 4글자 → 공정 코드
             proc_code = eqp_col[-4:]
-
-            # 장비 데이터 존재 여부 확인
-            df_proc = df_mid[df_mid[eqp_col].notna()].copy()
-            if df_proc.empty:
-                continue
-
-            # 장비별 합계
-            grouped = df_proc.groupby(eqp_col)['LOSS_QTY'].sum().reset_index()
-            for _, row in grouped.iterrows():
-                eqp = row[eqp_col]
-                qty = int(row['LOSS_QTY'])
-                eqp_str = eqp if pd.notna(eqp) else 'Unknown'
-                details.append(f"{proc_code} - {eqp_str} {qty}매")
+            rows = by_eqp[eqp_col][by_eqp[eqp_col]['MID_GROUP'] == mid_name]
+            details += [f"{proc_code} - {_unknown(eqp)} {int(qty)}매" for eqp, qty in zip(rows[eqp_col], rows['LOSS_QTY'])]
 
         # 결과 포맷팅
         if len(details) > 5:
@@ -536,297 +388,186 @@ def analyze_scratch(df_wafer):
     return result
 
 
-
-
-def analyze_edge(df_wafer):
-    """
-    EDGE 불량 분석 함수:
-    1) EG1차(3335), EG2차(3696), EBIS측정(7000) 공정별 장비 기준 LOSS_QTY 집계
-    2) 각 공정별 상위 2개 장비 비교 → 10매 이상 차이 시 "몰림 발생" 판단
-    3) LOSS_QTY 타입 변환, NaN 처리, 인덱스 안전 접근 보장
-    입력: df_wafer (DATA_WAF_3210_wafering_300 결과)
-    """
-    # REJ_GROUP 필터링
-    df_wafer = df_wafer[df_wafer['REJ_GROUP'] == 'EDGE'].copy()
-    df_wafer = df_wafer[df_wafer['GRADE_CS'] == 'Prime']
-
-    if df_wafer.empty:
+def _edge(df):
+    if df.empty:
         return ["[EDGE 분석] 데이터 없음"]
-
-    df_wafer = safe_convert_loss_qty(df_wafer, 'LOSS_QTY')
-
     result = ["[EDGE 분석]"]
 
     # 공정 정보 정의
     process_info = [
-        {'eqp_col': 'EQP_NM_300_WF_3335', 'time_col': 'REG_DTTM_300_WF_3335', 'label': 'EG1차'},
-        {'eqp_col': 'EQP_NM_300_WF_3696', 'time_col': 'REG_DTTM_300_WF_3696', 'label': 'EG2차'},
-        {'eqp_col': 'EQP_NM_300_WF_7000', 'time_col': 'REG_DTTM_300_WF_7000', 'label': 'EBIS측정'},
+        {'eqp_col': 'EQP_NM_300_WF_3335', 'label': 'EG1차'},
+        {'eqp_col': 'EQP_NM_300_WF_3696', 'label': 'EG2차'},
+        {'eqp_col': 'EQP_NM_300_WF_7000', 'label': 'EBIS측정'},
     ]
 
     for proc in process_info:
         eqp_col = proc['eqp_col']
-        time_col = proc['time_col']
         label = proc['label']
 
         # 장비 컬럼 존재 여부 체크
-        if eqp_col not in df_wafer.columns:
+        if eqp_col not in df.columns:
             result.append(f"{label} : 장비 컬럼 없음")
             continue
 
-        # 장비명이 NaN이 아닌 데이터만 필터링
-        df_proc = df_wafer[df_wafer[eqp_col].notna()].copy()
-
-        if df_proc.empty:
-            result.append(f"{label} : 데이터 없음")
-            continue
-
-        # 장비별 LOSS_QTY 합계
+        # 장비별 LOSS_QTY 합계 (장비명 NaN 제외)
         grouped = (
-            df_proc.groupby(eqp_col, dropna=False)['LOSS_QTY']
+            df.groupby(eqp_col, observed=True)['LOSS_QTY']
             .sum()
-            .reset_index()
-            .sort_values('LOSS_QTY', ascending=False)
-            .reset_index(drop=True)
+            .sort_values(ascending=False, kind='stable')
         )
+        if grouped.empty:
+            result.append(f"{label} : 데이터 없음")
+            continue
+
+        eqps = grouped.index.tolist()
+        qtys = [int(qty) for qty in grouped.to_numpy()[:2]]
 
         # 장비 1개만 존재할 경우
         if len(grouped) == 1:
-            eqp = grouped.iloc[0][eqp_col]
-            qty = int(grouped.iloc[0]['LOSS_QTY'])
-            eqp_str = eqp if pd.notna(eqp) else "Unknown"
-            result.append(f"{label} : 단일 장비 - {eqp_str} {qty}매")
+            result.append(f"{label} : 단일 장비 - {eqps[0]} {qtys[0]}매")
             continue
 
         # 장비 2개 이상: 상위 2개 비교
-        top1 = grouped.iloc[0]
-        top2 = grouped.iloc[1]
-        diff = int(top1['LOSS_QTY'] - top2['LOSS_QTY'])
-
-        top1_eqp = top1[eqp_col] if pd.notna(top1[eqp_col]) else "Unknown"
-        top2_eqp = top2[eqp_col] if pd.notna(top2[eqp_col]) else "Unknown"
-
+        diff = int(grouped.iloc[0] - grouped.iloc[1])
         if diff >= 10:  # >= 10: 임계값 포함
-            result.append(f"{label} : {top1_eqp} 장비 몰림 발생 - {int(top1['LOSS_QTY'])}매 (2위 대비 +{diff}매)")
+            result.append(f"{label} : {eqps[0]} 장비 몰림 발생 - {qtys[0]}매 (2위 대비 +{diff}매)")
         else:
-            result.append(f"{label} : 몰림 없음 - {top1_eqp} {int(top1['LOSS_QTY'])}매 / {top2_eqp} {int(top2['LOSS_QTY'])}매")
+            result.append(f"{label} : 몰림 없음 - {eqps[0]} {qtys[0]}매 / {eqps[1]} {qtys[1]}매")
 
     if len(result) == 1:
         result.append("분석 결과 없음")
 
     return result
 
-def analyze_chip(df_wafer):
-    """
-    CHIP 불량 분석 함수:
-    1) AFT_BAD_RSN_CD 기준 LOSS_QTY 합계 상위 1개 추출
-    2) 분석 대상 불량 유형인지 확인 (defect_mapping 기준)
-    3) 해당 유형별 장비 기준 상위 1, 2위 출력 (몰림성 판단 제외)
-    입력: df_wafer (DATA_WAF_3210_wafering_300 결과)
-    """
-    df_wafer = df_wafer[df_wafer['REJ_GROUP'] == 'CHIP'].copy()
-    df_wafer = df_wafer[df_wafer['GRADE_CS'] == 'Prime']
 
-    if df_wafer.empty:
+def _chip(df):
+    if df.empty:
         return ["[CHIP 분석] 데이터 없음"]
-
-    df_wafer = safe_convert_loss_qty(df_wafer, 'LOSS_QTY')
-
     result = ["[CHIP 분석]"]
 
     # STEP 1: AFT_BAD_RSN_CD별 LOSS_QTY 합계 → 상위 1개
     defect_sums = (
-        df_wafer.groupby('AFT_BAD_RSN_CD', dropna=False)['LOSS_QTY']
+        df.groupby('AFT_BAD_RSN_CD', dropna=False, observed=True)['LOSS_QTY']
         .sum()
-        .reset_index()
-        .sort_values('LOSS_QTY', ascending=False)
-        .reset_index(drop=True)
+        .sort_values(ascending=False, kind='stable')
     )
-
     if defect_sums.empty:
         result.append("분석 대상 불량 없음")
         return result
 
-    top_defect = defect_sums.iloc[0]['AFT_BAD_RSN_CD']
+    top_defect = defect_sums.index[0]
     result.append(f"최다 CHIP 불량 유형: {top_defect}")
 
     # STEP 2: 분석 대상 불량 유형 매핑
     defect_mapping = {
-        'EDGE_CHIP': ['EQP_NM_300_WF_3335', 'REG_DTTM_300_WF_3335', 'EQP_NM_300_WF_3696', 'REG_DTTM_300_WF_3696'],
-        'CHIP-LAP': ['EQP_NM_300_WF_3670', 'REG_DTTM_300_WF_3670'],
-        'CHIP-EG1AF': ['EQP_NM_300_WF_3335', 'REG_DTTM_300_WF_3335', 'EQP_NM_300_WF_3696', 'REG_DTTM_300_WF_3696'],
-        'CHIP-EG1BF': ['EQP_NM_300_WF_3300', 'REG_DTTM_300_WF_3300'],
+        'EDGE_CHIP': ['EQP_NM_300_WF_3335', 'EQP_NM_300_WF_3696'],
+        'CHIP-LAP': ['EQP_NM_300_WF_3670'],
+        'CHIP-EG1AF': ['EQP_NM_300_WF_3335', 'EQP_NM_300_WF_3696'],
+        'CHIP-EG1BF': ['EQP_NM_300_WF_3300'],
     }
 
     if top_defect not in defect_mapping:
         result.append(f"분석 제외: '{top_defect}'는 분석 대상 불량 유형이 아님")
         return result
 
-    df_sub = df_wafer[df_wafer['AFT_BAD_RSN_CD'] == top_defect].copy()
+    df_sub = df[df['AFT_BAD_RSN_CD'] == top_defect]
     eqp_cols = defect_mapping[top_defect]
 
     # CHIP-EG1AF: 주 장비 없을 시 fallback
     if top_defect == 'CHIP-EG1AF':
         primary_eqp = 'EQP_NM_300_WF_3335'
         if primary_eqp not in df_sub.columns or df_sub[primary_eqp].isna().all():
-            eqp_cols = ['EQP_NM_300_WF_3300', 'REG_DTTM_300_WF_3300']
+            eqp_cols = ['EQP_NM_300_WF_3300']
             result.append("→ 주 장비 정보 없어 EQP_NM_3300으로 대체")
 
     result.append(f"세부불량: {top_defect}")
 
-    # STEP 3: 각 장비 컬럼별 분석 (2개씩 묶음)
-    for i in range(0, len(eqp_cols), 2):
-        eqp_col = eqp_cols[i]
-        time_col = eqp_cols[i + 1] if i + 1 < len(eqp_cols) else None
-
+    # STEP 3: 각 장비 컬럼별 상위 1, 2위
+    for eqp_col in eqp_cols:
         # 장비 컬럼 존재 여부 체크
         if eqp_col not in df_sub.columns:
             result.append(f"{eqp_col}: 컬럼 없음")
             continue
 
-        # 장비명이 NaN이 아닌 데이터만
-        df_eqp = df_sub[df_sub[eqp_col].notna()].copy()
-        if df_eqp.empty:
-            result.append(f"{eqp_col}: 데이터 없음")
-            continue
-
-        # 장비별 LOSS_QTY 합계
+        # 장비별 LOSS_QTY 합계 (장비명 NaN 제외)
         grouped = (
-            df_eqp.groupby(eqp_col, dropna=False)['LOSS_QTY']
+            df_sub.groupby(eqp_col, observed=True)['LOSS_QTY']
             .sum()
-            .reset_index()
-            .sort_values('LOSS_QTY', ascending=False)
-            .reset_index(drop=True)
+            .sort_values(ascending=False, kind='stable')
         )
+        if grouped.empty:
+            result.append(f"{eqp_col}: 데이터 없음")
+            continue
 
         result.append(f"{eqp_col} 장비별 불량 상위")
-
-        # 1위
-        top1 = grouped.iloc[0]
-        top1_eqp = top1[eqp_col] if pd.notna(top1[eqp_col]) else "Unknown"
-        result.append(f"1위: {top1_eqp} ({int(top1['LOSS_QTY'])}매)")
-
-        # 2위
-        if len(grouped) >= 2:
-            top2 = grouped.iloc[1]
-            top2_eqp = top2[eqp_col] if pd.notna(top2[eqp_col]) else "Unknown"
-            result.append(f"2위: {top2_eqp} ({int(top2['LOSS_QTY'])}매)")
+        for rank, (eqp, qty) in enumerate(grouped.iloc[:2].items(), start=1):
+            result.append(f"{rank}위: {eqp} ({int(qty)}매)")
 
     return result
 
 
-def analyze_others(df_lot, rej_group):
-    """
-    기타 불량 그룹 공통 분석 함수
-    - REJ_GROUP에 따라 AFT_BAD_RSN_CD별 LOSS_QTY 합계 상위 1개 출력
-    입력:
-        df_lot: 원본 데이터
-        rej_group: REJ_GROUP 값 (예: 'HUMAN_ERR', 'VISUAL', ...)
-        group_label_kr: 한글 그룹명 (예: '사람오류', '시각불량', ...)
-    """
-    df_group = df_lot[df_lot['REJ_GROUP'] == rej_group].copy()
-    df_group = df_group[df_group['GRD_CD_NM_CS'] == 'Prime']
-
-    if df_group.empty:
+def _others(df, rej_group):
+    if df.empty:
         return [f"[{rej_group} 분석] 데이터 없음"]
 
-    df_group = safe_convert_loss_qty(df_group, 'LOSS_QTY')
-
     # AFT_BAD_RSN_CD별 합계 → 상위 1개
     defect_summary = (
-        df_group.groupby('AFT_BAD_RSN_CD', dropna=False)['LOSS_QTY']
+        df.groupby('AFT_BAD_RSN_CD', dropna=False, observed=True)['LOSS_QTY']
         .sum()
-        .reset_index()
-        .sort_values('LOSS_QTY', ascending=False)
-        .reset_index(drop=True)
+        .sort_values(ascending=False, kind='stable')
     )
-
     if defect_summary.empty:
         return [f"[{rej_group} 분석] 분석 대상 없음"]
 
-    top_row = defect_summary.iloc[0]
-    code = top_row['AFT_BAD_RSN_CD']
-    qty = int(top_row['LOSS_QTY'])
-    code_str = code if pd.notna(code) else "Unknown"
+    code = defect_summary.index[0]
+    qty = int(defect_summary.iloc[0])
+    return [f"[{rej_group} 분석]", f"{_unknown(code)} {qty}장 등 처리"]
 
-    return [f"[{rej_group} 분석]", f"{code_str} {qty}장 등 처리"]
-
-def analyze_HUMAN_ERR(df_lot):
-    return analyze_others(df_lot, 'HUMAN_ERR')
 
-def analyze_VISUAL(df_lot):
-    return analyze_others(df_lot, 'VISUAL')
-
-def analyze_NOSALE(df_lot):
-    return analyze_others(df_lot, 'NOSALE')
-
-def analyze_OTHER(df_lot):
-    return analyze_others(df_lot, 'OTHER')
-
-def analyze_GR(df_lot):  # 이름 수정: GR → GR_보증
-    return analyze_others(df_lot, 'GR_보증')
-
-
-# 1.Particle 상세분석
-# 1) 기본 비율 분석(FS, RESC, HG 비율)
-def analyze_particle_ratios(df_lot, ref_value=1.8, threshold=0.5):
+def _particle_ratios(denominator_data, df, ref_value=1.8, threshold=0.5):
     """
-    FS/RESC/HG 불량률 및 반영율을 'IN_QTY 전체 합계'를 기준으로 계산하며,
-    RESC 영향 여부도 함께 판단하여 결과 문자열로 반환.
+    FS/RESC/HG 불량률 및 반영율 (분모: Prime 분모 IN_QTY 합계)
+    denominator_data: REJ_GROUP == '분모' Prime slice / df: PARTICLE Prime slice
     """
-    df_lot = df_lot[df_lot['GRD_CD_NM_CS'] == 'Prime']
-    denominator_data = df_lot[df_lot['REJ_GROUP'] == '분모']
-    denominator_data = safe_convert_loss_qty(denominator_data, 'IN_QTY')
-    total_in_qty = denominator_data['IN_QTY'].sum()
-
-    df = df_lot[df_lot['REJ_GROUP'] == 'PARTICLE'].copy()
-    df = df[df['GRD_CD_NM_CS'] == 'Prime']
-    df = safe_convert_loss_qty(df, 'LOSS_QTY')
-    result = []
+    # 분모 행 없음 → 합계 0.0 (numpy 실수 나눗셈: 반영율 nan/inf, 예외 없음)
+    total_in_qty = np.float64(pd.to_numeric(denominator_data['IN_QTY'], errors='coerce').sum())
     base_dt = df['BASE_DT'].iloc[0]
 
+    # (CRET_CD, 등급) 합계 1회 groupby
+    loss = df.groupby(['CRET_CD', 'GRD_CD_NM_CS'], observed=True)['LOSS_QTY'].sum()
+
+    result = []
     for cret in ['FS', 'RESC', 'HG']:
         cret_total_loss = 0 #cret별 total loss_qty 저장용
         for grade in ['Prime', 'Normal']:
-            # 🔸 분자: 해당 조건의 LOSS_QTY
-            loss_qty = df[
-                (df['CRET_CD'] == cret) &
-                (df['GRD_CD_NM_CS'] == grade) &
-                (df['REJ_GROUP'] == 'PARTICLE')
-            ]['LOSS_QTY'].sum()
-
+            loss_qty = loss.get((cret, grade), 0)
             cret_total_loss += loss_qty
-
             rate = (loss_qty / total_in_qty * 100) if total_in_qty != 0 else 0.00
-            rate_rounded = round(rate, 2)  # 음수도 유지
-
             result.append({
                 'BASE_DT': base_dt,
                 'CRET_CD': cret,
                 'GRADE_CS': grade,
                 'LOSS_QTY': loss_qty,
                 'TOTAL_IN_QTY': total_in_qty,
-                'RATE(%)': rate_rounded
+                'RATE(%)': round(rate, 2)  # 음수도 유지
             })
-    
+
         # cret별 total행 추가
         rate_total = (cret_total_loss / total_in_qty * 100)
-        rate_total_rounded = round(rate_total, 2)
-
         result.append({
             'BASE_DT': base_dt,
             'CRET_CD': cret,
             'GRADE_CS': 'Total',
             'LOSS_QTY': cret_total_loss,
             'TOTAL_IN_QTY': total_in_qty,
-            'RATE(%)': rate_total_rounded
+            'RATE(%)': round(rate_total, 2)
         })
 
     df_result = pd.DataFrame(result)
 
     # 🔹 RESC Total 영향 판단
     resc_total_row = df_result[
-        (df_result['CRET_CD'] == 'RESC') & 
+        (df_result['CRET_CD'] == 'RESC') &
         (df_result['GRADE_CS'] == 'Total')
     ]
 
@@ -848,96 +589,51 @@ def analyze_particle_ratios(df_lot, ref_value=1.8, threshold=0.5):
 
     return df_result, rc_judgement
 
-# 2) particle 상세분석
-def create_particle_table(df_wafer):
+
+def _particle_table(df_wafer):
     """
-    Particle wafer 단위 데이터에서 주요 컬럼 기준으로 LOSS_QTY 합계를 피벗 테이블 형태로 변환
+    PARTICLE Prime wafer slice → 주요 컬럼 기준 LOSS_QTY 합계 후 양품 복귀(매칭) 제외, 코드별 최다 제품 문장
     """
     print(f"df_wafer 컬럼 목록: {list(df_wafer.columns)}")
     index_cols =['BASE_DT','WAF_ID','WAF_SEQ','DIV_CD','FAC_ID','CRET_CD','PROD_ID','IGOT_ID','BLK_ID','SUBLOT_ID','BEF_BAD_RSN_CD','AFT_BAD_RSN_CD','REJ_GROUP','PRODUCT_TYPE','GRADE_CS','GRADE_PS'] #PRODUCT_TYPE CUST_SITE_NM
 
     #pivot은 잘 안되서, groupby로 해결
-    df_wafer = df_wafer[df_wafer['REJ_GROUP'] == 'PARTICLE'].copy()
-    df_wafer = df_wafer[df_wafer['GRADE_CS'] == 'Prime']
-    df_grouped = df_wafer.groupby(index_cols, dropna=False)['LOSS_QTY'].sum().reset_index()
+    df_grouped = df_wafer.groupby(index_cols, dropna=False, observed=True)['LOSS_QTY'].sum().reset_index()
 
     #loss_qty별 구분
     df_grouped_plus = df_grouped[df_grouped['LOSS_QTY'] > 0].copy() #df_grouped[df_grouped['LOSS_QTY'] == 1].copy() 로 하면 데이터 일부 사라짐. 원인은 모르겠음.
-    df_grouped_minus = df_grouped[df_grouped['LOSS_QTY'] < 0].copy()
+    df_grouped_minus = df_grouped[df_grouped['LOSS_QTY'] < 0]
 
     df_grouped_plus['matching'] = (df_grouped_plus['WAF_SEQ'].astype(str) + df_grouped_plus['IGOT_ID'].astype(str) + df_grouped_plus['AFT_BAD_RSN_CD'].astype(str))
-    df_grouped_minus['matching'] = (df_grouped_minus['WAF_SEQ'].astype(str) + df_grouped_minus['IGOT_ID'].astype(str) + df_grouped_minus['BEF_BAD_RSN_CD'].astype(str))
-
-    df_grouped_minus['cat'] = 'Good' #loss_qty = -1인경우, cat(구분) 컬럼에 Good으로 입력
-    df_grouped_plus['cat'] = 'NAN' #우선 cat(구분)컬럼을 NAN으로 초기화
-
-    #매칭된 값이 존재하는 경우만 'Good'으로 설정
-    df_grouped_plus.loc[df_grouped_plus['matching'].isin(df_grouped_minus['matching']), 'cat'] = 'Good'
+    minus_matching = (df_grouped_minus['WAF_SEQ'].astype(str) + df_grouped_minus['IGOT_ID'].astype(str) + df_grouped_minus['BEF_BAD_RSN_CD'].astype(str))
 
-    # [수정] \\~ 제거 → 문자열 조건 직접 비교 (문제 없이 동작)
-    df_nan_particle = df_grouped_plus[df_grouped_plus['cat'] == 'NAN'].copy()  # 필터링
+    # 양품 복귀(LOSS_QTY < 0)와 매칭되지 않은 행만
+    df_nan_particle = df_grouped_plus[~df_grouped_plus['matching'].isin(minus_matching)]
 
-    top3_codes = (df_nan_particle.groupby('AFT_BAD_RSN_CD')['LOSS_QTY'].sum().sort_values(ascending=False).head(3).index.tolist()) # AFT_BAD_RSN_CD별 LOSS_QTY 합계 상위 3개 코드 추출
-
-    #결과 list 작성
-    result_descriptions = []
-
-    for code in top3_codes:
-        df_code = df_nan_particle[df_nan_particle['AFT_BAD_RSN_CD'] == code]
+    # AFT_BAD_RSN_CD별 LOSS_QTY 합계 상위 3개 코드 → 코드별 (제품, 등급) 최다 1개
+    top3_codes = _top_keys(df_nan_particle, 'AFT_BAD_RSN_CD', 3)
+    grouped = (df_nan_particle[df_nan_particle['AFT_BAD_RSN_CD'].isin(top3_codes)]
+               .groupby(['AFT_BAD_RSN_CD', 'PRODUCT_TYPE', 'GRADE_CS', 'GRADE_PS'], observed=True)['LOSS_QTY']
+               .sum().reset_index())
+    top = _top_n(grouped, 'AFT_BAD_RSN_CD', 1)
+    top = top.assign(GRADE=_grade_label(top['GRADE_CS'], top['GRADE_PS']))
 
-        #그룹화하여 LOSS_QTY 합계 계산
-        grouped = (df_code.groupby(['PRODUCT_TYPE', 'GRADE_CS', 'GRADE_PS'])['LOSS_QTY'].sum().reset_index().sort_values('LOSS_QTY', ascending=False)) #PRODUCT_TYPE CUST_SITE_NM
+    #결과 list 작성 (상위 코드 순서)
+    by_code = {code: f"{code} {cust} {grade} {int(qty)} 매"
+               for code, cust, grade, qty in zip(top['AFT_BAD_RSN_CD'], top['PRODUCT_TYPE'], top['GRADE'], top['LOSS_QTY'])}
+    return [by_code[code] for code in top3_codes if code in by_code]
 
-        #가장 많은 LOSS_QTY를 기록한 항목 선택
-        if not grouped.empty:
-            top_row = grouped.iloc[0]
-            cust = top_row['PRODUCT_TYPE']  #PRODUCT_TYPE CUST_SITE_NM
-            grade_cs = top_row['GRADE_CS']
-            grade_ps = top_row['GRADE_PS']
-            qty = int(top_row['LOSS_QTY']) #수량은 정수로 표현
 
-            #grade 재분류
-            if grade_cs == 'Prime' and grade_ps == 'Prime':
-                final_grade = 'Prime'
-            elif grade_cs == 'Normal' and grade_ps == 'Normal':
-                final_grade = 'Normal'
-            elif grade_cs == 'Normal' and grade_ps == 'Prime':
-                final_grade = 'Premium'
-            else:
-                final_grade = grade_cs  
-
-            result_descriptions.append(f"{code} {cust} {final_grade} {qty} 매")
-
-    return result_descriptions
-
-# particle완성
-def analyze_particle(df_lot, df_wafer):
+def _particle(denominator_data, df_lot, df_wafer):
     result = []
     # 1) RC 판단 비율 분석
-    df_result, rc_judgement = analyze_particle_ratios(df_lot)
+    df_result, rc_judgement = _particle_ratios(denominator_data, df_lot)
 
-    # RESC Total 값 추출 (safe_get 없이 직접 처리)
-    resc_total_row = df_result[
-        (df_result['CRET_CD'] == 'RESC') &
-        (df_result['GRADE_CS'] == 'Total')
-    ]
-    if not resc_total_row.empty:
-        total_rate = resc_total_row['RATE(%)'].values[0]
-    else:
-        total_rate = 0.00
-
-    # Prime, Normal 개별 추출
-    prime_row = df_result[
-        (df_result['CRET_CD'] == 'RESC') &
-        (df_result['GRADE_CS'] == 'Prime')
-    ]
-    normal_row = df_result[
-        (df_result['CRET_CD'] == 'RESC') &
-        (df_result['GRADE_CS'] == 'Normal')
-    ]
-
-    prime_rate = prime_row['RATE(%)'].values[0] if not prime_row.empty else 0.00
-    normal_rate = normal_row['RATE(%)'].values[0] if not normal_row.empty else 0.00
+    # RESC Prime / Normal / Total 반영율
+    resc = df_result[df_result['CRET_CD'] == 'RESC'].set_index('GRADE_CS')['RATE(%)']
+    total_rate = resc.get('Total', 0.00)
+    prime_rate = resc.get('Prime', 0.00)
+    normal_rate = resc.get('Normal', 0.00)
 
     # 출력 (FS, HG는 분석만, 출력은 RESC만)
     result.append("[PARTICLE 분석]")
@@ -950,7 +646,7 @@ def analyze_particle(df_lot, df_wafer):
 
     # 2) RC 영향 없을 때만 wafer 상세분석
     if rc_judgement == "R/C 영향 변동 아님 → 다른 요인 탐색 필요":
-        desc = create_particle_table(df_wafer)
+        desc = _particle_table(df_wafer)
         if desc:
             code_part = "코드별: " + ", ".join([d.split(' ', 1)[0] + " " + d.split(' ', 1)[1].rsplit(' ', 1)[0] + " 매" for d in desc])
             cust_part = "제품별: " + " / ".join([d.replace(' 매', '') for d in desc])
@@ -960,91 +656,402 @@ def analyze_particle(df_lot, df_wafer):
     return result
 
 
-def analyze_sample(df_lot):
-    """
-    SAMPLE 관련 AFT_BAD_RSN_CD 불량 유형 상세 분석
-    - MOM_SAMPLE, LOT_SMPL, SMPL, 기타 등 구분하여 로직 처리
-    - 상위 2개 코드만 분석 (LOSS_QTY 기준)
-    """
-    df_lot = df_lot[df_lot['REJ_GROUP'] == 'SAMPLE'].copy()
+def _sample(df):
     result = ["[SAMPLE 분석]"]
-
-    if df_lot.empty:
+    if df.empty:
         result.append("SAMPLE 불량 데이터 없음")
         return result
 
-    # 숫자형 변환
-    df_lot = safe_convert_loss_qty(df_lot, 'LOSS_QTY')
-    df_lot = add_mid_group(df_lot, 'SAMPLE')
+    def _qty_parts(keys, qtys):
+        return ", ".join(f"{key} {int(qty)}매" for key, qty in zip(keys, qtys))
 
     # ──────────────────────────────────────────────────
     # 1) Eng'r Sample (ENGSFT, ENGSCT, ENGSIS)
     # ──────────────────────────────────────────────────
-    eng_df = df_lot[df_lot['MID_GROUP'] == 'Engr Sample']
+    eng_df = df[df['MID_GROUP'] == 'Engr Sample']
     if not eng_df.empty:
-        code_summary = (eng_df.groupby('AFT_BAD_RSN_CD')['LOSS_QTY']
-                        .sum().reset_index().sort_values('LOSS_QTY', ascending=False))
-        parts = [f"{row['AFT_BAD_RSN_CD']} {int(row['LOSS_QTY'])}매" for _, row in code_summary.iterrows()]
-        result.append(f"- Eng'r Sample 발췌 증가 ({', '.join(parts)})")
+        code_summary = (eng_df.groupby('AFT_BAD_RSN_CD', observed=True)['LOSS_QTY']
+                        .sum().sort_values(ascending=False, kind='stable'))
+        result.append(f"- Eng'r Sample 발췌 증가 ({_qty_parts(code_summary.index, code_summary.to_numpy())})")
 
     # ──────────────────────────────────────────────────
     # 2) Lot Sample (LOT_SMPL, LOT-SAMPLE)
     # ──────────────────────────────────────────────────
-    lot_df = df_lot[df_lot['MID_GROUP'] == 'Lot Sample']
+    lot_df = df[df['MID_GROUP'] == 'Lot Sample']
     if not lot_df.empty:
-        prod_summary = (lot_df.groupby('PRODUCT_TYPE')['LOSS_QTY']
-                        .sum().reset_index().nlargest(2, 'LOSS_QTY'))
+        prod_summary = lot_df.groupby('PRODUCT_TYPE', observed=True)['LOSS_QTY'].sum().nlargest(2)
         if not prod_summary.empty:
-            parts = [f"{row['PRODUCT_TYPE']} {int(row['LOSS_QTY'])}매" for _, row in prod_summary.iterrows()]
-            result.append(f"- Lot Sample ({', '.join(parts)})")
+            result.append(f"- Lot Sample ({_qty_parts(prod_summary.index, prod_summary.to_numpy())})")
 
     # ──────────────────────────────────────────────────
     # 3) Monitoring Sample (MON_SAMPLE)
     # ──────────────────────────────────────────────────
-    mon_df = df_lot[df_lot['MID_GROUP'] == 'Monitoring Sample']
+    mon_df = df[df['MID_GROUP'] == 'Monitoring Sample']
     if not mon_df.empty:
-        oper_summary = (mon_df.groupby('OPER_ID')['LOSS_QTY']
-                        .sum().reset_index().nlargest(2, 'LOSS_QTY'))
+        oper_summary = mon_df.groupby('OPER_ID', observed=True)['LOSS_QTY'].sum().nlargest(2)
+        # 공정별 상위 2개 제품 (1회 groupby)
+        prods = (mon_df[mon_df['OPER_ID'].isin(oper_summary.index)]
+                 .groupby(['OPER_ID', 'PRODUCT_TYPE'], observed=True)['LOSS_QTY']
+                 .sum().reset_index())
+        top_prods = _top_n(prods, 'OPER_ID', 2)
         oper_parts = []
-        for _, row in oper_summary.iterrows():
-            oper_id = row['OPER_ID']
-            qty = int(row['LOSS_QTY'])
-            df_oper = mon_df[mon_df['OPER_ID'] == oper_id]
-            top_prods = (df_oper.groupby('PRODUCT_TYPE')['LOSS_QTY']
-                         .sum().reset_index().nlargest(2, 'LOSS_QTY'))
-            prod_str = " - " + ", ".join([f"{r['PRODUCT_TYPE']} {int(r['LOSS_QTY'])}매" for _, r in top_prods.iterrows()])
-            oper_parts.append(f"{oper_id} {qty}매{prod_str}")
+        for oper_id, qty in oper_summary.items():
+            rows = top_prods[top_prods['OPER_ID'] == oper_id]
+            prod_str = " - " + _qty_parts(rows['PRODUCT_TYPE'], rows['LOSS_QTY'])
+            oper_parts.append(f"{oper_id} {int(qty)}매{prod_str}")
         result.append(f"- Monitoring Sample ({', '.join(oper_parts)})")
 
     # ──────────────────────────────────────────────────
     # 4) Growing Engr Sample (SMPL)
     # ──────────────────────────────────────────────────
-    smpl_df = df_lot[df_lot['MID_GROUP'] == 'Growing Engr Sample']
+    smpl_df = df[df['MID_GROUP'] == 'Growing Engr Sample']
     if not smpl_df.empty:
-        igot_summary = (smpl_df.groupby('IGOT_ID')['LOSS_QTY']
-                        .sum().reset_index().nlargest(2, 'LOSS_QTY'))
+        igot_summary = smpl_df.groupby('IGOT_ID', observed=True)['LOSS_QTY'].sum().nlargest(2)
         if not igot_summary.empty:
-            parts = [f"{row['IGOT_ID']} {int(row['LOSS_QTY'])}매" for _, row in igot_summary.iterrows()]
-            result.append(f"- Growing Engr Sample ({', '.join(parts)})")
+            result.append(f"- Growing Engr Sample ({_qty_parts(igot_summary.index, igot_summary.to_numpy())})")
 
     # ──────────────────────────────────────────────────
     # 5) 기타 SAMPLE 코드 (MID_GROUP에 포함되지 않은 AFT_BAD_RSN_CD)
     # ──────────────────────────────────────────────────
-    # set difference로 known AFT_BAD_RSN_CD 제거
     known_list = ['ENGSFT', 'ENGSCT', 'ENGSIS', 'LOT_SMPL', 'LOT-SAMPLE', 'MON_SAMPLE', 'SMPL']
+    other_df = df[df['AFT_BAD_RSN_CD'].notna() & ~df['AFT_BAD_RSN_CD'].isin(known_list)]
+    if not other_df.empty:
+        other_summary = other_df.groupby('AFT_BAD_RSN_CD', observed=True)['LOSS_QTY'].sum()
+        result.append(f"- 기타 Sample ({_qty_parts(other_summary.index, other_summary.to_numpy())})")
 
-    # 현재 df_lot의 AFT_BAD_RSN_CD 중, known_list에 없는 것만 추출
-    current_codes = df_lot['AFT_BAD_RSN_CD'].dropna().unique()
-    other_codes = [code for code in current_codes if code not in known_list]
+    return result if len(result) > 1 else result + ["분석 없음"]
 
-    if other_codes:
-        other_df = df_lot[df_lot['AFT_BAD_RSN_CD'].isin(other_codes)].copy()
-        
-        other_summary = other_df.groupby('AFT_BAD_RSN_CD')['LOSS_QTY'].sum().reset_index()
-        parts = [f"{row['AFT_BAD_RSN_CD']} {int(row['LOSS_QTY'])}매" for _, row in other_summary.iterrows()]
-        result.append(f"- 기타 Sample ({', '.join(parts)})")
 
-    return result if len(result) > 1 else result + ["분석 없음"]
+# =========================================================
+# 단독 호출용 분석 함수 (전체 LOT/WAF 프레임 입력 → 내부에서 필터)
+# =========================================================
+def analyze_flatness(df_lot, target_mids=None):
+    """
+    FLATNESS 불량 분석 (디버그 포함)
+    """
+    return _flatness(prepare_group(df_lot, 'FLATNESS', 'GRD_CD_NM_CS', mid=True), target_mids)
+
+
+def analyze_warp(df_wafer, target_mids=None):
+    """
+    Nano Warp 불량 분석 통합 함수 (디버그 모드 포함)
+    """
+    return _warp(prepare_group(df_wafer, 'WARP&BOW', 'GRADE_CS', mid=True), target_mids)
+
+
+def analyze_growing(df_lot):
+    """
+    GROWING 불량 분석 함수:
+    - AFT_BAD_RSN_CD 기준 상위 3개 코드 추출
+    - 각 코드별 IGOT_ID 기준 LOSS_QTY 합계 상위 3개 추출
+    입력: df_lot (DATA_LOT_3210_wafering_300 결과)
+    """
+    return _growing(prepare_group(df_lot, 'GROWING', 'GRD_CD_NM_CS'))
+
+
+def analyze_broken(df_lot):
+    """
+    BROKEN 불량 분석:
+    1) AFT_BAD_RSN_CD 기준 상위 2개 추출
+    2) 'LAP', 'EP', 'FP', 'DSP' 포함 여부 → 'main공정' / '이외공정' 분류
+    3) 각 불량 코드별 EQP_ID 기준 LOSS_QTY 집계 및 몰림성 판단 (10매 이상 차이 시)
+    입력: df_lot (DATA_LOT_3210_wafering_300 결과)
+    """
+    return _broken(prepare_group(df_lot, 'BROKEN', 'GRD_CD_NM_CS'))
+
+
+def analyze_nano(df_wafer):
+    """
+    NANO 불량 분석 통합 함수:
+    1) 대량불량 (LOSS_QTY ≥ 100): 설비, 날짜 포함 문장 생성
+    2) 소량 반복 불량 (LOSS_QTY < 100): AFT_BAD_RSN_CD 기준 상위 3개 중, 각각 상위 3개 BLK_ID 추출
+    입력: df_wafer (DATA_WAF_3210_wafering_300 결과)
+    """
+    return _nano(prepare_group(df_wafer, 'NANO', 'GRADE_CS'))
+
+
+def analyze_pit(df_wafer):
+    """
+    PIT 불량 분석 함수:
+    1) AFT_BAD_RSN_CD 기준 LOSS_QTY 합계 상위 3개 코드 추출
+    2) 각 코드별 EQP_NM_3670 기준 LOSS_QTY 합계 상위 3개 장비 추출
+    3) 날짜 형식: REG_DTTM_3670 → M/D 변환 (옵션 포함)
+    입력: df_wafer (DATA_WAF_3210_wafering_300 결과)
+    """
+    return _pit(prepare_group(df_wafer, 'PIT', 'GRADE_CS'))
+
+
+def analyze_scratch(df_wafer):
+    """
+    SCRATCH 불량 분석 함수:
+    1) AFT_BAD_RSN_CD 기준 LOSS_QTY 합계 상위 3개 코드 추출
+    2) 각 코드별로 EQP_NM_6100 / EQP_NM_3670 공정에서의 최다 발생 장비 및 날짜 분석
+    3) 동일 수량일 경우 장비 병기 출력 (예: A장비 M/D / B장비 M/D)
+    입력: df_wafer (DATA_WAF_3210_wafering_300 결과)
+    """
+    return _scratch(prepare_group(df_wafer, 'SCRATCH', 'GRADE_CS', mid=True))
+
+
+def analyze_edge(df_wafer):
+    """
+    EDGE 불량 분석 함수:
+    1) EG1차(3335), EG2차(3696), EBIS측정(7000) 공정별 장비 기준 LOSS_QTY 집계
+    2) 각 공정별 상위 2개 장비 비교 → 10매 이상 차이 시 "몰림 발생" 판단
+    3) LOSS_QTY 타입 변환, NaN 처리, 인덱스 안전 접근 보장
+    입력: df_wafer (DATA_WAF_3210_wafering_300 결과)
+    """
+    return _edge(prepare_group(df_wafer, 'EDGE', 'GRADE_CS'))
+
+
+def analyze_chip(df_wafer):
+    """
+    CHIP 불량 분석 함수:
+    1) AFT_BAD_RSN_CD 기준 LOSS_QTY 합계 상위 1개 추출
+    2) 분석 대상 불량 유형인지 확인 (defect_mapping 기준)
+    3) 해당 유형별 장비 기준 상위 1, 2위 출력 (몰림성 판단 제외)
+    입력: df_wafer (DATA_WAF_3210_wafering_300 결과)
+    """
+    return _chip(prepare_group(df_wafer, 'CHIP', 'GRADE_CS'))
+
+
+def analyze_others(df_lot, rej_group):
+    """
+    기타 불량 그룹 공통 분석 함수
+    - REJ_GROUP에 따라 AFT_BAD_RSN_CD별 LOSS_QTY 합계 상위 1개 출력
+    입력:
+        df_lot: 원본 데이터
+        rej_group: REJ_GROUP 값 (예: 'HUMAN_ERR', 'VISUAL', ...)
+    """
+    return _others(prepare_group(df_lot, rej_group, 'GRD_CD_NM_CS'), rej_group)
+
+def analyze_HUMAN_ERR(df_lot):
+    return analyze_others(df_lot, 'HUMAN_ERR')
+
+def analyze_VISUAL(df_lot):
+    return analyze_others(df_lot, 'VISUAL')
+
+def analyze_NOSALE(df_lot):
+    return analyze_others(df_lot, 'NOSALE')
+
+def analyze_OTHER(df_lot):
+    return analyze_others(df_lot, 'OTHER')
+
+def analyze_GR(df_lot):  # 이름 수정: GR → GR_보증
+    return analyze_others(df_lot, 'GR_보증')
+
+
+# 1.Particle 상세분석
+# 1) 기본 비율 분석(FS, RESC, HG 비율)
+def analyze_particle_ratios(df_lot, ref_value=1.8, threshold=0.5):
+    """
+    FS/RESC/HG 불량률 및 반영율을 'IN_QTY 전체 합계'를 기준으로 계산하며,
+    RESC 영향 여부도 함께 판단하여 결과 문자열로 반환.
+    """
+    denominator_data = prepare_group(df_lot, '분모', 'GRD_CD_NM_CS')
+    denominator_data = safe_convert_loss_qty(denominator_data, 'IN_QTY')
+    df = prepare_group(df_lot, 'PARTICLE', 'GRD_CD_NM_CS')
+    return _particle_ratios(denominator_data, df, ref_value, threshold)
+
+# 2) particle 상세분석
+def create_particle_table(df_wafer):
+    """
+    Particle wafer 단위 데이터에서 주요 컬럼 기준으로 LOSS_QTY 합계를 피벗 테이블 형태로 변환
+    """
+    return _particle_table(prepare_group(df_wafer, 'PARTICLE', 'GRADE_CS'))
+
+# particle완성
+def analyze_particle(df_lot, df_wafer):
+    denominator_data = safe_convert_loss_qty(prepare_group(df_lot, '분모', 'GRD_CD_NM_CS'), 'IN_QTY')
+    return _particle(denominator_data, prepare_group(df_lot, 'PARTICLE', 'GRD_CD_NM_CS'),
+                     prepare_group(df_wafer, 'PARTICLE', 'GRADE_CS'))
+
+
+def analyze_sample(df_lot):
+    """
+    SAMPLE 관련 AFT_BAD_RSN_CD 불량 유형 상세 분석
+    - MOM_SAMPLE, LOT_SMPL, SMPL, 기타 등 구분하여 로직 처리
+    - 상위 2개 코드만 분석 (LOSS_QTY 기준)
+    """
+    return _sample(prepare_group(df_lot, 'SAMPLE', mid=True))
+
+
+# =========================================================
+# 분석 엔진: REJ_GROUP 1회 분할 → 분석 함수별 준비된 slice 전달
+# =========================================================
+# REJ_GROUP → (분석 함수, 입력 데이터, Prime 필터 컬럼, MID_GROUP 매핑 여부)
+ANALYZER_SPECS = {
+    'FLATNESS': (_flatness, 'lot', 'GRD_CD_NM_CS', True),
+    'WARP&BOW': (_warp, 'wafer', 'GRADE_CS', True),
+    'GROWING': (_growing, 'lot', 'GRD_CD_NM_CS', False),
+    'BROKEN': (_broken, 'lot', 'GRD_CD_NM_CS', False),
+    'NANO': (_nano, 'wafer', 'GRADE_CS', False),
+    'PIT': (_pit, 'wafer', 'GRADE_CS', False),
+    'SCRATCH': (_scratch, 'wafer', 'GRADE_CS', True),
+    'CHIP': (_chip, 'wafer', 'GRADE_CS', False),
+    'EDGE': (_edge, 'wafer', 'GRADE_CS', False),
+    'HUMAN_ERR': (_others, 'lot', 'GRD_CD_NM_CS', False),
+    'VISUAL': (_others, 'lot', 'GRD_CD_NM_CS', False),
+    'NOSALE': (_others, 'lot', 'GRD_CD_NM_CS', False),
+    'OTHER': (_others, 'lot', 'GRD_CD_NM_CS', False),
+    'GR_보증': (_others, 'lot', 'GRD_CD_NM_CS', False),
+    'SAMPLE': (_sample, 'lot', None, True),
+    'PARTICLE': (_particle, 'both', None, False),
+}
+
+# target_mids 인자를 받는 분석 함수
+_TARGET_MID_ANALYZERS = (_flatness, _warp)
+
+
+class DefectAnalyzerEngine:
+    """
+    REJ_GROUP별 세부분석 엔진
+    - LOT/WAF 프레임을 REJ_GROUP 기준 1회 groupby로 분할 (LOSS_QTY/IN_QTY 숫자형 변환도 1회)
+    - 분석 함수에는 REJ_GROUP/Prime 필터, MID_GROUP 매핑이 끝난 slice를 전달 (slice는 캐시)
+    - 원본 프레임은 수정하지 않음
+    - run_many(): 여러 그룹을 스레드 풀에서 병렬 실행 (분석 함수 간 공유 상태 없음)
+    """
+
+    def __init__(self, df_lot=None, df_wafer=None):
+        self.frames = {'lot': df_lot, 'wafer': df_wafer}
+        self._parts = {}
+        self._empty = {}
+        for source, df in self.frames.items():
+            self._parts[source], self._empty[source] = self._partition(df)
+        self._prepared = {}
+        self._lock = threading.Lock()
+        self._started = {}
+
+    @staticmethod
+    def _partition(df):
+        """REJ_GROUP 기준 1회 분할 (숫자형 변환 포함) → (그룹별 slice, 같은 dtype의 빈 프레임)"""
+        if not isinstance(df, pd.DataFrame):
+            return {}, pd.DataFrame()
+        numeric = {col: pd.to_numeric(df[col], errors='coerce') for col in ('LOSS_QTY', 'IN_QTY')
+                   if col in df.columns and not pd.api.types.is_numeric_dtype(df[col])}
+        if numeric:
+            df = df.assign(**numeric)
+        if df.empty or 'REJ_GROUP' not in df.columns:
+            return {}, df.iloc[0:0]
+        parts = {rej_group: part for rej_group, part in df.groupby('REJ_GROUP', observed=True, sort=False)}
+        return parts, df.iloc[0:0]
+
+    def available(self, source):
+        """입력 데이터 존재 여부 (None 이면 분석 불가)"""
+        if source == 'both':
+            return self.frames['lot'] is not None and self.frames['wafer'] is not None
+        return self.frames[source] is not None
+
+    def group(self, source, rej_group):
+        """REJ_GROUP slice (Prime 필터 전, 없으면 빈 프레임)"""
+        part = self._parts[source].get(rej_group)
+        if part is not None:
+            return part
+        # 숫자형 변환이 끝난 프레임의 빈 slice (컬럼 dtype 유지)
+        return self._empty[source]
+
+    def prepared(self, source, rej_group, grade_col=None, mid=False):
+        """REJ_GROUP + Prime 필터 + MID_GROUP 매핑 slice (캐시)"""
+        key = (source, rej_group, grade_col, mid)
+        with self._lock:
+            if key in self._prepared:
+                return self._prepared[key]
+        df = self.group(source, rej_group)
+        if grade_col is not None and grade_col in df.columns:
+            df = df[df[grade_col] == 'Prime']
+        elif grade_col is not None:
+            df = df.iloc[0:0]
+        if mid and 'AFT_BAD_RSN_CD' in df.columns:
+            df = add_mid_group(df, rej_group)
+        with self._lock:
+            return self._prepared.setdefault(key, df)
+
+    def run(self, rej_group, target_mids=None):
+        """REJ_GROUP 세부분석 실행 → 결과 문장 리스트"""
+        if rej_group not in ANALYZER_SPECS:
+            return [f"[{rej_group} 분석] 함수 없음"]
+        func, source, grade_col, mid = ANALYZER_SPECS[rej_group]
+        if not self.available(source):
+            missing = ['df_lot', 'df_wafer'] if source == 'both' else [f'df_{source}']
+            missing = [name for name in missing if self.frames[name[3:]] is None]
+            return [f"[{rej_group} 분석] 누락: {missing}"]
+
+        if func is _particle:
+            return _particle(self.prepared('lot', '분모', 'GRD_CD_NM_CS'),
+                             self.prepared('lot', 'PARTICLE', 'GRD_CD_NM_CS'),
+                             self.prepared('wafer', 'PARTICLE', 'GRADE_CS'))
+        df = self.prepared(source, rej_group, grade_col, mid)
+        if func is _others:
+            return _others(df, rej_group)
+        if func in _TARGET_MID_ANALYZERS:
+            return func(df, target_mids)
+        return func(df)
+
+    def _run_isolated(self, rej_group, target_mids=None):
+        """단일 분석 실행 (예외는 해당 그룹 결과 문장으로 변환)"""
+        with self._lock:
+            self._started[rej_group] = time.monotonic()
+        try:
+            return self.run(rej_group, target_mids)
+        except Exception as e:
+            logger.error(f"[{rej_group} 분석] 오류: {e}")
+            return [f"[{rej_group} 분석] 오류: {e}"]
+
+    def run_many(self, requests, max_workers=None, timeout=None):
+        """
+        여러 REJ_GROUP 세부분석 병렬 실행 (스레드 풀)
+        requests: {rej_group: target_mids}
+        - 분석별 오류는 해당 그룹 결과로 격리
+        - 분석별 시간 제한(timeout, 실행 시작 기준) 초과 시 '시간 초과' 결과로 대체 (스레드는 백그라운드 종료)
+        - 전체 제한(제출 시점 + timeout × 워커 회차 수) 초과 시 남은 분석 모두 '시간 초과', 대기 중인 분석은 취소
+          (시간 초과된 스레드가 워커를 계속 점유해도 대기 분석 때문에 멈추지 않음)
+        - 반환: requests 순서의 {rej_group: 결과 문장 리스트}
+        """
+        if max_workers is None:
+            max_workers = ANALYZER_CONFIG.get('max_workers', 4)
+        if timeout is None:
+            timeout = ANALYZER_CONFIG.get('timeout_sec')
+        items = list(requests.items())
+        if not items:
+            return {}
+
+        if not ANALYZER_CONFIG.get('parallel', True) or max_workers <= 1 or len(items) == 1:
+            return {rej_group: self._run_isolated(rej_group, target_mids) for rej_group, target_mids in items}
+
+        started_at = time.monotonic()
+        workers = min(max_workers, len(items))
+        deadline = started_at + timeout * -(-len(items) // workers) if timeout else None
+        results = {}
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analyzer')
+        try:
+            pending = {rej_group: executor.submit(self._run_isolated, rej_group, target_mids)
+                       for rej_group, target_mids in items}
+            while pending:
+                wait(pending.values(), timeout=0.2, return_when=FIRST_COMPLETED)
+                now = time.monotonic()
+                expired = deadline is not None and now > deadline
+                for rej_group, future in list(pending.items()):
+                    if future.done() and not future.cancelled():
+                        results[rej_group] = future.result()
+                        del pending[rej_group]
+                        continue
+                    if expired:
+                        queued = future.cancel()
+                        logger.warning(f"[{rej_group} 분석] 전체 시간 초과 → 결과 제외"
+                                       f"{' (대기 중 취소)' if queued else ''}")
+                        results[rej_group] = [f"[{rej_group} 분석] 시간 초과 ({timeout}초)"]
+                        del pending[rej_group]
+                        continue
+                    with self._lock:
+                        begun = self._started.get(rej_group)
+                    if timeout and begun is not None and now - begun > timeout:
+                        logger.warning(f"[{rej_group} 분석] 시간 초과 ({timeout}초) → 결과 제외")
+                        results[rej_group] = [f"[{rej_group} 분석] 시간 초과 ({timeout}초)"]
+                        del pending[rej_group]
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        logger.info(f"세부분석 {len(items)}건 병렬 완료: {time.monotonic() - started_at:.2f}초")
+        return {rej_group: results[rej_group] for rej_group, _ in items}
 
 
 
@@ -29,9 +29,68 @@ QUERY_CONFIG = {
     'fac_ids': ['WF7', 'WF8', 'WFA', 'FPC7', 'FPC8'],
     'grade_filter': 'PN',  # 'PN' 또는 특정 등급
     'oper_div_l': 'WF',
-    'max_data_size_gb': 1.0  # EXPLAIN 체크 시 허용 최대 용량 
+    'max_data_size_gb': 1.0,  # EXPLAIN 체크 시 허용 최대 용량 
+    'max_parallel_queries': 4,  # 동시 실행 쿼리 수 (1이면 순차 실행)
+    'streaming_fetch': True,  # fetchmany 배치 → Arrow 변환 (False면 fetchall)
+    'fetch_batch_size': 50000,  # 스트리밍 조회 배치 행 수
+    # 스캔 용량 정책 (초과 시 동작: 'warn' / 'skip' / 'split' / 'abort', 입력 프롬프트 없음)
+    'scan_default_action': 'warn',
+    'scan_explain_fail_action': 'warn',  # EXPLAIN 실패 시 동작
+    'scan_budgets': {
+        'DATA_WAF_3210_wafering_300': {'max_gb': 5.0, 'action': 'split'},
+        'DATA_LOT_3210_wafering_300': {'max_gb': 3.0, 'action': 'split'},
+        'DATA_1511_SMAX_wafering_300': {'max_gb': 2.0, 'action': 'warn'},
+        'DATA_3210_wafering_300_3months': {'max_gb': 2.0, 'action': 'warn'},
+    },
+    'scan_explain_prefetch': True,  # 실행 전 EXPLAIN 일괄 병렬 조회
+    'explain_cache_ttl_hours': 24  # 동일 쿼리 EXPLAIN 결과 재사용 시간
     } 
 
+# data_cache parquet 저장 레이아웃
+CACHE_CONFIG = {
+    'sort_columns': ['BASE_DT', 'REJ_GROUP', 'CRET_CD'],  # 필터 컬럼 기준 정렬 → row group 통계로 건너뛰기
+    'dictionary_columns': ['BASE_DT', 'REJ_GROUP', 'CRET_CD', 'AFT_BAD_RSN_CD', 'BEF_BAD_RSN_CD',
+                           'FAC_ID', 'OPER_ID', 'GRADE_CS', 'GRD_CD_NM_CS', 'GRD_CD_NM_PS', 'EQP_NM',
+                           'EQP_NM_300_WF_*'],  # 저카디널리티 코드 컬럼 (와일드카드 허용)
+    'row_group_size': 32768,  # 선택적 스캔용 row group 크기 (행 수)
+    'compression': 'zstd',
+    'compression_level': 3,
+    'registry_max_mb': 2048,  # 리포트 1회 실행 중 메모리에 유지할 데이터셋 총 크기 (LRU)
+}
+
+# 리포트 차트 렌더링
+CHART_CONFIG = {
+    'parallel': True,  # 프로세스 풀 병렬 렌더링 (False: 순차)
+    'max_workers': 0,  # 0 = CPU 코어 수
+    'dpi': 300,
+    'save_debug_png': False,  # True: 차트 PNG를 daily_reports_debug에도 저장 (Excel은 메모리 이미지 사용)
+}
+
+# 불량 세부분석 (REJ_GROUP별 분석 함수 병렬 실행)
+ANALYZER_CONFIG = {
+    'parallel': True,  # False: 순차 실행
+    'max_workers': 4,
+    'timeout_sec': 60,  # 분석 1건 최대 실행 시간 (초과 시 해당 그룹만 '시간 초과' 처리)
+}
+
+# 일자 범위 백필 (load_data_waf_3210_date_range)
+BACKFILL_CONFIG = {
+    'max_workers': 4,  # 동시 Trino 쿼리 수 상한
+    'max_retries': 2,  # 일자별 재시도 횟수 (초과 시 실패 기록 → 다음 실행에서 재조회)
+    'retry_wait_sec': 10,  # 재시도 대기 (회차마다 배수)
+}
+
+# Excel 보고서 출력
+EXCEL_CONFIG = {
+    'raw_appendix': False,  # True: 원천 데이터 부록 Excel 별도 생성 (write-only 스트리밍)
+    'raw_appendix_datasets': [
+        'DATA_3010_wafering_300',
+        'DATA_LOT_3210_wafering_300',
+        'DATA_WAF_3210_wafering_300',
+    ],
+    'raw_appendix_chunk_rows': 50000,  # 본문 변환 단위 (행 수)
+}
+
 def get_last_3months_date_range(self, target_date_str=None):
     """
     현재 월 기준 직전 3개월 전체 기간 계산
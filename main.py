@@ -66,6 +66,9 @@ def main():
         data = data_loader.fetch_data_by_catalog(QUERIES_BY_CATALOG, target_date)
         
         logger.info(f"총 {len(data)} 개 쿼리 실행 완료")
+
+        # Ref 구간 일별 집계 보충 (원본 캐시/집계 모두 없는 일자만 조회: LOT 서버 집계, WAF 불량 기간 조회 + 로컬 이력 조인)
+        data_loader.load_3210_aggregates(target_date)
         
         # 2. 리포트 생성
         logger.info("Step 2: 리포트 생성")
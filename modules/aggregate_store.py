@@ -0,0 +1,188 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from modules.cache_manager import get_cache, date_range, group_runs
+from modules.mid_lookup import assign_mid_group
+from modules.product_index import get_product_index
+
+logger = logging.getLogger(__name__)
+
+LOT_DAILY = 'AGG_LOT_3210_daily'
+# v2: 키에 CRET_CD 추가 → CRET_CD 없는 기존 집계 파티션과 섞이지 않도록 데이터셋 분리 (원본/서버 집계에서 재생성)
+WAF_DAILY = 'AGG_WAF_3210_daily_v2'
+
+# WAF 공정별 장비 컬럼 (EQP_NM_300_WF_<공정>) / 장비 무관 합계 행의 process 값
+WAF_PROCESSES = ['3300', '3335', '3670', '3696', '6100', '6210', '6500', '7000']
+ALL_PROCESS = 'ALL'
+
+LOT_KEYS = ['BASE_DT', 'REJ_GROUP', 'CRET_CD', 'GRD_CD_NM_CS', 'PRODUCT_TYPE', 'MID_GROUP']
+WAF_KEYS = ['BASE_DT', 'REJ_GROUP', 'CRET_CD', 'AFT_BAD_RSN_CD', 'MID_GROUP', 'PRODUCT_TYPE', 'process', 'EQP_NM']
+
+
+def _enrich(df):
+    """집계 키용 PRODUCT_TYPE / MID_GROUP 보강 (원본 프레임은 수정하지 않음)"""
+    df = df.copy(deep=False)
+    if 'PRODUCT_TYPE' not in df.columns:
+        if 'PROD_ID' in df.columns:
+            df['MS6'], df['PRODUCT_TYPE'] = get_product_index().product_type(df['PROD_ID'])
+        else:
+            df['PRODUCT_TYPE'] = 'Unknown'
+    if 'MID_GROUP' not in df.columns:
+        df = assign_mid_group(df)
+    return df
+
+
+def _quantity(df, column):
+    """수량 컬럼 → float64 (기존 캐시의 float32 컬럼도 합산 전 승격)"""
+    if column not in df.columns:
+        return pd.Series(0.0, index=df.index)
+    return pd.to_numeric(df[column], errors='coerce').astype('float64').fillna(0.0)
+
+
+def _row_counts(df):
+    """원본 행 수 (서버 집계 결과면 ROWS 컬럼, 상세 행이면 1)"""
+    if 'ROWS' in df.columns:
+        return pd.to_numeric(df['ROWS'], errors='coerce').fillna(0).astype('int64').to_numpy()
+    return 1
+
+
+def aggregate_lot_daily(df):
+    """
+    LOT 3210 원본 → (일자, REJ_GROUP, CRET_CD, 등급, 제품, MID_GROUP) LOSS_QTY / IN_QTY / 행 수 합계
+    - 결측 키도 유지 (분모 행 등)
+    - 서버 집계 결과(DATA_LOT_3210_wafering_300_agg)도 같은 방식으로 재합산
+    """
+    columns = LOT_KEYS + ['LOSS_QTY', 'IN_QTY', 'ROWS']
+    if df is None or df.empty:
+        return pd.DataFrame(columns=columns)
+    df = _enrich(df)
+    keys = [c for c in LOT_KEYS if c in df.columns]
+    frame = pd.DataFrame({c: df[c] for c in keys})
+    frame['LOSS_QTY'] = _quantity(df, 'LOSS_QTY')
+    frame['IN_QTY'] = _quantity(df, 'IN_QTY')
+    frame['ROWS'] = _row_counts(df)
+    return frame.groupby(keys, dropna=False, observed=True, sort=False).sum().reset_index()
+
+
+def aggregate_waf_daily(df, processes=WAF_PROCESSES):
+    """
+    WAF 3210 원본 → (일자, REJ_GROUP, CRET_CD, 코드, MID_GROUP, 제품, 공정, 장비) LOSS_QTY / 행 수 합계
+    - 공정별 장비 컬럼을 long 형태로 펼쳐 장비가 있는 행만 해당 공정 합계에 포함
+    - process='ALL' 행: 장비와 무관한 키별 합계 (원본 행 1회씩)
+    """
+    columns = WAF_KEYS + ['LOSS_QTY', 'ROWS']
+    if df is None or df.empty:
+        return pd.DataFrame(columns=columns)
+    df = _enrich(df)
+    keys = [c for c in WAF_KEYS[:-2] if c in df.columns]
+    loss = _quantity(df, 'LOSS_QTY').to_numpy()
+
+    pieces = [(ALL_PROCESS, np.arange(len(df)), None)]
+    for proc in processes:
+        eqp_col = f'EQP_NM_300_WF_{proc}'
+        if eqp_col not in df.columns:
+            continue
+        rows = np.flatnonzero(df[eqp_col].notna().to_numpy())
+        if len(rows):
+            pieces.append((proc, rows, df[eqp_col].take(rows).astype(object).to_numpy()))
+
+    rows = np.concatenate([p[1] for p in pieces])
+    frame = pd.DataFrame({c: df[c].take(rows).reset_index(drop=True) for c in keys})
+    frame['process'] = pd.Categorical.from_codes(
+        np.repeat(np.arange(len(pieces)), [len(p[1]) for p in pieces]), categories=[p[0] for p in pieces])
+    frame['EQP_NM'] = np.concatenate([np.full(len(p[1]), None, dtype=object) if p[2] is None else p[2]
+                                      for p in pieces])
+    frame['LOSS_QTY'] = loss[rows]
+    frame['ROWS'] = 1
+    return (frame.groupby(keys + ['process', 'EQP_NM'], dropna=False, observed=True, sort=False)
+            .sum().reset_index())
+
+
+# 집계 데이터셋 정의: 원본 데이터셋 / 원본에서 읽을 컬럼 / 집계 함수
+AGGREGATES = {
+    LOT_DAILY: {
+        'source': 'DATA_LOT_3210_wafering_300',
+        'columns': ['BASE_DT', 'REJ_GROUP', 'CRET_CD', 'GRD_CD_NM_CS', 'PROD_ID', 'AFT_BAD_RSN_CD',
+                    'LOSS_QTY', 'IN_QTY'],
+        'build': aggregate_lot_daily,
+        'empty_columns': LOT_KEYS + ['LOSS_QTY', 'IN_QTY', 'ROWS'],
+        'ref_months': 6,  # 전체 불량 Ref (직전 6개월)
+    },
+    WAF_DAILY: {
+        'source': 'DATA_WAF_3210_wafering_300',
+        'columns': ['BASE_DT', 'REJ_GROUP', 'CRET_CD', 'AFT_BAD_RSN_CD', 'PROD_ID', 'LOSS_QTY']
+                   + [f'EQP_NM_300_WF_{proc}' for proc in WAF_PROCESSES],
+        'build': aggregate_waf_daily,
+        'empty_columns': WAF_KEYS + ['LOSS_QTY', 'ROWS'],
+        'ref_months': 3,  # 장비별 Ref (직전 3개월)
+    },
+}
+
+
+class DailyAggregateStore:
+    """
+    일별 집계 저장소 (data_cache 파티션에 dataset=AGG_* 로 저장)
+    - 원본 일자 파티션이 있고 집계가 없거나 원본보다 오래된 일자만 원본에서 1회 집계
+    - Ref 기간 조회는 일별 집계 행만 읽어 합산 (원본 parquet 재로드 없음)
+    """
+
+    def __init__(self, cache=None, batch_days=31):
+        self.cache = cache or get_cache()
+        self.batch_days = batch_days
+
+    def stale_dates(self, name, start_date, end_date):
+        """원본 대비 집계가 없거나 오래된 일자"""
+        spec = AGGREGATES[name]
+        raw = self.cache.partitions(spec['source'])
+        agg = self.cache.partitions(name)
+        return [day for day in date_range(start_date, end_date)
+                if day in raw and (day not in agg or agg[day].get('fetched_at', '') < raw[day].get('fetched_at', ''))]
+
+    def refresh(self, name, start_date, end_date):
+        """기간 중 필요한 일자만 원본에서 집계하여 저장 → 반환: 집계한 일자 수"""
+        spec = AGGREGATES[name]
+        self.cache.import_legacy_files(spec['source'])
+        stale = self.stale_dates(name, start_date, end_date)
+        if not stale:
+            return 0
+        for run_start, run_end in group_runs(stale, max_run_days=self.batch_days):
+            raw = self.cache.read(spec['source'], run_start, run_end, columns=spec['columns'])
+            rows = self.cache.write_frame(name, spec['build'](raw), run_start, run_end)
+            logger.info(f"[집계] {name} {run_start} ~ {run_end}: 원본 {len(raw):,} 건 → 집계 {rows:,} 건")
+        return len(stale)
+
+    def ensure_remote(self, name, start_date, end_date, fetch_func, max_run_days=None):
+        """
+        원본 파티션도 집계도 없는 일자만 서버 집계 조회로 보충
+        fetch_func(start, end) → 서버 집계 DataFrame (None이면 기록 안 함)
+        반환: 서버에서 조회한 일자 수
+        """
+        self.refresh(name, start_date, end_date)
+        build = AGGREGATES[name]['build']
+
+        def fetch(run_start, run_end):
+            df = fetch_func(run_start, run_end)
+            return None if df is None else build(df)
+
+        return self.cache.ensure(name, start_date, end_date, fetch, max_run_days=max_run_days)
+
+    def window(self, name, start_date, end_date, filters=None):
+        """기간 일별 집계 행 (부족한 일자는 먼저 집계) — 호출측에서 필요한 키로 합산"""
+        self.refresh(name, start_date, end_date)
+        df = self.cache.read(name, start_date, end_date, filters=filters)
+        if df.empty:
+            return pd.DataFrame(columns=AGGREGATES[name]['empty_columns'])
+        return df
+
+
+_store = None
+
+
+def get_aggregate_store():
+    """프로세스 공용 집계 저장소 (기본 data_cache)"""
+    global _store
+    if _store is None:
+        _store = DailyAggregateStore()
+    return _store
@@ -0,0 +1,158 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from modules.scan_guard import ScanBudgetExceeded
+
+logger = logging.getLogger(__name__)
+
+STATE_NAME = "_backfill_state.json"
+
+
+def _format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}시간 {minutes}분" if hours else f"{minutes}분 {seconds}초"
+
+
+class BackfillProgress:
+    """완료 일자 / 행 수 기반 진행률 · 처리량 · 남은 시간 추정"""
+
+    def __init__(self, total_days):
+        self.total_days = total_days
+        self.done_days = 0
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    def update(self, rows):
+        self.done_days += 1
+        self.rows += rows
+
+    def summary(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        days_per_min = self.done_days / elapsed * 60
+        remaining = (self.total_days - self.done_days) / (self.done_days / elapsed) if self.done_days else 0
+        return (f"{self.done_days}/{self.total_days}일 ({self.done_days / self.total_days * 100:.0f}%) | "
+                f"{days_per_min:.1f}일/분, {self.rows / elapsed:,.0f}행/초 | "
+                f"경과 {_format_duration(elapsed)}, 남은 예상 {_format_duration(remaining)}")
+
+
+class DateRangeBackfill:
+    """
+    일자 단위 병렬 백필
+    - 캐시에 없는 일자만 워커 풀에서 조회 (워커 수 = 동시 Trino 쿼리 수 상한)
+    - 완료 일자는 즉시 파티션 저장 + 캐시 manifest 기록 → 중단 후 재실행 시 남은 일자부터
+    - 실패 일자는 재시도 후 _backfill_state.json 에 사유 기록 (다음 실행에서 다시 조회)
+    fetch_day(YYYYMMDD) → DataFrame (None이면 조회 생략, 기록 안 함)
+    """
+
+    def __init__(self, cache, dataset, fetch_day, max_workers=4, max_retries=2, retry_wait_sec=10):
+        self.cache = cache
+        self.dataset = dataset
+        self.fetch_day = fetch_day
+        self.max_workers = max(1, int(max_workers))
+        self.max_retries = max(0, int(max_retries))
+        self.retry_wait_sec = retry_wait_sec
+        self.state_path = cache.cache_dir / STATE_NAME
+        self._state_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 실패/생략 일자 기록
+    # ------------------------------------------------------------------
+    def _load_state(self):
+        if not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"[백필] 상태 파일 읽기 실패 → 새로 생성: {e}")
+            return {}
+
+    def _save_state(self, failed, skipped, start_date, end_date):
+        with self._state_lock:
+            state = self._load_state()
+            entry = state.setdefault(self.dataset, {'failed': {}, 'skipped': []})
+            # 이번 실행에서 완료된 일자는 실패/생략 기록에서 제거
+            done = set(self.cache.partitions(self.dataset))
+            entry['failed'] = {day: msg for day, msg in {**entry.get('failed', {}), **failed}.items()
+                               if day not in done}
+            entry['skipped'] = sorted((set(entry.get('skipped', [])) | set(skipped)) - done)
+            entry['last_run'] = {'start': start_date, 'end': end_date,
+                                 'finished_at': datetime.now().isoformat(timespec='seconds')}
+            tmp_path = self.state_path.with_name(self.state_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+            tmp_path.replace(self.state_path)
+
+    def failed_days(self):
+        """직전 실행까지 실패로 남은 일자 {YYYYMMDD: 사유}"""
+        return dict(self._load_state().get(self.dataset, {}).get('failed', {}))
+
+    # ------------------------------------------------------------------
+    # 실행
+    # ------------------------------------------------------------------
+    def _run_day(self, day):
+        """1일 조회 + 저장 (재시도 포함) → (상태, 행 수, 오류)"""
+        error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                df = self.fetch_day(day)
+                if df is None:
+                    return 'skipped', 0, None
+                return 'done', self.cache.write_frame(self.dataset, df, day, day), None
+            except ScanBudgetExceeded:
+                raise
+            except Exception as e:
+                error = e
+                if attempt < self.max_retries:
+                    logger.warning(f"[백필] {self.dataset} {day} 실패 ({attempt + 1}회): {e} → 재시도")
+                    time.sleep(self.retry_wait_sec * (attempt + 1))
+        return 'failed', 0, str(error)
+
+    def run(self, start_date, end_date):
+        """
+        기간 백필 → 반환: {'done', 'skipped', 'failed', 'rows', 'elapsed_sec'}
+        """
+        days = self.cache.missing_dates(self.dataset, start_date, end_date)
+        result = {'done': [], 'skipped': [], 'failed': {}, 'rows': 0, 'elapsed_sec': 0.0}
+        if not days:
+            logger.info(f"[백필] {self.dataset} {start_date} ~ {end_date}: 전체 캐시 존재")
+            return result
+
+        workers = min(self.max_workers, len(days))
+        logger.info(f"[백필] {self.dataset} {start_date} ~ {end_date}: 대상 {len(days)}일, 워커 {workers}개")
+        progress = BackfillProgress(len(days))
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backfill')
+        try:
+            futures = {executor.submit(self._run_day, day): day for day in days}
+            for future in as_completed(futures):
+                day = futures[future]
+                status, rows, error = future.result()
+                progress.update(rows)
+                if status == 'done':
+                    result['done'].append(day)
+                    result['rows'] += rows
+                elif status == 'skipped':
+                    result['skipped'].append(day)
+                else:
+                    result['failed'][day] = error
+                    logger.error(f"[백필] {self.dataset} {day} 최종 실패: {error}")
+                logger.info(f"[백필] {self.dataset} {day} {status} {rows:,}건 | {progress.summary()}")
+        except (ScanBudgetExceeded, KeyboardInterrupt):
+            # 중단: 대기 중인 일자 취소 (완료 일자는 이미 manifest에 기록됨)
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._save_state(result['failed'], result['skipped'], start_date, end_date)
+            raise
+        executor.shutdown(wait=True)
+
+        result['elapsed_sec'] = round(time.perf_counter() - progress.started, 1)
+        self._save_state(result['failed'], result['skipped'], start_date, end_date)
+        logger.info(f"[백필] {self.dataset} 완료: 저장 {len(result['done'])}일 / 생략 {len(result['skipped'])}일 / "
+                    f"실패 {len(result['failed'])}일, {result['rows']:,}건 ({progress.summary()})")
+        if result['failed']:
+            logger.warning(f"[백필] 실패 일자 (재실행 시 다시 조회): {sorted(result['failed'])}")
+        return result
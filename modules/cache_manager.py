@@ -0,0 +1,430 @@
+import json
+import logging
+import sys
+import threading
+from fnmatch import fnmatchcase
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from config.database import CACHE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "data_cache"
+MANIFEST_NAME = "_manifest.json"
+
+
+def date_range(start_date, end_date):
+    """YYYYMMDD 시작/종료(포함) → 일자 문자열 리스트"""
+    start_dt = datetime.strptime(start_date, '%Y%m%d')
+    end_dt = datetime.strptime(end_date, '%Y%m%d')
+    days = []
+    while start_dt <= end_dt:
+        days.append(start_dt.strftime('%Y%m%d'))
+        start_dt += timedelta(days=1)
+    return days
+
+
+def group_runs(days, split_by_month=True, max_run_days=None):
+    """연속된 일자를 (시작, 종료) 구간으로 묶음 (월 경계 분리 / 최대 일수 옵션)"""
+    runs = []
+    for day in sorted(days):
+        if runs:
+            prev_start, prev_end = runs[-1]
+            next_day = (datetime.strptime(prev_end, '%Y%m%d') + timedelta(days=1)).strftime('%Y%m%d')
+            same_month = prev_start[:6] == day[:6]
+            run_days = (datetime.strptime(prev_end, '%Y%m%d') - datetime.strptime(prev_start, '%Y%m%d')).days + 1
+            within_limit = max_run_days is None or run_days < max_run_days
+            if day == next_day and (same_month or not split_by_month) and within_limit:
+                runs[-1] = (prev_start, day)
+                continue
+        runs.append((day, day))
+    return runs
+
+
+def write_cache_parquet(df, path, options=None):
+    """
+    캐시용 parquet 저장
+    - 필터 컬럼(BASE_DT, REJ_GROUP, CRET_CD) 기준 정렬 → row group min/max 통계로 pruning
+    - row group 크기 조정, 코드 컬럼 dictionary 인코딩, zstd 압축, page 통계/인덱스 기록
+    """
+    options = options or CACHE_CONFIG
+    sort_cols = [c for c in options.get('sort_columns', []) if c in df.columns]
+    if sort_cols:
+        try:
+            df = df.sort_values(sort_cols, kind='mergesort', na_position='last')
+        except Exception as e:
+            logger.warning(f"[캐시] 정렬 실패 → 원본 순서로 저장: {e}")
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    dict_patterns = options.get('dictionary_columns', [])
+    dict_cols = [c for c in table.column_names if any(fnmatchcase(c, p) for p in dict_patterns)]
+
+    write_kwargs = dict(
+        row_group_size=options.get('row_group_size', 32768),
+        compression=options.get('compression', 'zstd'),
+        compression_level=options.get('compression_level'),
+        use_dictionary=dict_cols,
+        write_statistics=True,
+    )
+    try:
+        pq.write_table(
+            table, str(path),
+            write_page_index=True,
+            sorting_columns=[pq.SortingColumn(table.column_names.index(c)) for c in sort_cols],
+            **write_kwargs
+        )
+    except (TypeError, AttributeError):
+        # 구버전 pyarrow: page index / sorting 메타데이터 미지원
+        pq.write_table(table, str(path), **write_kwargs)
+
+
+def _unified_schema(paths):
+    """파티션 파일 footer만 읽어 공통 schema 생성 (일자별 null/정수/실수 타입 차이 흡수)"""
+    schemas = [pq.read_schema(str(path)) for path in paths]
+    try:
+        return pa.unify_schemas(schemas, promote_options='permissive')
+    except TypeError:
+        # 구버전 pyarrow (promote_options 미지원)
+        return pa.unify_schemas(schemas)
+
+
+def _build_filter_expression(schema, date_col, start_date, end_date, filters):
+    """
+    pyarrow dataset 필터식 생성
+    - 기간: date_col BETWEEN start AND end
+    - filters: {컬럼: 값 또는 값 리스트} → == / isin
+    """
+    expr = None
+    names = set(schema.names)
+    if date_col in names:
+        expr = (ds.field(date_col) >= start_date) & (ds.field(date_col) <= end_date)
+    for column, value in (filters or {}).items():
+        if column not in names:
+            logger.warning(f"[캐시] 필터 컬럼 없음 → 무시: {column}")
+            continue
+        if isinstance(value, (list, tuple, set)):
+            cond = ds.field(column).isin(list(value))
+        else:
+            cond = ds.field(column) == value
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def _apply_filters_pandas(df, filters):
+    """pyarrow 스캔 실패 시 대체용 pandas 필터"""
+    for column, value in (filters or {}).items():
+        if column not in df.columns:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            df = df[df[column].isin(list(value))]
+        else:
+            df = df[df[column] == value]
+    return df
+
+
+class PartitionedCache:
+    """
+    data_cache Hive 파티션 parquet 캐시
+    - 경로: data_cache/dataset=<이름>/ym=YYYYMM/dt=YYYYMMDD/part-0.parquet
+    - _manifest.json: 데이터셋별 보유 파티션 (행 수, 조회 시각)
+    - 조회는 manifest 기준 (매 호출 디렉토리 glob 없음)
+    """
+
+    def __init__(self, cache_dir=None, date_col='BASE_DT'):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.date_col = date_col
+        self.manifest_path = self.cache_dir / MANIFEST_NAME
+        self._lock = threading.RLock()
+        self._manifest = self._load_manifest()
+
+    # ------------------------------------------------------------------
+    # manifest
+    # ------------------------------------------------------------------
+    def _load_manifest(self):
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"[캐시] manifest 읽기 실패 → 새로 생성: {e}")
+            return {}
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+        tmp_path.replace(self.manifest_path)
+
+    def partition_path(self, dataset, day):
+        """일자 파티션 파일 경로"""
+        return (self.cache_dir / f"dataset={dataset}" / f"ym={day[:6]}" / f"dt={day}" / "part-0.parquet")
+
+    def partitions(self, dataset):
+        """데이터셋의 파티션 정보 {YYYYMMDD: {'rows', 'fetched_at'}}"""
+        with self._lock:
+            return dict(self._manifest.get(dataset, {}))
+
+    def has_partition(self, dataset, day):
+        with self._lock:
+            return day in self._manifest.get(dataset, {})
+
+    def missing_dates(self, dataset, start_date, end_date):
+        """기간 중 캐시에 없는 일자 리스트"""
+        with self._lock:
+            existing = self._manifest.get(dataset, {})
+            return [day for day in date_range(start_date, end_date) if day not in existing]
+
+    # ------------------------------------------------------------------
+    # 쓰기
+    # ------------------------------------------------------------------
+    def write_partition(self, dataset, day, df, save=True):
+        """일자 파티션 저장 (0건이면 파일 없이 manifest에만 기록 → 재조회 방지)"""
+        path = self.partition_path(dataset, day)
+        rows = 0 if df is None else len(df)
+        if rows > 0:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(path.name + '.tmp')
+            write_cache_parquet(df, tmp_path)
+            tmp_path.replace(path)
+        elif path.exists():
+            path.unlink()
+
+        with self._lock:
+            self._manifest.setdefault(dataset, {})[day] = {
+                'rows': rows,
+                'fetched_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            if save:
+                self._save_manifest()
+        return rows
+
+    def write_frame(self, dataset, df, start_date, end_date):
+        """
+        기간 조회 결과를 BASE_DT 기준 일자 파티션으로 분할 저장
+        - 기간 내 데이터 없는 일자도 0건으로 기록
+        """
+        days = date_range(start_date, end_date)
+        if df is None or df.empty or self.date_col not in df.columns:
+            for day in days:
+                self.write_partition(dataset, day, None, save=False)
+            with self._lock:
+                self._save_manifest()
+            return 0
+
+        # 1회 그룹 분할 (일자별 전체 스캔 없음), 데이터 없는 일자는 0건 파티션
+        day_keys = df[self.date_col].astype(str)
+        wanted = set(days)
+        total = 0
+        outside = 0
+        for day, part in df.groupby(day_keys, sort=False, observed=True):
+            if day not in wanted:
+                outside += len(part)
+                continue
+            total += self.write_partition(dataset, day, part, save=False)
+            wanted.discard(day)
+        for day in sorted(wanted):
+            self.write_partition(dataset, day, None, save=False)
+        with self._lock:
+            self._save_manifest()
+        if outside:
+            logger.warning(f"[캐시] {dataset}: 요청 기간 밖 {self.date_col} {outside:,} 건 저장 제외")
+        return total
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def read(self, dataset, start_date, end_date, columns=None, filters=None):
+        """
+        기간 [start, end]에 해당하는 파티션만 읽어 병합 (없으면 빈 DataFrame)
+        - columns: 필요한 컬럼만 디코딩 (없는 컬럼은 무시)
+        - filters: {컬럼: 값 또는 리스트} → pyarrow 스캔에 push-down
+          (row group 통계로 불필요한 구간 건너뜀)
+        """
+        with self._lock:
+            existing = self._manifest.get(dataset, {})
+            days = [day for day in date_range(start_date, end_date)
+                    if existing.get(day, {}).get('rows', 0) > 0]
+        if not days:
+            return pd.DataFrame()
+
+        paths = [self.partition_path(dataset, day) for day in days]
+        try:
+            schema = _unified_schema(paths)
+            scan_columns = [c for c in columns if c in schema.names] if columns else None
+            expr = _build_filter_expression(schema, self.date_col, start_date, end_date, filters)
+            dataset_scan = ds.dataset([str(path) for path in paths], schema=schema, format='parquet')
+            table = dataset_scan.to_table(columns=scan_columns, filter=expr)
+            df = table.to_pandas()
+        except Exception as e:
+            logger.warning(f"[캐시] {dataset} 스캔 실패 → 파티션별 읽기로 대체: {e}")
+            df = self._read_partitions_fallback(dataset, days, columns, filters)
+
+        logger.info(f"[캐시] {dataset} {start_date} ~ {end_date}: 파티션 {len(paths)}개, {len(df):,} 건 로드")
+        return df
+
+    def _read_partitions_fallback(self, dataset, days, columns=None, filters=None):
+        """파티션 파일 단위 읽기 (손상 파일은 manifest에서 제외 → 다음 ensure 시 재조회)"""
+        dfs = []
+        for day in days:
+            path = self.partition_path(dataset, day)
+            try:
+                df = _apply_filters_pandas(pd.read_parquet(path), filters)
+                if columns:
+                    df = df[[c for c in columns if c in df.columns]]
+                dfs.append(df)
+            except Exception as e:
+                logger.warning(f"[캐시] 파티션 읽기 실패 → manifest에서 제외: {path}: {e}")
+                with self._lock:
+                    self._manifest.get(dataset, {}).pop(day, None)
+                    self._save_manifest()
+        if not dfs:
+            return pd.DataFrame()
+        return pd.concat(dfs, ignore_index=True)
+
+    def ensure(self, dataset, start_date, end_date, fetch_func, split_by_month=True, max_run_days=None):
+        """
+        기간 중 없는 일자만 증분 조회 후 파티션 저장
+        fetch_func(start, end) → DataFrame (None이면 조회 생략, 기록 안 함)
+        반환: 새로 조회한 일자 수
+        """
+        missing = self.missing_dates(dataset, start_date, end_date)
+        if not missing:
+            logger.info(f"[캐시] {dataset} {start_date} ~ {end_date}: 전체 캐시 존재")
+            return 0
+
+        runs = group_runs(missing, split_by_month, max_run_days)
+        logger.info(f"[캐시] {dataset} 조회 계획: 없는 일자 {len(missing)}일 → 조회 {len(runs)}회")
+        fetched_days = 0
+        for run_start, run_end in runs:
+            logger.info(f"[캐시] {dataset} 증분 조회: {run_start} ~ {run_end}")
+            try:
+                df = fetch_func(run_start, run_end)
+            except Exception as e:
+                logger.error(f"[캐시] {dataset} {run_start}-{run_end} 조회 실패: {e}")
+                continue
+            if df is None:
+                continue
+            rows = self.write_frame(dataset, df, run_start, run_end)
+            fetched_days += len(date_range(run_start, run_end))
+            logger.info(f"[캐시] {dataset} {run_start} ~ {run_end} 저장 완료: {rows:,} 건")
+        return fetched_days
+
+    # ------------------------------------------------------------------
+    # 기존 평면 파일 이관
+    # ------------------------------------------------------------------
+    def import_legacy_files(self, dataset):
+        """
+        기존 data_cache/<dataset>_YYYYMM(.DD).parquet 파일을 파티션으로 1회 이관
+        (manifest에 해당 데이터셋이 없을 때만 수행, 원본 파일은 그대로 둠)
+        """
+        with self._lock:
+            if dataset in self._manifest:
+                return 0
+        legacy_files = sorted(self.cache_dir.glob(f"{dataset}_*.parquet"))
+        if not legacy_files:
+            with self._lock:
+                self._manifest.setdefault(dataset, {})
+                self._save_manifest()
+            return 0
+
+        imported = 0
+        # 월별 파일 먼저, 일별 파일이 같은 일자를 덮어씀
+        for file_path in sorted(legacy_files, key=lambda p: len(p.stem.split('_')[-1])):
+            date_part = file_path.stem.split('_')[-1]
+            if not date_part.isdigit() or len(date_part) not in (6, 8):
+                continue
+            try:
+                df = pd.read_parquet(file_path)
+            except Exception as e:
+                logger.warning(f"[캐시 이관] {file_path.name} 읽기 실패 → 건너뜀: {e}")
+                continue
+            if self.date_col not in df.columns:
+                continue
+            day_keys = df[self.date_col].astype(str)
+            for day in sorted(day_keys.unique()):
+                if day.startswith(date_part):
+                    self.write_partition(dataset, day, df[day_keys == day], save=False)
+                    imported += 1
+            logger.info(f"[캐시 이관] {file_path.name} → {dataset} 파티션")
+        with self._lock:
+            self._manifest.setdefault(dataset, {})
+            self._save_manifest()
+        return imported
+
+
+    # ------------------------------------------------------------------
+    # 레이아웃 재작성
+    # ------------------------------------------------------------------
+    def rewrite_partitions(self, dataset):
+        """기존 파티션 파일을 현재 저장 레이아웃(정렬/row group/zstd)으로 재작성"""
+        rewritten = 0
+        for day, info in sorted(self.partitions(dataset).items()):
+            if info.get('rows', 0) <= 0:
+                continue
+            path = self.partition_path(dataset, day)
+            try:
+                df = pd.read_parquet(path)
+                tmp_path = path.with_name(path.name + '.tmp')
+                write_cache_parquet(df, tmp_path)
+                tmp_path.replace(path)
+                rewritten += 1
+            except Exception as e:
+                logger.warning(f"[캐시 재작성] {path} 실패 → 건너뜀: {e}")
+        logger.info(f"[캐시 재작성] {dataset}: 파티션 {rewritten}개 완료")
+        return rewritten
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache(cache_dir=None):
+    """프로세스 공용 캐시 인스턴스 (기본 data_cache)"""
+    global _default_cache
+    if cache_dir is not None:
+        return PartitionedCache(cache_dir)
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PartitionedCache()
+        return _default_cache
+
+
+def load_dataset(dataset, start_date, end_date, columns=None, filters=None):
+    """데이터셋 기간 조회 (컬럼/행 필터 push-down, 기존 평면 캐시 파일은 최초 1회 이관)"""
+    cache = get_cache()
+    cache.import_legacy_files(dataset)
+    return cache.read(dataset, start_date, end_date, columns=columns, filters=filters)
+
+
+def rewrite_cache(datasets=None):
+    """
+    data_cache 전체를 새 레이아웃으로 1회 재작성
+    - 기존 평면 파일(DATA_*_YYYYMM.parquet 등)은 파티션으로 이관 후 재작성
+    """
+    cache = get_cache()
+    if not datasets:
+        legacy_names = {
+            '_'.join(p.stem.split('_')[:-1]) for p in cache.cache_dir.glob("DATA_*_*.parquet")
+        }
+        datasets = sorted(set(cache._manifest.keys()) | legacy_names)
+    for dataset in datasets:
+        cache.import_legacy_files(dataset)
+        cache.rewrite_partitions(dataset)
+
+
+if __name__ == "__main__":
+    # 사용법: python -m modules.cache_manager rewrite [데이터셋명 ...]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if len(sys.argv) < 2 or sys.argv[1] != 'rewrite':
+        print("사용법: python -m modules.cache_manager rewrite [데이터셋명 ...]")
+        sys.exit(1)
+    rewrite_cache(sys.argv[2:])
@@ -0,0 +1,549 @@
+import os
+import time
+import base64
+import struct
+import logging
+from io import BytesIO
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import matplotlib
+matplotlib.use('Agg')  # 화면 출력 없는 렌더링 백엔드 (워커 프로세스 공통)
+import matplotlib.pyplot as plt
+import numpy as np
+from openpyxl.drawing.image import Image as ExcelImage
+
+from config.database import CHART_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def _setup_fonts():
+    """한글 폰트 설정 (report_generator와 동일)"""
+    matplotlib.rcParams['font.family'] = 'Malgun Gothic'  # Windows
+    matplotlib.rcParams['font.size'] = 10
+    matplotlib.rcParams['axes.unicode_minus'] = False  # 마이너스 기호 깨짐 방지
+
+
+_setup_fonts()
+
+
+# =========================================================
+# 차트 유형별 렌더러: spec['data'] → Figure
+# (워커 프로세스로 전달되므로 data는 dict/list/숫자/문자열만 사용)
+# =========================================================
+def _render_yield_panels(data):
+    """3010 수율 4분할 차트 (월/일 실적 막대 + 목표선 + Gap)"""
+    results = data['results']
+    fig, axes = plt.subplots(1, 4, figsize=(16, 4), dpi=300)
+    axes = axes.flatten()
+
+    plot_order = ['Total_RTY', 'Prime_RTY', 'Total_OAY', 'Prime_OAY']
+    titles = ['Total RTY', 'Prime RTY', 'Total OAY', 'Prime OAY']
+
+    for idx, key in enumerate(plot_order):
+        ax = axes[idx]
+        row = results[key]
+
+        # X축: 월, 일
+        x_labels = ['월', '일']
+        x = np.arange(len(x_labels))
+        bar_width = 0.9
+
+        # 월/일 각각 하나의 막대 (실적만), 목표는 점선
+        bar_month = ax.bar(x[0], row['monthly_actual'], bar_width, color='#0000ff')
+        bar_day = ax.bar(x[1], row['daily_actual'], bar_width, color='#ff0000')
+
+        # 목표선 (공통 목표 = 일사업계획)
+        ax.axhline(y=row['daily_plan'], color='black', linestyle='--', linewidth=1.2, label='목표')
+
+        ax.set_xticks(x)
+        ax.set_xticklabels(x_labels, fontsize=15, fontweight='bold')
+        ax.set_xlabel('기간', fontsize=15)
+
+        # Y축 범위
+        all_vals = [row['monthly_actual'], row['daily_actual'], row['daily_plan']]
+        ax.set_ylim(max(90, min(all_vals) - 1.0), max(all_vals) + 3.0)
+        ylim_bottom = ax.get_ylim()[0]
+
+        ax.set_title(titles[idx], fontsize=20, fontweight='bold', pad=14)
+        ax.set_ylabel('수율 (%)', fontsize=15)
+
+        # 막대 내부에 텍스트
+        for bar, value in ((bar_month, row['monthly_actual']), (bar_day, row['daily_actual'])):
+            for rect in bar:
+                pos = (ylim_bottom + rect.get_height()) / 2.0
+                ax.text(rect.get_x() + rect.get_width() / 2., pos,
+                        f'{value:.2f}%', ha='center', va='center',
+                        fontsize=15, fontweight='bold', color='white')
+
+        # Gap 라벨 (막대 위, 색상 구분)
+        for x_pos, gap, base_height in ((x[0], row['monthly_gap'], row['monthly_actual']),
+                                        (x[1], row['daily_gap'], row['daily_actual'])):
+            color = 'blue' if gap >= 0 else 'red'
+            sign = '+' if gap >= 0 else ''
+            ax.text(x_pos, base_height + 0.3, f'{sign}{gap:.2f}%', ha='center', va='bottom',
+                    fontsize=15, fontweight='bold', color=color)
+
+        ax.legend(loc='upper center', ncol=1, frameon=False, fontsize=15, bbox_to_anchor=(0.5, 0.98))
+        ax.grid(axis='y', linestyle='--', alpha=0.7, zorder=0)
+        ax.set_axisbelow(True)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+    fig.tight_layout(pad=1.0)
+    return fig
+
+
+def _render_gap_bar(data):
+    """REJ_GROUP별 Gap 막대 차트 (양수 빨강 / 음수 파랑)"""
+    labels = data['labels']
+    values = data['values']
+    fig = plt.figure(figsize=(10, 6))
+    x = np.arange(len(labels))
+    bars = plt.bar(x, values, color=['#ff0000' if v > 0 else '#0000ff' for v in values], linewidth=1)
+
+    plt.title(data['title'], fontsize=14, fontweight='bold')
+    plt.xlabel('REJ_GROUP', fontsize=14)
+    plt.ylabel('GAP (%)', fontsize=14)
+    plt.xticks(x, labels, rotation=90, ha='right')
+
+    for bar in bars:
+        height = bar.get_height()
+        # 라벨 위치 조정 (양수는 위, 음수는 아래)
+        offset = 0.01 * (1 if height >= 0 else -1)
+        va_pos = 'bottom' if height >= 0 else 'top'
+        plt.text(bar.get_x() + bar.get_width() / 2, height + offset,
+                 f"{height:.2f}%", ha='center', va=va_pos,
+                 fontsize=14, fontweight='bold', color='black')
+
+    plt.ylim(*data.get('ylim', (-0.5, 1.0)))
+    plt.grid(axis='y', linestyle='--', alpha=0.7, zorder=0)
+    fig.tight_layout()
+    return fig
+
+
+def _render_top3_midgroup(data):
+    """REJ_GROUP별 Gap 상위 MID_GROUP Ref/일 비교 (최대 3개, 동일 Y축)"""
+    rows = data['rows']
+    fig, axes = plt.subplots(1, 3, figsize=(15, 4), dpi=300)
+    for i in range(len(rows), 3):
+        axes[i].set_visible(False)
+
+    # 전체 Y축 범위 (0 반드시 포함)
+    all_values = [v for row in rows for v in (row['ref'], row['actual'])]
+    global_min = min(all_values) if all_values else 0
+    global_max = max(all_values) if all_values else 0
+    y_min = min(0, float(global_min) * 0.95)
+    y_max = max(float(global_max) * 1.15, 0.01)
+
+    for i, row in enumerate(rows):
+        ax = axes[i]
+        ref_val = row['ref']
+        actual_val = row['actual']
+        gap_val = actual_val - ref_val
+
+        x_center = 0
+        bar_width = 0.9
+        ref_x = x_center - bar_width / 2
+        daily_x = x_center + bar_width / 2
+
+        bar_ref = ax.bar(ref_x, ref_val, bar_width, color='#0000ff')
+        bar_actual = ax.bar(daily_x, actual_val, bar_width, color='#ff0000')
+
+        ax.set_ylim(y_min, y_max)
+        ax.set_title(f"[{row['name']}]", fontsize=14, fontweight='bold', pad=15)
+        ax.set_xticks([ref_x, daily_x])
+        ax.set_xticklabels(['Ref.', '일'], fontsize=14, fontweight='bold')
+
+        # 막대 라벨 (양수면 위, 음수면 아래)
+        label_offset = 0.01
+        for bar, val in zip([bar_ref, bar_actual], [ref_val, actual_val]):
+            height = bar[0].get_height()
+            va = 'bottom' if height >= 0 else 'top'
+            label_y = height + label_offset if height >= 0 else height - label_offset
+            ax.text(bar[0].get_x() + bar[0].get_width() / 2., label_y, f'{val:.2f}%',
+                    ha='center', va=va, fontsize=15, fontweight='bold', color='black', zorder=4)
+
+        # Gap 라벨 (양수면 막대 위, 음수면 막대 아래)
+        max_val = max(ref_val, actual_val)
+        min_val = min(ref_val, actual_val)
+        if max_val >= 0:
+            gap_y, va_align = max_val * 1.1, 'bottom'
+        else:
+            gap_y, va_align = min_val * 1.1, 'top'
+        gap_color = '#ff0000' if gap_val >= 0 else '#0000ff'
+        ax.text(x_center, gap_y, f'{gap_val:+.2f}%', ha='center', va=va_align,
+                fontsize=15, fontweight='bold', color=gap_color)
+
+        ax.grid(axis='y', linestyle='--', alpha=0.7, zorder=0)
+        ax.set_axisbelow(True)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+    fig.suptitle(data['title'], fontsize=14, fontweight='bold', y=1.02)
+    fig.tight_layout()
+    return fig
+
+
+def _render_ref_daily_panels(data):
+    """
+    RC/HG 보상 차트 (CRET_CD별 Ref/일 막대 + Gap)
+    - style 'group': 그룹별 차트 (Gap +빨강/-파랑, 라벨 간격 2.5%)
+    - style 'total': 전체 차트 (Gap +파랑/-빨강, 라벨 간격 2%)
+    """
+    categories = data['categories']
+    ref = data['ref']
+    daily = data['daily']
+    gaps = data['gap']
+    y_lims = data['y_lims']
+    is_total = data.get('style') == 'total'
+
+    fig, axes = plt.subplots(1, len(categories), figsize=(10, 6), dpi=300)
+    for idx, cret_cd in enumerate(categories):
+        ax = axes[idx]
+        ref_rate = float(ref.get(cret_cd, 0.0))
+        daily_rate = float(daily.get(cret_cd, 0.0))
+        gap = float(gaps.get(cret_cd, 0.0))
+
+        y_min, y_max = y_lims[cret_cd]
+        y_range = y_max - y_min
+        label_offset = y_range * (0.02 if is_total else 0.025)
+        gap_offset = y_range * 0.06
+
+        x_center = 0
+        bar_width = 0.9
+        ref_x = x_center - bar_width / 2
+        daily_x = x_center + bar_width / 2
+
+        ax.bar(ref_x, ref_rate, bar_width, color='#0000ff')
+        ax.bar(daily_x, daily_rate, bar_width, color='#ff0000')
+        ax.set_ylim(y_min, y_max)
+
+        for container, value in zip(ax.containers, (ref_rate, daily_rate)):
+            for rect in container:
+                height = rect.get_height()
+                pos_y = height + label_offset if height >= 0 else height - label_offset
+                va = 'bottom' if height >= 0 else 'top'
+                ax.text(rect.get_x() + rect.get_width() / 2., pos_y, f'{value:.2f}%',
+                        ha='center', va=va, fontsize=15, fontweight='bold', color='black', zorder=4)
+
+        if is_total:
+            gap_y = (max(ref_rate, daily_rate) + label_offset * 3) if (ref_rate >= 0 or daily_rate >= 0) \
+                else (min(ref_rate, daily_rate) - label_offset * 3)
+            va_align = 'bottom' if gap >= 0 else 'top'
+            gap_color = '#0000ff' if gap >= 0 else '#ff0000'
+        else:
+            if ref_rate >= 0 and daily_rate >= 0:
+                gap_y, va_align = max(ref_rate, daily_rate) + gap_offset, 'bottom'
+            elif ref_rate <= 0 and daily_rate <= 0:
+                gap_y, va_align = min(ref_rate, daily_rate) - gap_offset, 'top'
+            else:
+                gap_y = (max(ref_rate, daily_rate) + gap_offset) if gap >= 0 else (min(ref_rate, daily_rate) - gap_offset)
+                va_align = 'bottom' if gap >= 0 else 'top'
+            gap_color = '#ff0000' if gap >= 0 else '#0000ff'
+        sign = '+' if gap >= 0 else ''
+        ax.text(x_center, gap_y, f'{sign}{gap:.2f}%', ha='center', va=va_align,
+                fontsize=15, fontweight='bold', color=gap_color)
+
+        ax.set_xticks([ref_x, daily_x])
+        ax.set_xticklabels(['Ref.', '일'], fontsize=20, fontweight='bold')
+        ax.set_title(cret_cd, fontsize=20, fontweight='bold', pad=10)
+        ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:.1f}%'))
+        ax.tick_params(axis='y', labelsize=14)
+        ax.grid(axis='y', linestyle='--', alpha=0.7)
+        ax.set_axisbelow(True)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+    fig.suptitle(data['title'], fontsize=14, fontweight='bold', y=1.05)
+    fig.tight_layout(pad=0.8)
+    return fig
+
+
+def _render_eqp_trend(data):
+    """장비별 60일 추이: IN_QTY(막대) + LOSS_RATE(선) 이중축"""
+    dates = [datetime.strptime(d, '%Y%m%d') for d in data['dates']]
+    in_qty = np.asarray(data['in_qty'], dtype=float)
+    loss_rate = np.asarray(data['loss_rate'], dtype=float)
+
+    fig = plt.figure(figsize=(12, 6))
+    ax1 = plt.gca()
+
+    # 막대: IN_QTY
+    ax1.bar(dates, in_qty, color='lightgray', alpha=0.7, label='IN_QTY', width=0.8)
+    ax1.set_xlabel('Date', fontsize=12, fontweight='bold')
+    ax1.set_ylabel('IN 수량', color='lightgray', fontsize=12, fontweight='bold')
+    ax1.tick_params(axis='y', labelcolor='lightgray')
+    ax1.set_ylim(0, max(in_qty.max() * 1.5 if len(in_qty) else 0, 4000))
+    ax1.grid(axis='y', linestyle='--', alpha=0.3)
+
+    # 선: LOSS_RATE
+    ax2 = ax1.twinx()
+    ax2.plot(dates, loss_rate, marker='o', linestyle='-', linewidth=2, markersize=4,
+             color='darkred', label='LOSS_RATE')
+    ax2.set_ylabel('불량률(%)', color='darkred', fontsize=12, fontweight='bold')
+    ax2.tick_params(axis='y', labelcolor='darkred')
+    max_rate = loss_rate.max() if len(loss_rate) else 0
+    ax2.set_ylim(0, max(max_rate * 1.5, 0.1) if max_rate > 0 else 1)
+
+    plt.title(data['title'], fontsize=14, fontweight='bold', pad=20)
+
+    lines1, labels1 = ax1.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left', fontsize=10, framealpha=0.9)
+
+    plt.xticks(rotation=45, ha='right')
+    if dates:
+        ax1.set_xlim(dates[0], dates[-1])
+    fig.tight_layout()
+    return fig
+
+
+CHART_RENDERERS = {
+    'yield_panels': _render_yield_panels,
+    'gap_bar': _render_gap_bar,
+    'top3_midgroup': _render_top3_midgroup,
+    'ref_daily_panels': _render_ref_daily_panels,
+    'eqp_trend': _render_eqp_trend,
+}
+
+
+def _png_size(png_bytes):
+    """PNG 헤더(IHDR)에서 (가로, 세로) 픽셀 크기"""
+    if png_bytes[:8] != b'\x89PNG\r\n\x1a\n' or len(png_bytes) < 24:
+        return 0, 0
+    return struct.unpack('>II', png_bytes[16:24])
+
+
+def _write_png(path, png_bytes):
+    """디버그 PNG 저장 (임시파일 → 교체)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(png_bytes)
+    tmp_path.replace(path)
+    return path
+
+
+class ChartImage:
+    """
+    렌더링된 차트 이미지 (메모리 PNG)
+    - png_bytes / base64 / width, height(px)를 Excel, HTML, 메일에서 그대로 재사용
+    - path: 디버그 PNG를 저장한 경우에만 설정
+    """
+
+    def __init__(self, png_bytes, key=None, path=None):
+        self.png_bytes = png_bytes
+        self.key = key
+        self.path = str(path) if path else None
+        self.width, self.height = _png_size(png_bytes)
+        self._base64 = None
+
+    @property
+    def base64(self):
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.png_bytes).decode()
+        return self._base64
+
+    @property
+    def nbytes(self):
+        return len(self.png_bytes)
+
+    def to_excel_image(self, width=None, height=None):
+        """openpyxl Image (메모리 스트림, 파일 I/O 없음)"""
+        img = ExcelImage(BytesIO(self.png_bytes))
+        if width is not None:
+            img.width = width
+        if height is not None:
+            img.height = height
+        return img
+
+    def to_html(self, alt=''):
+        """HTML/메일 본문용 data URI img 태그"""
+        return f'<img src="data:image/png;base64,{self.base64}" alt="{alt}" width="{self.width}" height="{self.height}">'
+
+    def save(self, path=None):
+        """PNG 파일로 저장 (경로 미지정 시 기존 path)"""
+        target = path or self.path
+        if not target:
+            raise ValueError("저장 경로 없음")
+        self.path = str(_write_png(target, self.png_bytes))
+        return self.path
+
+    @classmethod
+    def from_figure(cls, fig, key=None, debug_path=None, **savefig_kwargs):
+        """
+        matplotlib Figure → ChartImage (BytesIO 렌더링)
+        debug_path: CHART_CONFIG['save_debug_png']가 True일 때만 파일로도 저장
+        """
+        kwargs = {'dpi': CHART_CONFIG.get('dpi', 300), 'bbox_inches': 'tight'}
+        kwargs.update(savefig_kwargs)
+        bio = BytesIO()
+        fig.savefig(bio, format='png', **kwargs)
+        image = cls(bio.getvalue(), key=key)
+        if debug_path and CHART_CONFIG.get('save_debug_png', False):
+            image.save(debug_path)
+        return image
+
+    @classmethod
+    def from_file(cls, path, key=None):
+        """기존 PNG 파일 → ChartImage"""
+        return cls(Path(path).read_bytes(), key=key, path=path)
+
+
+def render_chart(spec):
+    """
+    차트 spec 1개 렌더링 → PNG bytes (워커 프로세스에서 실행)
+    spec: {'kind': 렌더러 이름, 'data': dict, 'path': 디버그 저장 경로(차트 식별자), 'savefig': savefig 추가 인자}
+    반환: {'png', 'path'(저장한 경우), 'elapsed', 'error'}
+    """
+    start = time.perf_counter()
+    fig = None
+    try:
+        fig = CHART_RENDERERS[spec['kind']](spec['data'])
+        savefig_kwargs = {'dpi': CHART_CONFIG.get('dpi', 300), 'bbox_inches': 'tight'}
+        savefig_kwargs.update(spec.get('savefig', {}))
+        bio = BytesIO()
+        fig.savefig(bio, format='png', **savefig_kwargs)
+        png_bytes = bio.getvalue()
+
+        saved_path = None
+        if spec.get('path') and CHART_CONFIG.get('save_debug_png', False):
+            saved_path = str(_write_png(spec['path'], png_bytes))
+        return {'png': png_bytes, 'path': saved_path, 'elapsed': time.perf_counter() - start, 'error': None}
+    except Exception as e:
+        return {'png': None, 'path': None, 'elapsed': time.perf_counter() - start, 'error': f"{type(e).__name__}: {e}"}
+    finally:
+        if fig is not None:
+            plt.close(fig)
+
+
+class ChartRenderer:
+    """
+    리포트 차트 병렬 렌더링 (프로세스 풀, Agg 백엔드)
+    - submit(): spec 등록 즉시 워커에서 렌더링 시작 (리포트 계산과 병행)
+    - collect(): 완료 순서대로 on_done(ChartImage) 콜백 호출
+    - get(): 차트 키/경로 → ChartImage (Excel 등에서 PNG bytes 재사용)
+    - 워커 수: CHART_CONFIG['max_workers'] (0이면 CPU 코어 수), parallel=False면 순차 렌더링
+    - 프로세스 풀 사용 불가 시 남은 차트는 현재 프로세스에서 순차 렌더링
+    """
+
+    def __init__(self, max_workers=None, parallel=None):
+        if max_workers is None:
+            max_workers = CHART_CONFIG.get('max_workers', 0)
+        if parallel is None:
+            parallel = CHART_CONFIG.get('parallel', True)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.parallel = parallel and self.max_workers > 1
+        self._executor = None
+        self._pending = []  # 등록 순서대로 {'key', 'spec', 'on_done', 'future', 'superseded'}
+        self._by_path = {}  # 저장 경로 → 마지막 등록 항목
+        self.images = {}  # 차트 키 → ChartImage
+        self._images_by_path = {}  # spec 경로 → ChartImage
+
+    def _get_executor(self):
+        if self._executor is None:
+            try:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            except Exception as e:
+                logger.warning(f"[차트] 프로세스 풀 생성 실패 → 순차 렌더링: {e}")
+                self.parallel = False
+        return self._executor
+
+    def submit(self, key, spec, on_done=None):
+        """
+        차트 spec 등록 (on_done(ChartImage): 렌더링 성공 시 호출)
+        - 같은 경로가 이미 등록된 경우 마지막 등록 spec 우선 (기존 순차 저장과 동일한 결과)
+        """
+        item = {'key': key, 'spec': spec, 'on_done': on_done, 'future': None, 'superseded': False}
+        defer = False
+        previous = self._by_path.get(spec['path'])
+        if previous is not None:
+            previous['superseded'] = True
+            if previous['future'] is not None and not previous['future'].cancel():
+                defer = True  # 이전 렌더링 진행 중 → 완료 후 현재 프로세스에서 렌더링
+        self._by_path[spec['path']] = item
+
+        if self.parallel and not defer:
+            executor = self._get_executor()
+            if executor is not None:
+                try:
+                    item['future'] = executor.submit(render_chart, spec)
+                except Exception as e:
+                    logger.warning(f"[차트] 작업 제출 실패 → 순차 렌더링: {key} ({e})")
+        self._pending.append(item)
+
+    def collect(self):
+        """등록된 모든 차트 렌더링 완료 대기 (완료 순서대로 반영) → {key: ChartImage}"""
+        if not self._pending:
+            return {}
+        start = time.perf_counter()
+        pending, self._pending = self._pending, []
+        self._by_path = {}
+        results = {}
+
+        def _finish(item, result):
+            if result['error']:
+                logger.error(f"[차트] 렌더링 실패: {item['key']} ({result['error']})")
+                return
+            image = ChartImage(result['png'], key=item['key'], path=result['path'])
+            results[item['key']] = image
+            self.images[item['key']] = image
+            self._images_by_path[str(item['spec'].get('path'))] = image
+            if item['on_done'] is not None:
+                try:
+                    item['on_done'](image)
+                except Exception as e:
+                    logger.error(f"[차트] 결과 반영 실패: {item['key']} ({e})")
+
+        futures = {item['future']: item for item in pending if item['future'] is not None}
+        serial = [item for item in pending if item['future'] is None and not item['superseded']]
+
+        for future in as_completed(futures):
+            item = futures[future]
+            if item['superseded']:
+                continue
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                logger.warning(f"[차트] 프로세스 풀 중단 → 순차 렌더링: {item['key']} ({e})")
+                serial.append(item)
+                continue
+            _finish(item, result)
+
+        for item in serial:
+            _finish(item, render_chart(item['spec']))
+
+        self.shutdown()
+        mode = f"병렬 {self.max_workers}개 프로세스" if futures else "순차"
+        total_mb = sum(image.nbytes for image in results.values()) / 1024 ** 2
+        logger.info(f"[차트] {len(results)}/{len(pending)}개 렌더링 완료 ({mode}): "
+                    f"{time.perf_counter() - start:.1f}초, {total_mb:.1f} MB")
+        return results
+
+    def get(self, ref):
+        """
+        차트 참조 → ChartImage (없으면 None)
+        ref: ChartImage / 차트 키 / spec 경로 (렌더링 결과 없고 파일만 있으면 파일에서 로드)
+        """
+        if ref is None or isinstance(ref, ChartImage):
+            return ref
+        ref = str(ref)
+        if ref in self.images:
+            return self.images[ref]
+        if ref in self._images_by_path:
+            return self._images_by_path[ref]
+        if ref.lower().endswith('.png') and Path(ref).exists():
+            image = ChartImage.from_file(ref)
+            self._images_by_path[ref] = image
+            return image
+        return None
+
+    def shutdown(self):
+        """프로세스 풀 종료"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -1,24 +1,155 @@
 import trino
 import pandas as pd
-import json
-import sys
+import pyarrow as pa
+import pyarrow.parquet as pq
 import warnings
 import urllib3
 from datetime import datetime, timedelta 
 import logging
+import threading
+import time
+from fnmatch import fnmatchcase
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 warnings.filterwarnings('ignore', message='Unverified HTTPS request')
 
+from queries.daily_queries import get_query_schema
+from modules.scan_guard import ScanSizeGuard, ScanBudgetExceeded
+from modules.cache_manager import get_cache
+from modules.mid_lookup import assign_mid_group
+
 logger = logging.getLogger(__name__)
 
+# Trino 타입명 → Arrow 타입 (스트리밍 조회 시 배치 단위 변환용)
+_TRINO_TO_ARROW_TYPES = {
+    'boolean': pa.bool_(),
+    'tinyint': pa.int8(),
+    'smallint': pa.int16(),
+    'integer': pa.int32(),
+    'bigint': pa.int64(),
+    'real': pa.float32(),
+    'double': pa.float64(),
+    'decimal': pa.float64(),
+    'varchar': pa.string(),
+    'char': pa.string(),
+    'date': pa.date32(),
+    'timestamp': pa.timestamp('ms'),
+}
+
+
+def _arrow_schema_from_description(description):
+    """cursor.description → Arrow schema (모르는 타입은 string)"""
+    fields = []
+    for desc in description:
+        type_code = str(desc[1] or '').lower()
+        base_type = type_code.split('(')[0].strip()
+        if base_type.startswith('timestamp'):
+            base_type = 'timestamp'
+        fields.append(pa.field(desc[0], _TRINO_TO_ARROW_TYPES.get(base_type, pa.string())))
+    return pa.schema(fields)
+
+
+def _rows_to_record_batch(rows, schema):
+    """fetchmany 결과(tuple 리스트)를 schema 타입의 RecordBatch로 변환"""
+    columns = list(zip(*rows))
+    arrays = []
+    for values, field in zip(columns, schema):
+        try:
+            arr = pa.array(values, type=field.type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError):
+            # Decimal 등 직접 변환 불가 → 문자열 경유 캐스팅
+            arr = pa.array([None if v is None else str(v) for v in values], type=pa.string())
+            arr = arr.cast(field.type, safe=False)
+        arrays.append(arr)
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _resolve_query_entry(entry):
+    """QUERIES_BY_CATALOG 항목 → (쿼리 함수, schema) (함수만 있는 예전 형식도 허용)"""
+    if isinstance(entry, dict):
+        return entry['query'], entry.get('schema', {})
+    return entry, {}
+
+
+def _coerce_column(series, dtype_spec):
+    """선언된 타입으로 단일 컬럼 변환"""
+    if dtype_spec == 'category':
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return series
+        return series.astype('category')
+    if dtype_spec == 'int32':
+        values = pd.to_numeric(series, errors='coerce')
+        # NULL 또는 소수 포함 시 int32 불가 → float64 (float32는 수개월 합산 시 정수 정밀도 손실)
+        if values.isna().any() or not (values == values.round()).all():
+            return values.astype('float64')
+        if len(values) and (values.abs().max() >= 2 ** 31):
+            return values.astype('int64')
+        return values.astype('int32')
+    if dtype_spec in ('float32', 'float64'):
+        return pd.to_numeric(series, errors='coerce').astype(dtype_spec)
+    if dtype_spec.startswith('datetime'):
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        fmt = dtype_spec.split(':', 1)[1] if ':' in dtype_spec else None
+        values = series.astype('string').str.strip()
+        return pd.to_datetime(values, format=fmt, errors='coerce')
+    return series
+
+
+def apply_query_schema(df, schema):
+    """
+    쿼리 결과 DataFrame에 선언된 컬럼 타입을 1회 적용
+    - 수량: int32 (NULL 포함 시 float64), 코드: category, 날짜: datetime64
+    - 변환 실패한 컬럼은 원본 유지 (경고 로그)
+    """
+    if df is None or df.empty or not schema:
+        return df
+    for column in df.columns:
+        dtype_spec = schema.get(column)
+        if dtype_spec is None:
+            dtype_spec = next((spec for pattern, spec in schema.items()
+                               if '*' in pattern and fnmatchcase(column, pattern)), None)
+        if dtype_spec is None:
+            continue
+        try:
+            df[column] = _coerce_column(df[column], dtype_spec)
+        except Exception as e:
+            logger.warning(f"컬럼 타입 변환 실패 ({column} → {dtype_spec}): {e}")
+    return df
+
+
 class TrinoDataLoader:
     def __init__(self, base_config, catalogs_config, query_config):
         self.base_config = base_config
         self.catalogs_config = catalogs_config
         self.query_config = query_config
         self.connections = {}
+        # 병렬 실행용 워커 전용 연결 (스레드별 1개)
+        self._worker_local = threading.local()
+        self._worker_connections = []
+        self._worker_lock = threading.Lock()
+        # 스캔 용량 정책 (EXPLAIN 결과는 data_cache에 캐시)
+        explain_cache_path = Path(__file__).parent.parent / "data_cache" / "explain_cache.json"
+        self.scan_guard = ScanSizeGuard(query_config, cache_path=explain_cache_path)
+
+    def _create_connection(self, catalog_name):
+        """catalog 설정으로 새 Trino 연결 생성 (캐싱 없음)"""
+        catalog_config = self.catalogs_config[catalog_name]
+        return trino.dbapi.connect(
+            host=self.base_config['host'],
+            port=self.base_config['port'],
+            user=self.base_config['user'],
+            http_scheme=self.base_config['http_scheme'],
+            auth=trino.auth.BasicAuthentication(
+                self.base_config['user'],
+                self.base_config['password']
+            ),
+            verify=self.base_config['verify'],
+            catalog=catalog_config['catalog'],
+            schema=catalog_config['schema']
+        )
 
     def connect(self, catalog_name):
         """특정 catalog에 연결"""
@@ -26,26 +157,27 @@ class TrinoDataLoader:
             return self.connections[catalog_name]
         
         try:
-            catalog_config = self.catalogs_config[catalog_name]
-            conn = trino.dbapi.connect(
-                host=self.base_config['host'],
-                port=self.base_config['port'],
-                user=self.base_config['user'],
-                http_scheme=self.base_config['http_scheme'],
-                auth=trino.auth.BasicAuthentication(
-                    self.base_config['user'],
-                    self.base_config['password']
-                ),
-                verify=self.base_config['verify'],
-                catalog=catalog_config['catalog'],
-                schema=catalog_config['schema']
-            )
+            conn = self._create_connection(catalog_name)
             self.connections[catalog_name] = conn
             logger.info(f"Trino 연결 성공: {catalog_name}")
             return conn
         except Exception as e:
             logger.error(f"Trino 연결 실패 ({catalog_name}): {e}")
             raise
+
+    def _worker_connect(self, catalog_name):
+        """워커 스레드 전용 연결 반환 (스레드당 catalog별 1개)"""
+        conns = getattr(self._worker_local, 'conns', None)
+        if conns is None:
+            conns = {}
+            self._worker_local.conns = conns
+        if catalog_name not in conns:
+            conn = self._create_connection(catalog_name)
+            conns[catalog_name] = conn
+            with self._worker_lock:
+                self._worker_connections.append((catalog_name, conn))
+            logger.info(f"Trino 워커 연결 성공: {catalog_name} ({threading.current_thread().name})")
+        return conns[catalog_name]
     
     @staticmethod
     def safe_float(val, default=0.0):
@@ -60,73 +192,202 @@ class TrinoDataLoader:
             except ValueError:
                 return default
         return default
-    
-    def check_data_size_before_query(self, conn, query):
-        """EXPLAIN으로 IO 통계 확인"""
-        explain_query = f"EXPLAIN (TYPE IO, FORMAT JSON) {query}"
-        cur = conn.cursor()
 
+    def fetch_query_as_arrow(self, conn, query, parquet_path=None, collect=True):
+        """
+        쿼리 결과를 fetchmany 배치 단위로 Arrow RecordBatch로 변환해 조회
+        - parquet_path 지정 시 배치마다 parquet에 바로 기록 (임시파일 → 완료 후 교체)
+        - collect=False 이면 결과를 메모리에 모으지 않음 (파일 저장 전용)
+        반환: (pa.Table 또는 None, 총 행 수)
+        """
+        batch_size = int(self.query_config.get('fetch_batch_size', 50000))
+        cur = conn.cursor()
+        writer = None
+        tmp_path = None
+        batches = []
+        total_rows = 0
         try:
-            logger.info("EXPLAIN 쿼리 실행 중... (예상 데이터 스캔 확인)")
-            cur.execute(explain_query)
-            explain_result = cur.fetchall()
-
-            json_str = explain_result[0][0]
-            io_stats = json.loads(json_str)
-
-            input_tables = io_stats.get("inputTableColumnInfos", [])
-            total_input_gb = 0.0
-            
-            logger.info("\n쿼리 예상 스캔 정보 (입력 기준):")
-            for table_info in input_tables:
-                table_name = table_info["table"]["schemaTable"]["table"]
-                estimate = table_info.get("estimate", {})
-                size_bytes = self.safe_float(estimate.get("outputSizeInBytes"), 0)
-                size_gb = size_bytes / (1024 ** 3)
-                total_input_gb += size_gb
-                logger.info(f"  - 테이블: {table_name}")
-                logger.info(f"    예상 스캔 크기: {size_bytes / (1024**2):.2f} MB ({size_gb:.3f} GB)")
-
-            global_estimate = io_stats.get("estimate", {})
-            output_size_bytes = self.safe_float(global_estimate.get("outputSizeInBytes"), float('nan'))
-            output_size_gb = output_size_bytes / (1024 ** 3) if not pd.isna(output_size_bytes) else float('nan')
-
-            logger.info(f"\n총 예상 출력 데이터 크기: "
-                  f"{output_size_bytes / (1024**2):.2f} MB ({output_size_gb:.3f} GB)" 
-                  if not pd.isna(output_size_gb) else "출력 크기 추정 불가")
-
-            max_size = self.query_config.get('max_data_size_gb', 1.0)
-            
-            if pd.isna(output_size_gb) or output_size_gb == float('inf'):
-                logger.warning(f"출력 추정 실패 → 입력 기준 예측 사용: {total_input_gb:.3f} GB")
-                if total_input_gb > max_size:
-                    confirm = input(f"데이터 크기가 {total_input_gb:.3f} GB입니다. 계속 진행하시겠습니까? (y/N): ").strip().lower()
-                    if confirm not in ['y', 'yes']:
-                        logger.info("사용자에 의해 쿼리 취소됨.")
-                        sys.exit(0)
-            else:
-                if output_size_gb > max_size:
-                    confirm = input(f"데이터 크기가 {output_size_gb:.3f} GB입니다. 계속 진행하시겠습니까? (y/N): ").strip().lower()
-                    if confirm not in ['y', 'yes']:
-                        logger.info("사용자에 의해 쿼리 취소됨.")
-                        sys.exit(0)
-
-            logger.info("용량 확인 완료. 실제 쿼리 실행을 시작합니다.")
+            cur.execute(query)
+            # Trino는 첫 데이터 수신 후에 description이 채워지므로 첫 배치 먼저 조회
+            rows = cur.fetchmany(batch_size)
+            schema = _arrow_schema_from_description(cur.description or [])
+
+            if parquet_path is not None:
+                parquet_path = Path(parquet_path)
+                tmp_path = parquet_path.with_name(parquet_path.name + '.tmp')
+                writer = pq.ParquetWriter(str(tmp_path), schema)
+
+            while rows:
+                batch = _rows_to_record_batch(rows, schema)
+                total_rows += batch.num_rows
+                if writer is not None:
+                    writer.write_batch(batch)
+                if collect:
+                    batches.append(batch)
+                rows = cur.fetchmany(batch_size)
+
+            if writer is not None:
+                writer.close()
+                writer = None
+                if total_rows > 0:
+                    tmp_path.replace(parquet_path)
+                else:
+                    tmp_path.unlink(missing_ok=True)
 
-        except Exception as e:
-            logger.error(f"EXPLAIN 분석 중 오류 발생: {e}")
-            confirm = input("EXPLAIN 실패. 그래도 쿼리 실행하시겠습니까? (y/N): ").strip().lower()
-            if confirm not in ['y', 'yes']:
-                logger.info("사용자에 의해 쿼리 취소됨.")
-                sys.exit(0)
+            table = pa.Table.from_batches(batches, schema=schema) if collect else None
+            return table, total_rows
         finally:
+            if writer is not None:
+                writer.close()
+                tmp_path.unlink(missing_ok=True)
             cur.close()
+
+    def fetch_query_as_dataframe(self, conn, query, parquet_path=None):
+        """쿼리 결과를 DataFrame으로 반환 (streaming_fetch 설정에 따라 배치/일괄 조회)"""
+        if not self.query_config.get('streaming_fetch', True):
+            cur = conn.cursor()
+            try:
+                cur.execute(query)
+                rows = cur.fetchall()
+                columns = [desc[0] for desc in cur.description]
+                df = pd.DataFrame(rows, columns=columns)
+            finally:
+                cur.close()
+            if parquet_path is not None and len(df) > 0:
+                df.to_parquet(parquet_path, engine='pyarrow', index=False)
+            return df
+
+        table, _ = self.fetch_query_as_arrow(conn, query, parquet_path=parquet_path)
+        return table.to_pandas()
     
+    def check_data_size_before_query(self, conn, query, query_name=None):
+        """
+        EXPLAIN으로 IO 통계 확인 후 스캔 용량 정책 적용 (프롬프트 없음)
+        반환: 'run' / 'skip' / 'split'  (abort 정책이면 ScanBudgetExceeded 발생)
+        """
+        return self.scan_guard.check(conn, query, query_name)
+
+    def prefetch_scan_estimates(self, queries_by_catalog, target_date):
+        """실행 예정 쿼리 전체의 EXPLAIN을 미리 병렬 수행 (이후 check는 캐시 사용)"""
+        max_workers = int(self.query_config.get('max_parallel_queries', 1) or 1)
+        for catalog_name, queries in queries_by_catalog.items():
+            planned = {}
+            for query_name, query_entry in queries.items():
+                query_func, _ = _resolve_query_entry(query_entry)
+                try:
+                    planned[query_name] = query_func(target_date, self.query_config)
+                except Exception as e:
+                    logger.error(f"{catalog_name}.{query_name} 쿼리 생성 실패: {e}")
+            self.scan_guard.prefetch(lambda: self._worker_connect(catalog_name), planned, max_workers=max_workers)
+
+    def fetch_date_range_guarded(self, conn, query_name, build_query, start_date, end_date, parquet_path=None):
+        """
+        날짜 범위 쿼리를 스캔 정책에 따라 실행
+        - split 정책: 기간을 반으로 나눠 재귀 조회 (1일 단위까지)
+        - skip 정책: None 반환 (부분 기간이 skip되어도 전체 None → 불완전 캐시 방지)
+        build_query: (start_date, end_date) → 쿼리 텍스트
+        """
+        query = build_query(start_date, end_date)
+        action = self.check_data_size_before_query(conn, query, query_name)
+        if action == 'skip':
+            logger.warning(f"[{query_name}] {start_date} \~ {end_date} 조회 생략 (스캔 정책)")
+            return None
+
+        if action == 'split':
+            start_dt = datetime.strptime(start_date, '%Y%m%d')
+            end_dt = datetime.strptime(end_date, '%Y%m%d')
+            if start_dt < end_dt:
+                mid_dt = start_dt + (end_dt - start_dt) // 2
+                ranges = [
+                    (start_date, mid_dt.strftime('%Y%m%d')),
+                    ((mid_dt + timedelta(days=1)).strftime('%Y%m%d'), end_date),
+                ]
+                logger.info(f"[{query_name}] 기간 분할 조회: {ranges}")
+                parts = []
+                for sub_start, sub_end in ranges:
+                    part = self.fetch_date_range_guarded(conn, query_name, build_query, sub_start, sub_end)
+                    if part is None:
+                        return None
+                    parts.append(part)
+                df = pd.concat(parts, ignore_index=True)
+                if parquet_path is not None and len(df) > 0:
+                    df.to_parquet(parquet_path, engine='pyarrow', index=False)
+                return df
+            logger.warning(f"[{query_name}] 1일 이하 기간은 분할 불가 → 그대로 실행")
+
+        return self.fetch_query_as_dataframe(conn, query, parquet_path=parquet_path)
+
+    def range_fetcher(self, query_name, query_func, schema=None):
+        """
+        기간 조회 함수 (start, end) → DataFrame 생성 (PartitionedCache.ensure 용)
+        - 쿼리 빌더에 기간을 직접 전달 (query_func(start, config, end_date=end), 쿼리 텍스트 치환 없음)
+        - 스캔 추정치가 허용 용량을 넘으면 split 정책으로 기간 분할 조회
+        """
+        def build_query(sub_start, sub_end):
+            return query_func(sub_start, self.query_config, end_date=sub_end)
+
+        def fetch_range(range_start, range_end):
+            logger.info(f"[{query_name}] Trino 기간 조회: {range_start} \~ {range_end}")
+            conn = self.connect("oracle")
+            df = self.fetch_date_range_guarded(conn, query_name, build_query, range_start, range_end)
+            if df is None or not schema:
+                return df
+            return apply_query_schema(df, schema)
+
+        return fetch_range
+    
+    def _run_query(self, conn, catalog_name, query_name, query_entry, target_date):
+        """단일 쿼리 실행 → (DataFrame, 소요시간 초)"""
+        query_func, schema = _resolve_query_entry(query_entry)
+        start = time.perf_counter()
+        logger.info(f"{catalog_name}.{query_name} 조회 시작")
+        # 쿼리 생성
+        query = query_func(target_date, self.query_config)
+        # 데이터 크기 체크 (정책)
+        action = self.check_data_size_before_query(conn, query, query_name)
+        if action == 'skip':
+            logger.warning(f"{catalog_name}.{query_name} 조회 생략 (스캔 정책) → 빈 DataFrame")
+            return pd.DataFrame(), time.perf_counter() - start
+        if action == 'split':
+            logger.warning(f"{catalog_name}.{query_name} 날짜 분할 미지원 쿼리 → 그대로 실행")
+        # 실제 쿼리 실행
+        df = self.fetch_query_as_dataframe(conn, query)
+        # 선언된 컬럼 타입 적용 (이후 단계에서 재변환 불필요) + MID_GROUP 1회 부여
+        df = assign_mid_group(apply_query_schema(df, schema))
+        elapsed = time.perf_counter() - start
+        logger.info(f"{catalog_name}.{query_name} 조회 완료: {len(df)} rows, {len(df.columns)} columns ({elapsed:.1f}초)")
+        return df, elapsed
+
+    def _run_query_in_worker(self, catalog_name, query_name, query_entry, target_date):
+        """워커 스레드에서 쿼리 실행 (실패 시 빈 DataFrame, 다른 쿼리에 영향 없음)"""
+        start = time.perf_counter()
+        try:
+            conn = self._worker_connect(catalog_name)
+            return self._run_query(conn, catalog_name, query_name, query_entry, target_date)
+        except ScanBudgetExceeded:
+            raise
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            logger.error(f"{catalog_name}.{query_name} 조회 실패 ({elapsed:.1f}초): {e}")
+            return pd.DataFrame(), elapsed
+
     def fetch_data_by_catalog(self, queries_by_catalog, target_date=None):
-        """Catalog별로 그룹화된 쿼리 실행"""
+        """Catalog별로 그룹화된 쿼리 실행
+
+        QUERY_CONFIG['max_parallel_queries'] > 1 이면 워커 풀에서 동시 실행
+        (워커마다 별도 연결/커서 사용), 1이면 기존처럼 순차 실행
+        """
         if target_date is None:
             target_date = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
         
+        # 실행 전 EXPLAIN 일괄 병렬 조회 (스캔 용량 판단은 이후 캐시 사용)
+        if self.query_config.get('scan_explain_prefetch', True):
+            self.prefetch_scan_estimates(queries_by_catalog, target_date)
+
+        max_workers = int(self.query_config.get('max_parallel_queries', 1) or 1)
+        if max_workers > 1:
+            return self._fetch_data_parallel(queries_by_catalog, target_date, max_workers)
+
         all_data = {}
         
         for catalog_name, queries in queries_by_catalog.items():
@@ -134,32 +395,66 @@ class TrinoDataLoader:
             
             try:
                 conn = self.connect(catalog_name)
-                for query_name, query_func in queries.items():
+                for query_name, query_entry in queries.items():
                     try:
-                        logger.info(f"{catalog_name}.{query_name} 조회 시작")
-                        # 쿼리 생성
-                        query = query_func(target_date, self.query_config)
-                        # 데이터 크기 체크
-                        self.check_data_size_before_query(conn, query)
-                        # 실제 쿼리 실행
-                        cur = conn.cursor()
-                        cur.execute(query)
-                        rows = cur.fetchall()
-                        columns = [desc[0] for desc in cur.description]
-                        df = pd.DataFrame(rows, columns=columns)
+                        df, _ = self._run_query(conn, catalog_name, query_name, query_entry, target_date)
                         all_data[query_name] = df
-                        logger.info(f"{catalog_name}.{query_name} 조회 완료: {len(df)} rows, {len(df.columns)} columns")
-                        cur.close()
+                    except ScanBudgetExceeded:
+                        raise
                     except Exception as e:
                         logger.error(f"{catalog_name}.{query_name} 조회 실패: {e}")
                         all_data[query_name] = pd.DataFrame()
                 logger.info(f"===== {catalog_name} catalog 데이터 조회 완료 =====")
+            except ScanBudgetExceeded:
+                raise
             except Exception as e:
                 logger.error(f"{catalog_name} catalog 처리 중 오류: {e}")
                 for query_name in queries.keys():
                     all_data[query_name] = pd.DataFrame()
         return all_data
-    
+
+    def _fetch_data_parallel(self, queries_by_catalog, target_date, max_workers):
+        """전체 catalog의 쿼리를 제한된 워커 풀에서 동시 실행"""
+        tasks = [
+            (catalog_name, query_name, query_entry)
+            for catalog_name, queries in queries_by_catalog.items()
+            for query_name, query_entry in queries.items()
+        ]
+        workers = min(max_workers, len(tasks)) if tasks else 1
+        logger.info(f"===== 병렬 데이터 조회 시작: {len(tasks)}개 쿼리, 워커 {workers}개 =====")
+
+        results = {}
+        timings = {}
+        wall_start = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='trino')
+        try:
+            futures = {
+                executor.submit(self._run_query_in_worker, catalog_name, query_name, query_entry, target_date):
+                    (catalog_name, query_name)
+                for catalog_name, query_name, query_entry in tasks
+            }
+            for future in as_completed(futures):
+                catalog_name, query_name = futures[future]
+                df, elapsed = future.result()
+                results[query_name] = df
+                timings[f"{catalog_name}.{query_name}"] = elapsed
+        except ScanBudgetExceeded:
+            # abort 정책: 대기 중인 쿼리 취소 후 중단
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+        wall_elapsed = time.perf_counter() - wall_start
+
+        # 쿼리별 소요시간 요약 (느린 순)
+        logger.info("쿼리별 소요시간:")
+        for name, elapsed in sorted(timings.items(), key=lambda x: x[1], reverse=True):
+            logger.info(f"  - {name}: {elapsed:.1f}초")
+        logger.info(f"===== 병렬 데이터 조회 완료: 전체 {wall_elapsed:.1f}초 "
+                    f"(순차 합계 {sum(timings.values()):.1f}초) =====")
+
+        # 원래 쿼리 정의 순서 유지
+        return {query_name: results.get(query_name, pd.DataFrame()) for _, query_name, _ in tasks}
+
     def close_all(self):
         """모든 연결 종료"""
         for catalog_name, conn in self.connections.items():
@@ -170,6 +465,18 @@ class TrinoDataLoader:
                 logger.error(f"연결 종료 실패 ({catalog_name}): {e}")
         self.connections = {}
 
+        # 워커 전용 연결 종료
+        with self._worker_lock:
+            worker_connections, self._worker_connections = self._worker_connections, []
+        for catalog_name, conn in worker_connections:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.error(f"워커 연결 종료 실패 ({catalog_name}): {e}")
+        if worker_connections:
+            logger.info(f"워커 연결 종료: {len(worker_connections)}개")
+        self._worker_local = threading.local()
+
 
     def get_last_3months_date_range(self, target_date_str=None):
         """
@@ -196,330 +503,226 @@ class TrinoDataLoader:
         end_date_str = end_date.strftime('%Y%m%d')
         return start_date_str, end_date_str
 
-def _modify_query_for_date_range(query, start_date, end_date):
+def _get_last_n_months_range(target_dt, n):
+    """현재 월 기준 직전 n개월 전체 기간 리스트 반환 (과거 → 최근)"""
+    months = []
+    current = target_dt
+    for _ in range(n):
+        # 해당 월의 시작일
+        start_of_month = current.replace(day=1)
+        # 종료일: 말일
+        if current.month == 12:
+            end_of_month = start_of_month.replace(year=current.year + 1, month=1) - timedelta(days=1)
+        else:
+            end_of_month = start_of_month.replace(month=current.month + 1) - timedelta(days=1)
+        months.append((
+            start_of_month.strftime('%Y%m%d'),
+            end_of_month.strftime('%Y%m%d')
+        ))
+        # 이전 달로 이동
+        if current.month == 1:
+            current = current.replace(year=current.year - 1, month=12)
+        else:
+            current = current.replace(month=current.month - 1)
+    return months[::-1]
+
+
+def _load_months_cached(self, dataset, query_func, download_month_count, target_date_str=None, fetch_range=None):
     """
-    쿼리 내 BASE_DT = '...' 조건을 BETWEEN 조건으로 변경
+    월 단위 쿼리 결과를 파티션 캐시(dataset=/ym=/dt=)에 증분 저장하고
+    최근 3개월(당월 포함)치만 반환
+    - 캐시에 없는 일자의 연속 구간마다 기간 쿼리 1회 (월 경계에서 나누지 않음)
+    - fetch_range: 기간 조회 함수 (기본: query_func 기간 조회)
     """
-    # 패턴 1: AND A.BASE_DT = '20260204'
-    query = query.replace(
-        f"AND A.BASE_DT = '{start_date}'",
-        f"AND A.BASE_DT BETWEEN '{start_date}' AND '{end_date}'"
-    )
-    # 패턴 2: AND A.BASE_DT = '{target_date}'
-    query = query.replace(
-        "AND A.BASE_DT = '{target_date}'",
-        f"AND A.BASE_DT BETWEEN '{start_date}' AND '{end_date}'"
-    )
-    return query
-
-def load_data_lot_3210_3months_cached(self, target_date_str=None):
-    """
-    DATA_LOT_3210_wafering_300의 직전 7개월치 데이터를 캐싱하고,
-    최근 3개월치만 반환합니다.
-    """
-    from pathlib import Path
-    import pandas as pd
-    from datetime import datetime, timedelta
-
-    # 프로젝트 루트: data_loader.py 기준 상위 2단계
-    PROJECT_ROOT = Path(__file__).parent.parent
-    cache_dir = PROJECT_ROOT / "data_cache"
-    cache_dir.mkdir(exist_ok=True)
-
-    logger.info(f"캐시 디렉토리: {cache_dir.absolute()}")
-
     if target_date_str is None:
         target_date_str = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
     target_dt = datetime.strptime(target_date_str, '%Y%m%d')
 
-    def get_last_n_months_range(n):
-        """현재 월 기준 직전 n개월 전체 기간 리스트 반환"""
-        months = []
-        current = target_dt
-        for _ in range(n):
-            # 해당 월의 시작일
-            start_of_month = current.replace(day=1)
-            # 종료일: 말일
-            if current.month == 12:
-                end_of_month = start_of_month.replace(year=current.year + 1, month=1) - timedelta(days=1)
-            else:
-                end_of_month = start_of_month.replace(month=current.month + 1) - timedelta(days=1)
-            months.append((
-                start_of_month.strftime('%Y%m%d'),
-                end_of_month.strftime('%Y%m%d')
-            ))
-            # 이전 달로 이동
-            if current.month == 1:
-                current = current.replace(year=current.year - 1, month=12)
-            else:
-                current = current.replace(month=current.month - 1)
-        return months[::-1]  # 과거 → 최근 순으로 정렬
-
-    # 1. 전체 다운로드 대상: 직전 7개월
-    download_months = get_last_n_months_range(9)
-    # 2. 최종 사용 대상: 최근 3개월
+    # 1. 전체 다운로드 대상 / 2. 최종 사용 대상: 최근 3개월
+    download_months = _get_last_n_months_range(target_dt, download_month_count)
     use_months = download_months[-3:]
+    download_start = download_months[0][0]
+    use_start = use_months[0][0]
+    # 당월은 기준일까지만 (미래 일자는 조회/기록하지 않음)
+    range_end = min(download_months[-1][1], target_date_str)
 
-    data_frames_all = []  # 전체 다운로드 (7개월)
-    data_frames_used = []  # 실제 반환용 (3개월)
-
-    for start_dt, end_dt in download_months:
-        ym = start_dt[:6]
-        file_path = cache_dir / f"DATA_LOT_3210_wafering_300_{ym}.parquet"
-
-        # (1) 캐시 있으면 로드
-        if file_path.exists():
-            try:
-                logger.info(f"캐시에서 로드: {file_path.name}")
-                df = pd.read_parquet(file_path)
-                logger.info(f"로드 완료: {len(df):,} 건")
-                data_frames_all.append(df)
-                if (start_dt, end_dt) in use_months:
-                    data_frames_used.append(df)
-                continue
-            except Exception as e:
-                logger.warning(f"캐시 파일 손상 또는 읽기 실패: {file_path.name} → 재조회: {e}")
-
-        # (2) 캐시 없으면 Trino에서 조회
-        logger.info(f"Trino에서 조회 중: {start_dt} \~ {end_dt}")
-        try:
-            from queries.daily_queries import DATA_LOT_3210_wafering_300
-            dummy_query = DATA_LOT_3210_wafering_300(start_dt, self.query_config)
-            query = _modify_query_for_date_range(dummy_query, start_dt, end_dt)
-
-            conn = self.connect("oracle")
-            self.check_data_size_before_query(conn, query)
-            cur = conn.cursor()
-            cur.execute(query)
-            rows = cur.fetchall()
-            columns = [desc[0] for desc in cur.description]
-            df = pd.DataFrame(rows, columns=columns)
-            cur.close()
-
-            # 조회 후 캐시 저장
-            df.to_parquet(file_path, engine='pyarrow', index=False)
-            logger.info(f"캐시 저장 완료: {file_path.name} ({len(df):,} 건)")
+    cache = get_cache()
+    cache.import_legacy_files(dataset)
+    logger.info(f"캐시 디렉토리: {cache.cache_dir.absolute()}")
 
-            data_frames_all.append(df)
-            if (start_dt, end_dt) in use_months:
-                data_frames_used.append(df)
-
-        except Exception as e:
-            logger.error(f"{start_dt}-{end_dt} 조회 실패: {e}")
-            continue
+    # 과대 구간은 스캔 추정으로 분할, 결과는 BASE_DT 기준 일자 파티션(ym=/dt=)으로 분할 저장
+    cache.ensure(dataset, download_start, range_end, fetch_range or self.range_fetcher(dataset, query_func),
+                 split_by_month=False)
 
     # 최종 반환: 최근 3개월 데이터만 결합
-    if data_frames_used:
-        combined_df = pd.concat(data_frames_used, ignore_index=True)
-        logger.info(f"최근 3개월 데이터 병합 완료: {len(combined_df):,} 건 (총 7개월 중)")
-        return combined_df
-    else:
+    combined_df = cache.read(dataset, use_start, range_end)
+    if combined_df.empty:
         logger.warning("사용할 3개월 데이터 모두 조회 실패 → 빈 데이터프레임 반환")
-        return pd.DataFrame()
+        return combined_df
 
+    # 병합 후 1회 타입 적용 + MID_GROUP 부여
+    combined_df = assign_mid_group(apply_query_schema(combined_df, get_query_schema(dataset)))
+    logger.info(f"최근 3개월 데이터 병합 완료: {len(combined_df):,} 건 (총 {download_month_count}개월 중)")
+    return combined_df
 
 
-def load_data_waf_3210_3months_cached(self, target_date_str=None):
+def load_data_lot_3210_3months_cached(self, target_date_str=None):
     """
-    DATA_WAF_3210_wafering_300의 직전 7개월치 데이터를 캐싱하고,
+    DATA_LOT_3210_wafering_300의 직전 9개월치 데이터를 캐싱하고,
     최근 3개월치만 반환합니다.
     """
+    from queries.daily_queries import DATA_LOT_3210_wafering_300
+    return _load_months_cached(self, 'DATA_LOT_3210_wafering_300', DATA_LOT_3210_wafering_300, 9, target_date_str)
 
-    # 프로젝트 루트: data_loader.py 기준 상위 2단계
-    PROJECT_ROOT = Path(__file__).parent.parent
-    cache_dir = PROJECT_ROOT / "data_cache"
-    cache_dir.mkdir(exist_ok=True)
-
-    logger.info(f"캐시 디렉토리: {cache_dir.absolute()}")
-
-    if target_date_str is None:
-        target_date_str = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
-    target_dt = datetime.strptime(target_date_str, '%Y%m%d')
-
-    def get_last_n_months_range(n):
-        """현재 월 기준 직전 n개월 전체 기간 리스트 반환"""
-        months = []
-        current = target_dt
-        for _ in range(n):
-            # 해당 월의 시작일
-            start_of_month = current.replace(day=1)
-            # 종료일: 말일
-            if current.month == 12:
-                end_of_month = start_of_month.replace(year=current.year + 1, month=1) - timedelta(days=1)
-            else:
-                end_of_month = start_of_month.replace(month=current.month + 1) - timedelta(days=1)
-            months.append((
-                start_of_month.strftime('%Y%m%d'),
-                end_of_month.strftime('%Y%m%d')
-            ))
-            # 이전 달로 이동
-            if current.month == 1:
-                current = current.replace(year=current.year - 1, month=12)
-            else:
-                current = current.replace(month=current.month - 1)
-        return months[::-1]  # 과거 → 최근 순으로 정렬
-
-    # 1. 전체 다운로드 대상: 직전 7개월
-    download_months = get_last_n_months_range(10)
-    # 2. 최종 사용 대상: 최근 3개월
-    use_months = download_months[-3:]
-
-    data_frames_all = []  # 전체 다운로드 (7개월)
-    data_frames_used = []  # 실제 반환용 (3개월)
-
-    for start_dt, end_dt in download_months:
-        ym = start_dt[:6]
-        file_path = cache_dir / f"DATA_WAF_3210_wafering_300_{ym}.parquet"
-
-        # (1) 캐시 있으면 로드
-        if file_path.exists():
-            try:
-                logger.info(f"캐시에서 로드: {file_path.name}")
-                df = pd.read_parquet(file_path)
-                logger.info(f"로드 완료: {len(df):,} 건")
-                data_frames_all.append(df)
-                if (start_dt, end_dt) in use_months:
-                    data_frames_used.append(df)
-                continue
-            except Exception as e:
-                logger.warning(f"캐시 파일 손상 또는 읽기 실패: {file_path.name} → 재조회: {e}")
-
-        # (2) 캐시 없으면 Trino에서 조회
-        logger.info(f"Trino에서 조회 중: {start_dt} \~ {end_dt}")
-        try:
-            from queries.daily_queries import DATA_WAF_3210_wafering_300
-            dummy_query = DATA_WAF_3210_wafering_300(start_dt, self.query_config)
-            query = _modify_query_for_date_range(dummy_query, start_dt, end_dt)
-
-            conn = self.connect("oracle")
-            self.check_data_size_before_query(conn, query)
-            cur = conn.cursor()
-            cur.execute(query)
-            rows = cur.fetchall()
-            columns = [desc[0] for desc in cur.description]
-            df = pd.DataFrame(rows, columns=columns)
-            cur.close()
-
-            # 조회 후 캐시 저장
-            df.to_parquet(file_path, engine='pyarrow', index=False)
-            logger.info(f"캐시 저장 완료: {file_path.name} ({len(df):,} 건)")
-
-            data_frames_all.append(df)
-            if (start_dt, end_dt) in use_months:
-                data_frames_used.append(df)
 
-        except Exception as e:
-            logger.error(f"{start_dt}-{end_dt} 조회 실패: {e}")
-            continue
-
-    # 최종 반환: 최근 3개월 데이터만 결합
-    if data_frames_used:
-        combined_df = pd.concat(data_frames_used, ignore_index=True)
-        logger.info(f"최근 3개월 데이터 병합 완료: {len(combined_df):,} 건 (총 7개월 중)")
-        # ===================================================================
-        # [추가] 일별 parquet 파일 자동 저장 (Trend 분석용: 전체 데이터 저장)
-        # ===================================================================
-        daily_file_path = cache_dir / f"DATA_WAF_3210_wafering_300_{target_date_str}.parquet"
-        try:
-            if not daily_file_path.exists():
-                if 'BASE_DT' in combined_df.columns:
-                    daily_data = combined_df[combined_df['BASE_DT'] == target_date_str]
-                elif 'base_dt' in combined_df.columns:
-                    daily_data = combined_df[combined_df['base_dt'] == target_date_str]
-                else:
-                    daily_data = combined_df.copy()
-                    logger.warning(f"[Trend 캐시] BASE_DT 컬럼 없음 → 전체 데이터 저장: {daily_file_path.name}")
-
-                if len(daily_data) > 0:
-                    daily_data.to_parquet(daily_file_path, index=False, engine='pyarrow')
-                    logger.info(f"[Trend 캐시 저장] {daily_file_path.name} 생성 완료: {len(daily_data):,} 건")
-                else:
-                    logger.info(f"[Trend 캐시] {daily_file_path.name} → 저장할 데이터 없음 (0건)")
-            else:
-                logger.info(f"[Trend 캐시 존재] {daily_file_path.name} 이미 있음 → 저장 생략")
-        except Exception as e:
-            logger.warning(f"[Trend 캐시 저장 실패] {daily_file_path.name}: {e}")
-
-        return combined_df
-    else:
-        logger.warning("사용할 3개월 데이터 모두 조회 실패 → 빈 데이터프레임 반환")
-        return pd.DataFrame()
+def load_data_waf_3210_3months_cached(self, target_date_str=None):
+    """
+    DATA_WAF_3210_wafering_300의 직전 10개월치 데이터를 캐싱하고,
+    최근 3개월치만 반환합니다.
+    (일별 Trend 분석용 데이터도 같은 일자 파티션으로 저장됨)
+    → 불량 행 기간 조회 + 일자별 공정 이력 조인 (일자별 행 구성은 일일 조회와 동일)
+    """
+    from queries.daily_queries import DATA_WAF_3210_wafering_300
+    return _load_months_cached(self, 'DATA_WAF_3210_wafering_300', DATA_WAF_3210_wafering_300, 10, target_date_str,
+                               fetch_range=_waf_detail_range_fetcher(self, get_cache()))
 
 
 def load_data_waf_3210_date_range(self, start_date: str, end_date: str):
     """
     특정 날짜 범위 (YYYYMMDD \~ YYYYMMDD) 에 대해 
     DATA_WAF_3210_wafering_300 데이터를 일별로 조회하고, 
-    data_cache 폴더에 각각 저장합니다.
+    data_cache 파티션(dataset=/ym=/dt=)에 각각 저장합니다.
     
     예: load_data_waf_3210_date_range('20260301', '20260303')
-    → 3/1, 3/2, 3/3 데이터 각각 저장
-    """
-    # 프로젝트 루트 및 캐시 디렉토리
-    PROJECT_ROOT = Path(__file__).parent.parent
-    cache_dir = PROJECT_ROOT / "data_cache"
-    cache_dir.mkdir(exist_ok=True)
+    → 3/1, 3/2, 3/3 데이터 각각 저장 (이미 있는 일자는 건너뜀)
 
+    - 공정 이력 스냅샷을 기간 전체에 대해 먼저 1회 보충 → 일자별 불량 조회는 워커 풀에서 병렬
+    - 완료 일자는 즉시 manifest에 기록 (중단 후 재실행 시 남은 일자만), 실패 일자는 상태 파일에 기록
+    반환: 백필 결과 {'done', 'skipped', 'failed', 'rows', 'elapsed_sec'}
+    """
     logger.info(f"[일별 데이터 저장] 기간: {start_date} \~ {end_date}")
     
     # 날짜 파싱
     try:
-        start_dt = datetime.strptime(start_date, '%Y%m%d')
-        end_dt = datetime.strptime(end_date, '%Y%m%d')
+        datetime.strptime(start_date, '%Y%m%d')
+        datetime.strptime(end_date, '%Y%m%d')
     except ValueError as e:
         logger.error(f"날짜 형식 오류. YYYYMMDD 형식이어야 함: {start_date}, {end_date}")
         raise e
 
-    # 쿼리 로드
-    from queries.daily_queries import DATA_WAF_3210_wafering_300
+    # 쿼리 로드: 불량 행만 Trino 조회, 공정 이력은 로컬 스냅샷(일자별 1회 조회)과 조인
+    from queries.daily_queries import DATA_WAF_3210_wafering_300_faults, DATA_WAFOPER_history_300
+    from modules.wafoper_history import WaferHistorySnapshot, HISTORY_DATASET
+    from modules.backfill import DateRangeBackfill
+    from config.database import BACKFILL_CONFIG
+    dataset = 'DATA_WAF_3210_wafering_300'
 
-    # 날짜별 순차 처리
-    current_dt = start_dt
-    while current_dt <= end_dt:
-        target_date_str = current_dt.strftime('%Y%m%d')
-        daily_file_path = cache_dir / f"DATA_WAF_3210_wafering_300_{target_date_str}.parquet"
+    cache = get_cache()
+    cache.import_legacy_files(dataset)
+    history = WaferHistorySnapshot(cache)
 
-        # (1) 파일 존재 여부 확인 → 있으면 건너뜀
-        if daily_file_path.exists():
-            logger.info(f"[SKIP] 이미 존재함: {daily_file_path.name}")
-            current_dt += timedelta(days=1)
-            continue
+    fetch_history = self.range_fetcher(HISTORY_DATASET, DATA_WAFOPER_history_300)
 
-        # (2) 쿼리 생성 (BASE_DT 기준)
-        try:
-            logger.info(f"[조회 중] {target_date_str} 데이터")
-            query = DATA_WAF_3210_wafering_300(target_date_str, self.query_config)
+    # 대상 일자가 있을 때만 이력 보충 (워커 간 중복 조회 방지를 위해 선행)
+    if cache.missing_dates(dataset, start_date, end_date):
+        new_days = history.ensure_range(start_date, end_date, fetch_history)
+        logger.info(f"[공정 이력] 신규 {new_days}일 조회")
 
-            # 연결 및 실행
-            conn = self.connect("oracle")
-            self.check_data_size_before_query(conn, query)
-            cur = conn.cursor()
-            cur.execute(query)
-            rows = cur.fetchall()
-            columns = [desc[0] for desc in cur.description]
-            df = pd.DataFrame(rows, columns=columns)
-            cur.close()
+    def fetch_day(target_date_str):
+        missing_history = history.missing_days(target_date_str)
+        if missing_history:
+            raise RuntimeError(f"공정 이력 누락 {len(missing_history)}일 ({missing_history[0]} ~ {missing_history[-1]})")
 
-            if df.empty:
-                logger.warning(f"[경고] {target_date_str} 데이터 없음 → 빈 파일 저장 안 함")
-                current_dt += timedelta(days=1)
-                continue
+        query = DATA_WAF_3210_wafering_300_faults(target_date_str, self.query_config)
+        conn = self._worker_connect("oracle")
+        action = self.check_data_size_before_query(conn, query, dataset)
+        if action == 'skip':
+            logger.warning(f"[SKIP] {target_date_str} 조회 생략 (스캔 정책)")
+            return None
+        return history.attach(self.fetch_query_as_dataframe(conn, query), target_date_str)
 
-            # (3) parquet 파일 저장
-            df.to_parquet(daily_file_path, index=False, engine='pyarrow')
-            logger.info(f"[저장 완료] {daily_file_path.name} → {len(df):,} 건")
+    backfill = DateRangeBackfill(cache, dataset, fetch_day, **BACKFILL_CONFIG)
+    result = backfill.run(start_date, end_date)
 
-        except Exception as e:
-            logger.error(f"[실패] {target_date_str} 처리 중 오류: {e}")
-            # 실패해도 다음 날로 진행
+    logger.info(f"[완료] {start_date} \~ {end_date} 기간 데이터 저장 완료 (신규 {len(result['done'])}일)")
+    return result
+
+
+def _waf_detail_range_fetcher(self, cache):
+    """
+    DATA_WAF_3210_wafering_300 기간 조회 함수 (start, end) → DataFrame (PartitionedCache.ensure 용)
+    - 불량 행만 기간 쿼리 1회 (DATA_WAF_3210_wafering_300_faults, 스캔 추정 초과 시 split 분할)
+    - 공정 이력은 로컬 WAFOPER 스냅샷에서 일자별 조인 → 일자별 행 구성이 상세 쿼리 1일 조회와 동일
+      (상세 쿼리 기간 조회는 이력 기간이 합집합으로 넓어져 앞쪽 일자에 이후 공정 장비가 붙음)
+    """
+    from queries.daily_queries import DATA_WAF_3210_wafering_300_faults, DATA_WAFOPER_history_300
+    from modules.wafoper_history import WaferHistorySnapshot, HISTORY_DATASET
+
+    history = WaferHistorySnapshot(cache)
+    fetch_history = self.range_fetcher(HISTORY_DATASET, DATA_WAFOPER_history_300)
+    fetch_faults = self.range_fetcher('DATA_WAF_3210_wafering_300', DATA_WAF_3210_wafering_300_faults)
+
+    def fetch_range(range_start, range_end):
+        history.ensure_range(range_start, range_end, fetch_history)
+        missing_history = history.missing_range_days(range_start, range_end)
+        if missing_history:
+            raise RuntimeError(f"공정 이력 누락 {len(missing_history)}일 ({missing_history[0]} ~ {missing_history[-1]})")
+
+        faults = fetch_faults(range_start, range_end)
+        if faults is None or faults.empty or 'BASE_DT' not in faults.columns:
+            return faults
+        parts = [history.attach(part, day)
+                 for day, part in faults.groupby(faults['BASE_DT'].astype(str), sort=True)]
+        return pd.concat(parts, ignore_index=True)
+
+    return fetch_range
+
+
+def load_3210_aggregates(self, target_date_str=None):
+    """
+    Ref용 일별 집계(AGG_LOT_3210_daily / AGG_WAF_3210_daily_v2) 보충
+    - 직전 n개월(당월 제외) 중 원본 캐시에도 집계에도 없는 일자만 조회
+    - LOT: 서버 집계 쿼리 (상세 lot 행은 전송하지 않음, GROUP BY 결과 cube만)
+    - WAF: 불량 행 기간 조회 + 로컬 공정 이력 조인 (일자별 30일 이력 재스캔 없음)
+      → 원본 파티션도 함께 저장 (월 캐시 / Trend 재조회 없음) 후 로컬 집계
+    """
+    from queries.daily_queries import AGGREGATE_QUERIES
+    from modules.aggregate_store import get_aggregate_store, AGGREGATES, WAF_DAILY
+
+    if target_date_str is None:
+        target_date_str = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
+    target_dt = datetime.strptime(target_date_str, '%Y%m%d')
+    range_end = (target_dt.replace(day=1) - timedelta(days=1)).strftime('%Y%m%d')
+    store = get_aggregate_store()
+
+    fetched = {}
+    for name, entry in AGGREGATE_QUERIES.items():
+        query_func, schema = _resolve_query_entry(entry)
+        range_start = _get_last_n_months_range(target_dt, AGGREGATES[name]['ref_months'] + 1)[0][0]
+        fetch_range = self.range_fetcher(name, query_func, schema)
+        fetched[name] = store.ensure_remote(name, range_start, range_end, fetch_range)
+        logger.info(f"[서버 집계] {name} {range_start} \~ {range_end}: 신규 {fetched[name]}일")
+
+    waf_dataset = AGGREGATES[WAF_DAILY]['source']
+    cache = get_cache()
+    cache.import_legacy_files(waf_dataset)
+    fetch_detail = _waf_detail_range_fetcher(self, cache)
+
+    def fetch_waf(range_start, range_end):
+        df = fetch_detail(range_start, range_end)
+        if df is not None:
+            cache.write_frame(waf_dataset, df, range_start, range_end)
+        return df
 
-        # 다음 날짜
-        current_dt += timedelta(days=1)
+    range_start = _get_last_n_months_range(target_dt, AGGREGATES[WAF_DAILY]['ref_months'] + 1)[0][0]
+    fetched[WAF_DAILY] = store.ensure_remote(WAF_DAILY, range_start, range_end, fetch_waf)
+    logger.info(f"[로컬 집계] {WAF_DAILY} {range_start} \~ {range_end}: 신규 {fetched[WAF_DAILY]}일")
+    return fetched
 
-    logger.info(f"[완료] {start_date} \~ {end_date} 기간 데이터 저장 완료")
 
 
 # 메서드 바인딩
 TrinoDataLoader.load_data_lot_3210_3months_cached = load_data_lot_3210_3months_cached
 TrinoDataLoader.load_data_waf_3210_3months_cached = load_data_waf_3210_3months_cached
 TrinoDataLoader.load_data_waf_3210_date_range = load_data_waf_3210_date_range
+TrinoDataLoader.load_3210_aggregates = load_3210_aggregates
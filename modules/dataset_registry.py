@@ -0,0 +1,183 @@
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from config.database import CACHE_CONFIG
+from modules.cache_manager import load_dataset, _apply_filters_pandas
+
+logger = logging.getLogger(__name__)
+
+
+def _freeze_filters(filters):
+    """필터 dict → 비교 가능한 키 (리스트 값은 정렬 튜플)"""
+    if not filters:
+        return ()
+    frozen = []
+    for column, value in filters.items():
+        if isinstance(value, (list, tuple, set)):
+            value = tuple(sorted(value))
+        frozen.append((column, value))
+    return tuple(sorted(frozen))
+
+
+def _shift_day(day, days):
+    """YYYYMMDD 문자열 일자 이동"""
+    return (datetime.strptime(day, '%Y%m%d') + timedelta(days=days)).strftime('%Y%m%d')
+
+
+class _Entry:
+    """레지스트리 항목: 하나의 (데이터셋, 컬럼, 필터) 조합으로 로드된 연속 기간 프레임"""
+
+    def __init__(self, dataset, columns, filters, start_date, end_date, frame, derived):
+        self.dataset = dataset
+        self.columns = columns          # None = 전체 컬럼
+        self.filters = filters          # _freeze_filters 결과
+        self.start_date = start_date
+        self.end_date = end_date
+        self.frame = frame
+        self.derived = derived          # 로드 시 보강(enrich)으로 추가된 컬럼
+        self.nbytes = int(frame.memory_usage(deep=True).sum()) if not frame.empty else 0
+
+    def covers(self, start_date, end_date):
+        return self.start_date <= start_date and end_date <= self.end_date
+
+    def can_serve(self, columns, filters):
+        """요청 컬럼 ⊆ 항목 컬럼, 항목 필터 ⊆ 요청 필터 → 메모리에서 잘라서 제공 가능"""
+        if self.columns is not None:
+            if columns is None or not set(columns) <= set(self.columns):
+                return False
+        return set(self.filters) <= set(filters)
+
+
+class DatasetRegistry:
+    """
+    리포트 1회 실행 범위의 데이터셋 메모리 캐시
+    - 동일 데이터셋/기간은 파티션 캐시에서 1회만 로드 → 이후 요청은 기간 slice/필터로 제공
+    - 로드 시점에 enrich(예: PRODUCT_TYPE 병합) 1회 적용
+    - 총 메모리 max_bytes 초과 시 오래 사용되지 않은 항목부터 제거 (LRU)
+    - 반환 프레임은 공유 데이터이므로 호출측에서 직접 수정하지 않음 (수정 필요 시 copy)
+    """
+
+    def __init__(self, enrich=None, max_bytes=None, date_col='BASE_DT', loader=load_dataset):
+        if max_bytes is None:
+            max_bytes = int(CACHE_CONFIG.get('registry_max_mb', 2048) * 1024 ** 2)
+        self.enrich = enrich
+        self.max_bytes = max_bytes
+        self.date_col = date_col
+        self.loader = loader
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.loads = 0
+
+    # ------------------------------------------------------------------
+    # 로드
+    # ------------------------------------------------------------------
+    def _load(self, dataset, start_date, end_date, columns, filters):
+        """파티션 캐시에서 로드 → 날짜 정렬 → enrich 적용"""
+        self.loads += 1
+        scan_filters = {column: list(value) if isinstance(value, tuple) else value
+                        for column, value in filters} if filters else None
+        df = self.loader(dataset, start_date, end_date, columns=list(columns) if columns else None,
+                         filters=scan_filters)
+        if not df.empty and self.date_col in df.columns and not df[self.date_col].is_monotonic_increasing:
+            df = df.sort_values(self.date_col, kind='stable')
+        df = df.reset_index(drop=True)
+        if self.enrich is not None and not df.empty:
+            df = self.enrich(df)
+        return df
+
+    def _extend(self, entry, start_date, end_date):
+        """기존 항목 기간 밖 구간만 추가 로드하여 이어붙임"""
+        pieces = []
+        if start_date < entry.start_date:
+            pieces.append(self._load(entry.dataset, start_date, _shift_day(entry.start_date, -1),
+                                     entry.columns, entry.filters))
+        pieces.append(entry.frame)
+        if end_date > entry.end_date:
+            pieces.append(self._load(entry.dataset, _shift_day(entry.end_date, 1), end_date,
+                                     entry.columns, entry.filters))
+        pieces = [p for p in pieces if not p.empty]
+        frame = pd.concat(pieces, ignore_index=True) if pieces else pd.DataFrame()
+        return _Entry(entry.dataset, entry.columns, entry.filters,
+                      min(start_date, entry.start_date), max(end_date, entry.end_date),
+                      frame, entry.derived)
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def _slice(self, entry, start_date, end_date, columns, filters):
+        """항목 프레임에서 기간 slice (정렬된 날짜 기준 위치 slice) + 잔여 필터 + 컬럼 선택"""
+        df = entry.frame
+        if df.empty:
+            return df
+        if self.date_col in df.columns and (start_date > entry.start_date or end_date < entry.end_date):
+            dates = df[self.date_col].astype(str).to_numpy()
+            lo = dates.searchsorted(start_date, side='left')
+            hi = dates.searchsorted(end_date, side='right')
+            df = df.iloc[lo:hi]
+        remaining = {column: value for column, value in filters if (column, value) not in entry.filters}
+        if remaining:
+            df = _apply_filters_pandas(df, remaining)
+        if columns is not None and entry.columns != columns:
+            keep = [c for c in columns if c in df.columns]
+            keep += [c for c in entry.derived if c not in keep]
+            df = df[keep]
+        return df
+
+    def get(self, dataset, start_date, end_date, columns=None, filters=None):
+        """
+        데이터셋 기간 조회 (load_dataset과 동일한 인자)
+        - 메모리 항목 중 기간/컬럼/필터를 만족하는 항목이 있으면 slice 제공
+        - 같은 조합 항목이 기간만 부족하면 부족한 구간만 추가 로드
+        - 없으면 로드 후 등록
+        """
+        columns = tuple(columns) if columns else None
+        frozen = _freeze_filters(filters)
+        key = (dataset, columns, frozen)
+
+        with self._lock:
+            for entry_key, entry in self._entries.items():
+                if entry.dataset == dataset and entry.covers(start_date, end_date) \
+                        and entry.can_serve(columns, frozen):
+                    self._entries.move_to_end(entry_key)
+                    self.hits += 1
+                    logger.info(f"[레지스트리] {dataset} {start_date} ~ {end_date}: 메모리 재사용")
+                    return self._slice(entry, start_date, end_date, columns, frozen)
+
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                entry = self._extend(entry, start_date, end_date)
+            else:
+                frame = self._load(dataset, start_date, end_date, columns, frozen)
+                raw_columns = set(columns) if columns else set()
+                derived = tuple(c for c in frame.columns if columns and c not in raw_columns)
+                entry = _Entry(dataset, columns, frozen, start_date, end_date, frame, derived)
+
+            self._entries[key] = entry
+            self._evict()
+            return self._slice(entry, start_date, end_date, columns, frozen)
+
+    def _evict(self):
+        """총 메모리 한도 초과 시 LRU 순서로 제거 (최근 항목 1개는 유지)"""
+        total = sum(entry.nbytes for entry in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            total -= entry.nbytes
+            logger.info(f"[레지스트리] 메모리 한도 초과 → 제거: {entry.dataset} "
+                        f"{entry.start_date} ~ {entry.end_date} ({entry.nbytes / 1024 ** 2:.1f} MB)")
+
+    def clear(self):
+        """전체 항목 해제"""
+        with self._lock:
+            self._entries.clear()
+
+    def summary(self):
+        """적재 현황 문자열 (로그용)"""
+        with self._lock:
+            total = sum(entry.nbytes for entry in self._entries.values())
+            return (f"항목 {len(self._entries)}개, {total / 1024 ** 2:.1f} MB, "
+                    f"로드 {self.loads}회, 재사용 {self.hits}회")
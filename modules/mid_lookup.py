@@ -0,0 +1,80 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from config.mappings import REJ_GROUP_TO_MID_MAPPING
+
+logger = logging.getLogger(__name__)
+
+
+def _compile(mapping):
+    """
+    REJ_GROUP별 {AFT_BAD_RSN_CD: MID_GROUP} → (코드 Index, MID 위치 배열) 1회 변환
+    - MID 위치는 MID_CATEGORIES 기준 정수
+    """
+    categories = pd.Index(sorted({mid for codes in mapping.values() for mid in codes.values()}))
+    compiled = {}
+    for rej_group, codes in mapping.items():
+        if not codes:
+            continue
+        compiled[rej_group] = (pd.Index(list(codes.keys())),
+                               categories.get_indexer(list(codes.values())))
+    return categories, compiled
+
+
+# 모듈 로드 시 1회 컴파일
+MID_CATEGORIES, _COMPILED = _compile(REJ_GROUP_TO_MID_MAPPING)
+
+
+def _as_category(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    return series.astype('category')
+
+
+def mid_group_codes(rej_group, bad_rsn_cd):
+    """
+    (REJ_GROUP, AFT_BAD_RSN_CD) → MID_GROUP Categorical
+    - 매핑 테이블은 (REJ_GROUP 범주 × 코드 범주) 크기로만 구성 → 행 단위는 정수 take 1회
+    - 매핑 없는 코드는 코드 값 그대로, 코드 결측은 결측 유지 (기존 map + fillna 와 동일)
+    """
+    rej = _as_category(rej_group)
+    code = _as_category(bad_rsn_cd)
+    rej_cats = rej.cat.categories
+    code_cats = code.cat.categories
+
+    # 결과 범주: 매핑 MID + 원본 코드 (매핑 없는 코드 fallback)
+    categories = MID_CATEGORIES.append(pd.Index(code_cats.astype(object))).unique()
+    fallback = categories.get_indexer(code_cats.astype(object))
+
+    # 마지막 행/열 = REJ_GROUP 결측 / 코드 결측 (cat.codes -1 이 그대로 가리킴)
+    table = np.empty((len(rej_cats) + 1, len(code_cats) + 1), dtype=np.int64)
+    table[:, :-1] = fallback
+    table[:, -1] = -1
+    for i, name in enumerate(rej_cats):
+        compiled = _COMPILED.get(name)
+        if compiled is None:
+            continue
+        mapped_codes, mid_positions = compiled
+        positions = code_cats.get_indexer(mapped_codes)
+        found = positions >= 0
+        table[i, positions[found]] = mid_positions[found]
+
+    out = table[rej.cat.codes.to_numpy(), code.cat.codes.to_numpy()]
+    return pd.Categorical.from_codes(out, categories=categories).remove_unused_categories()
+
+
+def assign_mid_group(df):
+    """
+    로드 시점 MID_GROUP 일괄 부여 (전체 REJ_GROUP 1회, categorical 컬럼)
+    - REJ_GROUP / AFT_BAD_RSN_CD 컬럼이 없으면 그대로 반환
+    - df 를 직접 수정 (로드 직후 소유 프레임 대상)
+    """
+    if df is None or df.empty or 'REJ_GROUP' not in df.columns or 'AFT_BAD_RSN_CD' not in df.columns:
+        return df
+    try:
+        df['MID_GROUP'] = mid_group_codes(df['REJ_GROUP'], df['AFT_BAD_RSN_CD'])
+    except Exception as e:
+        logger.warning(f"MID_GROUP 부여 실패: {e}")
+    return df
@@ -0,0 +1,160 @@
+import logging
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from modules.cache_manager import DEFAULT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+MS6_CSV_PATH = PROJECT_ROOT / "queries" / "MS6.csv"
+MS6_INDEX_PATH = DEFAULT_CACHE_DIR / "ms6_index.arrow"
+
+UNKNOWN = 'Unknown'
+# 제품 그룹화: [P]SEC F3 & [P]SEC UB → '[P]SEC F3/UB'
+PRODUCT_TYPE_GROUPS = {'[P]SEC F3': '[P]SEC F3/UB', '[P]SEC UB': '[P]SEC F3/UB'}
+
+
+def _source_stamp(path):
+    """원본 CSV 변경 감지용 (mtime, size) 문자열 (없으면 빈 문자열)"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return ''
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _as_codes(values):
+    """Series → (정수 코드, 고유값 Index) (categorical이면 범주 그대로, 결측은 -1)"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, uniques = pd.factorize(values)
+    return codes, pd.Index(uniques)
+
+
+def group_product_type(values):
+    """
+    PRODUCT_TYPE 그룹화 (결측 → 'Unknown', [P]SEC F3/UB 병합)
+    - 행 단위 apply 대신 고유값에서만 변환 후 코드 take → categorical
+    """
+    codes, uniques = _as_codes(values)
+    labels = [PRODUCT_TYPE_GROUPS.get(str(v).strip(), str(v).strip()) for v in uniques]
+    categories = pd.Index(pd.unique(np.array(labels + [UNKNOWN], dtype=object)))
+    lookup = np.append(categories.get_indexer(labels), categories.get_loc(UNKNOWN))
+    grouped = pd.Categorical.from_codes(lookup[codes], categories=categories)
+    return pd.Series(grouped, index=values.index, name=values.name).cat.remove_unused_categories()
+
+
+class ProductIndex:
+    """
+    MS6(제품ID 앞 6자리) → 제품1(PRODUCT_TYPE) 인덱스
+    - MS6.csv 파싱은 원본 변경 시에만 수행, 결과는 Arrow IPC 파일로 저장 → 이후 실행은 바이너리 로드
+    - 적용은 PROD_ID 고유값 단위 조회 + 코드 take (행 단위 문자열 처리/dict map 없음)
+    """
+
+    def __init__(self, ms6, products):
+        self.keys = pd.Index(ms6)
+        self.categories = pd.Index([UNKNOWN] + sorted(set(products) - {UNKNOWN}))
+        self.codes = self.categories.get_indexer(products)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_csv(cls, path):
+        """MS6.csv 파싱 (utf-8 실패 시 cp949), 중복 MS6는 마지막 값 사용"""
+        try:
+            df = pd.read_csv(path, dtype=str, encoding="utf-8")
+        except UnicodeDecodeError:
+            df = pd.read_csv(path, dtype=str, encoding="cp949")
+        if "MS6" not in df.columns or "제품1" not in df.columns:
+            logger.warning(f"MS6.csv 컬럼 없음 (MS6, 제품1): {path}")
+            return cls([], [])
+        df = df.dropna(subset=["MS6", "제품1"])
+        df = pd.DataFrame({'MS6': df["MS6"].astype(str).str.strip(),
+                           'PRODUCT': df["제품1"].astype(str).str.strip()})
+        df = df.drop_duplicates('MS6', keep='last')
+        return cls(df['MS6'].tolist(), df['PRODUCT'].tolist())
+
+    @classmethod
+    def from_binary(cls, path):
+        table = feather.read_table(path)
+        return cls(table.column('MS6').to_pylist(), table.column('PRODUCT').to_pylist())
+
+    def save(self, path, source_stamp=''):
+        """Arrow IPC (zstd) 저장, 원본 CSV stamp는 schema metadata에 기록"""
+        table = pa.table({
+            'MS6': pa.array(self.keys.astype(str).tolist(), type=pa.string()),
+            'PRODUCT': pa.DictionaryArray.from_arrays(
+                pa.array(self.codes, type=pa.int32()),
+                pa.array(self.categories.tolist(), type=pa.string())),
+        }).replace_schema_metadata({'source_stamp': source_stamp})
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        feather.write_feather(table, tmp_path, compression='zstd')
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, csv_path=MS6_CSV_PATH, index_path=MS6_INDEX_PATH):
+        """
+        바이너리 인덱스 우선 로드 (원본 CSV가 바뀌었으면 재생성)
+        - CSV가 없으면 기존 바이너리 사용, 둘 다 없으면 빈 인덱스
+        """
+        stamp = _source_stamp(csv_path)
+        if index_path.exists():
+            try:
+                metadata = feather.read_table(index_path, columns=[]).schema.metadata or {}
+                saved_stamp = metadata.get(b'source_stamp', b'').decode()
+                if not stamp or saved_stamp == stamp:
+                    return cls.from_binary(index_path)
+            except Exception as e:
+                logger.warning(f"MS6 인덱스 로드 실패 → CSV 재파싱: {e}")
+        if not stamp:
+            logger.warning(f"MS6.csv 없음: {csv_path} → PRODUCT_TYPE 'Unknown'")
+            return cls([], [])
+
+        index = cls.from_csv(csv_path)
+        try:
+            index.save(index_path, stamp)
+            logger.info(f"MS6 인덱스 저장: {index_path} ({len(index)}건)")
+        except Exception as e:
+            logger.warning(f"MS6 인덱스 저장 실패: {e}")
+        return index
+
+    def product_type(self, prod_id):
+        """
+        PROD_ID → (MS6, PRODUCT_TYPE) Categorical
+        - PROD_ID 고유값에서만 앞 6자리 추출/조회, 행 단위는 정수 take
+        """
+        codes, uniques = _as_codes(prod_id)
+        ms6 = pd.Index(uniques.astype(str).str[:6])
+        ms6_categories = pd.Index(ms6.unique())
+        ms6_lookup = np.append(ms6_categories.get_indexer(ms6), -1)
+
+        product_lookup = np.zeros(len(ms6) + 1, dtype=np.int64)  # 미매칭/결측 → 'Unknown'(0)
+        if len(self.keys):
+            positions = self.keys.get_indexer(ms6)
+            found = positions >= 0
+            product_lookup[:-1][found] = self.codes[positions[found]]
+
+        ms6_values = pd.Categorical.from_codes(ms6_lookup[codes], categories=ms6_categories)
+        products = pd.Categorical.from_codes(product_lookup[codes], categories=self.categories)
+        return ms6_values, products.remove_unused_categories()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_product_index():
+    """프로세스 공용 MS6 인덱스 (최초 1회 로드)"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ProductIndex.load()
+        return _index
@@ -10,15 +10,20 @@ from logging import FileHandler
 import matplotlib
 from pathlib import Path
 import base64
-from analysis.defect_analyzer import analyze_flatness, analyze_warp, analyze_growing, analyze_broken, analyze_nano, analyze_pit, analyze_scratch, analyze_chip, analyze_edge, analyze_HUMAN_ERR, analyze_VISUAL, analyze_NOSALE, analyze_OTHER, analyze_GR, analyze_sample,analyze_particle
+from analysis.defect_analyzer import DefectAnalyzerEngine, add_mid_group
+from modules.mid_lookup import assign_mid_group
+from modules.product_index import get_product_index, group_product_type
 from config.mappings import REJ_GROUP_TO_MID_MAPPING, NAME_TO_EQP, MID_TO_EQP
+from modules.dataset_registry import DatasetRegistry
+from modules.aggregate_store import get_aggregate_store, aggregate_waf_daily, LOT_DAILY, WAF_DAILY, ALL_PROCESS
+from modules.chart_renderer import ChartRenderer, ChartImage
+from config.database import EXCEL_CONFIG
 import tempfile
-from inspect import signature
 import re
 from openpyxl import Workbook
 from openpyxl.drawing.image import Image as ExcelImage
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
+from openpyxl.cell import WriteOnlyCell
 from matplotlib.ticker import PercentFormatter
 from decimal import Decimal
 import textwrap
@@ -48,6 +53,103 @@ CENTER_WRAP = Alignment(horizontal="center", vertical="center", wrap_text=True)
 LEFT = Alignment(horizontal="left", vertical="center", wrap_text=True)
 
 HEADER_FILL = PatternFill("solid", fgColor="D3D3D3")
+CENTER = Alignment(horizontal="center", vertical="center")
+
+# 표 Gap 색상 (글자색, 배경색)
+TONE_COLORS = {
+    'red': ("FF0000", "FFCCCC"),
+    'blue': ("0000FF", "CCE5FF"),
+}
+
+
+# ---- 공유 Named Style (워크북당 1회 등록 → 셀에는 스타일 이름만 지정) ----
+def table_style(wb, kind='body', number_format=None, tone=None, size=None):
+    """
+    표 셀 Named Style 이름 반환 (처음 요청 시에만 워크북에 등록)
+    kind: 'header'(굵게/회색 배경) / 'body'
+    tone: None / 'red' / 'blue' (Gap 강조)
+    """
+    size = size or (10 if kind == 'header' else 9)
+    name = f"tbl_{kind}_{size}_{number_format or 'General'}_{tone or 'plain'}"
+    if name in wb.named_styles:
+        return name
+
+    style = NamedStyle(name=name, border=_BORDER_THIN, alignment=CENTER)
+    if kind == 'header':
+        style.font = Font(bold=True, size=size)
+        style.fill = HEADER_FILL
+    elif tone:
+        font_color, fill_color = TONE_COLORS[tone]
+        style.font = Font(size=size, color=font_color)
+        style.fill = PatternFill("solid", fgColor=fill_color)
+    else:
+        style.font = Font(size=size)
+    if number_format:
+        style.number_format = number_format
+    wb.add_named_style(style)
+    return name
+
+
+def _sign(value):
+    """Gap 값 부호 (숫자 변환 불가 시 0)"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0
+    return (value > 0) - (value < 0)
+
+
+def write_table_rows(ws, rows, start_row, start_col, col_styles, tone_col=None, tone_styles=None):
+    """
+    표 행 단위 출력: 열별 스타일 이름을 미리 정해두고 각 행은 값 + 스타일 이름만 지정
+    rows: 행 값 시퀀스 (DataFrame은 itertuples(index=False, name=None))
+    col_styles: 열별 Named Style 이름 (table_style)
+    tone_col / tone_styles: 부호에 따라 (양수 스타일, 음수 스타일)로 바꿀 열 위치(0부터)
+    반환: 출력 행 수
+    """
+    count = 0
+    for r_idx, values in enumerate(rows, start_row):
+        for offset, value in enumerate(values):
+            style = col_styles[min(offset, len(col_styles) - 1)]
+            if offset == tone_col:
+                sign = _sign(value)
+                if sign > 0:
+                    style = tone_styles[0]
+                elif sign < 0:
+                    style = tone_styles[1]
+            cell = ws.cell(row=r_idx, column=start_col + offset, value=value)
+            cell.style = style
+        count += 1
+    return count
+
+
+def write_appendix_sheet(wb, title, df, chunk_rows=50000):
+    """
+    write-only 워크북에 원천 데이터 시트 스트리밍 출력
+    - 헤더만 Named Style 셀, 본문은 chunk 단위로 변환 후 행 단위 append (메모리 일정)
+    - Excel 최대 행 수 초과 시 시트 분할
+    반환: 생성한 시트 수
+    """
+    max_rows = 1048575  # 헤더 1행 제외
+    header_style = table_style(wb, kind='header', size=9)
+    n_sheets = max(1, -(-len(df) // max_rows))
+
+    for part in range(n_sheets):
+        ws = wb.create_sheet(title=title if n_sheets == 1 else f"{title[:28]}_{part + 1}")
+        header = []
+        for column in df.columns:
+            cell = WriteOnlyCell(ws, value=str(column))
+            cell.style = header_style
+            header.append(cell)
+        ws.append(header)
+
+        part_end = min(len(df), (part + 1) * max_rows)
+        for start in range(part * max_rows, part_end, chunk_rows):
+            chunk = df.iloc[start:min(start + chunk_rows, part_end)].astype(object)
+            chunk = chunk.where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                ws.append(row)
+    return n_sheets
 
 # 한글 폰트 설정
 matplotlib.rcParams['font.family'] = 'Malgun Gothic'  # Windows
@@ -56,6 +158,21 @@ matplotlib.rcParams['axes.unicode_minus'] = False  # 마이너스 기호 깨짐
 
 # 결과 저장 폴더
 REPORT_DIR = "./daily_reports_debug"
+
+# WAF 60일 Trend 분석 대상 공정 / 캐시 로드 시 필요한 컬럼만 읽기
+WAF_TREND_PROCESSES = ['3300', '3335', '3670', '3696', '6100', '6210', '6500', '7000']
+WAF_TREND_COLUMNS = ['BASE_DT', 'CRET_CD', 'REJ_GROUP', 'LOSS_QTY'] + [
+    f"{prefix}_300_WF_{proc}" for proc in WAF_TREND_PROCESSES for prefix in ('EQP_NM', 'REG_DTTM')
+]
+
+# WAF 3개월 Ref 분석 대상 불량 그룹
+WAF_REF_REJ_GROUPS = ['PIT', 'SCRATCH', 'EDGE', 'BROKEN', 'CHIP', 'VISUAL']
+
+# LOT 3210 RC/HG 보상 분석 대상 불량 그룹 / 보상 코드
+RC_HG_REJ_GROUPS = ['PARTICLE', 'FLATNESS', 'WARP&BOW', 'NANO']
+RC_HG_CRET_CODES = ['FS', 'HG', 'RESC']
+RC_HG_TOTAL = '전체'
+RC_HG_TABLE_COLUMNS = ['구분', 'Ref.(3개월)', '일', 'Ref.(3개월)%', '일%', 'Gap']
 os.makedirs(REPORT_DIR, exist_ok=True)
 
 # 기존 로거 설정 대체
@@ -72,13 +189,250 @@ formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(messag
 file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 
-class DailyReportGenerator:
-    _ms6_mapping_cache = None
+def lot_loss_cube(df):
+    """
+    LOT 3210 단일 groupby 집계: (REJ_GROUP, CRET_CD, PRIME) → LOSS_QTY/IN_QTY 합계
+    - 결측 키도 유지 (분모 IN_QTY, 유효 불량 합계를 모두 이 결과에서 산출)
+    """
+    columns = ['REJ_GROUP', 'CRET_CD', 'PRIME', 'LOSS_QTY', 'IN_QTY']
+    if df is None or df.empty:
+        return pd.DataFrame(columns=columns)
+    if 'GRD_CD_NM_CS' in df.columns:
+        prime = df['GRD_CD_NM_CS'].eq('Prime')
+    else:
+        prime = pd.Series(False, index=df.index)
+    keys = [df['REJ_GROUP'].astype(object), df['CRET_CD'].astype(object), prime.rename('PRIME')]
+    cube = df.groupby(keys, dropna=False)[['LOSS_QTY', 'IN_QTY']].sum().reset_index()
+    return cube[columns]
+
+
+def rc_hg_loss_frame(ref_cube, daily_cube, total_months, prime_only=False):
+    """
+    RC/HG 보상 Loss Rate tidy 프레임 (Ref 3개월 월평균 vs 일 실적)
+    반환: (frame, avg_in_qty, total_daily_qty)
+      frame: REJ_GROUP(전체 + 그룹), CRET_CD, REF_QTY, DAILY_QTY, REF_RATE, DAILY_RATE, GAP
+    """
+    index = pd.MultiIndex.from_product([[RC_HG_TOTAL] + RC_HG_REJ_GROUPS, RC_HG_CRET_CODES],
+                                       names=['REJ_GROUP', 'CRET_CD'])
+
+    def _scope(cube):
+        return cube[cube['PRIME'].astype(bool)] if prime_only else cube
+
+    def _loss(cube):
+        valid = cube[cube['REJ_GROUP'].notna()]
+        by_group = valid.groupby(['REJ_GROUP', 'CRET_CD'])['LOSS_QTY'].sum()
+        total = valid.groupby('CRET_CD')['LOSS_QTY'].sum()
+        total.index = pd.MultiIndex.from_product([[RC_HG_TOTAL], total.index])
+        return pd.concat([total, by_group]).reindex(index, fill_value=0)
+
+    ref, daily = _scope(ref_cube), _scope(daily_cube)
+    avg_in_qty = ref.loc[ref['REJ_GROUP'] == '분모', 'IN_QTY'].sum() / total_months
+    total_daily_qty = daily.loc[daily['REJ_GROUP'] == '분모', 'IN_QTY'].sum()
+
+    frame = pd.DataFrame({'REF_QTY': _loss(ref) / total_months, 'DAILY_QTY': _loss(daily)})
+    frame['REF_RATE'] = (frame['REF_QTY'] / avg_in_qty) * 100 if avg_in_qty != 0 else 0.0
+    frame['DAILY_RATE'] = (frame['DAILY_QTY'] / total_daily_qty) * 100 if total_daily_qty != 0 else 0.0
+    frame['GAP'] = frame['REF_RATE'] - frame['DAILY_RATE']
+    return frame.reset_index(), avg_in_qty, total_daily_qty
+
+
+def rc_hg_table(frame, group):
+    """tidy 프레임 → 리포트 표 (구분, Ref.(3개월), 일, Ref.(3개월)%, 일%, Gap)"""
+    part = frame[frame['REJ_GROUP'] == group]
+    return pd.DataFrame({
+        '구분': part['CRET_CD'].tolist(),
+        'Ref.(3개월)': part['REF_QTY'].astype(int).tolist(),
+        '일': part['DAILY_QTY'].astype(int).tolist(),
+        'Ref.(3개월)%': [f"{v:+.2f}%" for v in part['REF_RATE']],
+        '일%': [f"{v:+.2f}%" for v in part['DAILY_RATE']],
+        'Gap': [f"{v:+.2f}%" for v in part['GAP']],
+    }, columns=RC_HG_TABLE_COLUMNS)
+
+
+def waf_process_events(df, processes=WAF_TREND_PROCESSES):
+    """
+    WAF wide 프레임의 공정별 (EQP_NM_300_WF_*, REG_DTTM_300_WF_*) 컬럼 → long 테이블 1회 변환
+    - 컬럼: process, EQP_NM, process_datetime, shift_date(int YYYYMMDD), REJ_GROUP, BASE_DT, LOSS_QTY
+    - 장비/등록일시가 모두 있는 행만, 공정별 전체 프레임 복사 없이 필요한 값만 take
+    - 등록일시는 전 공정 1회 파싱, 07:00 ~ 익일 06:59 를 전날로 묶기 위해 -7시간 후 일자 키
+    """
+    pieces = []
+    for proc in processes:
+        eqp_col, reg_col = f'EQP_NM_300_WF_{proc}', f'REG_DTTM_300_WF_{proc}'
+        if eqp_col not in df.columns or reg_col not in df.columns:
+            continue
+        rows = np.flatnonzero(df[eqp_col].notna().to_numpy() & df[reg_col].notna().to_numpy())
+        if len(rows):
+            pieces.append((proc, rows, df[eqp_col].take(rows), df[reg_col].take(rows)))
+    if not pieces:
+        return pd.DataFrame(columns=['process', 'EQP_NM', 'process_datetime', 'shift_date',
+                                     'REJ_GROUP', 'BASE_DT', 'LOSS_QTY'])
+
+    rows = np.concatenate([p[1] for p in pieces])
+    process = pd.Categorical.from_codes(np.repeat(np.arange(len(pieces)), [len(p[1]) for p in pieces]),
+                                        categories=[p[0] for p in pieces])
+    eqp = pd.concat([p[2].astype(object) for p in pieces], ignore_index=True)
+    process_datetime = pd.to_datetime(pd.concat([p[3] for p in pieces], ignore_index=True),
+                                      format='%Y%m%d%H%M%S%f', errors='coerce')
+    shifted = process_datetime - pd.Timedelta(hours=7)
+
+    events = pd.DataFrame({
+        'process': process,
+        'EQP_NM': eqp.astype('category'),
+        'process_datetime': process_datetime,
+        'shift_date': shifted.dt.year * 10000 + shifted.dt.month * 100 + shifted.dt.day,
+    })
+    for col in ('REJ_GROUP', 'BASE_DT', 'LOSS_QTY'):
+        if col in df.columns:
+            events[col] = df[col].take(rows).reset_index(drop=True)
+
+    # 등록일시 해석 불가 행은 일자 키 없음 → 제외
+    events = events[events['shift_date'].notna()]
+    events['shift_date'] = events['shift_date'].astype('int32')
+    return events.reset_index(drop=True)
+
+
+class LossRateCube:
+    """
+    공정 × 장비 × 일자 × REJ_GROUP 불량률 cube (WAF 공정 이력 분자 + SMAX 투입 분모)
+    - in_qty: (process, eqp_name, base_dt) 투입량 (분자만 있는 일자는 0)
+    - loss: (process, eqp_name, base_dt, REJ_GROUP) 불량수량 / 불량률(%)
+    - 장비별 행 위치를 미리 색인 → 그래프용 장비 slice는 전체 프레임 필터 없이 조회
+    """
+
+    def __init__(self, loss, in_qty):
+        self.in_qty = in_qty.reset_index(drop=True)
+        self.loss = loss.reset_index(drop=True)
+        self._in_rows = self.in_qty.groupby('eqp_name', sort=False).indices
+        self._loss_rows = self.loss.groupby(['eqp_name', 'REJ_GROUP'], observed=True, sort=False).indices
+
+    @classmethod
+    def build(cls, events, denominators):
+        """
+        events: waf_process_events 결과 / denominators: {공정: SMAX (base_dt, eqp_name, prodc_qty)}
+        분자/분모 모두 있는 공정만 1회 groupby → merge
+        """
+        procs = [proc for proc in events['process'].unique() if proc in denominators]
+        events = events[events['process'].isin(procs)]
+        loss = (events.assign(process=events['process'].astype(str),
+                              base_dt=events['shift_date'].astype('int64'),
+                              eqp_name=events['EQP_NM'].astype(str))
+                .groupby(['process', 'eqp_name', 'base_dt', 'REJ_GROUP'], observed=True)['LOSS_QTY']
+                .sum().reset_index())
+
+        if procs:
+            denom = pd.concat([denominators[proc].assign(process=proc) for proc in procs], ignore_index=True)
+            denom['base_dt'] = pd.to_numeric(denom['base_dt'].astype(str), errors='coerce')
+            denom = denom.dropna(subset=['base_dt']).astype({'base_dt': 'int64'})
+            denom['eqp_name'] = denom['eqp_name'].astype(str)
+            in_qty = (denom.groupby(['process', 'eqp_name', 'base_dt'])['prodc_qty'].sum()
+                      .rename('IN_QTY').astype(float))
+        else:
+            in_qty = pd.Series(dtype=float, name='IN_QTY',
+                               index=pd.MultiIndex.from_tuples([], names=['process', 'eqp_name', 'base_dt']))
+
+        keys = ['process', 'eqp_name', 'base_dt']
+        loss_keys = pd.MultiIndex.from_frame(loss[keys])
+        in_qty = in_qty.reindex(in_qty.index.union(loss_keys.unique()), fill_value=0.0)
+        loss['LOSS_QTY'] = loss['LOSS_QTY'].astype(float)
+        loss['RATE'] = (loss['LOSS_QTY'] / (in_qty.reindex(loss_keys).to_numpy() + 1e-9) * 100).round(4)
+        return cls(loss, in_qty.reset_index())
+
+    @property
+    def processes(self):
+        return self.in_qty['process'].unique().tolist()
+
+    def equipment_trend(self, eqp, rej_group, days=60):
+        """
+        장비 1대 일별 (일자 문자열, IN_QTY, REJ_GROUP 불량률) — 최근 일자 기준 days일, 누락 일자 0
+        - 동일 장비명이 여러 공정에 있으면 IN_QTY 합계, 불량률 최대값
+        """
+        in_rows = self._in_rows.get(eqp)
+        if in_rows is None:
+            return None
+        daily_in = self.in_qty.iloc[in_rows].groupby('base_dt')['IN_QTY'].sum()
+        latest = pd.to_datetime(str(daily_in.index.max()), format='%Y%m%d')
+        all_dates = pd.date_range(end=latest, periods=days, freq='D')
+        day_keys = all_dates.year * 10000 + all_dates.month * 100 + all_dates.day
+
+        loss_rows = self._loss_rows.get((eqp, rej_group))
+        if loss_rows is not None:
+            daily_rate = self.loss.iloc[loss_rows].groupby('base_dt')['RATE'].max()
+        else:
+            daily_rate = pd.Series(dtype=float)
+        return pd.DataFrame({
+            'base_dt': all_dates.strftime('%Y%m%d'),
+            'IN_QTY': daily_in.reindex(day_keys, fill_value=0.0).to_numpy(),
+            'LOSS_RATE': daily_rate.reindex(day_keys, fill_value=0.0).to_numpy(),
+        })
+
+
+YIELD_ITEM_MEASURES = {
+    '월사업계획': 'monthly_plan',
+    '월실적': 'monthly_actual',
+    '일사업계획': 'daily_plan',
+    '일실적': 'daily_actual',
+}
+MONTHLY_ITEM_TYPES = ['월실적', '월사업계획']
+
+
+def parse_3010_dates(raw, item_type):
+    """
+    3010 dt_range 문자열 일괄 파싱
+    - 월 항목: '%Y-%m' / 그 외: ISO 일자 (실패한 값만 개별 형식 추론)
+    - 빈 값/'None'/'nan'/'NaT' → NaT
+    """
+    raw = raw.astype(str).str.strip()
+    raw = raw.where(~raw.isin(['', 'None', 'nan', 'NaT']))
+    monthly = item_type.isin(MONTHLY_ITEM_TYPES).to_numpy()
+
+    parsed = pd.Series(pd.NaT, index=raw.index, dtype='datetime64[ns]')
+    parsed[monthly] = pd.to_datetime(raw[monthly], format='%Y-%m', errors='coerce')
+    daily = raw[~monthly]
+    daily_parsed = pd.to_datetime(daily, format='%Y-%m-%d', errors='coerce')
+    retry = daily_parsed.isna() & daily.notna()
+    if retry.any():
+        daily_parsed[retry] = pd.to_datetime(daily[retry], format='mixed', errors='coerce')
+    parsed[~monthly] = daily_parsed
+    return parsed
+
+
+def pivot_3010_yield(df, current_month, target_date, grades, yld_types):
+    """
+    3010 수율 (grade, yld_type) × (월/일 목표·실적) 단일 프레임
+    - 월: 당월 첫 행 / 일: 기준일 첫 행, 없으면 최신 일자 첫 행 / 없으면 0
+    - 반환: (pivot, {(grade, yld_type): 일실적 일자})
+    """
+    df = df[df['item_type'].isin(list(YIELD_ITEM_MEASURES)) & df['dt_range'].notna()]
+    monthly = df['item_type'].isin(MONTHLY_ITEM_TYPES)
+
+    month_rows = df[monthly & (df['month_str'] == current_month)]
+    day_rows = df[~monthly].assign(_is_target=lambda d: d['dt_range'].dt.date == target_date)
+    day_rows = day_rows.sort_values(['_is_target', 'dt_range'], ascending=False, kind='stable')
+
+    picked = (pd.concat([month_rows, day_rows], ignore_index=True)
+              .drop_duplicates(['grade', 'yld_type', 'item_type'], keep='first'))
+
+    full_index = pd.MultiIndex.from_product([grades, yld_types], names=['grade', 'yld_type'])
+    pivot = (picked.pivot(index=['grade', 'yld_type'], columns='item_type', values='rate')
+             .rename(columns=YIELD_ITEM_MEASURES)
+             .reindex(index=full_index, columns=list(YIELD_ITEM_MEASURES.values()))
+             .fillna(0.0))
+
+    actual = picked[picked['item_type'] == '일실적']
+    daily_dates = dict(zip(zip(actual['grade'], actual['yld_type']), actual['dt_range']))
+    return pivot, daily_dates
+
 
+class DailyReportGenerator:
     def __init__(self, data, target_date=None):
         self.data = data
         self.target_date = target_date or (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
         self.target_date_obj = datetime.strptime(self.target_date, '%Y%m%d').date()
+        # 실행 범위 데이터셋 캐시: 같은 기간 데이터는 1회만 로드, PRODUCT_TYPE은 로드 시 1회 병합
+        self.datasets = DatasetRegistry(enrich=self._enrich_dataset)
+        # 차트 렌더러: 각 분석 단계에서 spec 등록 → 프로세스 풀에서 병렬 렌더링 → Excel 생성 전 수집
+        self.charts = ChartRenderer()
 
     def _calculate_total_loss_influence(self, df):
         """
@@ -87,24 +441,14 @@ class DailyReportGenerator:
         - PRODUCT_TYPE별 전체 불량률 계산
         """
 
-        # ──────────────────────────────────────────────────
-        # [신규] PRODUCT_TYPE 그룹화: [P]SEC F3 & [P]SEC UB → '[P]SEC F3/UB'
-        # ──────────────────────────────────────────────────
-        def group_product_type(pt):
-            if pd.isna(pt):
-                return "Unknown"
-            pt = str(pt).strip()
-            if pt in ['[P]SEC F3', '[P]SEC UB']: #[P]SEC F3 과 [P]SEC UB
-                return '[P]SEC F3/UB'
-            return pt
-
-        df['PRODUCT_TYPE'] = df['PRODUCT_TYPE'].apply(group_product_type)
-        # ──────────────────────────────────────────────────
-
         if df is None or getattr(df, "empty", True):
             return pd.DataFrame(), 0
 
-        df = df.copy()
+        # [신규] PRODUCT_TYPE 그룹화: [P]SEC F3 & [P]SEC UB → '[P]SEC F3/UB' (고유값 단위 변환)
+        # 레지스트리 공유 프레임일 수 있으므로 얕은 복사 후 컬럼 교체
+        df = df.copy(deep=False)
+        df['PRODUCT_TYPE'] = group_product_type(df['PRODUCT_TYPE'])
+
         df = df[df['GRD_CD_NM_CS'] == 'Prime']
 
         # 전체 불량: '분모' 제외 모든 불량
@@ -123,7 +467,7 @@ class DailyReportGenerator:
         df_total = df[df['REJ_GROUP']!= '분모']
 
         loss_summary = (
-            df_total.groupby("PRODUCT_TYPE", dropna=False)["LOSS_QTY"]
+            df_total.groupby("PRODUCT_TYPE", dropna=False, observed=True)["LOSS_QTY"]
             .sum()
             .reset_index()
         )
@@ -132,7 +476,7 @@ class DailyReportGenerator:
         # Compile 수량
         compile_summary = (
             df[df['REJ_GROUP'] == '분모']
-            .groupby("PRODUCT_TYPE", dropna=False)["IN_QTY"]
+            .groupby("PRODUCT_TYPE", dropna=False, observed=True)["IN_QTY"]
             .sum()
             .reset_index()
         )
@@ -167,56 +511,29 @@ class DailyReportGenerator:
     # ──────────────────────────────────────────────────
     # [신규] MS6.csv 기반 제품 정보 병합 함수
     # ──────────────────────────────────────────────────
-    @classmethod
-    def _load_ms6_mapping(cls):
-        """MS6.csv에서 (MS6 -> 제품1) 매핑을 1회만 로드하여 캐시"""
-        if cls._ms6_mapping_cache is not None:
-            return cls._ms6_mapping_cache
-
-        project_root = Path(__file__).parent.parent
-        ms6_path = project_root / "queries" / "MS6.csv"
-
-        if not ms6_path.exists():
-            cls._ms6_mapping_cache = {}
-            return cls._ms6_mapping_cache
-
-        try:
-            df_ms6 = pd.read_csv(ms6_path, dtype=str, encoding="utf-8")
-        except UnicodeDecodeError:
-            df_ms6 = pd.read_csv(ms6_path, dtype=str, encoding="cp949")
-
-        if "MS6" not in df_ms6.columns or "제품1" not in df_ms6.columns:
-            cls._ms6_mapping_cache = {}
-            return cls._ms6_mapping_cache
-
-        df_ms6 = df_ms6.dropna(subset=["MS6", "제품1"]).copy()
-        cls._ms6_mapping_cache = dict(
-            zip(df_ms6["MS6"].astype(str).str.strip(), df_ms6["제품1"].astype(str).str.strip())
-        )
-        return cls._ms6_mapping_cache
-
     def _merge_product_type(self, df):
-        """df에 PROD_ID 기준으로 MS6.csv의 '제품1' 컬럼을 병합하여 'PRODUCT_TYPE' 추가 (캐시 적용)"""
-        if df is None or getattr(df, "empty", True):
-            # empty or None
-            try:
-                df = df.copy()
-            except Exception:
-                df = pd.DataFrame()
-            df["PRODUCT_TYPE"] = "Unknown"
+        """
+        df에 PROD_ID 기준으로 MS6 인덱스의 '제품1'을 'PRODUCT_TYPE'(categorical)으로 추가
+        - 인덱스는 프로세스 1회 로드 (MS6.csv 변경 시에만 재파싱, 바이너리 저장)
+        - 이미 병합된 프레임은 그대로 반환, 원본 데이터는 복사하지 않음 (얕은 복사 후 컬럼 추가)
+        """
+        if df is None:
+            df = pd.DataFrame()
+        if "PRODUCT_TYPE" in df.columns and not df.empty:
             return df
 
-        if "PROD_ID" not in df.columns:
-            df = df.copy()
+        df = df.copy(deep=False)
+        if df.empty or "PROD_ID" not in df.columns:
             df["PRODUCT_TYPE"] = "Unknown"
             return df
 
-        mapping = self._load_ms6_mapping()
-        df = df.copy()
-        df["MS6"] = df["PROD_ID"].astype(str).str[:6]
-        df["PRODUCT_TYPE"] = df["MS6"].map(mapping).fillna("Unknown")
+        df["MS6"], df["PRODUCT_TYPE"] = get_product_index().product_type(df["PROD_ID"])
         return df
 
+    def _enrich_dataset(self, df):
+        """레지스트리 로드 시 1회 보강: PRODUCT_TYPE 병합 + MID_GROUP 부여"""
+        return assign_mid_group(self._merge_product_type(df))
+
     def _get_top3_rej_groups(self):
         """
         안전하게 상위 3개 REJ_GROUP 목록 가져오기
@@ -225,35 +542,17 @@ class DailyReportGenerator:
 
     def _create_total_loss_ref(self):
         """6개월 전체 불량 기반 Ref 데이터 생성 (현재 날짜 기준 직전 6개월)"""
-        PROJECT_ROOT = Path(__file__).parent.parent
-        cache_dir = PROJECT_ROOT / "data_cache"
-        pattern = "DATA_LOT_3210_wafering_300_*.parquet"
-        parquet_files = list(cache_dir.glob(pattern))
-
-        # 현재 날짜 기준으로 직전 6개월의 연월 생성 (YYYYMM 형식)
+        # 현재 날짜 기준 직전 6개월 전체 기간 (파티션 캐시에서 해당 일자만 로드)
         current_date =  self.target_date_obj
-        target_months = []
-        for i in range(6, 0, -1):  # 최근 6개월: -1개월, -2개월, ..., -6개월
-            month_date = current_date - relativedelta(months=i)
-            target_months.append(month_date.strftime("%Y%m"))
-        print(f"target_months:", target_months)
-        df_list = []
-        for file_path in parquet_files:
-            try:
-                stem = file_path.stem
-                date_part = stem.split("_")[-1]
-                if len(date_part) == 6 and date_part.isdigit() and date_part in target_months:
-                    df_part = pd.read_parquet(file_path)
-                    df_part = self._merge_product_type(df_part)
-                    df_list.append(df_part)
-            except Exception as e:
-                continue  # 로그 추가를 원하면 logger.warning 사용
+        start_date = (current_date - relativedelta(months=6)).replace(day=1)
+        end_date = current_date.replace(day=1) - timedelta(days=1)
+        print(f"target_range: {start_date} ~ {end_date}")
 
-        if not df_list:
+        # 일별 집계 저장소에서 6개월 집계 행만 로드 (원본 LOT 행 재로드/재집계 없음)
+        df_full = get_aggregate_store().window(LOT_DAILY, start_date.strftime("%Y%m%d"), end_date.strftime("%Y%m%d"))
+        if df_full.empty:
             return pd.DataFrame(), 0
 
-        df_full = pd.concat(df_list, ignore_index=True)
-
         return self._calculate_total_loss_influence(df_full)
 
 
@@ -455,6 +754,9 @@ class DailyReportGenerator:
 
             self._plot_rej_group_top3_eqp_trend(output_dir="./daily_reports_debug")
 
+            # 등록된 차트 렌더링 완료 대기 (경로/Base64는 각 details에 반영됨)
+            self.charts.collect()
+
             report = {
                 'DATA_3010_wafering_300' : data_3010_details,
                 'DATA_3210_wafering_300_details': data_3210_details,
@@ -475,10 +777,14 @@ class DailyReportGenerator:
                 print(f"Excel 생성 실패: {e}")
                 report['excel_report'] = None
 
+            logger.info(f"데이터셋 레지스트리: {self.datasets.summary()}")
+            self.datasets.clear()
+
             logger.info("리포트 생성 완료")
             return report
         except Exception as e:
             logger.error(f"리포트 생성 실패: {e}")
+            self.charts.shutdown()
             raise
     
 
@@ -505,24 +811,8 @@ class DailyReportGenerator:
         df['grade'] = df['grade'].astype(str).str.strip()
         df['yld_type'] = df['yld_type'].astype(str).str.strip()
 
-        # item_type에 따라 파싱 전략 분기
-        def parse_date(row):
-            raw = row['dt_range_raw']
-            item_type = row['item_type']
-            
-            # 빈 값 또는 이상한 값 필터링
-            if pd.isna(raw) or raw in ['', 'None', 'nan', 'NaT']:
-                return pd.NaT
-
-            try:
-                if item_type in ['월실적', '월사업계획']:
-                    return pd.to_datetime(raw, format='%Y-%m', errors='coerce')
-                else:
-                    return pd.to_datetime(raw, errors='coerce')
-            except:
-                return pd.NaT
-
-        df['dt_range'] = df.apply(parse_date, axis=1)
+        # item_type에 따라 파싱 전략 분기 (월: '%Y-%m' / 일: ISO 일자, 실패분만 개별 형식 추론)
+        df['dt_range'] = parse_3010_dates(df['dt_range_raw'], df['item_type'])
 
         # month_str 생성
         df['month_str'] = df['dt_range'].dt.strftime('%Y-%m')
@@ -530,80 +820,36 @@ class DailyReportGenerator:
         # ──────────────────────────────────────────────────
         # 기준일: 어제
         # ──────────────────────────────────────────────────
-        # target_date = (datetime.now().date() - timedelta(days=1))  # 2026-02-03
         target_date = self.target_date
         print(f"기준일: {target_date}")
-        # ──────────────────────────────────────────────────
-        # 3. 재사용 함수 정의
-        # ──────────────────────────────────────────────────
-        def get_latest_or_target(df, item_type, target_date):
-            print(f"[DEBUG] 조회: item_type={item_type}, target_date={target_date}")
-            
-            # 동일 날짜 찾기
-            same_day = df[
-                (df['item_type'] == item_type) &
-                (df['dt_range'].notna()) &
-                (df['dt_range'].dt.date == target_date)
-            ]
-            if not same_day.empty:
-                return same_day.iloc[0]
-
-            # 없으면 최신 날짜 사용
-            latest = df[
-                (df['item_type'] == item_type) &
-                (df['dt_range'].notna())
-            ]
-            if not latest.empty:
-                latest_sorted = latest.sort_values('dt_range', ascending=False)
-                return latest_sorted.iloc[0]
-            
-            return None
-
-        # 월 데이터 추출 함수
-        def get_monthly_value(df, item_type, current_month):
-            monthly = df[
-                (df['item_type'] == item_type) &
-                (df['month_str'] == current_month)
-            ]
-            return float(monthly['rate'].iloc[0]) if not monthly.empty else 0.0
 
         # ──────────────────────────────────────────────────
-        # 4개 조합 (Total/Prime × RTY/OAY) 데이터 추출
+        # 3. 월/일 × 목표/실적 × grade × yld_type 1회 피벗
+        #    월: 당월 행 / 일: 기준일 행 (없으면 최신 일자 행)
         # ──────────────────────────────────────────────────
         grades = ['Total', 'Prime']
         yld_types = ['RTY', 'OAY']
+        pivot, daily_dates = pivot_3010_yield(df, current_month, self.target_date_obj, grades, yld_types)
+
         results = {}
         daily_actual_date = "N/A"
-
         for grade in grades:
             for yld_type in yld_types:
                 key = f"{grade}_{yld_type}"
-                df_filtered = df[(df['grade'] == grade) & (df['yld_type'] == yld_type)].copy()
-                
-                # 월 목표/실적
-                monthly_plan_val = get_monthly_value(df_filtered, '월사업계획', current_month)
-                monthly_actual_val = get_monthly_value(df_filtered, '월실적', current_month)
-                
-                # 일 목표/실적
-                daily_plan_row = get_latest_or_target(df_filtered, '일사업계획', target_date)
-                daily_actual_row = get_latest_or_target(df_filtered, '일실적', target_date)
-                
-                daily_plan_val = float(daily_plan_row['rate']) if daily_plan_row is not None else 0.0
-                if daily_actual_row is not None:
-                    daily_actual_val = float(daily_actual_row['rate'])
-                    daily_actual_date = daily_actual_row['dt_range'].strftime('%Y-%m-%d')
-                else:
-                    daily_actual_val = 0.0
-                
+                values = pivot.loc[(grade, yld_type)]
+                actual_date = daily_dates.get((grade, yld_type))
+                if actual_date is not None:
+                    daily_actual_date = actual_date.strftime('%Y-%m-%d')
+
                 results[key] = {
                     'grade': grade,
                     'yld_type': yld_type,
-                    'monthly_plan': float(monthly_plan_val),
-                    'monthly_actual': float(monthly_actual_val),
-                    'daily_plan': float(daily_plan_val),
-                    'daily_actual': float(daily_actual_val),
-                    'monthly_gap': float(monthly_actual_val - monthly_plan_val),
-                    'daily_gap': float(daily_actual_val - daily_plan_val)
+                    'monthly_plan': float(values['monthly_plan']),
+                    'monthly_actual': float(values['monthly_actual']),
+                    'daily_plan': float(values['daily_plan']),
+                    'daily_actual': float(values['daily_actual']),
+                    'monthly_gap': float(values['monthly_actual'] - values['monthly_plan']),
+                    'daily_gap': float(values['daily_actual'] - values['daily_plan'])
                 }
 
         # ──────────────────────────────────────────────────
@@ -619,89 +865,14 @@ class DailyReportGenerator:
 
         chart_path = debug_dir / "3010_yield_WF_chart.png"
 
-        if chart_path.exists():
-            chart_path.unlink() #파일 삭제
-            print(f"기존 그래프 파일 삭제됨 : {chart_path}")
-
-        fig, axes = plt.subplots(1, 4, figsize=(16, 4), dpi=300)
-        axes = axes.flatten()
-
-        plot_order = ['Total_RTY', 'Prime_RTY', 'Total_OAY', 'Prime_OAY']
-        titles = ['Total RTY', 'Prime RTY', 'Total OAY', 'Prime OAY']
-
-        for idx, key in enumerate(plot_order):
-            ax = axes[idx]
-            data = results[key]
-
-            # X축: 월, 일
-            x_labels = ['월', '일']
-            x = np.arange(len(x_labels))
-            bar_width = 0.9
-            month_color = '#0000ff'  # 파랑
-            day_color = '#ff0000'    # 빨강
-
-            # 월/일 각각 하나의 막대 (실적만), 목표는 점선
-            bar_month = ax.bar(x[0], data['monthly_actual'], bar_width, color=month_color)
-            bar_day = ax.bar(x[1], data['daily_actual'], bar_width, color=day_color)
-
-            # 목표선 (공통 목표 = 일사업계획)
-            ax.axhline(y=data['daily_plan'], color='black', linestyle='--', linewidth=1.2, label='목표')
-
-            # X축 레이블 설정
-            ax.set_xticks(x)
-            ax.set_xticklabels(x_labels, fontsize=15, fontweight='bold')
-            ax.set_xlabel('기간', fontsize=15)
-
-            # Y축 범위
-            all_vals = [data['monthly_actual'], data['daily_actual'], data['daily_plan']]
-            min_ylim = min(all_vals)
-            max_ylim = max(all_vals)
-            ax.set_ylim(max(90, min_ylim - 1.0), max_ylim + 3.0)
-            ylim_bottom = ax.get_ylim()[0]
-
-            # 제목
-            ax.set_title(titles[idx], fontsize=20, fontweight='bold', pad=14)
-            ax.set_ylabel('수율 (%)', fontsize=15)
-
-            # 막대 내부에 텍스트
-            def add_internal_label(bar, value):
-                for rect in bar:
-                    height = rect.get_height()
-                    pos = (ylim_bottom + height) / 2.0
-                    ax.text(rect.get_x() + rect.get_width()/2., pos,
-                            f'{value:.2f}%', ha='center', va='center',
-                            fontsize=15, fontweight='bold', color='white')
-
-            add_internal_label(bar_month, data['monthly_actual'])
-            add_internal_label(bar_day, data['daily_actual'])
-
-            # Gap 라벨 (막대 위, 색상 구분)
-            def add_gap_label(x_pos, gap, base_height):
-                color = 'blue' if gap >= 0 else 'red'
-                sign = '+' if gap >= 0 else ''
-                ax.text(x_pos, base_height + 0.3,
-                        f'{sign}{gap:.2f}%', ha='center', va='bottom',
-                        fontsize=15, fontweight='bold', color=color)
-
-            add_gap_label(x[0], data['monthly_gap'], data['monthly_actual'])
-            add_gap_label(x[1], data['daily_gap'], data['daily_actual'])
-
-            # 범례 (상단 왼쪽)
-            ax.legend(loc='upper center', ncol=1, frameon=False, fontsize=15, bbox_to_anchor=(0.5, 0.98))
-
-            # 그리드
-            ax.grid(axis='y', linestyle='--', alpha=0.7, zorder=0)
-            ax.set_axisbelow(True)
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-
-        plt.tight_layout(pad=1.0)
-        plt.savefig(chart_path, dpi=300, bbox_inches='tight', pad_inches=0.5)
-        plt.close()
-
-        # Base64 인코딩
-        with open(chart_path, "rb") as img_file:
-            img_base64 = base64.b64encode(img_file.read()).decode()
+        # 차트 렌더러에 등록 (별도 프로세스에서 메모리 PNG로 렌더링, 완료 시 이미지/Base64 반영)
+        self.charts.submit('3010_yield_WF', {
+            'kind': 'yield_panels',
+            'data': {'results': results},
+            'path': str(chart_path),
+            'savefig': {'pad_inches': 0.5},
+        }, on_done=lambda image: details.update(chart_image=image, img_base64=image.base64))
+        img_base64 = None
         # ──────────────────────────────────────────────────
         # 5. 표 생성 (계층형 DataFrame)
         # ──────────────────────────────────────────────────
@@ -1003,7 +1174,7 @@ class DailyReportGenerator:
                 df[col] = pd.to_numeric(df[col], errors='coerce')
 
         # 그룹별 집계
-        summary = df.groupby(['BASE_DT_NM', 'REJ_GROUP'], dropna=False).agg(
+        summary = df.groupby(['BASE_DT_NM', 'REJ_GROUP'], dropna=False, observed=True).agg(
             AVG_LOSS_RATIO=('LOSS_RATIO', 'sum'),
             AVG_GOAL_RATIO=('GOAL_RATIO', 'mean'),
             TOTAL_MGR_QTY=('MGR_QTY', 'mean')
@@ -1048,49 +1219,27 @@ class DailyReportGenerator:
         debug_dir.mkdir(exist_ok=True, parents=True)
 
         # ──────────────────────────────────────────────────
-        # 1. 그래프 저장 → Base64 인코딩
+        # 1. 그래프 렌더링 등록 (완료 시 이미지/Base64 반영)
         # ──────────────────────────────────────────────────
         chart_path = debug_dir / "prime_gap_chart.png"
 
-        if chart_path.exists():
-            chart_path.unlink() #파일 삭제
-            print(f"기존 그래프 파일 삭제됨 : {chart_path}")
-
         # 'Total' 제외한 데이터로 그래프 생성
         plot_data = summary[summary['REJ_GROUP'] != 'Total'].copy()
         if plot_data.empty:
             print("그래프를 그릴 데이터가 없습니다 (Total 제외 후).")
             return details  # 또는 기본 이미지 처리
 
-
-        plt.figure(figsize=(10, 6))
-        x = np.arange(len(plot_data))
-        bars = plt.bar(x, plot_data['GAP_PCT'],
-                    color=plot_data['GAP_PCT'].apply(lambda x: '#ff0000' if x > 0 else '#0000ff'), linewidth=1)
-
-        plt.title(f"Gap 분석 - {base_date}", fontsize=14, fontweight='bold')
-        plt.xlabel('REJ_GROUP', fontsize=14)
-        plt.ylabel('GAP (%)', fontsize=14)
-        plt.xticks(x, plot_data['REJ_GROUP'], rotation=90, ha='right')
-
-        for i, bar in enumerate(bars):
-            height = bar.get_height()
-            # 라벨 위치 조정 (양수는 위, 음수는 아래)
-            offset = 0.01 * (1 if height >= 0 else -1)
-            va_pos = 'bottom' if height >= 0 else 'top'
-            plt.text(bar.get_x() + bar.get_width() / 2, height + offset,
-                    f"{height:.2f}%", ha='center', va=va_pos,
-                    fontsize=14, fontweight='bold', color='black')
-
-        plt.ylim(-0.5, 1.0) #-0.5 ~ 0.5로 변경 요청
-        plt.grid(axis='y', linestyle='--', alpha=0.7, zorder=0)
-        plt.tight_layout()
-        plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-        plt.close()
-
-        # Base64 인코딩
-        with open(chart_path, "rb") as img_file:
-            img_base64 = base64.b64encode(img_file.read()).decode()
+        self.charts.submit('prime_gap', {
+            'kind': 'gap_bar',
+            'data': {
+                'labels': plot_data['REJ_GROUP'].astype(str).tolist(),
+                'values': plot_data['GAP_PCT'].astype(float).tolist(),
+                'title': f"Gap 분석 - {base_date}",
+                'ylim': (-0.5, 1.0),  # -0.5 ~ 0.5로 변경 요청
+            },
+            'path': str(chart_path),
+        }, on_done=lambda image: details.update(chart_image=image, img_base64=image.base64))
+        img_base64 = None
 
         # ──────────────────────────────────────────────────
         # 2. 상위 3개 불량 상세분석
@@ -1102,13 +1251,11 @@ class DailyReportGenerator:
         for rej_group in top3_rej_groups:
             group_df = df[df['REJ_GROUP'] == rej_group].copy()
 
-            # MID_GROUP 매핑 적용
-            mid_mapping = REJ_GROUP_TO_MID_MAPPING.get(rej_group, {})
-            group_df['MID_GROUP'] = group_df['AFT_BAD_RSN_CD'].map(mid_mapping)
-            group_df['MID_GROUP'] = group_df['MID_GROUP'].fillna(group_df['AFT_BAD_RSN_CD'])
+            # MID_GROUP 매핑 적용 (로드 시 부여된 컬럼이 없을 때만)
+            group_df = add_mid_group(group_df, rej_group)
 
             # MID_GROUP별 평균 LOSS_RATIO 계산
-            mid_agg = group_df.groupby('MID_GROUP', dropna=False).agg(
+            mid_agg = group_df.groupby('MID_GROUP', dropna=False, observed=True).agg(
                 YESTERDAY_LOSS_RATIO=('LOSS_RATIO', 'sum') #mean -> sum으로 변경
             ).reset_index()
 
@@ -1162,17 +1309,16 @@ class DailyReportGenerator:
                 return details
 
             # 3. 분자 계산: AFT_BAD_RSN_CD 별 LOSS_QTY 전체 합계
-            summary_list = []
-            for rej_group, group_df in df.groupby('REJ_GROUP', dropna=False):
-                mid_mapping = REJ_GROUP_TO_MID_MAPPING.get(rej_group, {})
-                group_df = group_df.copy()
-                group_df['MID_GROUP'] = group_df['AFT_BAD_RSN_CD'].map(mid_mapping)
-                group_df['MID_GROUP'] = group_df['MID_GROUP'].fillna(group_df['AFT_BAD_RSN_CD'])
+            # MID_GROUP: 로드 시 전체 행 1회 부여 (없으면 여기서 1회 부여)
+            if 'MID_GROUP' not in df.columns:
+                df = assign_mid_group(df)
 
+            summary_list = []
+            for rej_group, group_df in df.groupby('REJ_GROUP', dropna=False, observed=True):
                 print(f"🔧 [DEBUG] {rej_group} → MID_GROUP 생성됨: {group_df['MID_GROUP'].nunique()} 종류")
 
                 # 그룹 집계: REJ_GROUP + MID_GROUP + AFT_BAD_RSN_CD
-                agg_df = group_df.groupby(['REJ_GROUP', 'MID_GROUP', 'AFT_BAD_RSN_CD'], dropna=False).agg(
+                agg_df = group_df.groupby(['REJ_GROUP', 'MID_GROUP', 'AFT_BAD_RSN_CD'], dropna=False, observed=True).agg(
                     TOTAL_LOSS_QTY=('LOSS_QTY', 'sum'),
                     COUNT_DAYS=('BASE_DT_NM', 'nunique')
                 ).reset_index()
@@ -1216,13 +1362,13 @@ class DailyReportGenerator:
                     return pd.Series()
                 if 'AFT_BAD_RSN_CD' not in df_ref.columns:
                     return pd.Series()
-                loss_ratio_series = df_ref.groupby('AFT_BAD_RSN_CD')['LOSS_RATIO'].sum()
+                loss_ratio_series = df_ref.groupby('AFT_BAD_RSN_CD', observed=True)['LOSS_RATIO'].sum()
                 return loss_ratio_series
 
             # 3개월 평균 (Ref) 준비
             ref_3months = summary_3months[summary_3months['REJ_GROUP'].isin(yesterday_mid['REJ_GROUP'])].copy()
             # REJ_GROUP + MID_GROUP 기준 집계 (AFT_BAD_RSN_CD 는 제거하고 MID_GROUP 수준으로 비교)
-            ref_3months = ref_3months.groupby(['REJ_GROUP', 'MID_GROUP'], dropna=False).agg(
+            ref_3months = ref_3months.groupby(['REJ_GROUP', 'MID_GROUP'], dropna=False, observed=True).agg(
                 REF_AVG_LOSS_RATIO=('AVG_LOSS_RATIO', 'sum'),  # 동일 MID_GROUP 내 불량코드 합계 비율
                 REF_LOSS_QTY=('TOTAL_LOSS_QTY', 'sum')
             ).reset_index()
@@ -1247,28 +1393,10 @@ class DailyReportGenerator:
             analysis_text = "[ Prime 주요 열위 불량 세부코드 분석 Ref.(3개월) 比 일 실적 변동 (상위 3개) ]\n"
             detailed_analysis_dict = {}  # 세부분석 결과 저장
 
-            # REJ_GROUP별 분석 함수 매핑 (내부 정의)
-            REJ_GROUP_TO_ANALYZER = {
-                'FLATNESS': analyze_flatness,
-                'WARP&BOW': analyze_warp,
-                'GROWING': analyze_growing,
-                'BROKEN': analyze_broken,
-                'NANO': analyze_nano,
-                'PIT': analyze_pit,
-                'SCRATCH': analyze_scratch,
-                'CHIP': analyze_chip,
-                'EDGE': analyze_edge,
-                'HUMAN_ERR': analyze_HUMAN_ERR,
-                'VISUAL': analyze_VISUAL,
-                'NOSALE': analyze_NOSALE,
-                'OTHER': analyze_OTHER,
-                'GR_보증': analyze_GR,
-                'SAMPLE': analyze_sample,
-                'PARTICLE': analyze_particle
-            }
-            # 데이터 준비
+            # 데이터 준비: LOT/WAF를 REJ_GROUP 기준 1회 분할 → 세부분석 함수에는 필터/매핑된 slice 전달
             df_wafer = self.data.get('DATA_WAF_3210_wafering_300')
             df_lot = self.data.get('DATA_LOT_3210_wafering_300')
+            analyzer = DefectAnalyzerEngine(df_lot, df_wafer)
 
             # === AFT_BAD_RSN_CD 기준 Gap 계산 (실적) ===
             def get_code_gap_daily(rej_group):
@@ -1276,17 +1404,18 @@ class DailyReportGenerator:
                     return pd.Series()
                 if 'REJ_GROUP' not in df_wafer.columns:
                     return pd.Series()
-                df_daily = df_wafer[df_wafer['REJ_GROUP'] == rej_group].copy()
+                df_daily = analyzer.group('wafer', rej_group)
                 if df_daily.empty:
                     return pd.Series()
                 if 'AFT_BAD_RSN_CD' not in df_daily.columns or 'LOSS_RATIO' not in df_daily.columns:
                     return pd.Series()
-                loss_ratio_series = df_daily.groupby('AFT_BAD_RSN_CD')['LOSS_RATIO'].sum()
+                loss_ratio_series = df_daily.groupby('AFT_BAD_RSN_CD', observed=True)['LOSS_RATIO'].sum()
                 return loss_ratio_series
 
             # 전역 딕셔너리에 저장
             self.CODE_GAP_REF = {}
             self.CODE_GAP_DAILY = {}
+            analysis_requests = {}  # {REJ_GROUP: target_mids}
 
             for rej in top3_rej_groups:
                 ref_series = get_code_gap_ref(rej)
@@ -1324,50 +1453,13 @@ class DailyReportGenerator:
                 top_row = top3.iloc[0]
                 analysis_text += f"\n {rej} 최대 Gap: {top_row['MID_GROUP']} ({top_row['Gap']:.2f}%)"
 
-                # 4. 세부분석 함수 실행
-                if rej not in REJ_GROUP_TO_ANALYZER:
-                    detailed_analysis_dict[rej] = [f"[{rej} 분석] 함수 없음"]
-                    continue
-
-                analyzer_func = REJ_GROUP_TO_ANALYZER[rej]
-                sig = signature(analyzer_func)
-                bound_args = {}
-                missing = []
-
-
-                for param_name, param in sig.parameters.items():
-                    if 'wafer' in param_name.lower():
-                        if df_wafer is not None:
-                            df_target = df_wafer[df_wafer['REJ_GROUP'] == rej].copy()
-                            bound_args[param_name] = df_target
-                        else:
-                            missing.append(param_name)
-                    elif 'lot' in param_name.lower():
-                        if df_lot is not None:
-                            bound_args[param_name] = df_lot
-                        else:
-                            missing.append(param_name)
-                    elif param.name == 'target_mids':
-                        bound_args['target_mids'] = [mid for mid in top3['MID_GROUP']]
-                        print(f"{rej}: target_mids → {bound_args['target_mids']}")
-                    elif param.name == 'target_codes':
-                        target_codes = top3['MID_GROUP'].tolist()
-                        bound_args['target_codes'] = target_codes
-                        print(f"{rej}: target_codes → {target_codes}")
-                    elif param.default == param.empty:
-                        missing.append(param_name)
-
-                if missing:
-                    detailed_analysis_dict[rej] = [f"[{rej} 분석] 누락: {missing}"]
-                    continue
-
-                try:
-                    result = analyzer_func(**bound_args)
-                    content_only = result[1:] if len(result) > 1 and result[0].startswith("[") else result
-                    detailed_analysis_dict[rej] = content_only
-                except Exception as e:
-                    detailed_analysis_dict[rej] = [f"[{rej} 분석] 오류: {e}"]
+                # 4. 세부분석 요청 등록 (target_mids: Gap 상위 MID_GROUP)
+                analysis_requests[rej] = top3['MID_GROUP'].tolist()
 
+            # 세부분석 병렬 실행 (그룹별 오류/시간 초과 격리, 결과는 요청 순서)
+            for rej, result in analyzer.run_many(analysis_requests).items():
+                content_only = result[1:] if len(result) > 1 and result[0].startswith("[") else result
+                detailed_analysis_dict[rej] = content_only
 
             # 개별 플롯 생성
             plot_paths = self._create_top3_midgroup_plot_per_group(merged, top3_rej_groups)
@@ -1395,7 +1487,7 @@ class DailyReportGenerator:
     def _create_top3_midgroup_plot_per_group(self, merged_df, top3_rej_groups):
         """
         각 REJ_GROUP별로 Gap 상위 3개 MID_GROUP만 추출하여 개별 막대그래프 생성
-        → 결과: {'GR_보증': 'path1.png', 'SAMPLE': 'path2.png', ...}
+        → 결과: {'GR_보증': 'path1.png', 'SAMPLE': 'path2.png', ...} (렌더링은 self.charts.collect()에서 완료)
         """
         # PROJECT_ROOT 및 날짜 폴더
         PROJECT_ROOT = Path(__file__).parent.parent
@@ -1422,107 +1514,17 @@ class DailyReportGenerator:
                 safe_rej = "".join(c if c.isalnum() else "_" for c in rej_group)
                 plot_path = debug_dir  / f"prime_midgroup_top3_gap_{safe_rej}.png"
 
-                # 기존 파일 삭제
-                if plot_path.exists():
-                    plot_path.unlink()
-                # 서브플롯 생성 (가로 3개)
-                fig, axes = plt.subplots(1, 3, figsize=(15, 4), dpi=300)
-                # 그래프 수에 따라 안 보이는 서브플롯 숨기기
-                n_plots = len(top3_mids)
-                for i in range(n_plots, 3):
-                    axes[i].set_visible(False)
-
-                # 전체 Y축 범위 계산 (3개 MID 기준 통합)
-                all_values = []
-                for _, row in top3_mids.iterrows():
-                    all_values.extend([float(row['Ref(3개월)']), float(row['실적(%)'])])
-                
-                global_min = min(all_values) if all_values else 0
-                global_max = max(all_values) if all_values else 0
-
-                # 여유 포함 (0 반드시 포함)
-                y_min = min(0, float(global_min) * 0.95)
-                y_max = max(float(global_max) * 1.15, 0.01)
-
-                # 각 MID_GROUP 그래프 그리기 (동일 Y축)
-                for i, (idx, row) in enumerate(top3_mids.iterrows()):
-                    ax = axes[i]
-                    mid_name = row['MID_GROUP']
-                    ref_val = float(row['Ref(3개월)'])
-                    actual_val = float(row['실적(%)'])
-                    gap_val = actual_val - ref_val
-
-                    # X 축 위치
-                    x_center = 0
-                    bar_width = 0.9
-                    ref_x = x_center - bar_width/2
-                    daily_x = x_center + bar_width/2
-
-                    # 막대 그리기
-                    bar_ref = ax.bar(ref_x, ref_val, bar_width, color='#0000ff')
-                    bar_actual = ax.bar(daily_x, actual_val, bar_width, color='#ff0000')
-
-                    #  Y 축 범위 (0 반드시 포함)
-                    ax.set_ylim(y_min, y_max)
-                    ax.set_title(f"[{mid_name}]", fontsize=14, fontweight='bold', pad=15)
-
-                    # X 축 라벨
-                    ax.set_xticks([ref_x, daily_x])
-                    ax.set_xticklabels(['Ref.', '일'], fontsize=14, fontweight='bold')
-
-                    #  내부 라벨 (흰색, 막대 중앙)
-                    label_offset = 0.01
-                    for bar, val in zip([bar_ref, bar_actual], [ref_val, actual_val]):
-                        height = bar[0].get_height()
-                        # 양수면 위, 음수면 아래
-                        if height >= 0:
-                            va = 'bottom'
-                            label_y = height + label_offset
-                        else:
-                            va = 'top'
-                            label_y = height - label_offset
-
-                        ax.text(bar[0].get_x() + bar[0].get_width()/2., label_y,
-                                f'{val:.2f}%', 
-                                ha='center', va=va,                    # 가로 중앙, 세로 정렬 (bottom/top)
-                                fontsize=15, fontweight='bold', 
-                                color='black',                         
-                                zorder=4)                              # 막대 위에 표시
-
-                    #  Gap 라벨 (제목과 겹치지 않게)
-                    max_val = max(ref_val, actual_val)
-                    min_val = min(ref_val, actual_val)
-                    
-                    # 양수면 막대 위, 음수면 막대 아래
-                    if max_val >= 0:
-                        gap_y = max_val * 1.1  
-                        va_align = 'bottom'
-                    else:
-                        gap_y = min_val * 1.1
-                        va_align = 'top'
-                    
-                    gap_x = x_center
-                    gap_color = '#ff0000' if gap_val >= 0 else '#0000ff'
-                    ax.text(gap_x, gap_y, f'{gap_val:+.2f}%', ha='center', va=va_align,
-                            fontsize=15, fontweight='bold', color=gap_color)
-
-                    # 그리드
-                    ax.grid(axis='y', linestyle='--', alpha=0.7, zorder=0)
-                    ax.set_axisbelow(True)
-                    ax.spines['top'].set_visible(False)
-                    ax.spines['right'].set_visible(False)
-
-                # 전체 제목
-                fig.suptitle(f"[ {rej_group} 상위 3개 분석 ]", fontsize=14, fontweight='bold', y=1.02)
-
-                plt.tight_layout()
-                plt.savefig(str(plot_path), dpi=300, bbox_inches='tight')
-                plt.close()
-
-                if plot_path.exists():
-                    plot_paths[rej_group] = str(plot_path)
-                else:
-                    raise RuntimeError(f"파일 생성 실패: {plot_path}")
+                # 차트 렌더러에 등록 (동일 Y축, 최대 3개 서브플롯)
+                rows = [
+                    {'name': str(row['MID_GROUP']), 'ref': float(row['Ref(3개월)']), 'actual': float(row['실적(%)'])}
+                    for row in top3_mids.to_dict('records')
+                ]
+                self.charts.submit(f"top3_midgroup_{safe_rej}", {
+                    'kind': 'top3_midgroup',
+                    'data': {'rows': rows, 'title': f"[ {rej_group} 상위 3개 분석 ]"},
+                    'path': str(plot_path),
+                })
+                plot_paths[rej_group] = str(plot_path)
 
             except Exception as e:
                 print(f"{rej_group} 플롯 생성 실패: {e}")
@@ -1532,6 +1534,81 @@ class DailyReportGenerator:
 
 
 
+    def _fill_rc_hg_details(self, details, frame, avg_in_qty, total_daily_qty, debug_dir, prime=False):
+        """
+        RC/HG 보상 tidy 프레임 → details 표/dict 채우기 + 그룹별/전체 그래프 등록
+        prime=True: 'prime_' 접두 키, 그래프 파일/키에 '_Prime' 접미
+        """
+        prefix = 'prime_' if prime else ''
+        suffix = '_Prime' if prime else ''
+        title_suffix = ' - Prime' if prime else ''
+
+        # 전체 요약 표 (+ 모수 행)
+        summary = rc_hg_table(frame, RC_HG_TOTAL)
+        total = frame[frame['REJ_GROUP'] == RC_HG_TOTAL]
+        ref_qty_dict = dict(zip(total['CRET_CD'], total['REF_QTY'].astype(int).tolist()))
+        daily_qty_dict = dict(zip(total['CRET_CD'], total['DAILY_QTY'].astype(int).tolist()))
+        ref_qty_dict['모수'] = int(avg_in_qty)
+        daily_qty_dict['모수'] = int(total_daily_qty)
+        summary.loc[len(summary)] = ['모수', ref_qty_dict['모수'], daily_qty_dict['모수'], "", "", ""]
+
+        details[f'{prefix}rc_hg_ref_qty_total'] = ref_qty_dict
+        details[f'{prefix}rc_hg_daily_qty_total'] = daily_qty_dict
+        details['prime_avg_in_qty' if prime else 'rc_hg_avg_in_qty'] = avg_in_qty
+        details['prime_summary' if prime else 'summary'] = summary
+
+        # 그룹별 비교 표 + 그래프 (모수 제외)
+        for key in ['rc_hg_ref_qty_by_group', 'rc_hg_daily_qty_by_group', 'rc_hg_ref_rate_by_group',
+                    'rc_hg_daily_rate_by_group', 'rc_hg_gap_data_by_group', 'loss_rate_table_by_group',
+                    'rc_hg_gap_chart_path_by_group']:
+            details[f'{prefix}{key}'] = {}
+
+        for group in RC_HG_REJ_GROUPS:
+            part = frame[frame['REJ_GROUP'] == group]
+            crets = part['CRET_CD'].tolist()
+            ref_rate_dict = dict(zip(crets, part['REF_RATE'].tolist()))
+            daily_rate_dict = dict(zip(crets, part['DAILY_RATE'].tolist()))
+            gap_data = dict(zip(crets, part['GAP'].tolist()))
+
+            details[f'{prefix}loss_rate_table_by_group'][group] = rc_hg_table(frame, group)
+            details[f'{prefix}rc_hg_ref_qty_by_group'][group] = dict(zip(crets, part['REF_QTY'].astype(int).tolist()))
+            details[f'{prefix}rc_hg_daily_qty_by_group'][group] = dict(zip(crets, part['DAILY_QTY'].astype(int).tolist()))
+            details[f'{prefix}rc_hg_ref_rate_by_group'][group] = ref_rate_dict
+            details[f'{prefix}rc_hg_daily_rate_by_group'][group] = daily_rate_dict
+            details[f'{prefix}rc_hg_gap_data_by_group'][group] = gap_data
+
+            graph_path = debug_dir / f"RC_HG_보상_{group}{suffix}.png"
+            self.charts.submit(f"RC_HG_{group}{suffix}", {
+                'kind': 'ref_daily_panels',
+                'data': {
+                    'categories': ['FS', 'RESC', 'HG'],
+                    'ref': ref_rate_dict, 'daily': daily_rate_dict, 'gap': gap_data,
+                    'y_lims': {'FS': (0.0, 2.0), 'RESC': (-1.0, 1.0), 'HG': (-1.0, 1.0)},
+                    'style': 'group',
+                    'title': f'RC/HG 보상 ({group}){title_suffix}',
+                },
+                'path': str(graph_path),
+            })
+            details[f'{prefix}rc_hg_gap_chart_path_by_group'][group] = str(graph_path)
+
+        # 전체 RC/HG 보상 그래프 (표 표기와 동일하게 소수 2자리)
+        crets = total['CRET_CD'].tolist()
+        total_graph_path = debug_dir / f"RC_HG_보상_전체{suffix}.png"
+        self.charts.submit(f'RC_HG_전체{suffix}', {
+            'kind': 'ref_daily_panels',
+            'data': {
+                'categories': ['FS', 'RESC', 'HG'],
+                'ref': dict(zip(crets, total['REF_RATE'].round(2).tolist())),
+                'daily': dict(zip(crets, total['DAILY_RATE'].round(2).tolist())),
+                'gap': dict(zip(crets, total['GAP'].round(2).tolist())),
+                'y_lims': {'FS': (4.0, 12.0), 'RESC': (-3.0, 1.0), 'HG': (-3.0, 1.0)},
+                'style': 'total',
+                'title': f'RC/HG 보상 (전체){title_suffix}',
+            },
+            'path': str(total_graph_path),
+        })
+        details[f'{prefix}rc_hg_gap_chart_path_total'] = str(total_graph_path)
+
     def _create_DATA_LOT_3210_wafering_300(self):
         """3210 LOT 상세 분석 - 캐시된 3개월 데이터 + self.data의 당일 데이터 모두 활용"""
 
@@ -1551,55 +1628,15 @@ class DailyReportGenerator:
         debug_dir = PROJECT_ROOT / "daily_reports_debug" / date_folder_name 
         debug_dir.mkdir(exist_ok=True, parents=True)  # 폴더 생성
 
-        target_months = []
-        current = self.target_date_obj.replace(day=1)
-        for _ in range(3):
-            # 전월로 이동
-            current = (current - timedelta(days=1)).replace(day=1)
-            month_str = current.strftime("%Y%m")
-            target_months.append(month_str)
-
-        # 역순 정렬 (과거 → 최근)
-        target_months = sorted(target_months)
-
-        cache_dir = PROJECT_ROOT / "data_cache"
-        pattern = "DATA_LOT_3210_wafering_300_*.parquet"
-        parquet_files = list(cache_dir.glob(pattern))
+        # 직전 3개월 전체 기간 (당월 제외)
+        month_start = self.target_date_obj.replace(day=1)
+        range_start = (month_start - relativedelta(months=3)).strftime("%Y%m%d")
+        range_end = (month_start - timedelta(days=1)).strftime("%Y%m%d")
 
-        df_cached_3months = pd.DataFrame()
-
-        if parquet_files:
-            valid_files = []
-            for file_path in parquet_files:
-                try:
-                    stem = file_path.stem  # 전체 이름 (확장자 제외)
-                    date_part = stem.split('_')[-1]  # '202506'
-
-                    if len(date_part) != 6 or not date_part.isdigit():
-                        continue  # 형식 맞지 않으면 건너뜀
-
-                    file_ym = date_part  # '202506' 형식
-                except Exception as e:
-                    print(f"[캐시] {file_path.name}에서 월 정보 추출 실패 → 건너뜀: {e}")
-                    continue
-
-                if file_ym in target_months:
-                    valid_files.append(file_path)
-
-            dfs = []
-            for file_path in valid_files:
-                try:
-                    df_part = pd.read_parquet(file_path)
-                    dfs.append(df_part)
-                except Exception as e:
-                    print(f"[캐시] {file_path.name} 읽기 실패: {e}")
-
-            if dfs:
-                df_cached_3months = pd.concat(dfs, ignore_index=True)
-            else:
-                print("[캐시] 모든 파일 로드 실패 → 3개월 데이터 없음")
-        else:
-            print("[캐시] data_cache에 DATA_LOT_3210_wafering_300_*.parquet 파일 없음")
+        # Ref 3개월: 일별 집계 (일자, REJ_GROUP, CRET_CD, 등급, ...) 행 합산 → 원본 행 불필요
+        df_cached_3months = get_aggregate_store().window(LOT_DAILY, range_start, range_end)
+        if df_cached_3months.empty:
+            print(f"[캐시] DATA_LOT_3210_wafering_300 {range_start} ~ {range_end} 데이터 없음")
 
         # ===================================================================
         # 2. [기존] self.data에서 당일 데이터 사용 (실시간 리포트용)
@@ -1611,552 +1648,48 @@ class DailyReportGenerator:
             print("[self.data] DATA_LOT_3210_wafering_300 없거나 빈 데이터")
 
         # ===================================================================
-        # [핵심] MS6 기반 PRODUCT_TYPE 병합
+        # [핵심] MS6 기반 PRODUCT_TYPE 병합 (당일 데이터만, Ref 집계는 집계 저장소 window()에서 읽으며 PRODUCT_TYPE/MID_GROUP은 aggregate_store._enrich에서 부여됨)
         # ===================================================================
-        if not df_cached_3months.empty:
-            df_cached_3months = self._merge_product_type(df_cached_3months)
-
         if not df_self_data.empty:
             df_self_data = self._merge_product_type(df_self_data)
 
         # ===================================================================
         # 3. [핵심] 3개월 데이터 기반 Loss Rate 분석
+        #    Ref/일 각각 (REJ_GROUP, CRET_CD, Prime) 1회 groupby → 표/dict/그래프는 집계 결과에서 파생
         # ===================================================================
         if not df_cached_3months.empty:
             total_months = 3
+            ref_cube = lot_loss_cube(df_cached_3months)
+            daily_cube = lot_loss_cube(df_self_data)
 
             # ===================================================================
             # (1) 전체 (Total) 데이터 기준 분석
             # ===================================================================
-            denominator_data = df_cached_3months[df_cached_3months['REJ_GROUP'] == '분모']
-            total_in_qty = denominator_data['IN_QTY'].sum() 
-            avg_in_qty = total_in_qty / total_months
+            frame, avg_in_qty, total_daily_qty = rc_hg_loss_frame(ref_cube, daily_cube, total_months)
 
             if avg_in_qty == 0:
                 print(" 분모(IN_QTY)가 0입니다. Loss Rate 계산 불가")
                 self.avg_in_qty = 0
                 self.total_daily_qty = 0
-
-                # 🔽 이 부분이 사라진 게 아닙니다 — 아래 else 블록에서 처리됩니다
             else:
                 self.avg_in_qty = avg_in_qty
-
-                valid_cached = df_cached_3months[df_cached_3months['REJ_GROUP'].notna()]
-                total_loss_by_cret = valid_cached.groupby('CRET_CD')['LOSS_QTY'].sum() / total_months
-
-                daily_loss_by_cret = pd.Series(dtype='int64')
-                total_daily_qty = 0
-                if not df_self_data.empty:
-                    valid_daily = df_self_data[df_self_data['REJ_GROUP'].notna()]
-                    daily_loss_by_cret = valid_daily.groupby('CRET_CD')['LOSS_QTY'].sum()
-                    denominator_daily = df_self_data[df_self_data['REJ_GROUP'] == '분모']
-                    total_daily_qty = denominator_daily['IN_QTY'].sum()
                 self.total_daily_qty = total_daily_qty
-
-                cret_list = ['FS', 'HG', 'RESC']
-                report_table_total = []
-                ref_qty_dict = {}
-                daily_qty_dict = {}
-
-                for cret_cd in cret_list:
-                    ref_qty = total_loss_by_cret.get(cret_cd, 0)
-                    daily_qty = daily_loss_by_cret.get(cret_cd, 0)
-                    ref_rate = (ref_qty / avg_in_qty) * 100 if avg_in_qty != 0 else 0
-                    daily_rate = (daily_qty / total_daily_qty) * 100 if total_daily_qty != 0 else 0
-                    gap = ref_rate - daily_rate 
-
-                    report_table_total.append({
-                        '구분': cret_cd,
-                        'Ref.(3개월)': int(ref_qty),
-                        '일': int(daily_qty),
-                        'Ref.(3개월)%': f"{ref_rate:+.2f}%",
-                        '일%': f"{daily_rate:+.2f}%",
-                        'Gap': f"{gap:+.2f}%"
-                    })
-                    ref_qty_dict[cret_cd] = int(ref_qty)
-                    daily_qty_dict[cret_cd] = int(daily_qty)
-
-                ref_qty_dict['모수'] = int(avg_in_qty)
-                daily_qty_dict['모수'] = int(total_daily_qty)
-                report_table_total.append({
-                    '구분': '모수',
-                    'Ref.(3개월)': ref_qty_dict['모수'],
-                    '일': daily_qty_dict['모수'],
-                    'Ref.(3개월)%': "", '일%': "", 'Gap': ""
-                })
-
-                details['rc_hg_ref_qty_total'] = ref_qty_dict
-                details['rc_hg_daily_qty_total'] = daily_qty_dict
-                details['rc_hg_avg_in_qty'] = avg_in_qty
-                details['summary'] = pd.DataFrame(report_table_total)
-
-                # ===================================================================
-                # 4. 그룹별 비교 표 생성 + 그래프 생성 (모수 제외)
-                # ===================================================================
-                rej_groups = ['PARTICLE', 'FLATNESS', 'WARP&BOW', 'NANO']
-                details['rc_hg_ref_qty_by_group'] = {}
-                details['rc_hg_daily_qty_by_group'] = {}
-                details['rc_hg_ref_rate_by_group'] = {}    
-                details['rc_hg_daily_rate_by_group'] = {}  
-                details['rc_hg_gap_data_by_group'] = {}
-                details['loss_rate_table_by_group'] = {}
-                details['rc_hg_gap_chart_path_by_group'] = {}
-
-                for group in rej_groups:
-                    group_data = df_cached_3months[df_cached_3months['REJ_GROUP'] == group]
-                    group_loss_by_cret = group_data.groupby('CRET_CD')['LOSS_QTY'].sum() / total_months
-
-                    group_daily_loss_by_cret = pd.Series(dtype='int64')
-                    if not df_self_data.empty:
-                        group_self_data = df_self_data[df_self_data['REJ_GROUP'] == group]
-                        group_daily_loss_by_cret = group_self_data.groupby('CRET_CD')['LOSS_QTY'].sum()
-
-                    group_table = []
-                    gap_data = {}
-                    ref_qty_dict_group = {}
-                    daily_qty_dict_group = {}
-                    ref_rate_dict_group = {}     
-                    daily_rate_dict_group = {}   
-
-                    for cret_cd in cret_list:
-                        ref_qty = group_loss_by_cret.get(cret_cd, 0)
-                        daily_qty = group_daily_loss_by_cret.get(cret_cd, 0)
-                        ref_rate = (ref_qty / avg_in_qty) * 100 if avg_in_qty != 0 else 0
-                        daily_rate = (daily_qty / total_daily_qty) * 100 if total_daily_qty != 0 else 0
-                        gap = ref_rate - daily_rate 
-
-                        group_table.append({
-                            '구분': cret_cd,
-                            'Ref.(3개월)': int(ref_qty),
-                            '일': int(daily_qty),
-                            'Ref.(3개월)%': f"{ref_rate:+.2f}%",
-                            '일%': f"{daily_rate:+.2f}%",
-                            'Gap': f"{gap:+.2f}%"
-                        })
-                        gap_data[cret_cd] = gap
-                        ref_qty_dict_group[cret_cd] = int(ref_qty)
-                        daily_qty_dict_group[cret_cd] = int(daily_qty)
-                        ref_rate_dict_group[cret_cd] = ref_rate      
-                        daily_rate_dict_group[cret_cd] = daily_rate 
-
-                    group_table_df = pd.DataFrame(group_table)
-                    if group_table_df.empty:
-                        group_table_df = pd.DataFrame(columns=['구분', 'Ref.(3개월)', '일', 'Ref.(3개월)%', '일%', 'Gap'])
-                    details['loss_rate_table_by_group'][group] = group_table_df
-
-                    details['rc_hg_ref_qty_by_group'][group] = ref_qty_dict_group
-                    details['rc_hg_daily_qty_by_group'][group] = daily_qty_dict_group
-                    details['rc_hg_ref_rate_by_group'][group] = ref_rate_dict_group      
-                    details['rc_hg_daily_rate_by_group'][group] = daily_rate_dict_group 
-                    details['rc_hg_gap_data_by_group'][group] = gap_data
-
-                    fig, axes = plt.subplots(1, 3, figsize=(10, 6), dpi=300)
-                    categories = ['FS', 'RESC', 'HG']
-                    Y_LIM_MAP = {
-                        'FS': (0.0, 2.0),
-                        'RESC': (-1.0, 1.0),
-                        'HG': (-1.0, 1.0)
-                    }
-                    ref_color = '#0000ff'
-                    daily_color = '#ff0000'
-
-                    for idx, cret_cd in enumerate(categories):
-                        ax = axes[idx]
-                        ref_rate = float(ref_rate_dict_group.get(cret_cd, 0.0))
-                        daily_rate = float(daily_rate_dict_group.get(cret_cd, 0.0))
-                        gap = float(gap_data.get(cret_cd, 0.0))
-
-                        y_min, y_max = Y_LIM_MAP[cret_cd]
-                        y_range = y_max - y_min
-                        label_offset = y_range * 0.025
-                        gap_offset = y_range * 0.06
-
-                        x_center = 0
-                        bar_width = 0.9
-                        ref_x = x_center - bar_width/2
-                        daily_x = x_center + bar_width/2
-
-                        bar_ref = ax.bar(ref_x, ref_rate, bar_width, color=ref_color)
-                        bar_daily = ax.bar(daily_x, daily_rate, bar_width, color=daily_color)
-                        ax.set_ylim(y_min, y_max)
-
-                        def add_internal_label(bar, value):
-                            for rect in bar:
-                                height = rect.get_height()
-                                pos_y = height + label_offset if height >= 0 else height - label_offset
-                                va = 'bottom' if height >= 0 else 'top'
-                                ax.text(rect.get_x() + rect.get_width()/2., pos_y,
-                                        f'{value:.2f}%', ha='center', va=va, fontsize=15,
-                                        fontweight='bold', color='black', zorder=4)
-
-                        add_internal_label(bar_ref, ref_rate)
-                        add_internal_label(bar_daily, daily_rate)
-
-                        if ref_rate >= 0 and daily_rate >= 0:
-                            gap_y = max(ref_rate, daily_rate) + gap_offset
-                            va_align = 'bottom'
-                        elif ref_rate <= 0 and daily_rate <= 0:
-                            gap_y = min(ref_rate, daily_rate) - gap_offset
-                            va_align = 'top'
-                        else:
-                            gap_y = (max(ref_rate, daily_rate) + gap_offset) if gap >= 0 else (min(ref_rate, daily_rate) - gap_offset)
-                            va_align = 'bottom' if gap >= 0 else 'top'
-
-                        gap_color = '#ff0000' if gap >= 0 else '#0000ff'
-                        sign = '+' if gap >= 0 else ''
-                        ax.text(x_center, gap_y, f'{sign}{gap:.2f}%', ha='center', va=va_align,
-                                fontsize=15, fontweight='bold', color=gap_color)
-
-                        ax.set_xticks([ref_x, daily_x])
-                        ax.set_xticklabels(['Ref.', '일'], fontsize=20, fontweight='bold')
-                        ax.set_title(cret_cd, fontsize=20, fontweight='bold', pad=10)
-                        ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:.1f}%'))
-                        ax.tick_params(axis='y', labelsize=14)
-                        ax.grid(axis='y', linestyle='--', alpha=0.7)
-                        ax.set_axisbelow(True)
-                        ax.spines['top'].set_visible(False)
-                        ax.spines['right'].set_visible(False)
-
-                    fig.suptitle(f'RC/HG 보상 ({group})', fontsize=14, fontweight='bold', y=1.05)
-                    plt.tight_layout(pad=0.8)
-
-                    graph_path = debug_dir / f"RC_HG_보상_{group}.png"
-                    if graph_path.exists(): graph_path.unlink()
-                    plt.savefig(graph_path, dpi=300, bbox_inches='tight')
-                    plt.close()
-                    details['rc_hg_gap_chart_path_by_group'][group] = str(graph_path)
-
-                # ===================================================================
-                # 7. 전체 RC/HG 보상 그래프 생성
-                # ===================================================================
-                total_gap_data = {}
-                total_ref_data = {}
-                total_daily_data = {}
-                for row in details['summary'].to_dict('records'):
-                    if row['구분'] in ['FS', 'RESC', 'HG']:
-                        total_gap_data[row['구분']] = float(row['Gap'].replace('%', '').replace('+', ''))
-                        total_ref_data[row['구분']] = float(row['Ref.(3개월)%'].replace('%', '').replace('+', ''))
-                        total_daily_data[row['구분']] = float(row['일%'].replace('%', '').replace('+', ''))
-
-                fig, axes = plt.subplots(1, 3, figsize=(10, 6), dpi=300)
-                Y_LIM_MAP = {
-                    'FS': (4.0, 12.0),
-                    'RESC': (-3.0, 1.0),
-                    'HG': (-3.0, 1.0)
-                }
-                for idx, cret_cd in enumerate(['FS', 'RESC', 'HG']):
-                    ax = axes[idx]
-                    ref_rate = total_ref_data.get(cret_cd, 0)
-                    daily_rate = total_daily_data.get(cret_cd, 0)
-                    gap = total_gap_data.get(cret_cd, 0)
-                    y_min, y_max = Y_LIM_MAP[cret_cd]
-                    label_offset = (y_max - y_min) * 0.02
-
-                    x_center = 0
-                    bar_width = 0.9
-                    ref_x = x_center - bar_width/2
-                    daily_x = x_center + bar_width/2
-
-                    ax.bar(ref_x, ref_rate, bar_width, color='#0000ff')
-                    ax.bar(daily_x, daily_rate, bar_width, color='#ff0000')
-                    ax.set_ylim(y_min, y_max)
-
-                    def add_label(bar, value):
-                        for rect in bar:
-                            height = rect.get_height()
-                            pos_y = height + label_offset if height >= 0 else height - label_offset
-                            va = 'bottom' if height >= 0 else 'top'
-                            ax.text(rect.get_x() + rect.get_width()/2., pos_y,
-                                    f'{value:.2f}%', ha='center', va=va, fontsize=15,
-                                    fontweight='bold', color='black', zorder=4)
-
-                    add_label(ax.containers[0], ref_rate)
-                    add_label(ax.containers[1], daily_rate)
-
-                    gap_y = (max(ref_rate, daily_rate) + label_offset * 3) if (ref_rate >= 0 or daily_rate >= 0) \
-                        else (min(ref_rate, daily_rate) - label_offset * 3)
-                    va_align = 'bottom' if gap >= 0 else 'top'
-                    gap_color = '#0000ff' if gap >= 0 else '#ff0000'
-                    sign = '+' if gap >= 0 else ''
-                    ax.text(x_center, gap_y, f'{sign}{gap:.2f}%', ha='center', va=va_align,
-                            fontsize=15, fontweight='bold', color=gap_color)
-
-                    ax.set_xticks([ref_x, daily_x])
-                    ax.set_xticklabels(['Ref.', '일'], fontsize=20, fontweight='bold')
-                    ax.set_title(cret_cd, fontsize=20, fontweight='bold', pad=10)
-                    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:.1f}%'))
-                    ax.tick_params(axis='y', labelsize=14)
-                    ax.grid(axis='y', linestyle='--', alpha=0.7)
-                    ax.set_axisbelow(True)
-                    ax.spines['top'].set_visible(False)
-                    ax.spines['right'].set_visible(False)
-
-                fig.suptitle(f'RC/HG 보상 (전체)', fontsize=14, fontweight='bold', y=1.05)
-                plt.tight_layout(pad=0.8)
-                total_graph_path = debug_dir / "RC_HG_보상_전체.png"
-                if total_graph_path.exists(): total_graph_path.unlink()
-                plt.savefig(total_graph_path, dpi=300, bbox_inches='tight')
-                plt.close()
-                details['rc_hg_gap_chart_path_total'] = str(total_graph_path)
+                self._fill_rc_hg_details(details, frame, avg_in_qty, total_daily_qty, debug_dir, prime=False)
 
             # ===================================================================
             # (2) Prime 제품 전용 분석
             # ===================================================================
             if 'GRD_CD_NM_CS' in df_cached_3months.columns:
-                df_cached_prime = df_cached_3months[df_cached_3months['GRD_CD_NM_CS'] == 'Prime']
-                df_self_prime = df_self_data[df_self_data['GRD_CD_NM_CS'] == 'Prime'] if not df_self_data.empty else pd.DataFrame()
+                if ref_cube['PRIME'].astype(bool).any():
+                    frame_prime, avg_in_qty_prime, total_daily_qty_prime = rc_hg_loss_frame(
+                        ref_cube, daily_cube, total_months, prime_only=True)
 
-                if not df_cached_prime.empty:
-                    denominator_data_prime = df_cached_prime[df_cached_prime['REJ_GROUP'] == '분모']
-                    total_in_qty_prime = denominator_data_prime['IN_QTY'].sum()
-                    avg_in_qty_prime = total_in_qty_prime / total_months if total_in_qty_prime > 0 else 0
-
-                    if avg_in_qty_prime == 0:
+                    if avg_in_qty_prime <= 0:
                         print("Prime 분모(IN_QTY)가 0입니다. Loss Rate 계산 불가")
                         details['prime_avg_in_qty'] = 0
                     else:
-                        valid_cached_prime = df_cached_prime[df_cached_prime['REJ_GROUP'].notna()]
-                        total_loss_by_cret_prime = valid_cached_prime.groupby('CRET_CD')['LOSS_QTY'].sum() / total_months
-
-                        daily_loss_by_cret_prime = pd.Series(dtype='int64')
-                        total_daily_qty_prime = 0
-                        if not df_self_prime.empty:
-                            valid_daily_prime = df_self_prime[df_self_prime['REJ_GROUP'].notna()]
-                            daily_loss_by_cret_prime = valid_daily_prime.groupby('CRET_CD')['LOSS_QTY'].sum()
-                            denominator_daily_prime = df_self_prime[df_self_prime['REJ_GROUP'] == '분모']
-                            total_daily_qty_prime = denominator_daily_prime['IN_QTY'].sum()
-
-                        report_table_prime = []
-                        ref_qty_dict_prime = {}
-                        daily_qty_dict_prime = {}
-
-                        for cret_cd in cret_list:
-                            ref_qty = total_loss_by_cret_prime.get(cret_cd, 0)
-                            daily_qty = daily_loss_by_cret_prime.get(cret_cd, 0)
-                            ref_rate = (ref_qty / avg_in_qty_prime) * 100 if avg_in_qty_prime != 0 else 0
-                            daily_rate = (daily_qty / total_daily_qty_prime) * 100 if total_daily_qty_prime != 0 else 0
-                            gap = ref_rate - daily_rate
-
-                            report_table_prime.append({
-                                '구분': cret_cd,
-                                'Ref.(3개월)': int(ref_qty),
-                                '일': int(daily_qty),
-                                'Ref.(3개월)%': f"{ref_rate:+.2f}%",
-                                '일%': f"{daily_rate:+.2f}%",
-                                'Gap': f"{gap:+.2f}%"
-                            })
-                            ref_qty_dict_prime[cret_cd] = int(ref_qty)
-                            daily_qty_dict_prime[cret_cd] = int(daily_qty)
-
-                        ref_qty_dict_prime['모수'] = int(avg_in_qty_prime)
-                        daily_qty_dict_prime['모수'] = int(total_daily_qty_prime)
-                        report_table_prime.append({
-                            '구분': '모수',
-                            'Ref.(3개월)': ref_qty_dict_prime['모수'],
-                            '일': daily_qty_dict_prime['모수'],
-                            'Ref.(3개월)%': "", '일%': "", 'Gap': ""
-                        })
-
-                        details['prime_rc_hg_ref_qty_total'] = ref_qty_dict_prime
-                        details['prime_rc_hg_daily_qty_total'] = daily_qty_dict_prime
-                        details['prime_avg_in_qty'] = avg_in_qty_prime
-                        details['prime_summary'] = pd.DataFrame(report_table_prime)
-
-                        details['prime_rc_hg_ref_qty_by_group'] = {}
-                        details['prime_rc_hg_daily_qty_by_group'] = {}
-                        details['prime_rc_hg_ref_rate_by_group'] = {}
-                        details['prime_rc_hg_daily_rate_by_group'] = {}
-                        details['prime_rc_hg_gap_data_by_group'] = {}
-                        details['prime_loss_rate_table_by_group'] = {}
-                        details['prime_rc_hg_gap_chart_path_by_group'] = {}
-
-                        for group in ['PARTICLE', 'FLATNESS', 'WARP&BOW', 'NANO']:
-                            group_data = df_cached_prime[df_cached_prime['REJ_GROUP'] == group]
-                            group_loss_by_cret = group_data.groupby('CRET_CD')['LOSS_QTY'].sum() / total_months
-
-                            group_daily_loss_by_cret = pd.Series(dtype='int64')
-                            if not df_self_prime.empty:
-                                group_self_data = df_self_prime[df_self_prime['REJ_GROUP'] == group]
-                                group_daily_loss_by_cret = group_self_data.groupby('CRET_CD')['LOSS_QTY'].sum()
-
-                            group_table = []
-                            gap_data = {}
-                            ref_qty_dict_g = {}
-                            daily_qty_dict_g = {}
-                            ref_rate_dict_g = {}
-                            daily_rate_dict_g = {}
-
-                            for cret_cd in cret_list:
-                                ref_qty = group_loss_by_cret.get(cret_cd, 0)
-                                daily_qty = group_daily_loss_by_cret.get(cret_cd, 0)
-                                ref_rate = (ref_qty / avg_in_qty_prime) * 100 if avg_in_qty_prime != 0 else 0
-                                daily_rate = (daily_qty / total_daily_qty_prime) * 100 if total_daily_qty_prime != 0 else 0
-                                gap = ref_rate - daily_rate
-
-                                group_table.append({
-                                    '구분': cret_cd,
-                                    'Ref.(3개월)': int(ref_qty),
-                                    '일': int(daily_qty),
-                                    'Ref.(3개월)%': f"{ref_rate:+.2f}%",
-                                    '일%': f"{daily_rate:+.2f}%",
-                                    'Gap': f"{gap:+.2f}%"
-                                })
-                                gap_data[cret_cd] = gap
-                                ref_qty_dict_g[cret_cd] = int(ref_qty)
-                                daily_qty_dict_g[cret_cd] = int(daily_qty)
-                                ref_rate_dict_g[cret_cd] = ref_rate
-                                daily_rate_dict_g[cret_cd] = daily_rate
-
-                            group_table_df = pd.DataFrame(group_table)
-                            if group_table_df.empty:
-                                group_table_df = pd.DataFrame(columns=['구분', 'Ref.(3개월)', '일', 'Ref.(3개월)%', '일%', 'Gap'])
-                            details['prime_loss_rate_table_by_group'][group] = group_table_df
-
-                            details['prime_rc_hg_ref_qty_by_group'][group] = ref_qty_dict_g
-                            details['prime_rc_hg_daily_qty_by_group'][group] = daily_qty_dict_g
-                            details['prime_rc_hg_ref_rate_by_group'][group] = ref_rate_dict_g
-                            details['prime_rc_hg_daily_rate_by_group'][group] = daily_rate_dict_g
-                            details['prime_rc_hg_gap_data_by_group'][group] = gap_data
-
-                            fig, axes = plt.subplots(1, 3, figsize=(10, 6), dpi=300)
-                            Y_LIM_MAP = {
-                                'FS': (0.0, 2.0),
-                                'RESC': (-1.0, 1.0),
-                                'HG': (-1.0, 1.0)
-                            }
-                            for idx, cret_cd in enumerate(['FS', 'RESC', 'HG']):
-                                ax = axes[idx]
-                                ref_rate = float(ref_rate_dict_g.get(cret_cd, 0.0))
-                                daily_rate = float(daily_rate_dict_g.get(cret_cd, 0.0))
-                                gap = float(gap_data.get(cret_cd, 0.0))
-
-                                y_min, y_max = Y_LIM_MAP[cret_cd]
-                                label_offset = (y_max - y_min) * 0.025
-                                gap_offset = (y_max - y_min) * 0.06
-
-                                x_center = 0
-                                bar_width = 0.9
-                                ref_x = x_center - bar_width/2
-                                daily_x = x_center + bar_width/2
-
-                                ax.bar(ref_x, ref_rate, bar_width, color='#0000ff')
-                                ax.bar(daily_x, daily_rate, bar_width, color='#ff0000')
-                                ax.set_ylim(y_min, y_max)
-
-                                def add_label(bar, value):
-                                    for rect in bar:
-                                        height = rect.get_height()
-                                        pos_y = height + label_offset if height >= 0 else height - label_offset
-                                        va = 'bottom' if height >= 0 else 'top'
-                                        ax.text(rect.get_x() + rect.get_width()/2., pos_y,
-                                                f'{value:.2f}%', ha='center', va=va, fontsize=15,
-                                                fontweight='bold', color='black', zorder=4)
-
-                                add_label(ax.containers[0], ref_rate)
-                                add_label(ax.containers[1], daily_rate)
-
-                                if ref_rate >= 0 and daily_rate >= 0:
-                                    gap_y = max(ref_rate, daily_rate) + gap_offset
-                                    va_align = 'bottom'
-                                elif ref_rate <= 0 and daily_rate <= 0:
-                                    gap_y = min(ref_rate, daily_rate) - gap_offset
-                                    va_align = 'top'
-                                else:
-                                    gap_y = (max(ref_rate, daily_rate) + gap_offset) if gap >= 0 else (min(ref_rate, daily_rate) - gap_offset)
-                                    va_align = 'bottom' if gap >= 0 else 'top'
-
-                                gap_color = '#ff0000' if gap >= 0 else '#0000ff'
-                                sign = '+' if gap >= 0 else ''
-                                ax.text(x_center, gap_y, f'{sign}{gap:.2f}%', ha='center', va=va_align,
-                                        fontsize=15, fontweight='bold', color=gap_color)
-
-                                ax.set_xticks([ref_x, daily_x])
-                                ax.set_xticklabels(['Ref.', '일'], fontsize=20, fontweight='bold')
-                                ax.set_title(cret_cd, fontsize=20, fontweight='bold', pad=10)
-                                ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:.1f}%'))
-                                ax.tick_params(axis='y', labelsize=14)
-                                ax.grid(axis='y', linestyle='--', alpha=0.7)
-                                ax.set_axisbelow(True)
-                                ax.spines['top'].set_visible(False)
-                                ax.spines['right'].set_visible(False)
-
-                            fig.suptitle(f'RC/HG 보상 ({group}) - Prime', fontsize=14, fontweight='bold', y=1.05)
-                            plt.tight_layout(pad=0.8)
-                            graph_path = debug_dir / f"RC_HG_보상_{group}_Prime.png"
-                            if graph_path.exists(): graph_path.unlink()
-                            plt.savefig(graph_path, dpi=300, bbox_inches='tight')
-                            plt.close()
-                            details['prime_rc_hg_gap_chart_path_by_group'][group] = str(graph_path)
-
-                        total_gap_data_p = {}
-                        total_ref_data_p = {}
-                        total_daily_data_p = {}
-                        for row in details['prime_summary'].to_dict('records'):
-                            if row['구분'] in ['FS', 'RESC', 'HG']:
-                                total_gap_data_p[row['구분']] = float(row['Gap'].replace('%', '').replace('+', ''))
-                                total_ref_data_p[row['구분']] = float(row['Ref.(3개월)%'].replace('%', '').replace('+', ''))
-                                total_daily_data_p[row['구분']] = float(row['일%'].replace('%', '').replace('+', ''))
-
-                        fig, axes = plt.subplots(1, 3, figsize=(10, 6), dpi=300)
-                        Y_LIM_MAP = {
-                            'FS': (4.0, 12.0),
-                            'RESC': (-3.0, 1.0),
-                            'HG': (-3.0, 1.0)
-                        }
-                        for idx, cret_cd in enumerate(['FS', 'RESC', 'HG']):
-                            ax = axes[idx]
-                            ref_rate = total_ref_data_p.get(cret_cd, 0)
-                            daily_rate = total_daily_data_p.get(cret_cd, 0)
-                            gap = total_gap_data_p.get(cret_cd, 0)
-                            y_min, y_max = Y_LIM_MAP[cret_cd]
-                            label_offset = (y_max - y_min) * 0.02
-
-                            x_center = 0
-                            bar_width = 0.9
-                            ref_x = x_center - bar_width/2
-                            daily_x = x_center + bar_width/2
-
-                            ax.bar(ref_x, ref_rate, bar_width, color='#0000ff')
-                            ax.bar(daily_x, daily_rate, bar_width, color='#ff0000')
-                            ax.set_ylim(y_min, y_max)
-
-                            def add_label(bar, value):
-                                for rect in bar:
-                                    height = rect.get_height()
-                                    pos_y = height + label_offset if height >= 0 else height - label_offset
-                                    va = 'bottom' if height >= 0 else 'top'
-                                    ax.text(rect.get_x() + rect.get_width()/2., pos_y,
-                                            f'{value:.2f}%', ha='center', va=va, fontsize=15,
-                                            fontweight='bold', color='black', zorder=4)
-
-                            add_label(ax.containers[0], ref_rate)
-                            add_label(ax.containers[1], daily_rate)
-
-                            gap_y = (max(ref_rate, daily_rate) + label_offset * 3) if (ref_rate >= 0 or daily_rate >= 0) \
-                                else (min(ref_rate, daily_rate) - label_offset * 3)
-                            va_align = 'bottom' if gap >= 0 else 'top'
-                            gap_color = '#0000ff' if gap >= 0 else '#ff0000'
-                            sign = '+' if gap >= 0 else ''
-                            ax.text(x_center, gap_y, f'{sign}{gap:.2f}%', ha='center', va=va_align,
-                                    fontsize=15, fontweight='bold', color=gap_color)
-
-                            ax.set_xticks([ref_x, daily_x])
-                            ax.set_xticklabels(['Ref.', '일'], fontsize=20, fontweight='bold')
-                            ax.set_title(cret_cd, fontsize=20, fontweight='bold', pad=10)
-                            ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x:.1f}%'))
-                            ax.tick_params(axis='y', labelsize=14)
-                            ax.grid(axis='y', linestyle='--', alpha=0.7)
-                            ax.set_axisbelow(True)
-                            ax.spines['top'].set_visible(False)
-                            ax.spines['right'].set_visible(False)
-
-                        fig.suptitle(f'RC/HG 보상 (전체) - Prime', fontsize=14, fontweight='bold', y=1.05)
-                        plt.tight_layout(pad=0.8)
-                        total_graph_path_p = debug_dir / "RC_HG_보상_전체_Prime.png"
-                        if total_graph_path_p.exists(): total_graph_path_p.unlink()
-                        plt.savefig(total_graph_path_p, dpi=300, bbox_inches='tight')
-                        plt.close()
-                        details['prime_rc_hg_gap_chart_path_total'] = str(total_graph_path_p)
+                        self._fill_rc_hg_details(details, frame_prime, avg_in_qty_prime, total_daily_qty_prime,
+                                                 debug_dir, prime=True)
                 else:
                     print("Prime 제품에 대한 3개월 데이터가 없습니다.")
             else:
@@ -2179,7 +1712,7 @@ class DailyReportGenerator:
         # ===================================================================
         details['cache_data_available'] = not df_cached_3months.empty
         details['self_data_available'] = not df_self_data.empty
-        details['cache_total_count'] = len(df_cached_3months) if not df_cached_3months.empty else 0
+        details['cache_total_count'] = int(df_cached_3months['ROWS'].sum()) if not df_cached_3months.empty else 0
         details['self_data_count'] = len(df_self_data) if not df_self_data.empty else 0
 
         return details
@@ -2997,94 +2530,26 @@ class DailyReportGenerator:
         → 이후 _create_DATA_WAF_3210_wafering_300 내에서 
         공정별 REG_DTTM 컬럼 기준으로 재분리
         """
-        PROJECT_ROOT = Path(__file__).parent.parent
-        cache_dir = PROJECT_ROOT / "data_cache"
-
-        if not cache_dir.exists():
-            print(f"[WAF 혼합 로드] 캐시 디렉토리 없음: {cache_dir}")
-            return pd.DataFrame()
-
         # ===================================================================
-        # [1] 기준일 설정: 어제 기준 최근 90일 (여유)
+        # [1] 기준일 설정: 어제 기준 최근 70일 (여유), 월 시작일부터
         # ===================================================================
         base_date = self.target_date_obj #이미 date 객체
         print(f"base_date:", base_date)
-        target_dates_60days = {
-            (base_date - timedelta(days=i)).strftime("%Y%m%d")
-            for i in range(70)  # 여유 있게 70일 (일별 파일용)
-        }
-        target_months_90days = {
-            (base_date - timedelta(days=i)).strftime("%Y%m")
-            for i in range(70)  # 월별 파일용
-        }
-
-        # ===================================================================
-        # [2] 월별 파일 로드 (예: DATA_WAF_3210_wafering_300_202601.parquet)
-        # ===================================================================
-        monthly_pattern = "DATA_WAF_3210_wafering_300_*.parquet"
-        monthly_files = list(cache_dir.glob(monthly_pattern))
-
-        valid_monthly_files = []
-        for file_path in monthly_files:
-            try:
-                # 파일명에서 마지막 언더스코어 뒤의 6자리 추출 (YYYYMM)
-                stem = file_path.stem  # 전체 이름
-                parts = stem.split('_')
-                if len(parts) < 1:
-                    continue
-                date_part = parts[-1]  # '202601' or '20260301'
-
-                # 길이로 구분: 6자리 → 월별, 8자리 → 일별
-                if len(date_part) == 6 and date_part.isdigit():
-                    ym = date_part  # '202601'
-                    if ym in target_months_90days:
-                        valid_monthly_files.append((file_path, ym))
-            except Exception as e:
-                print(f"[월별 파일 파싱 실패] {file_path.name}: {e}")
-
-        dfs_monthly = []
-        for file_path, ym in valid_monthly_files:
-            try:
-                df = pd.read_parquet(file_path)
-                # BASE_DT가 있는 경우, 해당 월 데이터만 필터링
-                if 'BASE_DT' in df.columns:
-                    df['BASE_DT'] = df['BASE_DT'].astype(str)
-                    df = df[df['BASE_DT'].str.startswith(ym)].copy()
-
-                dfs_monthly.append(df)
-            except Exception as e:
-                print(f"[월별 로드 실패] {file_path.name}: {e}")
+        range_start = (base_date - timedelta(days=69)).replace(day=1).strftime("%Y%m%d")
+        range_end = base_date.strftime("%Y%m%d")
 
         # ===================================================================
-        # [3] 일별 파일 로드 (예: DATA_WAF_3210_wafering_300_20260301.parquet)
+        # [2] 파티션 캐시에서 기간 내 일자만 로드 (월별/일별 구분 없음, 중복 없음)
         # ===================================================================
-        daily_files = []
-        for date_str in target_dates_60days:
-            file_path = cache_dir / f"DATA_WAF_3210_wafering_300_{date_str}.parquet"
-            if file_path.exists():
-                daily_files.append(file_path)
-
-        dfs_daily = []
-        for file_path in daily_files:
-            try:
-                df = pd.read_parquet(file_path)
-                dfs_daily.append(df)
-            except Exception as e:
-                print(f"[일별 로드 실패] {file_path.name}: {e}")
-
-        # ===================================================================
-        # [4] 병합
-        # ===================================================================
-        all_dfs = dfs_monthly + dfs_daily
-        if not all_dfs:
+        # CRET_CD가 FS인 데이터 + 공정별 장비/시간 컬럼만 읽기 (scan 단계 필터)
+        df_combined = self.datasets.get(
+            "DATA_WAF_3210_wafering_300", range_start, range_end,
+            columns=WAF_TREND_COLUMNS, filters={'CRET_CD': 'FS'}
+        )
+        if df_combined.empty:
             print("[WAF 혼합 로드] 사용 가능한 데이터 없음")
             return pd.DataFrame()
 
-        df_combined = pd.concat(all_dfs, ignore_index=True)
-        df_fs = df_combined[df_combined['CRET_CD'] == 'FS'].copy() # CRET_CD가 FS인 데이터만 사용.
-
-        df_combined = df_fs
-
         # ===================================================================
         # 🔍 BASE_DT 기준 데이터 기간 출력
         # ===================================================================
@@ -3115,58 +2580,22 @@ class DailyReportGenerator:
         # ===================================================================
         # base_date = (datetime.now().date() - timedelta(days=1))
         base_date = self.target_date_obj
-        target_months = []
-        current = base_date.replace(day=1)
-        for _ in range(3):
-            current = (current - timedelta(days=1)).replace(day=1)
-            month_str = current.strftime("%Y%m")
-            target_months.append(month_str)
-        target_months = sorted(target_months)  # 과거 → 최근
-
-        # print(f"[WAF 캐시 필터링] 최근 3개월 대상 월: {target_months}")
-
-        cache_dir = PROJECT_ROOT / "data_cache"
-        pattern = "DATA_WAF_3210_wafering_300_*.parquet"
-        parquet_files = list(cache_dir.glob(pattern))
-
-        df_cached_3months = pd.DataFrame()
-
-        if parquet_files:
-            valid_files = []
-            for file_path in parquet_files:
-                try:
-                    stem = file_path.stem
-                    date_part = stem.split('_')[-1]  # '202506'
-
-                    if len(date_part) != 6 or not date_part.isdigit():
-                        continue
-
-                    file_ym = date_part
-                except Exception as e:
-                    print(f"[WAF 캐시] {file_path.name}에서 월 정보 추출 실패 → 건너뜀: {e}")
-                    continue
-
-                if file_ym in target_months:
-                    valid_files.append(file_path)
-
-            # print(f"[WAF 캐시 필터링] 전체 {len(parquet_files)}개 중 대상 {len(valid_files)}개 파일 선정: {[f.name for f in valid_files]}")
-
-            dfs = []
-            for file_path in valid_files:
-                try:
-                    df_part = pd.read_parquet(file_path)
-                    print(f"[WAF 캐시] {file_path.name} 로드 완료: {len(df_part):,} 건")
-                    dfs.append(df_part)
-                except Exception as e:
-                    print(f"[WAF 캐시] {file_path.name} 읽기 실패: {e}")
-
-            if dfs:
-                df_cached_3months = pd.concat(dfs, ignore_index=True)
-                print(f"[WAF 캐시] 총 {len(df_cached_3months):,} 건 데이터 병합 완료")
-            else:
-                print("[WAF 캐시] 모든 파일 로드 실패 → 3개월 데이터 없음")
+        # 직전 3개월 전체 기간 (당월 제외)
+        month_start = base_date.replace(day=1)
+        range_start = (month_start - relativedelta(months=3)).strftime("%Y%m%d")
+        range_end = (month_start - timedelta(days=1)).strftime("%Y%m%d")
+
+        # 분석 대상 불량 그룹의 일별 집계 (일자, REJ_GROUP, CRET_CD, 코드, MID_GROUP, 제품, 공정, 장비) 행만 읽기
+        # → 원본 wafer 행 재로드 없이 장비별 LOSS_QTY 합산
+        df_cached_3months = get_aggregate_store().window(
+            WAF_DAILY, range_start, range_end,
+            filters={'REJ_GROUP': WAF_REF_REJ_GROUPS}
+        )
+        if df_cached_3months.empty:
+            print(f"[WAF 캐시] DATA_WAF_3210_wafering_300 {range_start} ~ {range_end} 데이터 없음")
         else:
-            print("[WAF 캐시] data_cache에 DATA_WAF_3210_wafering_300_*.parquet 파일 없음")
+            print(f"[WAF 캐시] 일별 집계 {len(df_cached_3months):,} 건 로드 "
+                  f"(원본 {int(df_cached_3months.loc[df_cached_3months['process'] == ALL_PROCESS, 'ROWS'].sum()):,} 건)")
 
         # ===================================================================
         # 2. [기존] self.data에서 당일 데이터 사용
@@ -3179,15 +2608,15 @@ class DailyReportGenerator:
             print("[self.data] DATA_WAF_3210_wafering_300 없거나 빈 데이터")
 
         # ===================================================================
-        # 3. [핵심] PRODUCT_TYPE 병합
+        # 3. [핵심] PRODUCT_TYPE 병합 (당일 데이터만, Ref 집계는 집계 저장소 window()에서 읽으며 PRODUCT_TYPE/MID_GROUP은 aggregate_store._enrich에서 부여됨)
         # ===================================================================
-        if not df_cached_3months.empty:
-            df_cached_3months = self._merge_product_type(df_cached_3months)
-
         if not df_self_data.empty:
             df_self_data = self._merge_product_type(df_self_data)
 
-        print(f"[WAF] PRODUCT_TYPE 병합 완료: 3개월 {df_cached_3months['PRODUCT_TYPE'].notna().sum()}건, 당일 {df_self_data['PRODUCT_TYPE'].notna().sum()}건")
+        # 당일 데이터도 Ref와 같은 일별 집계 형태로 변환 (장비별 합산 로직 공용)
+        df_daily = aggregate_waf_daily(df_self_data)
+
+        print(f"[WAF] PRODUCT_TYPE 병합 완료: 3개월 {df_cached_3months['PRODUCT_TYPE'].notna().sum()}건, 당일 {df_daily['PRODUCT_TYPE'].notna().sum()}건")
 
         # ===================================================================
         # 3. [핵심] 3개월 데이터 기반 Loss Rate 분석
@@ -3213,19 +2642,17 @@ class DailyReportGenerator:
         def calculate_loss_metrics(group_data, eqp_col, denominator):
             """
             실제 LOSS_QTY 합계 (Count) 와 불량률 (Rate) 을 모두 반환
+            - group_data: 일별 집계 (공정 = 장비 컬럼 끝 4자리, EQP_NM 장비)
             """
-            if eqp_col not in group_data.columns or denominator == 0:
+            if denominator == 0:
                 return {}
-            
-            valid = group_data.dropna(subset=[eqp_col]).copy()
+
+            valid = group_data[(group_data['process'] == eqp_col[-4:]) & group_data['EQP_NM'].notna()]
             if valid.empty:
                 return {}
-            
-            # LOSS_QTY numeric 변환
-            valid.loc[:,'LOSS_QTY'] = pd.to_numeric(valid['LOSS_QTY'], errors='coerce').fillna(0.0).astype(float)
-            
-            # 장비별 LOSS_QTY 합계
-            loss_sum = valid.groupby(eqp_col)['LOSS_QTY'].sum()
+
+            # 장비별 LOSS_QTY 합계 (집계 시 numeric 변환/결측 0 처리됨)
+            loss_sum = valid.groupby('EQP_NM', observed=True)['LOSS_QTY'].sum()
             
             #  count (int) 와 rate (float, %) 를 모두 반환
             return {
@@ -3255,7 +2682,7 @@ class DailyReportGenerator:
             ref_results['PIT'] = pit_ref
 
 
-        df_pit_d = df_self_data[df_self_data['REJ_GROUP'] == 'PIT']
+        df_pit_d = df_daily[df_daily['REJ_GROUP'] == 'PIT']
         if not df_pit_d.empty:
             eqp_col = ['EQP_NM_300_WF_3670']
             pit_daily = {}
@@ -3276,7 +2703,7 @@ class DailyReportGenerator:
                     scratch_ref[eqp] = res
             ref_results['SCRATCH'] = scratch_ref
 
-        df_scratch_d = df_self_data[df_self_data['REJ_GROUP'] == 'SCRATCH']
+        df_scratch_d = df_daily[df_daily['REJ_GROUP'] == 'SCRATCH']
         if not df_scratch_d.empty:
             eqps_scratch = ['EQP_NM_300_WF_3670', 'EQP_NM_300_WF_6100', 'EQP_NM_300_WF_7000']
             scratch_daily = {}
@@ -3298,7 +2725,7 @@ class DailyReportGenerator:
                     edge_ref[eqp] = res
             ref_results['EDGE'] = edge_ref
 
-        df_edge_d = df_self_data[df_self_data['REJ_GROUP'] == 'EDGE']
+        df_edge_d = df_daily[df_daily['REJ_GROUP'] == 'EDGE']
         if not df_edge_d.empty:
             eqps = ['EQP_NM_300_WF_3335', 'EQP_NM_300_WF_3696', 'EQP_NM_300_WF_7000']
             edge_daily = {}
@@ -3324,7 +2751,9 @@ class DailyReportGenerator:
 
         # df_broken 필터링
         df_broken = df_cached_3months[df_cached_3months['REJ_GROUP'] == 'BROKEN']
-        df_broken_d = df_self_data[df_self_data['REJ_GROUP'] == 'BROKEN']
+        ref_processes = set(df_cached_3months['process'].astype(str).unique())
+        daily_processes = set(df_daily['process'].astype(str).unique())
+        df_broken_d = df_daily[df_daily['REJ_GROUP'] == 'BROKEN']
 
         # ===================================================================
         # [1] REF 데이터 처리 (각 MID_GROUP 내 장비별 상위 3개)
@@ -3336,15 +2765,15 @@ class DailyReportGenerator:
             df_broken['MID_GROUP'] = df_broken['MID_GROUP'].astype(str).str.strip().str.upper()
             df_broken = df_broken.reset_index(drop=True)  # 중복 인덱스 방지
 
-            for mid_group, group_df in df_broken.groupby('MID_GROUP'):
+            for mid_group, group_df in df_broken.groupby('MID_GROUP', observed=True):
                 if mid_group not in MID_TO_EQP:
                     continue
 
                 eqp_col = MID_TO_EQP[mid_group]
 
-                if eqp_col not in group_df.columns:
-                    # 컬럼 없으면 전체 LOSS_QTY 합산 (비상)
-                    loss_qty = pd.to_numeric(group_df['LOSS_QTY'], errors='coerce').sum()
+                if eqp_col[-4:] not in ref_processes:
+                    # 장비 컬럼 없으면 전체 LOSS_QTY 합산 (비상)
+                    loss_qty = group_df.loc[group_df['process'] == ALL_PROCESS, 'LOSS_QTY'].sum()
                     total_rate = (loss_qty / avg_in_qty * 100)
                     broken_ref_list.append({
                         'EQP': f"{mid_group}_UNKNOWN",
@@ -3381,14 +2810,14 @@ class DailyReportGenerator:
             df_broken_d['MID_GROUP'] = df_broken_d['MID_GROUP'].astype(str).str.strip().str.upper()
             df_broken_d = df_broken_d.reset_index(drop=True)
 
-            for mid_group, group_df in df_broken_d.groupby('MID_GROUP'):
+            for mid_group, group_df in df_broken_d.groupby('MID_GROUP', observed=True):
                 if mid_group not in MID_TO_EQP:
                     continue
 
                 eqp_col = MID_TO_EQP[mid_group]
 
-                if eqp_col not in group_df.columns:
-                    loss_qty = pd.to_numeric(group_df['LOSS_QTY'], errors='coerce').sum()
+                if eqp_col[-4:] not in daily_processes:
+                    loss_qty = group_df.loc[group_df['process'] == ALL_PROCESS, 'LOSS_QTY'].sum()
                     total_rate = (loss_qty / total_daily_qty * 100)
                     broken_daily_list.append({
                         'EQP': f"{mid_group}_UNKNOWN",
@@ -3439,7 +2868,7 @@ class DailyReportGenerator:
         if broken_ref_list:
             df_all = pd.DataFrame(broken_ref_list)
 
-            for mid_group, group_df in df_all.groupby('MID_GROUP'):
+            for mid_group, group_df in df_all.groupby('MID_GROUP', observed=True):
                 top3 = group_df.sort_values('rate', ascending=False).head(3)
                 key = f"{mid_group}_BROKEN"
 
@@ -3457,7 +2886,7 @@ class DailyReportGenerator:
         if broken_daily_list:
             df_all_d = pd.DataFrame(broken_daily_list)
 
-            for mid_group, group_df in df_all_d.groupby('MID_GROUP'):
+            for mid_group, group_df in df_all_d.groupby('MID_GROUP', observed=True):
                 top3 = group_df.sort_values('rate', ascending=False).head(3)
                 key = f"{mid_group}_BROKEN"
 
@@ -3531,7 +2960,7 @@ class DailyReportGenerator:
             if chip_ref:
                 ref_results['CHIP'] = chip_ref
 
-        df_chip_d = df_self_data[df_self_data['REJ_GROUP'] == 'CHIP']
+        df_chip_d = df_daily[df_daily['REJ_GROUP'] == 'CHIP']
 
         if not df_chip_d.empty:
             chip_daily = {}
@@ -3593,25 +3022,23 @@ class DailyReportGenerator:
             eqp_col = ['EQP_NM_300_WF_6100']  
             visual_ref = {}
             for eqp in eqp_col:
-                if eqp in visual_filtered.columns:
-                    res = calculate_loss_metrics(visual_filtered, eqp, avg_in_qty)
-                    if res:
-                        visual_ref[eqp] = res
+                res = calculate_loss_metrics(visual_filtered, eqp, avg_in_qty)
+                if res:
+                    visual_ref[eqp] = res
             if visual_ref:
                 ref_results['VISUAL'] = visual_ref
 
         # 2) VISUAL (daily_results)
-        df_visual_d = df_self_data[df_self_data['REJ_GROUP'] == 'VISUAL']
+        df_visual_d = df_daily[df_daily['REJ_GROUP'] == 'VISUAL']
         if not df_visual_d.empty:
             cond = df_visual_d['AFT_BAD_RSN_CD'].isin(['B_PARTICLE', 'B_PAR2'])
             visual_filtered_d = df_visual_d[cond]
             eqp_col = ['EQP_NM_300_WF_6100']  
             visual_daily = {}
             for eqp in eqp_col:
-                if eqp in visual_filtered_d.columns:
-                    res = calculate_loss_metrics(visual_filtered_d, eqp, total_daily_qty)
-                    if res:
-                        visual_daily[eqp] = res
+                res = calculate_loss_metrics(visual_filtered_d, eqp, total_daily_qty)
+                if res:
+                    visual_daily[eqp] = res
             if visual_daily:
                 daily_results['VISUAL'] = visual_daily
 
@@ -3771,190 +3198,16 @@ class DailyReportGenerator:
             print("[WAF] 60일 원본 데이터 없음")
             # 기존 로직 계속
         else:
-            # print(f"[WAF] 60일 원본 데이터 로드 완료: {len(df_60days_raw):,} 건")
-            # 공정별 데이터셋 생성
-            process_datasets = {}
-            # 1. 3300
-            eqp_col_3300 = 'EQP_NM_300_WF_3300'
-            reg_col_3300 = 'REG_DTTM_300_WF_3300'
-            if reg_col_3300 in df_60days_raw.columns:
-                df_3300 = df_60days_raw.dropna(subset=[reg_col_3300, eqp_col_3300]).copy()
-                df_3300['process_datetime'] = pd.to_datetime(
-                    df_3300[reg_col_3300],
-                    format='%Y%m%d%H%M%S%f',
-                    errors='coerce'
-                )
-
-                # 시간 기준 보정: 07:00 \~ 익일 06:59 까지를 전날 기준일로 묶기 위해 -7시간 이동
-                df_3300['base_dt_7hours'] = (df_3300['process_datetime'] - pd.Timedelta(hours=7)).dt.strftime('%Y%m%d') 
-
-                selected_cols = ['process_datetime','base_dt_7hours','REJ_GROUP', 'BASE_DT','LOSS_QTY', eqp_col_3300]
-                missing_cols = [c for c in selected_cols if c not in df_3300.columns]
-                if missing_cols:
-                    print(f"[3300] 누락된 컬럼: {missing_cols} → 건너뜀")
-                else:
-                    df_3300 = df_3300[selected_cols].rename(columns={eqp_col_3300: 'EQP_NM'})
-                    process_datasets['3300'] = df_3300
-
-            # 2. 3335
-            eqp_col_3335 = 'EQP_NM_300_WF_3335'
-            reg_col_3335 = 'REG_DTTM_300_WF_3335'
-            if reg_col_3335 in df_60days_raw.columns:
-                df_3335 = df_60days_raw.dropna(subset=[reg_col_3335, eqp_col_3335]).copy()
-                df_3335['process_datetime'] = pd.to_datetime(
-                    df_3335[reg_col_3335],
-                    format='%Y%m%d%H%M%S%f',
-                    errors='coerce'
-                )
-
-                # 시간 기준 보정: 07:00 \~ 익일 06:59 까지를 전날 기준일로 묶기 위해 -7시간 이동
-                df_3335['base_dt_7hours'] = (df_3335['process_datetime'] - pd.Timedelta(hours=7)).dt.strftime('%Y%m%d') 
-
-                selected_cols = ['process_datetime','base_dt_7hours','REJ_GROUP', 'BASE_DT','LOSS_QTY', eqp_col_3335]
-                missing_cols = [c for c in selected_cols if c not in df_3335.columns]
-                if missing_cols:
-                    print(f"[3335] 누락된 컬럼: {missing_cols} → 건너뜀")
-                else:
-                    df_3335 = df_3335[selected_cols].rename(columns={eqp_col_3335: 'EQP_NM'})
-                    process_datasets['3335'] = df_3335
-
-            # 3. 3670
-            eqp_col_3670 = 'EQP_NM_300_WF_3670'
-            reg_col_3670 = 'REG_DTTM_300_WF_3670'
-            if reg_col_3670 in df_60days_raw.columns:
-                df_3670 = df_60days_raw.dropna(subset=[reg_col_3670, eqp_col_3670]).copy()
-                df_3670['process_datetime'] = pd.to_datetime(
-                    df_3670[reg_col_3670],
-                    format='%Y%m%d%H%M%S%f',
-                    errors='coerce'
-                )
-
-                # 시간 기준 보정: 07:00 \~ 익일 06:59 까지를 전날 기준일로 묶기 위해 -7시간 이동
-                df_3670['base_dt_7hours'] = (df_3670['process_datetime'] - pd.Timedelta(hours=7)).dt.strftime('%Y%m%d') 
-
-                # 3개 컬럼만 선택 + EQP 컬럼 이름 통일
-                selected_cols = ['process_datetime','base_dt_7hours','REJ_GROUP', 'BASE_DT','LOSS_QTY', eqp_col_3670]
-                missing_cols = [c for c in selected_cols if c not in df_3670.columns]
-                if missing_cols:
-                    print(f"[3670] 누락된 컬럼: {missing_cols} → 건너뜀")
-                else:
-                    df_3670 = df_3670[selected_cols].rename(columns={eqp_col_3670: 'EQP_NM'})
-                    process_datasets['3670'] = df_3670
-
-
-            # 4. 3696
-            eqp_col_3696 = 'EQP_NM_300_WF_3696'
-            reg_col_3696 = 'REG_DTTM_300_WF_3696'
-            if reg_col_3696 in df_60days_raw.columns:
-                df_3696 = df_60days_raw.dropna(subset=[reg_col_3696, eqp_col_3696]).copy()
-                df_3696['process_datetime'] = pd.to_datetime(
-                    df_3696[reg_col_3696],
-                    format='%Y%m%d%H%M%S%f',
-                    errors='coerce'
-                )
-
-                # 시간 기준 보정: 07:00 \~ 익일 06:59 까지를 전날 기준일로 묶기 위해 -7시간 이동
-                df_3696['base_dt_7hours'] = (df_3696['process_datetime'] - pd.Timedelta(hours=7)).dt.strftime('%Y%m%d') 
-
-                selected_cols = ['process_datetime','base_dt_7hours','REJ_GROUP','BASE_DT', 'LOSS_QTY', eqp_col_3696]
-                missing_cols = [c for c in selected_cols if c not in df_3696.columns]
-                if missing_cols:
-                    print(f"[3696] 누락된 컬럼: {missing_cols} → 건너뜀")
-                else:
-                    df_3696 = df_3696[selected_cols].rename(columns={eqp_col_3696: 'EQP_NM'})
-                    process_datasets['3696'] = df_3696
-
-
-            # 5. 6100
-            eqp_col_6100 = 'EQP_NM_300_WF_6100'
-            reg_col_6100 = 'REG_DTTM_300_WF_6100'
-            if reg_col_6100 in df_60days_raw.columns:
-                df_6100 = df_60days_raw.dropna(subset=[reg_col_6100, eqp_col_6100]).copy()
-                df_6100['process_datetime'] = pd.to_datetime(
-                    df_6100[reg_col_6100],
-                    format='%Y%m%d%H%M%S%f',
-                    errors='coerce'
-                )
-
-                # 시간 기준 보정: 07:00 \~ 익일 06:59 까지를 전날 기준일로 묶기 위해 -7시간 이동
-                df_6100['base_dt_7hours'] = (df_6100['process_datetime'] - pd.Timedelta(hours=7)).dt.strftime('%Y%m%d') 
-
-                selected_cols = ['process_datetime','base_dt_7hours','REJ_GROUP', 'BASE_DT','LOSS_QTY', eqp_col_6100]
-                missing_cols = [c for c in selected_cols if c not in df_6100.columns]
-                if missing_cols:
-                    print(f"[6100] 누락된 컬럼: {missing_cols} → 건너뜀")
-                else:
-                    df_6100 = df_6100[selected_cols].rename(columns={eqp_col_6100: 'EQP_NM'})
-                    process_datasets['6100'] = df_6100
-
-            # 6. 6210
-            eqp_col_6210 = 'EQP_NM_300_WF_6210'
-            reg_col_6210 = 'REG_DTTM_300_WF_6210'
-            if reg_col_6210 in df_60days_raw.columns:
-                df_6210 = df_60days_raw.dropna(subset=[reg_col_6210, eqp_col_6210]).copy()
-                df_6210['process_datetime'] = pd.to_datetime(
-                    df_6210[reg_col_6210],
-                    format='%Y%m%d%H%M%S%f',
-                    errors='coerce'
-                )
-
-                # 시간 기준 보정: 07:00 \~ 익일 06:59 까지를 전날 기준일로 묶기 위해 -7시간 이동
-                df_6210['base_dt_7hours'] = (df_6210['process_datetime'] - pd.Timedelta(hours=7)).dt.strftime('%Y%m%d') 
-
-                selected_cols = ['process_datetime','base_dt_7hours','REJ_GROUP', 'BASE_DT','LOSS_QTY', eqp_col_6210]
-                missing_cols = [c for c in selected_cols if c not in df_6210.columns]
-                if missing_cols:
-                    print(f"[6210] 누락된 컬럼: {missing_cols} → 건너뜀")
-                else:
-                    df_6210 = df_6210[selected_cols].rename(columns={eqp_col_6210: 'EQP_NM'})
-                    process_datasets['6210'] = df_6210
-
-            # 7. 6500
-            eqp_col_6500 = 'EQP_NM_300_WF_6500'
-            reg_col_6500 = 'REG_DTTM_300_WF_6500'
-            if reg_col_6500 in df_60days_raw.columns:
-                df_6500 = df_60days_raw.dropna(subset=[reg_col_6500, eqp_col_6500]).copy()
-                df_6500['process_datetime'] = pd.to_datetime(
-                    df_6500[reg_col_6500],
-                    format='%Y%m%d%H%M%S%f',
-                    errors='coerce'
-                )
-
-                # 시간 기준 보정: 07:00 \~ 익일 06:59 까지를 전날 기준일로 묶기 위해 -7시간 이동
-                df_6500['base_dt_7hours'] = (df_6500['process_datetime'] - pd.Timedelta(hours=7)).dt.strftime('%Y%m%d') 
-
-                selected_cols = ['process_datetime','base_dt_7hours','REJ_GROUP', 'BASE_DT','LOSS_QTY', eqp_col_6500]
-                missing_cols = [c for c in selected_cols if c not in df_6500.columns]
-                if missing_cols:
-                    print(f"[6500] 누락된 컬럼: {missing_cols} → 건너뜀")
-                else:
-                    df_6500 = df_6500[selected_cols].rename(columns={eqp_col_6500: 'EQP_NM'})
-                    process_datasets['6500'] = df_6500
-
-            # 8. 7000
-            eqp_col_7000 = 'EQP_NM_300_WF_7000'
-            reg_col_7000 = 'REG_DTTM_300_WF_7000'
-            if reg_col_7000 in df_60days_raw.columns:
-                df_7000 = df_60days_raw.dropna(subset=[reg_col_7000, eqp_col_7000]).copy()
-                df_7000['process_datetime'] = pd.to_datetime(
-                    df_7000[reg_col_7000],
-                    format='%Y%m%d%H%M%S%f',
-                    errors='coerce'
-                )
-
-                # 시간 기준 보정: 07:00 \~ 익일 06:59 까지를 전날 기준일로 묶기 위해 -7시간 이동
-                df_7000['base_dt_7hours'] = (df_7000['process_datetime'] - pd.Timedelta(hours=7)).dt.strftime('%Y%m%d') 
-
-                selected_cols = ['process_datetime','base_dt_7hours','REJ_GROUP', 'BASE_DT','LOSS_QTY', eqp_col_7000]
-                missing_cols = [c for c in selected_cols if c not in df_7000.columns]
-                if missing_cols:
-                    print(f"[7000] 누락된 컬럼: {missing_cols} → 건너뜀")
-                else:
-                    df_7000 = df_7000[selected_cols].rename(columns={eqp_col_7000: 'EQP_NM'})
-                    process_datasets['7000'] = df_7000
-
-            # 저장
-            self.data['WAF_PROCESS_DATASETS'] = process_datasets
+            # 공정별 (장비, 처리일시, 보정 일자) long 테이블 1회 생성
+            missing_cols = [c for c in ('REJ_GROUP', 'BASE_DT', 'LOSS_QTY') if c not in df_60days_raw.columns]
+            if missing_cols:
+                print(f"[WAF] 공정별 데이터 누락된 컬럼: {missing_cols} → 건너뜀")
+            else:
+                process_events = waf_process_events(df_60days_raw)
+                print(f"[WAF] 공정별 이력: {len(process_events):,} 건 "
+                      f"({process_events['process'].nunique()}개 공정)")
+                # 저장
+                self.data['WAF_PROCESS_EVENTS'] = process_events
 
         # ===================================================================
         # 9. details에 저장
@@ -4044,125 +3297,47 @@ class DailyReportGenerator:
 
     def _calculate_loss_rate_by_process(self):
         """
-        WAF_PROCESS_DATASETS (분자) + SMAX_INQTY_DATASETS (분모)
-        → 공정별, 장비별, 일별 LOSS_RATE 계산
+        WAF_PROCESS_EVENTS (분자) + SMAX_INQTY_DATASETS (분모)
+        → 공정 × 장비 × 일자 × REJ_GROUP 불량률 cube 1회 계산
         """
-        if 'WAF_PROCESS_DATASETS' not in self.data:
-            print("[LOSS_RATE] 분자 데이터 없음: WAF_PROCESS_DATASETS")
-            return {}
+        if 'WAF_PROCESS_EVENTS' not in self.data:
+            print("[LOSS_RATE] 분자 데이터 없음: WAF_PROCESS_EVENTS")
+            return None
 
         if 'SMAX_INQTY_DATASETS' not in self.data:
             print("[LOSS_RATE] 분모 데이터 없음: SMAX_INQTY_DATASETS")
-            return {}
+            return None
 
-        waf_datasets = self.data['WAF_PROCESS_DATASETS']  # 분자
+        events = self.data['WAF_PROCESS_EVENTS']  # 분자
         smax_datasets = self.data['SMAX_INQTY_DATASETS']  # 분모
-        loss_rate_results = {}
-
-        for proc in waf_datasets.keys():
+        for proc in events['process'].unique():
             if proc not in smax_datasets:
                 print(f"[LOSS_RATE] 공정 {proc}: 분모 데이터 없음")
-                continue
-
-            # ===================================================================
-            # [1] 분자 데이터 준비 (LOSS_QTY)
-            # ===================================================================
-            df_num = waf_datasets[proc].copy()
-            df_num = df_num.rename(columns={
-                'base_dt_7hours' : 'base_dt_7hours',
-                'EQP_NM': 'eqp_name'
-            })
-            df_num['base_dt'] = df_num['base_dt_7hours'].astype(str)
-            df_num['eqp_name'] = df_num['eqp_name'].astype(str)
-
-            # REJ_GROUP 기준으로 LOSS_QTY 합계
-            df_num_grouped = df_num.groupby(['base_dt', 'eqp_name', 'REJ_GROUP'])['LOSS_QTY'].sum().reset_index()
-
-            # ===================================================================
-            # [2] 분모 데이터 준비 (IN_QTY)
-            # ===================================================================
-            df_denom = smax_datasets[proc].copy()
-            df_denom['base_dt'] = df_denom['base_dt'].astype(str)
-            df_denom['eqp_name'] = df_denom['eqp_name'].astype(str)
-
-            # 장비별 투입량 합계 (일별)
-            df_denom_grouped = df_denom.groupby(['base_dt', 'eqp_name'])['prodc_qty'].sum().reset_index()
-            df_denom_grouped = df_denom_grouped.rename(columns={'prodc_qty': 'IN_QTY'})
-
-            # ===================================================================
-            # [3] 병합: 분자 + 분모
-            # ===================================================================
-            df_merge = pd.merge(
-                df_denom_grouped,
-                df_num_grouped,
-                on=['base_dt', 'eqp_name'],
-                how='outer'
-            )
-
-            # ===================================================================
-            # [4] LOSS_RATE 계산
-            # ===================================================================
-            df_merge['LOSS_QTY'] = df_merge['LOSS_QTY'].fillna(0).astype(float)
-            df_merge['IN_QTY'] = df_merge['IN_QTY'].fillna(0).astype(float)
-
-
-            # ===================================================================
-            # [4] REJ_GROUP Pivot (행 → 컬럼)
-            # ===================================================================
-            pivot_cols = ['base_dt', 'eqp_name', 'IN_QTY', 'REJ_GROUP', 'LOSS_QTY']
-            df_pivot = df_merge[pivot_cols].copy()
-            
-            # Pivot 수행
-            df_pivot = df_pivot.pivot_table(
-                index=['base_dt', 'eqp_name', 'IN_QTY'],
-                columns='REJ_GROUP',
-                values='LOSS_QTY',
-                aggfunc='sum',
-                fill_value=0  # 불량 없는 경우 0
-            ).reset_index()
-            
-            # 컬럼명 정리 (MultiIndex 제거)
-            df_pivot.columns.name = None
-
-        # ===================================================================
-            # [5] LOSS_RATE 계산 (전체 불량률)
-            # ===================================================================
-            # 전체 불량 수량 (모든 REJ_GROUP 합계)
-            rej_cols = [c for c in df_pivot.columns if c not in ['base_dt', 'eqp_name', 'IN_QTY']]
-            df_pivot['TOTAL_LOSS_QTY'] = df_pivot[rej_cols].sum(axis=1)
-            
-            # 각 불량 유형별로 LOSS_RATE 컬럼 생성
-            for rej in rej_cols:
-                rate_col = f"{rej}_RATE"
-                df_pivot[rate_col] = (
-                    df_pivot[rej] / (df_pivot['IN_QTY'] + 1e-9)
-                ) * 100
-                df_pivot[rate_col] = df_pivot[rate_col].round(4)
-
-            # 날짜 정렬
-            df_pivot = df_pivot.sort_values(['base_dt', 'eqp_name']).reset_index(drop=True)
 
-            loss_rate_results[proc] = df_pivot
+        cube = LossRateCube.build(events, smax_datasets)
+        print(f"[LOSS_RATE] cube 생성: {len(cube.processes)}개 공정, 장비-일자 {len(cube.in_qty):,}건, "
+              f"불량 {len(cube.loss):,}건")
 
         # 최종 저장
-        self.data['LOSS_RATE_BY_EQP'] = loss_rate_results
-        return loss_rate_results
+        self.data['LOSS_RATE_CUBE'] = cube
+        return cube
 
 
     def _plot_rej_group_top3_eqp_trend(self, output_dir="./daily_reports_debug"):
         """
         REJ_GROUP별 상위 3개 장비에 대해 IN_QTY(막대) + LOSS_RATE(선) 이중축 그래프 생성 → PNG 저장
-        → 생성된 파일 경로를 반환 (엑셀 삽입용)
+        → 생성될 파일 경로를 반환 (엑셀 삽입용, 렌더링은 self.charts.collect()에서 완료)
         """
 
         # ===================================================================
-        # [1] LOSS_RATE_BY_EQP 존재 확인
+        # [1] LOSS_RATE_CUBE 존재 확인
         # ===================================================================
-        if 'LOSS_RATE_BY_EQP' not in self.data:
-            print("[ERROR] self.data에 'LOSS_RATE_BY_EQP' 없음")
+        cube = self.data.get('LOSS_RATE_CUBE')
+        if cube is None:
+            print("[ERROR] self.data에 'LOSS_RATE_CUBE' 없음")
             return {}
         else:
-            print(f"[OK] LOSS_RATE_BY_EQP 존재 → {len(self.data['LOSS_RATE_BY_EQP'])}개 공정")
+            print(f"[OK] LOSS_RATE_CUBE 존재 → {len(cube.processes)}개 공정")
 
         # ===================================================================
         # [2] top3_rej_groups 및 valid_groups 확인
@@ -4206,30 +3381,8 @@ class DailyReportGenerator:
         else:
             print(f"[OK] waf_analysis_gap 존재 → {len(waf_gap_data)}개 그룹")
 
-        # ===================================================================
-        # [4] LOSS_RATE_BY_EQP 통합
-        # ===================================================================
-        try:
-            df_list = []
-            for proc, df in self.data['LOSS_RATE_BY_EQP'].items():
-                if df.empty:
-                    continue
-                df = df.copy()
-                df['PROC_CD'] = proc
-                df_list.append(df)
-            
-            df_all_loss = pd.concat(df_list, ignore_index=True)
-            
-            if df_all_loss.empty:
-                print("[ERROR] LOSS_RATE_BY_EQP 통합 결과가 빈 데이터프레임")
-                return {}
-
-            # base_dt를 datetime으로 변환
-            df_all_loss['base_dt_dt'] = pd.to_datetime(df_all_loss['base_dt'], format='%Y%m%d', errors='coerce')
-
-        except Exception as e:
-            print(f"[ERROR] df_all_loss 생성 실패: {e}")
-            traceback.print_exc()
+        if cube.in_qty.empty:
+            print("[ERROR] LOSS_RATE_CUBE 가 비어 있음")
             return {}
 
         # ===================================================================
@@ -4268,175 +3421,19 @@ class DailyReportGenerator:
                     top3_eqps_in_col = [eqp for eqp, _ in top3_eqps_in_col]
 
                     for eqp in top3_eqps_in_col:
-                        df_eqp_raw = df_all_loss[df_all_loss['eqp_name'] == eqp].copy()
-                        if df_eqp_raw.empty:
-                            continue
-
-                        # LOSS_RATE 컬럼명
-                        rate_col = f"{rej_group}_RATE"
-
-                        # base_dt 기준 집계
-                        agg_dict = {'IN_QTY': 'sum'}
-                        if rate_col in df_eqp_raw.columns:
-                            agg_dict[rate_col] = 'max'
-                        df_eqp = df_eqp_raw.groupby('base_dt').agg(agg_dict).reset_index()
-
-                        # 날짜 보정
-                        latest_date = df_eqp['base_dt'].max()
-                        latest_dt = pd.to_datetime(latest_date, format='%Y%m%d')
-                        start_dt = latest_dt - timedelta(days=59)
-                        all_dates = pd.date_range(start=start_dt, end=latest_dt, freq='D')
-                        all_dates_str = all_dates.strftime('%Y%m%d')
-
-                        df_plot = df_eqp.set_index('base_dt').reindex(all_dates_str, fill_value=0).reset_index()
-                        df_plot['base_dt_dt'] = pd.to_datetime(df_plot['index'], format='%Y%m%d')
-                        df_plot = df_plot.sort_values('base_dt_dt')
-
-                        df_plot['IN_QTY'] = df_plot['IN_QTY'].fillna(0)
-                        loss_rate_series = df_plot[rate_col].fillna(0.0).values if rate_col in df_plot.columns else np.zeros(len(df_plot))
-
-                        # 그래프 생성
-                        plt.figure(figsize=(12, 6))
-                        ax1 = plt.gca()
-
-                        # 막대: IN_QTY
-                        ax1.bar(df_plot['base_dt_dt'], df_plot['IN_QTY'],
-                                color='lightgray', alpha=0.7, label='IN_QTY', width=0.8)
-                        ax1.set_xlabel('Date', fontsize=12, fontweight='bold')
-                        ax1.set_ylabel('IN 수량', color='lightgray', fontsize=12, fontweight='bold')
-                        ax1.tick_params(axis='y', labelcolor='lightgray')
-                        ax1.set_ylim(0, max(df_plot['IN_QTY'].max() * 1.5, 4000))
-                        ax1.grid(axis='y', linestyle='--', alpha=0.3)
-
-                        # 선: LOSS_RATE
-                        ax2 = ax1.twinx()
-                        ax2.plot(df_plot['base_dt_dt'], loss_rate_series,
-                                marker='o', linestyle='-', linewidth=2, markersize=4,
-                                color='darkred', label='LOSS_RATE')
-                        ax2.set_ylabel('불량률(%)', color='darkred', fontsize=12, fontweight='bold')
-                        ax2.tick_params(axis='y', labelcolor='darkred')
-
-                        max_rate = loss_rate_series.max()
-                        ax2.set_ylim(0, max(max_rate * 1.5, 0.1) if max_rate > 0 else 1)
-
-                        # 제목에 eqp_col 추가 (디버깅 용이)
-                        plt.title(f'{rej_group} - {eqp} ({eqp_col[-4:]})',
-                                fontsize=14, fontweight='bold', pad=20)
-
-                        lines1, labels1 = ax1.get_legend_handles_labels()
-                        lines2, labels2 = ax2.get_legend_handles_labels()
-                        ax1.legend(lines1 + lines2, labels1 + labels2,
-                                loc='upper left', fontsize=10, framealpha=0.9)
-
-                        plt.xticks(rotation=45, ha='right')
-                        ax1.set_xlim(all_dates[0], all_dates[-1])
-                        plt.tight_layout()
-
-                        # 파일명: 불량_장비_base_date.png
-                        safe_rej = "".join(c if c.isalnum() else "_" for c in rej_group)
-                        safe_eqp = "".join(c if c.isalnum() else "_" for c in eqp)
-                        filename = f"loss_rate_{safe_rej}_{safe_eqp}_{base_date}.png"
-                        filepath = debug_dir / filename
-
-                        if filepath.exists():
-                            filepath.unlink()
-                        plt.savefig(filepath, dpi=300, bbox_inches='tight')
-                        plt.close()
-
-                        eqp_graph_paths.append(str(filepath))
-                        print(f"[SUCCESS] 개별 그래프 생성: {filepath}")
+                        filepath = self._submit_eqp_trend_chart(
+                            cube, rej_group, eqp, f'{rej_group} - {eqp} ({eqp_col[-4:]})', debug_dir, base_date)
+                        if filepath:
+                            eqp_graph_paths.append(filepath)
             else:
                 # gap_data가 flat dict인 경우 (예: SCRATCH)
                 sorted_rates = sorted(gap_data.items(), key=lambda x: abs(x[1]), reverse=True)[:3]
                 top3_eqps = [eqp for eqp, _ in sorted_rates]
                 for eqp in top3_eqps:
-
-                    df_eqp_raw = df_all_loss[df_all_loss['eqp_name'] == eqp].copy()
-                if df_eqp_raw.empty:
-                    continue
-
-                # LOSS_RATE 컬럼명 확인
-                rate_col = f"{rej_group}_RATE"
-
-                # base_dt 기준으로 집계 (중복 제거)
-                agg_dict = {'IN_QTY': 'sum'}
-                if rate_col in df_eqp_raw.columns:
-                    agg_dict[rate_col] = 'max'  # 또는 'mean'
-                
-                df_eqp = df_eqp_raw.groupby('base_dt').agg(agg_dict).reset_index()
-
-                # 날짜 기준 reindex (모든 날짜 포함, 누락 시 0)
-                df_plot = df_eqp.set_index('base_dt').reindex(all_dates_str, fill_value=0).reset_index()
-                df_plot['base_dt_dt'] = pd.to_datetime(df_plot['index'], format='%Y%m%d')
-                df_plot = df_plot.sort_values('base_dt_dt')
-
-                # IN_QTY: 누락 시 0 (이미 fill_value=0 처리됨)
-                df_plot['IN_QTY'] = df_plot['IN_QTY'].fillna(0)
-
-                # LOSS_RATE: 해당 REJ_GROUP 의 _RATE 컬럼 사용
-                if rate_col in df_plot.columns:
-                    loss_rate_series = df_plot[rate_col].fillna(0.0).values
-                else:
-                    loss_rate_series = np.zeros(len(df_plot))
-
-
-                # 그래프 생성
-                plt.figure(figsize=(12, 6))
-                ax1 = plt.gca()
-
-                # 막대: IN_QTY
-                ax1.bar(df_plot['base_dt_dt'], df_plot['IN_QTY'],
-                        color='lightgray', alpha=0.7, label='IN_QTY', width=0.8)
-                ax1.set_xlabel('Date', fontsize=12, fontweight='bold')
-                ax1.set_ylabel('IN 수량', color='lightgray', fontsize=12, fontweight='bold')
-                ax1.tick_params(axis='y', labelcolor='lightgray')
-                ax1.set_ylim(0, max(df_plot['IN_QTY'].max() * 1.5, 4000))
-                ax1.grid(axis='y', linestyle='--', alpha=0.3)
-
-                # 선: LOSS_RATE
-                ax2 = ax1.twinx()
-                ax2.plot(df_plot['base_dt_dt'], loss_rate_series,
-                        marker='o', linestyle='-', linewidth=2, markersize=4,
-                        color='darkred', label='LOSS_RATE')
-                ax2.set_ylabel('불량률(%)', color='darkred', fontsize=12, fontweight='bold')
-                ax2.tick_params(axis='y', labelcolor='darkred')
-
-                # Y 축 범위 조정 (0.03 → 실제 값 기반)
-                max_rate = loss_rate_series.max()
-                if max_rate > 0:
-                    ax2.set_ylim(0, max(max_rate * 1.5, 0.1))  # 최소 0.1%
-                else:
-                    ax2.set_ylim(0, 1)
-
-                # 제목
-                plt.title(f'{rej_group} - {eqp} 불량률',
-                        fontsize=14, fontweight='bold', pad=20)
-
-                # 범례
-                lines1, labels1 = ax1.get_legend_handles_labels()
-                lines2, labels2 = ax2.get_legend_handles_labels()
-                ax1.legend(lines1 + lines2, labels1 + labels2,
-                        loc='upper left', fontsize=10, framealpha=0.9)
-
-                # X축
-                plt.xticks(rotation=45, ha='right')
-                ax1.set_xlim(all_dates[0], all_dates[-1])
-                plt.tight_layout()
-
-                # 파일 저장
-                safe_rej = "".join(c if c.isalnum() else "_" for c in rej_group)
-                safe_eqp = "".join(c if c.isalnum() else "_" for c in eqp)
-                filename = f"loss_rate_{safe_rej}_{safe_eqp}_{base_date}.png"
-                filepath = debug_dir / filename
-
-                if filepath.exists():
-                    filepath.unlink()
-                    print(f"[INFO] 기존 파일 삭제: {filepath}")
-                plt.savefig(filepath, dpi=300, bbox_inches='tight')
-                plt.close()
-
-                eqp_graph_paths.append(str(filepath))
-                print(f"[SUCCESS] 개별 그래프 생성: {filepath}")
+                    filepath = self._submit_eqp_trend_chart(
+                        cube, rej_group, eqp, f'{rej_group} - {eqp} 불량률', debug_dir, base_date)
+                    if filepath:
+                        eqp_graph_paths.append(filepath)
 
             graph_paths[rej_group] = eqp_graph_paths
 
@@ -4451,6 +3448,32 @@ class DailyReportGenerator:
         return graph_paths
 
 
+    def _submit_eqp_trend_chart(self, cube, rej_group, eqp, title, debug_dir, base_date):
+        """장비 1대 60일 IN_QTY(막대) + REJ_GROUP 불량률(선) 차트 등록 → 파일 경로 (데이터 없으면 None)"""
+        df_plot = cube.equipment_trend(eqp, rej_group)
+        if df_plot is None:
+            return None
+
+        # 파일명: 불량_장비_base_date.png
+        safe_rej = "".join(c if c.isalnum() else "_" for c in rej_group)
+        safe_eqp = "".join(c if c.isalnum() else "_" for c in eqp)
+        filename = f"loss_rate_{safe_rej}_{safe_eqp}_{base_date}.png"
+        filepath = debug_dir / filename
+
+        # 차트 렌더러에 등록 (IN_QTY 막대 + LOSS_RATE 선, 이중축)
+        self.charts.submit(f"loss_rate_{safe_rej}_{safe_eqp}", {
+            'kind': 'eqp_trend',
+            'data': {
+                'dates': df_plot['base_dt'].tolist(),
+                'in_qty': df_plot['IN_QTY'].astype(float).tolist(),
+                'loss_rate': df_plot['LOSS_RATE'].astype(float).tolist(),
+                'title': title,
+            },
+            'path': str(filepath),
+        })
+        print(f"[SUCCESS] 개별 그래프 등록: {filepath}")
+        return str(filepath)
+
     def _export_to_excel(self, report, output_dir="./daily_reports_debug"):
         """Excel 보고서 생성 (기존 출력 형식과 동일하게 정확히 재현)"""
         try:
@@ -4484,6 +3507,16 @@ class DailyReportGenerator:
             ws.title = "Daily 불량분석"
             ws.sheet_view.showGridLines = False # 눈금선 끄기 추가
 
+            # 표 공유 Named Style (워크북당 1회 등록, 이후 셀에는 이름만 지정)
+            style_header = table_style(wb, kind='header')
+            style_body = table_style(wb)
+            style_int = table_style(wb, number_format='#,##0')
+            style_pct = table_style(wb, number_format='0.00%')
+            style_pct_red = table_style(wb, number_format='0.00%', tone='red')
+            style_pct_blue = table_style(wb, number_format='0.00%', tone='blue')
+            rc_hg_styles = [style_body] + [table_style(wb, number_format='#,###')] * 2 + [style_pct] * 3
+            rc_hg_detail_styles = [style_body] + [style_int] * 2 + [style_pct] * 3
+
             # ──────────────────────────────────────────────────
             # 1. [3010 수율 분석] 제목 및 그래프 삽입 (가장 위)
             # ──────────────────────────────────────────────────
@@ -4599,15 +3632,13 @@ class DailyReportGenerator:
                 ws.cell(row=4, column=1, value="[차트 없음: chart_path 없음]").font = Font(size=10, color="FF0000")
                 print("3010: 삽입할 chart_path 없음")
             else:
-                chart_path_3010 = Path(chart_path_3010)
-                if not chart_path_3010.exists():
-                    ws.cell(row=4, column=1, value=f"[차트 파일 없음: {chart_path_3010.name}]").font = Font(size=10, color="FF0000")
-                    print(f"3010: 차트 파일 없음: {chart_path_3010}")
+                chart_3010 = self.charts.get(data_3010_details.get('chart_image') or chart_path_3010)
+                if chart_3010 is None:
+                    ws.cell(row=4, column=1, value=f"[차트 없음: {Path(chart_path_3010).name}]").font = Font(size=10, color="FF0000")
+                    print(f"3010: 차트 없음: {chart_path_3010}")
                 else:
                     try:
-                        img = ExcelImage(str(chart_path_3010))
-                        img.width = 1000
-                        img.height = 400
+                        img = chart_3010.to_excel_image(width=1000, height=400)
                         ws.add_image(img, 'A4')
                     except Exception as e:
                         ws.cell(row=4, column=1, value=f"[이미지 삽입 실패: {e}]").font = Font(size=10, color="FF0000")
@@ -4821,12 +3852,13 @@ class DailyReportGenerator:
             current_date = (datetime.now().date() - timedelta(days=1)).strftime("%Y%m%d")
             debug_dir = PROJECT_ROOT / "daily_reports_debug" / current_date
 
-            total_chart_path = debug_dir / "RC_HG_보상_전체.png"
-            group_chart_paths = {
-                'PARTICLE': debug_dir / "RC_HG_보상_PARTICLE.png",
-                'FLATNESS': debug_dir / "RC_HG_보상_FLATNESS.png",
-                'WARP&BOW': debug_dir / "RC_HG_보상_WARP&BOW.png",
-                'NANO': debug_dir / "RC_HG_보상_NANO.png"
+            # 렌더링된 메모리 이미지 (차트 키 기준)
+            total_chart = self.charts.get('RC_HG_전체')
+            group_charts = {
+                'PARTICLE': self.charts.get('RC_HG_PARTICLE'),
+                'FLATNESS': self.charts.get('RC_HG_FLATNESS'),
+                'WARP&BOW': self.charts.get('RC_HG_WARP&BOW'),
+                'NANO': self.charts.get('RC_HG_NANO')
             }
 
             data_lot_details = report.get('DATA_LOT_3210_wafering_300_details', {})
@@ -4907,7 +3939,7 @@ class DailyReportGenerator:
                     return False
 
             # 전체 그래프 + 표
-            if total_chart_path.exists():
+            if total_chart is not None:
                 # 코멘트 삽입: 그래프 바로 위
                 comment_row = current_row - 1  # 그래프는 current_row 에 삽입 → 그 위에 코멘트
                 ws[f'A{comment_row}'] = "Total"
@@ -4947,11 +3979,9 @@ class DailyReportGenerator:
                         comment_row += 1
 
                 graph_row = comment_row + 1
-                if total_chart_path.exists():
+                if total_chart is not None:
                     try:
-                        img = ExcelImage(str(total_chart_path))
-                        img.width = 600
-                        img.height = 300
+                        img = total_chart.to_excel_image(width=600, height=300)
                         ws.add_image(img, f'A{current_row+3}')
                     except Exception as e:
                         ws[f'A{current_row+3}'] = f"[RC/HG 전체 그래프 삽입 실패: {e}]"
@@ -4966,13 +3996,7 @@ class DailyReportGenerator:
                     start_row = graph_row
                     start_col = 7
 
-                    for c_idx, header in enumerate(headers, start_col):
-                        cell = ws.cell(row=start_row, column=c_idx, value=header)
-                        cell.font = Font(bold=True, size=10)
-                        cell.fill = PatternFill("solid", fgColor="D3D3D3")
-                        cell.alignment = Alignment(horizontal='center', vertical='center')
-                        cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                            top=Side(style='thin'), bottom=Side(style='thin'))
+                    write_table_rows(ws, [headers], start_row, start_col, [style_header])
 
                     table_total_fmt = loss_rate_table_total.copy()
                     pct_columns = ['Ref.(3개월)%', '일%', 'Gap']
@@ -4980,30 +4004,9 @@ class DailyReportGenerator:
                         if col in table_total_fmt.columns:
                             table_total_fmt[col] = table_total_fmt[col].apply(safe_pct_to_float)
 
-                    for r_idx, row in enumerate(dataframe_to_rows(table_total_fmt, index=False, header=False), start_row + 1):
-                        for c_idx, value in enumerate(row, start_col):
-                            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-                            cell.font = Font(size=9)
-                            cell.alignment = Alignment(horizontal='center', vertical='center')
-                            cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                                top=Side(style='thin'), bottom=Side(style='thin'))
-                            
-                            # Ref.(3 개월), 일은 #,### 형식
-                            if c_idx in [8, 9]:
-                                cell.number_format = '#,###'
-                            if c_idx in [10, 11, 12]:
-                                cell.number_format = '0.00%'
-                            if c_idx == 12:
-                                try:
-                                    gap_val = float(value)
-                                    if gap_val < 0:
-                                        cell.fill = PatternFill("solid", fgColor="FFCCCC") 
-                                        cell.font = Font(color="FF0000", bold=False, size=9) # 빨간색 : FF0000,FFCCCC 파란색 : 0000FF, CCE5FF
-                                    elif gap_val > 0:
-                                        cell.fill = PatternFill("solid", fgColor="CCE5FF")
-                                        cell.font = Font(color="0000FF", bold=False, size=9)
-                                except:
-                                    pass
+                    # Ref.(3 개월), 일은 #,### 형식 / Gap 음수 빨간색, 양수 파란색
+                    write_table_rows(ws, table_total_fmt.itertuples(index=False, name=None), start_row + 1, start_col,
+                                     rc_hg_styles, tone_col=5, tone_styles=(style_pct_blue, style_pct_red))
 
                     table_height = len(loss_rate_table_total) + 1                        
 
@@ -5016,7 +4019,7 @@ class DailyReportGenerator:
             # ──────────────────────────────────────────────────
             # 4-2. [RC/HG 보상 영향성 분석 - Prime] 섹션 추가
             # ──────────────────────────────────────────────────
-            prime_chart_path = debug_dir / "RC_HG_보상_전체_Prime.png"
+            prime_chart = self.charts.get('RC_HG_전체_Prime')
             prime_data_details = report.get('DATA_LOT_3210_wafering_300_details', {})
             prime_loss_rate_table_total = prime_data_details.get('prime_summary')  # Prime 전체 표
             prime_loss_rate_table_by_group = prime_data_details.get('prime_loss_rate_table_by_group', {})  # 그룹별 표
@@ -5027,7 +4030,7 @@ class DailyReportGenerator:
             # ws.cell(row=current_row, column=1).alignment = Alignment(horizontal='left')
             # current_row += 2  # 여백
 
-            if prime_chart_path.exists():
+            if prime_chart is not None:
                 # 코멘트 삽입: 그래프 바로 위
                 comment_row = current_row
                 ws[f'A{comment_row}'] = "Prime"
@@ -5069,9 +4072,7 @@ class DailyReportGenerator:
 
                 graph_row = comment_row + 1
                 try:
-                    img = ExcelImage(str(prime_chart_path))
-                    img.width = 600
-                    img.height = 300
+                    img = prime_chart.to_excel_image(width=600, height=300)
                     ws.add_image(img, f'A{graph_row}')
                 except Exception as e:
                     ws[f'A{graph_row}'] = f"[RC/HG Prime 그래프 삽입 실패: {e}]"
@@ -5083,13 +4084,7 @@ class DailyReportGenerator:
                     start_row = graph_row
                     start_col = 7
 
-                    for c_idx, header in enumerate(headers, start_col):
-                        cell = ws.cell(row=start_row, column=c_idx, value=header)
-                        cell.font = Font(bold=True, size=10)
-                        cell.fill = PatternFill("solid", fgColor="D3D3D3")
-                        cell.alignment = Alignment(horizontal='center', vertical='center')
-                        cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                            top=Side(style='thin'), bottom=Side(style='thin'))
+                    write_table_rows(ws, [headers], start_row, start_col, [style_header])
 
                     table_fmt = prime_loss_rate_table_total.copy()
                     pct_columns = ['Ref.(3개월)%', '일%', 'Gap']
@@ -5097,29 +4092,8 @@ class DailyReportGenerator:
                         if col in table_fmt.columns:
                             table_fmt[col] = table_fmt[col].apply(safe_pct_to_float)
 
-                    for r_idx, row in enumerate(dataframe_to_rows(table_fmt, index=False, header=False), start_row + 1):
-                        for c_idx, value in enumerate(row, start_col):
-                            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-                            cell.font = Font(size=9)
-                            cell.alignment = Alignment(horizontal='center', vertical='center')
-                            cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                                top=Side(style='thin'), bottom=Side(style='thin'))
-                            
-                            if c_idx in [8, 9]:
-                                cell.number_format = '#,###'
-                            if c_idx in [10, 11, 12]:
-                                cell.number_format = '0.00%'
-                            if c_idx == 12:
-                                try:
-                                    gap_val = float(value)
-                                    if gap_val < 0:
-                                        cell.fill = PatternFill("solid", fgColor="FFCCCC") 
-                                        cell.font = Font(color="FF0000", bold=False, size=9)
-                                    elif gap_val > 0:
-                                        cell.fill = PatternFill("solid", fgColor="CCE5FF")
-                                        cell.font = Font(color="0000FF", bold=False, size=9)
-                                except:
-                                    pass
+                    write_table_rows(ws, table_fmt.itertuples(index=False, name=None), start_row + 1, start_col,
+                                     rc_hg_styles, tone_col=5, tone_styles=(style_pct_blue, style_pct_red))
                 else:
                     ws.cell(row=graph_row, column=7, value="[RC/HG Prime 표 없음]").font = Font(size=10, color="FF0000")
 
@@ -5270,15 +4244,12 @@ class DailyReportGenerator:
                                 label_text, ha='center', va=va, fontsize=16, fontweight='bold', color='black')
 
                     plt.tight_layout()
-                    plt.savefig(chart1_path, dpi=300, bbox_inches='tight')  # DPI 향상 (선명도 개선)
+                    chart1 = ChartImage.from_figure(plt.gcf(), key='product_mix', debug_path=chart1_path)  # dpi=300 (선명도 개선)
                     plt.close()
 
-                    # Excel 삽입
-                    if chart1_path.exists():
-                        img1 = ExcelImage(str(chart1_path))
-                        img1.width = 800
-                        img1.height = 300
-                        ws.add_image(img1, f'A{current_row}')
+                    # Excel 삽입 (메모리 PNG)
+                    img1 = chart1.to_excel_image(width=800, height=300)
+                    ws.add_image(img1, f'A{current_row}')
 
                 except Exception as e:
                     ws[f'A{current_row}'] = f"[그래프1 생성 실패: {e}]"
@@ -5379,15 +4350,12 @@ class DailyReportGenerator:
                             fontsize=16, fontweight='bold', color=gap_color)
                     
                     plt.tight_layout()
-                    plt.savefig(chart2_path, dpi=300, bbox_inches='tight')  # DPI 향상 (선명도 개선)
+                    chart2 = ChartImage.from_figure(plt.gcf(), key='product_volume_gap', debug_path=chart2_path)  # dpi=300 (선명도 개선)
                     plt.close()
 
-                    # Excel 삽입
-                    if chart2_path.exists():
-                        img2 = ExcelImage(str(chart2_path))
-                        img2.width = 800  
-                        img2.height = 300
-                        ws.add_image(img2, f'A{current_row + 15}')
+                    # Excel 삽입 (메모리 PNG)
+                    img2 = chart2.to_excel_image(width=800, height=300)
+                    ws.add_image(img2, f'A{current_row + 15}')
 
                 except Exception as e:
                     ws[f'A{current_row + 15}'] = f"[그래프 2 생성 실패: {e}]"
@@ -5519,6 +4487,7 @@ class DailyReportGenerator:
             next_start_row = 118
             data_3210_details = report.get('DATA_3210_wafering_300_details', {})
             chart_path = data_3210_details.get('chart_path')
+            chart_3210 = self.charts.get(data_3210_details.get('chart_image') or chart_path)
 
             ws.merge_cells(f'A{next_start_row}:D{next_start_row}')
             ws[f'A{next_start_row}'] = "[ Prime 불량 목표 比 일실적 변동 ]"
@@ -5572,15 +4541,12 @@ class DailyReportGenerator:
                 ws[f'A{comment_row}'] = "[차트 없음]"
                 ws[f'A{comment_row}'].font = Font(size=10, color="FF0000")
             else:
-                chart_path = Path(chart_path)
-                if not chart_path.exists():
-                    ws[f'A{comment_row}'] = f"[파일 없음: {chart_path.name}]"
+                if chart_3210 is None:
+                    ws[f'A{comment_row}'] = f"[차트 없음: {Path(chart_path).name}]"
                     ws[f'A{comment_row}'].font = Font(size=10, color="FF0000")
                 else:
                     try:
-                        img = ExcelImage(str(chart_path))
-                        img.width = 600
-                        img.height = 300
+                        img = chart_3210.to_excel_image(width=600, height=300)
                         ws.add_image(img, f'A{comment_row}')
                     except Exception as e:
                         ws[f'A{comment_row}'] = f"[삽입 실패: {e}]"
@@ -5600,29 +4566,11 @@ class DailyReportGenerator:
                 start_row = next_start_row + 1
                 start_col = 8
 
-                for r_idx, row in enumerate(dataframe_to_rows(table_df, index=False, header=True), start_row):
-                    for c_idx, value in enumerate(row, start_col):
-                        cell = ws.cell(row=r_idx, column=c_idx, value=value)
-                        cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                            top=Side(style='thin'), bottom=Side(style='thin'))
-                        cell.font = Font(size=9)
-                        cell.alignment = Alignment(horizontal='center', vertical='center')
-                        if r_idx == start_row:
-                            cell.font = Font(bold=True, size=9)
-                            cell.fill = PatternFill("solid", fgColor="D3D3D3")
-                        else:
-                            cell.number_format = '0.00%'
-                            if c_idx == start_col + 3:  # GAP 열
-                                try:
-                                    gap_val = float(value)
-                                    if gap_val > 0:
-                                        cell.fill = PatternFill("solid", fgColor="FFCCCC")
-                                        cell.font = Font(color="FF0000", bold=False, size=9)
-                                    elif gap_val < 0:
-                                        cell.fill = PatternFill("solid", fgColor="CCE5FF")
-                                        cell.font = Font(color="0000FF", bold=False, size=9)
-                                except:
-                                    pass
+                write_table_rows(ws, [list(table_df.columns)], start_row, start_col,
+                                 [table_style(wb, kind='header', size=9)])
+                # GAP 열: 양수 빨간색, 음수 파란색
+                write_table_rows(ws, table_df.itertuples(index=False, name=None), start_row + 1, start_col,
+                                 [style_pct], tone_col=3, tone_styles=(style_pct_red, style_pct_blue))
 
                 for row in range(start_row, start_row + len(table_df) + 1):
                     ws.row_dimensions[row].height = 18
@@ -5703,12 +4651,10 @@ class DailyReportGenerator:
                     graph_row = current_row
 
                 # 2. 그래프 삽입
-                plot_path = plot_paths.get(rej_group)
-                if plot_path and Path(plot_path).exists():
+                plot_image = self.charts.get(plot_paths.get(rej_group))
+                if plot_image is not None:
                     try:
-                        img = ExcelImage(plot_path)
-                        img.width = 600
-                        img.height = 300
+                        img = plot_image.to_excel_image(width=600, height=300)
                         ws.add_image(img, f'A{graph_row}')
                     except Exception as e:
                         ws.cell(row=graph_row, column=1, value=f"{rej_group} 이미지 오류").font = Font(size=9)
@@ -5725,41 +4671,16 @@ class DailyReportGenerator:
                     headers = ['MID_GROUP', '실적(%)', 'Ref(3개월)', 'Gap']
                     start_col = 8
 
-                    for c_idx, header in enumerate(headers, start_col):  #F열부터
-                        cell = ws.cell(row=table_start_row, column=c_idx, value=header)
-                        cell.font = Font(bold=True, size=10)
-                        cell.fill = PatternFill("solid", fgColor="D3D3D3")
-                        cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                            top=Side(style='thin'), bottom=Side(style='thin'))
-                        cell.alignment = Alignment(horizontal='center')
+                    write_table_rows(ws, [headers], table_start_row, start_col, [style_header])  #H열부터
 
                     table_df_fmt = table_df.copy()
                     for col in ['실적(%)', 'Ref(3개월)', 'Gap']:
                         if col in table_df_fmt.columns:
                             table_df_fmt[col] = pd.to_numeric(table_df_fmt[col], errors='coerce') / 100.0
 
-                    for r_idx, row in enumerate(dataframe_to_rows(table_df_fmt, index=False, header=False), table_start_row + 1):
-                        for c_idx, value in enumerate(row, start_col):
-                            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-                            cell.font = Font(size=9)
-                            cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                                top=Side(style='thin'), bottom=Side(style='thin'))
-                            cell.alignment = Alignment(horizontal='center')
-                            if c_idx in [7,8]:
-                                cell.number_format = '#,##0'
-                            if c_idx in [9, 10, 11]:  # 퍼센트 컬럼
-                                cell.number_format = '0.00%'
-                            if c_idx == 11:  # Gap 컬럼
-                                try:
-                                    gap_val = float(value)
-                                    if gap_val > 0:
-                                        cell.fill = PatternFill("solid", fgColor="FFCCCC")
-                                        cell.font = Font(color="FF0000", size=9)
-                                    elif gap_val < 0:
-                                        cell.fill = PatternFill("solid", fgColor="CCE5FF")
-                                        cell.font = Font(color="0000FF", size=9)
-                                except:
-                                    pass
+                    # MID_GROUP + 퍼센트 컬럼, Gap 양수 빨간색 / 음수 파란색
+                    write_table_rows(ws, table_df_fmt.itertuples(index=False, name=None), table_start_row + 1, start_col,
+                                     [style_body, style_pct], tone_col=3, tone_styles=(style_pct_red, style_pct_blue))
                     table_end_row = table_start_row + len(table_df) + 1
                 else:
                     ws.cell(row=graph_row, column=8, value="표 없음").font = Font(size=9)
@@ -5789,7 +4710,7 @@ class DailyReportGenerator:
                 next_row = left_block_end + 1  # 좌측 블록 아래 시작
 
                 if rej_group.upper() in target_groups:
-                    chart_path = group_chart_paths[rej_group]  
+                    group_chart = group_charts[rej_group]
                     table_data = loss_rate_table_by_group.get(rej_group)  
 
                     # 그룹 제목
@@ -5822,11 +4743,9 @@ class DailyReportGenerator:
 
                     # 그래프 삽입
                     detail_graph_row = comment_row + 1
-                    if chart_path.exists():
+                    if group_chart is not None:
                         try:
-                            img = ExcelImage(str(chart_path))
-                            img.width = 600
-                            img.height = 300
+                            img = group_chart.to_excel_image(width=600, height=300)
                             ws.add_image(img, f'A{detail_graph_row}')
                         except Exception as e:
                             ws[f'A{detail_graph_row}'] = f"[{rej_group} 그래프 삽입 실패]"
@@ -5841,41 +4760,16 @@ class DailyReportGenerator:
                     if isinstance(table_data, pd.DataFrame) and not table_data.empty:
                         headers = ['구분', 'Ref.(3개월)', '일', 'Ref.(3개월)%', '일%', 'Gap']
                         start_col = 7
-                        for c_idx, header in enumerate(headers, start_col):
-                            cell = ws.cell(row=detail_table_start_row, column=c_idx, value=header)
-                            cell.font = Font(bold=True, size=10)
-                            cell.fill = PatternFill("solid", fgColor="D3D3D3")
-                            cell.alignment = Alignment(horizontal='center', vertical='center')
-                            cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                                top=Side(style='thin'), bottom=Side(style='thin'))
+                        write_table_rows(ws, [headers], detail_table_start_row, start_col, [style_header])
 
                         table_group_fmt = table_data.copy()
                         for col in ['Ref.(3개월)%', '일%', 'Gap']:
                             if col in table_group_fmt.columns:
                                 table_group_fmt[col] = table_group_fmt[col].apply(safe_pct_to_float)
 
-                        for r_idx, row in enumerate(dataframe_to_rows(table_group_fmt, index=False, header=False), detail_table_start_row + 1):
-                            for c_idx, value in enumerate(row, start_col):
-                                cell = ws.cell(row=r_idx, column=c_idx, value=value)
-                                cell.font = Font(size=9)
-                                cell.alignment = Alignment(horizontal='center', vertical='center')
-                                cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                                    top=Side(style='thin'), bottom=Side(style='thin'))
-                                if c_idx in [8, 9]:
-                                    cell.number_format = '#,##0'
-                                if c_idx in [10, 11, 12]:
-                                    cell.number_format = '0.00%'
-                                if c_idx == 12:
-                                    try:
-                                        gap_val = float(value)
-                                        if gap_val > 0:
-                                            cell.fill = PatternFill("solid", fgColor="CCE5FF")
-                                            cell.font = Font(color="0000FF", bold=False, size=9)
-                                        elif gap_val < 0:
-                                            cell.fill = PatternFill("solid", fgColor="FFCCCC")
-                                            cell.font = Font(color="FF0000", bold=False, size=9)
-                                    except:
-                                        pass
+                        write_table_rows(ws, table_group_fmt.itertuples(index=False, name=None), detail_table_start_row + 1,
+                                         start_col, rc_hg_detail_styles,
+                                         tone_col=5, tone_styles=(style_pct_blue, style_pct_red))
 
                         detail_table_end_row = detail_table_start_row + len(table_data) + 1
                     else:
@@ -6072,9 +4966,6 @@ class DailyReportGenerator:
                                 safe_rej = "".join(c if c.isalnum() else "_" for c in sub_group)
                                 safe_eqp = "".join(c if c.isalnum() else "_" for c in proc)
                                 chart_path = debug_dir / f"WAF_{safe_rej}_{safe_eqp}_gap_chart.png"
-                                
-                                if chart_path.exists():
-                                    chart_path.unlink()
 
                                 try:
                                     fig, ax = plt.subplots(figsize=(10, 6))
@@ -6156,23 +5047,20 @@ class DailyReportGenerator:
                                     fig.suptitle(f'{sub_group} - 공정 {proc}', fontsize=14, fontweight='bold', y=1.02)
                                     
                                     plt.tight_layout()
-                                    plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-                                    plt.close()
+                                    chart_image = ChartImage.from_figure(fig, key=f"WAF_{safe_rej}_{safe_eqp}", debug_path=chart_path)
+                                    plt.close('all')
 
-                                    # ✅ Excel 삽입 (기존 로직 유지)
-                                    if chart_path.exists():
-                                        img = ExcelImage(str(chart_path))
-                                        img.width = 400
-                                        img.height = 200
+                                    # ✅ Excel 삽입 (메모리 PNG)
+                                    img = chart_image.to_excel_image(width=400, height=200)
 
-                                        if graphs_in_row >= 3:
-                                            current_graph_row += 10
-                                            graphs_in_row = 0
+                                    if graphs_in_row >= 3:
+                                        current_graph_row += 10
+                                        graphs_in_row = 0
 
-                                        col_offset = graphs_in_row * 5
-                                        col_letter = col_num_to_letter(1 + col_offset)
-                                        ws.add_image(img, f'{col_letter}{current_graph_row}')
-                                        graphs_in_row += 1
+                                    col_offset = graphs_in_row * 5
+                                    col_letter = col_num_to_letter(1 + col_offset)
+                                    ws.add_image(img, f'{col_letter}{current_graph_row}')
+                                    graphs_in_row += 1
 
                                 except Exception as e:
                                     print(f"[ERROR] 그래프 생성 실패: {sub_group}-{proc} | {e}")
@@ -6186,13 +5074,7 @@ class DailyReportGenerator:
                     table_start_row = next_row_after_graph + 1
 
                     headers = ['불량','구분', '장비', 'Ref.(3개월)', '일', 'Ref.(3개월)', '일', 'Gap']
-                    for c_idx, header in enumerate(headers, 1):
-                        cell = ws.cell(row=table_start_row, column=c_idx, value=header)
-                        cell.font = Font(bold=True, size=9)
-                        cell.fill = PatternFill("solid", fgColor="D3D3D3")
-                        cell.alignment = Alignment(horizontal='center', vertical='center')
-                        cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                            top=Side(style='thin'), bottom=Side(style='thin'))
+                    write_table_rows(ws, [headers], table_start_row, 1, [table_style(wb, kind='header', size=9)])
 
                     # 데이터 수집 (소분류 기준)
                     table_rows = []
@@ -6248,6 +5130,13 @@ class DailyReportGenerator:
                         defect_merge_start = None
                         process_merge_start = None
 
+                        eqp_table_keys = ['불량', '구분', '장비', 'Ref_Count', 'Daily_Count', 'Ref_rate', 'Daily_rate', 'Gap']
+                        signed_pct = '+0.00%;-0.00%;0.00%'
+                        eqp_table_styles = [style_body] * 3 + [style_int] * 2 + [style_pct] * 2 + [
+                            table_style(wb, number_format=signed_pct)]
+                        eqp_gap_tones = (table_style(wb, number_format=signed_pct, tone='red'),
+                                         table_style(wb, number_format=signed_pct, tone='blue'))
+
                         for r_idx, row in enumerate(table_rows, table_start_row + 1):
                             # ✅ 소분류 기준으로 병합
                             if row['불량'] != current_defect:
@@ -6264,30 +5153,8 @@ class DailyReportGenerator:
                                 current_process = row['구분']
                                 process_merge_start = r_idx
 
-                            for col, key, fmt, align in [
-                                (1, '불량', None, 'center'),
-                                (2, '구분', None, 'center'),
-                                (3, '장비', None, 'center'),
-                                (4, 'Ref_Count', '#,##0', 'center'),
-                                (5, 'Daily_Count', '#,##0', 'center'),
-                                (6, 'Ref_rate', '0.00%', 'center'),
-                                (7, 'Daily_rate', '0.00%', 'center'),
-                                (8, 'Gap', '+0.00%;-0.00%;0.00%', 'center')
-                            ]:
-                                cell = ws.cell(row=r_idx, column=col, value=row[key])
-                                if fmt: cell.number_format = fmt
-                                cell.font = Font(size=9)
-                                cell.alignment = Alignment(horizontal=align, vertical='center')
-                                cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                                                    top=Side(style='thin'), bottom=Side(style='thin'))
-                                if col == 8:
-                                    gap_num = row['Gap']
-                                    if gap_num > 0:
-                                        cell.fill = PatternFill("solid", fgColor="FFCCCC")
-                                        cell.font = Font(color="FF0000", size=9)
-                                    elif gap_num < 0:
-                                        cell.fill = PatternFill("solid", fgColor="CCE5FF")
-                                        cell.font = Font(color="0000FF", size=9)
+                            write_table_rows(ws, [[row[key] for key in eqp_table_keys]], r_idx, 1, eqp_table_styles,
+                                             tone_col=7, tone_styles=eqp_gap_tones)
 
                         # 마지막 병합
                         if defect_merge_start:
@@ -6378,8 +5245,8 @@ class DailyReportGenerator:
 
                 # 장비별 그래프 삽입 (최대 3개, A, G, M 열)
                 for idx, path in enumerate(paths):
-                    path_obj = Path(path)
-                    if not path_obj.exists():
+                    trend_image = self.charts.get(path)
+                    if trend_image is None:
                         col_letter = ['A', 'F', 'K'][idx % 3]
                         current_col = 1 + (idx % 3) * 5
                         current_row_target = graph_row + (idx // 3) * 11  # 🔹 동적 행 계산
@@ -6388,14 +5255,11 @@ class DailyReportGenerator:
                         continue
 
                     try:
-                        img_path = str(path_obj).replace('\\', '/')
-                        img = ExcelImage(img_path)
-                        img.width = 400
-                        img.height = 200
+                        img = trend_image.to_excel_image(width=400, height=200)
                         col_letter = ['A', 'F', 'K'][idx % 3]
                         current_row_target = graph_row + (idx // 3) * 11
                         ws.add_image(img, f'{col_letter}{current_row_target}')
-                        print(f"[OK] 삽입됨: {img_path} → {col_letter}{current_row_target}")
+                        print(f"[OK] 삽입됨: {trend_image.key} → {col_letter}{current_row_target}")
                     except Exception as e:
                         print(f"[ERROR] 삽입 실패: {e} | idx={idx}, path={path}")
                         current_row_target = graph_row + (idx // 3) * 11
@@ -6414,8 +5278,42 @@ class DailyReportGenerator:
 
             wb.save(str(excel_path))
             print(f"Excel 저장 성공: {excel_path}")
+
+            if EXCEL_CONFIG.get('raw_appendix'):
+                try:
+                    self._export_raw_appendix(report, debug_dir)
+                except Exception as e:
+                    logger.error(f"원천 데이터 부록 생성 실패: {e}")
             return str(excel_path)
 
         except Exception as e:
             logger.error(f"Excel 생성 실패: {e}")
             raise
+
+    def _export_raw_appendix(self, report, debug_dir):
+        """
+        원천 데이터 부록 Excel (write-only 스트리밍)
+        - 데이터셋별 시트, 헤더 스타일은 1회 등록 후 공유
+        - 행 단위 append → 행 수에 비례한 시간, 메모리는 chunk 크기로 제한
+        """
+        raw_data = report.get('raw_data') or {}
+        datasets = [(name, raw_data.get(name)) for name in EXCEL_CONFIG.get('raw_appendix_datasets', [])]
+        datasets = [(name, df) for name, df in datasets if isinstance(df, pd.DataFrame) and not df.empty]
+        if not datasets:
+            logger.info("원천 데이터 부록: 출력할 데이터셋 없음")
+            return None
+
+        appendix_path = debug_dir / f"Daily_Report_{self.target_date}_raw.xlsx"
+        chunk_rows = EXCEL_CONFIG.get('raw_appendix_chunk_rows', 50000)
+        started = datetime.now()
+
+        wb = Workbook(write_only=True)
+        total_rows = 0
+        for name, df in datasets:
+            write_appendix_sheet(wb, name[:31], df, chunk_rows=chunk_rows)
+            total_rows += len(df)
+        wb.save(str(appendix_path))
+
+        elapsed = (datetime.now() - started).total_seconds()
+        logger.info(f"원천 데이터 부록 저장: {appendix_path} ({len(datasets)}개 데이터셋, {total_rows:,}행, {elapsed:.1f}초)")
+        return str(appendix_path)
@@ -0,0 +1,213 @@
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 허용 용량 초과 시 동작
+SCAN_ACTIONS = ('warn', 'skip', 'split', 'abort')
+
+
+class ScanBudgetExceeded(Exception):
+    """스캔 용량 초과 + abort 정책 → 전체 실행 중단"""
+
+
+def _safe_float(val, default=0.0):
+    """안전한 float 변환 (EXPLAIN JSON 값용)"""
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return default
+
+
+def _query_key(query):
+    """쿼리 텍스트 기준 캐시 키"""
+    return hashlib.sha1(query.strip().encode('utf-8')).hexdigest()
+
+
+class ScanSizeGuard:
+    """
+    EXPLAIN (TYPE IO) 기반 스캔 용량 정책 엔진 (input() 프롬프트 없음)
+    - 쿼리별 허용 용량/초과 시 동작: QUERY_CONFIG['scan_budgets']
+    - 동일 쿼리 텍스트의 EXPLAIN 결과는 파일 캐시 (재실행 시 EXPLAIN 생략)
+    - prefetch()로 실행 예정 쿼리의 EXPLAIN을 미리 병렬 수행
+    """
+
+    def __init__(self, query_config, cache_path=None):
+        self.query_config = query_config
+        self.default_budget_gb = query_config.get('max_data_size_gb', 1.0)
+        self.default_action = query_config.get('scan_default_action', 'warn')
+        self.explain_fail_action = query_config.get('scan_explain_fail_action', 'warn')
+        self.budgets = query_config.get('scan_budgets', {})
+        self.cache_ttl = timedelta(hours=query_config.get('explain_cache_ttl_hours', 24))
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._lock = threading.Lock()
+        self._cache = self._load_cache()
+
+    # ------------------------------------------------------------------
+    # EXPLAIN 캐시
+    # ------------------------------------------------------------------
+    def _load_cache(self):
+        """파일 캐시 로드 (만료 항목 제외)"""
+        if self.cache_path is None or not self.cache_path.exists():
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+        except Exception as e:
+            logger.warning(f"EXPLAIN 캐시 읽기 실패 → 무시: {e}")
+            return {}
+        now = datetime.now()
+        return {
+            key: entry for key, entry in raw.items()
+            if now - datetime.fromisoformat(entry.get('fetched_at', '1970-01-01T00:00:00')) <= self.cache_ttl
+        }
+
+    def _save_cache(self):
+        """파일 캐시 저장 (임시파일 → 교체)"""
+        if self.cache_path is None:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._cache, f, ensure_ascii=False, indent=2)
+            tmp_path.replace(self.cache_path)
+        except Exception as e:
+            logger.warning(f"EXPLAIN 캐시 저장 실패: {e}")
+
+    # ------------------------------------------------------------------
+    # 용량 추정
+    # ------------------------------------------------------------------
+    def _run_explain(self, conn, query):
+        """EXPLAIN (TYPE IO, FORMAT JSON) 실행 → 추정치 dict"""
+        cur = conn.cursor()
+        try:
+            cur.execute(f"EXPLAIN (TYPE IO, FORMAT JSON) {query}")
+            io_stats = json.loads(cur.fetchall()[0][0])
+        finally:
+            cur.close()
+
+        tables = {}
+        total_input_gb = 0.0
+        for table_info in io_stats.get("inputTableColumnInfos", []):
+            table_name = table_info["table"]["schemaTable"]["table"]
+            size_bytes = _safe_float(table_info.get("estimate", {}).get("outputSizeInBytes"), 0.0)
+            size_gb = size_bytes / (1024 ** 3)
+            tables[table_name] = tables.get(table_name, 0.0) + size_gb
+            total_input_gb += size_gb
+
+        output_bytes = _safe_float(io_stats.get("estimate", {}).get("outputSizeInBytes"), float('nan'))
+        output_gb = output_bytes / (1024 ** 3)
+        if output_gb != output_gb or output_gb == float('inf'):  # NaN / inf → 추정 불가
+            output_gb = None
+
+        return {
+            'input_gb': total_input_gb,
+            'output_gb': output_gb,
+            'tables': tables,
+            'fetched_at': datetime.now().isoformat(timespec='seconds'),
+        }
+
+    def get_estimate(self, conn, query):
+        """쿼리 예상 스캔 용량 (캐시 우선, EXPLAIN 실패 시 None)"""
+        key = _query_key(query)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            logger.info("EXPLAIN 캐시 사용 (동일 쿼리 텍스트)")
+            return cached
+
+        logger.info("EXPLAIN 쿼리 실행 중... (예상 데이터 스캔 확인)")
+        try:
+            estimate = self._run_explain(conn, query)
+        except Exception as e:
+            logger.error(f"EXPLAIN 분석 중 오류 발생: {e}")
+            return None
+
+        for table_name, size_gb in estimate['tables'].items():
+            logger.info(f"  - 테이블: {table_name} 예상 스캔 크기: {size_gb * 1024:.2f} MB ({size_gb:.3f} GB)")
+
+        with self._lock:
+            self._cache[key] = estimate
+            self._save_cache()
+        return estimate
+
+    def prefetch(self, conn_factory, queries, max_workers=4):
+        """
+        실행 예정 쿼리들의 EXPLAIN을 병렬로 미리 수행 (캐시에 적재)
+        conn_factory: 워커 스레드에서 호출되는 연결 반환 함수
+        queries: {query_name: query_text}
+        """
+        pending = {
+            name: query for name, query in queries.items()
+            if _query_key(query) not in self._cache
+        }
+        if not pending:
+            logger.info(f"EXPLAIN 사전 조회 생략: {len(queries)}개 모두 캐시됨")
+            return
+
+        def _explain(item):
+            name, query = item
+            try:
+                self.get_estimate(conn_factory(), query)
+            except Exception as e:
+                logger.error(f"EXPLAIN 사전 조회 실패 ({name}): {e}")
+
+        workers = max(1, min(max_workers, len(pending)))
+        logger.info(f"EXPLAIN 사전 조회: {len(pending)}개 쿼리, 워커 {workers}개")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='explain') as executor:
+            list(executor.map(_explain, pending.items()))
+
+    # ------------------------------------------------------------------
+    # 정책 판단
+    # ------------------------------------------------------------------
+    def get_policy(self, query_name):
+        """쿼리별 (허용 용량 GB, 초과 시 동작)"""
+        policy = self.budgets.get(query_name, {}) if query_name else {}
+        budget_gb = policy.get('max_gb', self.default_budget_gb)
+        action = policy.get('action', self.default_action)
+        if action not in SCAN_ACTIONS:
+            logger.warning(f"알 수 없는 스캔 정책 '{action}' → warn 적용")
+            action = 'warn'
+        return budget_gb, action
+
+    def check(self, conn, query, query_name=None):
+        """
+        스캔 용량 정책 판단
+        반환: 'run' / 'skip' / 'split'  (abort 정책은 ScanBudgetExceeded 발생)
+        """
+        label = query_name or '(이름 없음)'
+        estimate = self.get_estimate(conn, query)
+
+        if estimate is None:
+            action = self.explain_fail_action
+            logger.warning(f"[{label}] EXPLAIN 실패 → 정책 '{action}' 적용")
+            if action == 'abort':
+                raise ScanBudgetExceeded(f"{label}: EXPLAIN 실패")
+            return 'skip' if action == 'skip' else 'run'
+
+        if estimate['output_gb'] is not None:
+            size_gb = estimate['output_gb']
+            logger.info(f"[{label}] 총 예상 출력 데이터 크기: {size_gb * 1024:.2f} MB ({size_gb:.3f} GB)")
+        else:
+            size_gb = estimate['input_gb']
+            logger.warning(f"[{label}] 출력 추정 실패 → 입력 기준 예측 사용: {size_gb:.3f} GB")
+
+        budget_gb, action = self.get_policy(query_name)
+        if size_gb <= budget_gb:
+            logger.info(f"[{label}] 용량 확인 완료 ({size_gb:.3f} GB ≤ {budget_gb:.3f} GB)")
+            return 'run'
+
+        message = f"[{label}] 예상 {size_gb:.3f} GB > 허용 {budget_gb:.3f} GB → 정책 '{action}'"
+        if action == 'abort':
+            logger.error(message)
+            raise ScanBudgetExceeded(message)
+        logger.warning(message)
+        if action == 'warn':
+            return 'run'
+        return action
@@ -0,0 +1,116 @@
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from modules.cache_manager import get_cache
+from queries.daily_queries import WAFOPER_HISTORY_DAYS, WAFOPER_PROCESSES
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DATASET = 'WAFOPER_HISTORY_300'
+HISTORY_COLUMNS = ['BASE_DT', 'IGOT_ID', 'WAF_SEQ', 'BLK_ID', 'OPER_ID', 'REG_DTTM', 'SLOT_NO', 'EQP_NM']
+HISTORY_FIELDS = ['EQP_NM', 'REG_DTTM', 'SLOT_NO']
+# 상세 쿼리 출력과 동일한 공정 컬럼 (3200은 이력 조회 대상이 아니라 항상 결측)
+PIVOT_PROCESSES = ['3200'] + WAFOPER_PROCESSES
+WAFER_KEYS = ['IGOT_ID', 'WAF_SEQ']
+
+
+def history_window(target_date):
+    """기준일 → 공정 이력 조회 기간 (기준일 - 30일 ~ 기준일)"""
+    target_dt = datetime.strptime(target_date, '%Y%m%d')
+    return (target_dt - timedelta(days=WAFOPER_HISTORY_DAYS)).strftime('%Y%m%d'), target_date
+
+
+def pivot_history(history):
+    """
+    공정 이력 → (IGOT_ID, WAF_SEQ)별 공정 장비/등록일시/슬롯 wide 프레임
+    - 공정별 최신 1건: REG_DTTM, SLOT_NO 내림차순 (결측은 뒤)
+    - _BLK_ROWS: (IGOT_ID, WAF_SEQ)별 BLK_ID 수 — 상세 쿼리 waf_blk_mapping LEFT JOIN 행 수와 동일하게 맞춤
+    """
+    columns = [f'{field}_300_WF_{proc}' for proc in PIVOT_PROCESSES for field in HISTORY_FIELDS]
+    if history is None or history.empty:
+        empty = pd.DataFrame(columns=WAFER_KEYS + columns + ['_BLK_ROWS'])
+        return empty.set_index(WAFER_KEYS)
+
+    history = history[history['IGOT_ID'].notna() & history['WAF_SEQ'].notna()]
+    blk_rows = (history.loc[history['BLK_ID'].notna(), WAFER_KEYS + ['BLK_ID']]
+                .drop_duplicates().groupby(WAFER_KEYS).size())
+
+    latest = (history.sort_values(['REG_DTTM', 'SLOT_NO'], ascending=False, na_position='last', kind='stable')
+              .drop_duplicates(WAFER_KEYS + ['OPER_ID']))
+    latest = latest.assign(OPER_ID=latest['OPER_ID'].astype(str))
+    wide = latest.set_index(WAFER_KEYS + ['OPER_ID'])[HISTORY_FIELDS].unstack('OPER_ID')
+
+    pivot = pd.DataFrame(index=wide.index)
+    for proc in PIVOT_PROCESSES:
+        for field in HISTORY_FIELDS:
+            column = (field, proc)
+            pivot[f'{field}_300_WF_{proc}'] = wide[column] if column in wide.columns else None
+    pivot['_BLK_ROWS'] = blk_rows.reindex(pivot.index)
+    return pivot
+
+
+class WaferHistorySnapshot:
+    """
+    WAFOPER 공정 이력 로컬 스냅샷 (data_cache dataset=WAFOPER_HISTORY_300 일자 파티션)
+    - 일자별 1회만 Trino 조회 → 연속 일자 조회 시 30일 이력 재스캔 없음
+    - 불량 행(DATA_WAF_3210_wafering_300_faults)은 로컬에서 조인하여 상세 쿼리와 같은 컬럼 구성
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache or get_cache()
+
+    def ensure(self, target_date, fetch_func):
+        """기준일 조회 기간 중 없는 일자만 조회 → 반환: 새로 조회한 일자 수"""
+        start_date, end_date = history_window(target_date)
+        return self.cache.ensure(HISTORY_DATASET, start_date, end_date, fetch_func)
+
+    def ensure_range(self, start_date, end_date, fetch_func):
+        """기간 내 모든 기준일의 조회 기간 합집합을 1회 보충 (병렬 백필 전 선행) → 새로 조회한 일자 수"""
+        return self.cache.ensure(HISTORY_DATASET, history_window(start_date)[0], end_date, fetch_func)
+
+    def missing_range_days(self, start_date, end_date):
+        """기간 내 모든 기준일의 조회 기간 합집합 중 스냅샷에 없는 일자"""
+        return self.cache.missing_dates(HISTORY_DATASET, history_window(start_date)[0], end_date)
+
+    def missing_days(self, target_date):
+        """기준일 조회 기간 중 스냅샷에 없는 일자"""
+        start_date, end_date = history_window(target_date)
+        return self.cache.missing_dates(HISTORY_DATASET, start_date, end_date)
+
+    def pivot(self, target_date):
+        start_date, end_date = history_window(target_date)
+        return pivot_history(self.cache.read(HISTORY_DATASET, start_date, end_date, columns=HISTORY_COLUMNS))
+
+    def attach(self, faults, target_date):
+        """
+        불량 행 + 공정 이력 (상세 쿼리 final_with_all_history 와 동일)
+        - 키 결측 행은 이력 없음, BLK_ID 매핑 수만큼 행 반복, HST_REG_DTTM 내림차순
+        """
+        if faults is None or faults.empty:
+            return faults
+        pivot = self.pivot(target_date)
+        keys = faults[WAFER_KEYS]
+        positions = pivot.index.get_indexer(pd.MultiIndex.from_frame(keys)) if len(pivot) else \
+            np.full(len(faults), -1)
+        positions = np.where(keys.notna().all(axis=1).to_numpy(), positions, -1)
+
+        repeats = np.ones(len(faults), dtype=np.int64)
+        matched = positions >= 0
+        blk_rows = pivot['_BLK_ROWS'].to_numpy()
+        repeats[matched] = np.nan_to_num(blk_rows[positions[matched]].astype(float), nan=1).astype(np.int64)
+
+        rows = np.repeat(np.arange(len(faults)), repeats)
+        out = faults.take(rows).reset_index(drop=True)
+        history_rows = np.repeat(positions, repeats)
+        found = history_rows >= 0
+        for column in pivot.columns.drop('_BLK_ROWS'):
+            values = np.full(len(out), None, dtype=object)
+            values[found] = pivot[column].to_numpy(dtype=object)[history_rows[found]]
+            out[column] = values
+
+        if 'HST_REG_DTTM' in out.columns:
+            out = out.sort_values('HST_REG_DTTM', ascending=False, na_position='last', kind='stable')
+        return out.reset_index(drop=True)
@@ -1,3 +1,4 @@
+import re
 from datetime import datetime, timedelta
 
 _RUNTIME_CONFIG = {}
@@ -11,6 +12,74 @@ def get_runtime_config():
     return _RUNTIME_CONFIG.copy()
 
 
+# ===================================================================
+# 쿼리별 컬럼 타입 선언 (TrinoDataLoader에서 조회 직후 1회 적용)
+# - 'int32' : 정수 수량 (NULL 포함 시 float64)
+# - 'float32' / 'float64' : 실수
+# - 'category' : 코드성 컬럼
+# - 'datetime:<format>' : 날짜/시간 문자열 → datetime64
+# - 컬럼명에 와일드카드(*) 사용 가능, 결과에 없는 컬럼은 무시
+# ※ BASE_DT는 'YYYYMMDD' 문자열 키로 비교/파일명에 쓰이므로 변환하지 않음
+# ===================================================================
+_CODE_COLUMNS_SCHEMA = {
+    'REJ_GROUP': 'category',
+    'CRET_CD': 'category',
+    'AFT_BAD_RSN_CD': 'category',
+    'FAC_ID': 'category',
+    'OPER_ID': 'category',
+}
+
+_QTY_COLUMNS_SCHEMA = {
+    'IN_QTY': 'int32',
+    'OUT_QTY': 'int32',
+    'LOSS_QTY': 'int32',
+}
+
+SCHEMA_DATA_1511_SMAX_wafering_300 = {
+    'prodc_qty': 'float64',
+    'oper_id': 'category',
+    'cret_cd': 'category',
+}
+
+SCHEMA_DATA_3010_wafering_300 = {
+    'rate': 'float64',
+}
+
+SCHEMA_DATA_WAF_3210_wafering_300 = {
+    **_CODE_COLUMNS_SCHEMA,
+    **_QTY_COLUMNS_SCHEMA,
+    'RESPON_RATIO': 'float32',
+    'EQP_NM_300_WF_*': 'category',
+    'REG_DTTM_300_WF_*': 'datetime:%Y%m%d%H%M%S%f',
+}
+
+SCHEMA_DATA_3210_wafering_300 = {
+    'REJ_GROUP': 'category',
+    'AFT_BAD_RSN_CD': 'category',
+    'LOSS_QTY': 'int32',
+    'MGR_QTY': 'int32',
+    'LOSS_RATIO': 'float64',
+    'GOAL_RATIO': 'float64',
+    'GOAL_RATIO_SUM': 'float64',
+    'GAP_RATIO': 'float64',
+    'COM_QTY': 'float64',
+}
+
+SCHEMA_DATA_3210_wafering_300_3months = {
+    'REJ_GROUP': 'category',
+    'AFT_BAD_RSN_CD': 'category',
+    'LOSS_QTY': 'int32',
+    'MGR_QTY': 'int32',
+    'LOSS_RATIO': 'float64',
+}
+
+SCHEMA_DATA_LOT_3210_wafering_300 = {
+    **_CODE_COLUMNS_SCHEMA,
+    **_QTY_COLUMNS_SCHEMA,
+    'RESPON_RATIO': 'float32',
+}
+
+
 
 def DATA_1511_SMAX_wafering_300(target_date, config):
     """
@@ -59,30 +128,65 @@ and a.prod_type = '{config['oper_div_l']}'
 """
 
 
-def DATA_WAF_3210_wafering_300(target_date, config):
+_BIND_MARKER = re.compile(r"__BIND_(\d+)__")
+
+
+class QueryParams:
     """
-    3210_DATA_WAF_wafering_300 조회
-    
-    Args:
-        target_date: YYYYMMDD 형식 날짜
-        config: QUERY_CONFIG 딕셔너리
+    쿼리 값 주입 (날짜 / FAC_ID 목록 / 등급)
+    - bind=False: 값 리터럴 ('...') → 기존 쿼리 텍스트 그대로 (EXPLAIN 캐시 키 유지)
+    - bind=True: 값 자리에 바인드 표시 → compile()로 ? 치환 + 등장 순서대로 값 목록
+      (파라미터 쿼리: 값이 달라도 쿼리 텍스트 동일, cursor.execute(sql, params) 형태)
     """
-    fac_ids_str = "','".join(config['fac_ids'])
-    grade_filter = config['grade_filter']
 
-    # 등급 조건 설정: GRD_CD_NM과 GRD_CD_NM_PS 모두 적용
-    if grade_filter == 'PN':
-        grade_condition = ""
-    else:
-        grade_condition = f"AND mp.GRD_CD_NM = '{grade_filter}' AND mp.GRD_CD_NM_PS = '{grade_filter}'"
+    def __init__(self, bind=False):
+        self.bind = bind
+        self._values = []
 
-    # Trino에서 30일 전 날짜 계산
-    target_date_obj = datetime.strptime(target_date, '%Y%m%d')
-    date_range_start = (target_date_obj - timedelta(days=30)).strftime('%Y%m%d')
+    def __call__(self, value):
+        if not self.bind:
+            return f"'{value}'"
+        self._values.append(value)
+        return f"__BIND_{len(self._values) - 1}__"
 
-    return f"""
-WITH 
--- 1. 불량 데이터 추출
+    def in_list(self, values):
+        return ",".join(self(value) for value in values)
+
+    def compile(self, query):
+        """바인드 표시 → ? (쿼리 텍스트 순서 = 값 순서) → (템플릿, 값 목록)"""
+        values = [self._values[int(m.group(1))] for m in _BIND_MARKER.finditer(query)]
+        return _BIND_MARKER.sub("?", query), values
+
+
+def bind_query(query_func, target_date, config, end_date=None):
+    """바인드 지원 쿼리 함수 → (? 파라미터 쿼리, 바인드 값 목록)"""
+    params = QueryParams(bind=True)
+    return params.compile(query_func(target_date, config, end_date=end_date, params=params))
+
+
+def _base_dt_condition(column, start_date, end_date=None, params=None):
+    """
+    BASE_DT 조건: 1일이면 '=' (기존 쿼리 텍스트 그대로), 기간이면 BETWEEN
+    → 바인드 템플릿은 1일도 BETWEEN ? AND ? (일자 / 기간 조회가 같은 템플릿 사용)
+    """
+    params = params or QueryParams()
+    if params.bind:
+        return f"{column} BETWEEN {params(start_date)} AND {params(end_date or start_date)}"
+    if end_date is None or end_date == start_date:
+        return f"{column} = {params(start_date)}"
+    return f"{column} BETWEEN {params(start_date)} AND {params(end_date)}"
+
+
+# WAF 공정 이력(DW_QM_PW_WAFOPER_H) 조회 기간 / 대상 공정
+WAFOPER_HISTORY_DAYS = 30
+WAFOPER_PROCESSES = ['3300', '3335', '3670', '3696', '6100', '6210', '6500', '7000']
+
+
+def _waf_fault_ctes(target_date, config, end_date=None, params=None):
+    """WAF 3210 불량 행 CTE (step1_base → step2_with_prod), 상세 쿼리 / 불량 전용 쿼리 공용"""
+    params = params or QueryParams()
+    base_dt_condition = _base_dt_condition('A.BASE_DT', target_date, end_date, params)
+    return f"""-- 1. 불량 데이터 추출
 step1_base AS (
     SELECT 
         A.WAF_ID, A.WAF_SEQ, A.WAF_SIZE, A.BASE_DT, A.DIV_CD, A.REJ_DIV_CD,
@@ -93,8 +197,8 @@ step1_base AS (
         A.LOSS_QTY, A.REAL_DPT_GROUP, A.HST_REG_DTTM, 'ORI' AS DATA_TYPE, A.DATA_CHG_DTTM
     FROM oracle.PMDW_MGR.DM_PP_AC_TOTALFAULTDTLWAFSTD_S A
     WHERE A.WAF_SIZE = '{config['waf_size']}'
-      AND A.BASE_DT = '{target_date}'
-      AND A.FAC_ID IN ('{fac_ids_str}')
+      AND {base_dt_condition}
+      AND A.FAC_ID IN ({params.in_list(config['fac_ids'])})
       AND A.OPER_ID != '3200'
 
     UNION ALL
@@ -108,8 +212,8 @@ step1_base AS (
         A.LOSS_QTY, A.REAL_DPT_GROUP, NULL AS HST_REG_DTTM, 'MNL' AS DATA_TYPE, A.DATA_CHG_DTTM
     FROM oracle.PMDW_MGR.DW_BA_CM_TOTALFAULTMANUAL_S A
     WHERE A.WAF_SIZE = '{config['waf_size']}'
-      AND A.BASE_DT = '{target_date}'
-      AND A.FAC_ID IN ('{fac_ids_str}')
+      AND {base_dt_condition}
+      AND A.FAC_ID IN ({params.in_list(config['fac_ids'])})
       AND A.OPER_ID != '3200'
 ),
 -- 2. 불량 데이터에 장비명 추가
@@ -134,7 +238,36 @@ step2_with_prod AS (
         ON codes.UP_CD = 'DMS010' 
        AND codes.SYS_CD = 'DMS' 
        AND codes.CD_VAL = p.GRD_CD_NM
-),
+)"""
+
+
+def DATA_WAF_3210_wafering_300(target_date, config, end_date=None, params=None):
+    """
+    3210_DATA_WAF_wafering_300 조회
+    
+    Args:
+        target_date: YYYYMMDD 형식 날짜 (기간 조회 시 시작일)
+        config: QUERY_CONFIG 딕셔너리
+        end_date: 기간 조회 종료일 (없으면 target_date 1일)
+        params: QueryParams (바인드 템플릿 생성 시)
+    """
+    params = params or QueryParams()
+    grade_filter = config['grade_filter']
+
+    # 등급 조건 설정: GRD_CD_NM과 GRD_CD_NM_PS 모두 적용
+    if grade_filter == 'PN':
+        grade_condition = ""
+    else:
+        grade_condition = f"AND mp.GRD_CD_NM = {params(grade_filter)} AND mp.GRD_CD_NM_PS = {params(grade_filter)}"
+
+    # Trino에서 30일 전 날짜 계산
+    target_date_obj = datetime.strptime(target_date, '%Y%m%d')
+    date_range_start = (target_date_obj - timedelta(days=WAFOPER_HISTORY_DAYS)).strftime('%Y%m%d')
+    date_range_end = end_date or target_date
+
+    return f"""
+WITH 
+{_waf_fault_ctes(target_date, config, end_date, params)},
 
 -- 3. IGOT_ID 기준 WAF_SEQ ↔ BLK_ID 매핑 테이블 생성
 waf_blk_mapping AS (
@@ -144,9 +277,9 @@ waf_blk_mapping AS (
         BLK_ID
     FROM oracle.PMDW_MGR.DW_QM_PW_WAFOPER_H
     WHERE HST_DIV_CD = 'OC'
-      AND FAC_ID IN ('{fac_ids_str}')
+      AND FAC_ID IN ({params.in_list(config['fac_ids'])})
       AND OPER_ID IN ('3300','3335','3670','3696','6100','6210','6500','7000')
-      AND BASE_DT BETWEEN '{date_range_start}' AND '{target_date}'
+      AND BASE_DT BETWEEN {params(date_range_start)} AND {params(date_range_end)}
       AND IGOT_ID IS NOT NULL
       AND WAF_SEQ IS NOT NULL
       AND BLK_ID IS NOT NULL
@@ -167,9 +300,9 @@ ope_history_all AS (
     LEFT JOIN oracle.PMDW_MGR.DW_BA_CM_STDPEQP_M eqp 
         ON eqp.EQP_ID = B.EQP_ID
     WHERE B.HST_DIV_CD = 'OC'
-      AND B.FAC_ID IN ('{fac_ids_str}')
+      AND B.FAC_ID IN ({params.in_list(config['fac_ids'])})
       AND B.OPER_ID IN ('3300','3335','3670','3696','6100','6210','6500','7000')
-      AND B.BASE_DT BETWEEN '{date_range_start}' AND '{target_date}'
+      AND B.BASE_DT BETWEEN {params(date_range_start)} AND {params(date_range_end)}
       AND B.IGOT_ID IS NOT NULL
       AND (B.WAF_SEQ IS NOT NULL OR B.BLK_ID IS NOT NULL)
 ),
@@ -274,6 +407,60 @@ FROM final_with_all_history
 ORDER BY HST_REG_DTTM DESC
 """
 
+
+def DATA_WAF_3210_wafering_300_faults(target_date, config, end_date=None, params=None):
+    """
+    DATA_WAF_3210_wafering_300 불량 행만 조회 (공정 이력 CTE 제외)
+    → 공정별 장비/등록일시/슬롯은 로컬 WAFOPER 이력 스냅샷과 조인 (modules.wafoper_history)
+    """
+    return f"""
+WITH
+{_waf_fault_ctes(target_date, config, end_date, params)}
+SELECT *
+FROM step2_with_prod
+"""
+
+
+def DATA_WAFOPER_history_300(target_date, config, end_date=None, params=None):
+    """
+    DW_QM_PW_WAFOPER_H 1일치 공정 이력 (상세 쿼리 waf_blk_mapping / ope_history_all 과 같은 조건)
+    → (일자, IGOT_ID, WAF_SEQ, BLK_ID, OPER_ID)별 최신 1건, 기간 최신 선택은 로컬 스냅샷에서 수행
+    """
+    params = params or QueryParams()
+    oper_ids_str = "','".join(WAFOPER_PROCESSES)
+    base_dt_condition = _base_dt_condition('A.BASE_DT', target_date, end_date, params)
+    return f"""
+WITH ope AS (
+    SELECT
+        A.BASE_DT,
+        A.IGOT_ID,
+        A.WAF_SEQ,
+        A.BLK_ID,
+        A.OPER_ID,
+        A.EQP_ID,
+        A.REG_DTTM,
+        A.SLOT_NO,
+        eqp.EQP_NM,
+        ROW_NUMBER() OVER (
+            PARTITION BY A.BASE_DT, A.IGOT_ID, A.WAF_SEQ, A.BLK_ID, A.OPER_ID
+            ORDER BY A.REG_DTTM DESC, A.SLOT_NO DESC
+        ) AS RN
+    FROM oracle.PMDW_MGR.DW_QM_PW_WAFOPER_H A
+    LEFT JOIN oracle.PMDW_MGR.DW_BA_CM_STDPEQP_M eqp
+        ON eqp.EQP_ID = A.EQP_ID
+    WHERE A.HST_DIV_CD = 'OC'
+      AND A.FAC_ID IN ({params.in_list(config['fac_ids'])})
+      AND A.OPER_ID IN ('{oper_ids_str}')
+      AND {base_dt_condition}
+      AND A.IGOT_ID IS NOT NULL
+      AND A.WAF_SEQ IS NOT NULL
+)
+SELECT BASE_DT, IGOT_ID, WAF_SEQ, BLK_ID, OPER_ID, EQP_ID, REG_DTTM, SLOT_NO, EQP_NM
+FROM ope
+WHERE RN = 1
+"""
+
+
 def DATA_3210_wafering_300(target_date, config):
     """
     팀별 Loss Rate 조회 쿼리 (300mm 웨이퍼링 공정 기준)
@@ -804,23 +991,26 @@ ORDER BY BASE_DT_NM, REJ_GROUP, LOSS_QTY DESC
 
 
 
-def DATA_LOT_3210_wafering_300(target_date, config):
+def DATA_LOT_3210_wafering_300(target_date, config, end_date=None, params=None):
     """
     → OPER_ID 조건 없음
     → PART_NO 추출 로직 포함
     → config 주입만 정확히 수행
+    → end_date 지정 시 target_date ~ end_date 기간 조회 (팀부서그룹은 행별 BASE_DT 기준)
     """
+    params = params or QueryParams()
     waf_size = config['waf_size']
-    fac_ids_str = "','".join(config['fac_ids'])
     oper_div_l = config['oper_div_l']
     grade_filter = config['grade_filter']
+    base_dt_condition = _base_dt_condition('A.BASE_DT', target_date, end_date, params)
+    team_dt_condition = _base_dt_condition('K.BASE_DT', target_date, end_date, params)
 
     if grade_filter == 'PN':
         grade_cs_condition = "TRUE"
         grade_ps_condition = "TRUE"
     else:
-        grade_cs_condition = f"C.GRD_CD_NM = '{grade_filter}'"
-        grade_ps_condition = f"C.GRD_CD_NM_PS = '{grade_filter}'"
+        grade_cs_condition = f"C.GRD_CD_NM = {params(grade_filter)}"
+        grade_ps_condition = f"C.GRD_CD_NM_PS = {params(grade_filter)}"
 
     return f"""
 WITH
@@ -915,12 +1105,12 @@ AND Z1.OPER_ID = A.OPER_ID
 WHERE
     1 = 1
     AND Z1.OPER_DIV_L = '{oper_div_l}'
-    AND (CASE WHEN '{grade_filter}' = 'PN' THEN TRUE ELSE {grade_cs_condition} END)
-    AND (CASE WHEN '{grade_filter}' = 'PN' THEN TRUE ELSE {grade_ps_condition} END)
-    AND Z1.FAC_ID IN ('{fac_ids_str}')
+    AND (CASE WHEN {params(grade_filter)} = 'PN' THEN TRUE ELSE {grade_cs_condition} END)
+    AND (CASE WHEN {params(grade_filter)} = 'PN' THEN TRUE ELSE {grade_ps_condition} END)
+    AND Z1.FAC_ID IN ({params.in_list(config['fac_ids'])})
     AND 'N' = 'N'
     AND A.WAF_SIZE = '{waf_size}'
-    AND A.BASE_DT = '{target_date}'
+    AND {base_dt_condition}
 
 UNION ALL
 
@@ -1016,12 +1206,12 @@ AND Z1.OPER_ID = A.OPER_ID
 WHERE
     1 = 1
     AND Z1.OPER_DIV_L = '{oper_div_l}'
-    AND (CASE WHEN '{grade_filter}' = 'PN' THEN TRUE ELSE {grade_cs_condition} END)
-    AND (CASE WHEN '{grade_filter}' = 'PN' THEN TRUE ELSE {grade_ps_condition} END)
-    AND Z1.FAC_ID IN ('{fac_ids_str}')
+    AND (CASE WHEN {params(grade_filter)} = 'PN' THEN TRUE ELSE {grade_cs_condition} END)
+    AND (CASE WHEN {params(grade_filter)} = 'PN' THEN TRUE ELSE {grade_ps_condition} END)
+    AND Z1.FAC_ID IN ({params.in_list(config['fac_ids'])})
     AND 'N' = 'N'
     AND A.WAF_SIZE = '{waf_size}'
-    AND A.BASE_DT = '{target_date}'
+    AND {base_dt_condition}
 
 GROUP BY
     A.WAF_SIZE, A.BASE_DT, A.DIV_CD, A.REJ_DIV_CD, A.FAC_ID, A.OPER_ID,
@@ -1042,6 +1232,36 @@ Z_WITH_PIMS AS (
     LEFT JOIN iceberg.ibg_lake.PIMS_PROD P
     ON P.MS_CODE = Z.PROD_ID
     AND P.SPEC_TYPE = 'CS'
+),
+-- (3) TEAM_MAP: (기준일, 부서)별 팀부서그룹 — 해당 일자에 유효한 최신 1건
+--     (기간 조회 시 일자별 매핑 적용, 기준일은 BASEDATE 달력에서 조회 → Z 재스캔 없음)
+TEAM_MAP AS (
+    SELECT T.BASE_DT, T.DPT_CD, T.TEAMGRP_NM, T.SORT_CD
+    FROM (
+        SELECT
+            K.BASE_DT,
+            S1.DPT_CD,
+            S2.TEAMGRP_NM,
+            S2.SORT_SEQ AS SORT_CD,
+            ROW_NUMBER() OVER (PARTITION BY K.BASE_DT, S1.DPT_CD ORDER BY S1.ST_DT DESC) AS RN
+        FROM (
+            SELECT DISTINCT K.BASE_DT
+            FROM oracle.PMDW_MGR.DW_BA_CM_BASEDATE_M K
+            WHERE {team_dt_condition}
+        ) K
+        INNER JOIN oracle.PMDW_MGR.DW_BA_CM_LOSSREJGRPDTL_M S1
+        ON S1.ST_DT <= K.BASE_DT
+        AND S1.ED_DT >= K.BASE_DT
+        INNER JOIN oracle.PMDW_MGR.DW_BA_CM_LOSSREJGRP_M S2
+        ON S1.TEAMGRP_CD = S2.TEAMGRP_CD
+        AND S1.WAF_SIZE = S2.WAF_SIZE
+        AND S1.OPER_DIV_L = S2.OPER_DIV_L
+        WHERE
+            S1.TARGET_DIV_CD IN ('A', 'L')
+            AND S1.WAF_SIZE = '{waf_size}'
+            AND S1.OPER_DIV_L = '{oper_div_l}'
+    ) T
+    WHERE T.RN = 1
 )
 -- 최종 SELECT: REJ_GROUP별 집계 + PART_NO 포함
 SELECT
@@ -1058,26 +1278,10 @@ SELECT
         ELSE ' '
     END AS PART_NO
 FROM Z_WITH_PIMS Z
---  Step 5: 팀부서그룹 매핑 (LATERAL)
-LEFT JOIN LATERAL (
-    SELECT
-        S2.TEAMGRP_NM,
-        S2.SORT_SEQ AS SORT_CD
-    FROM oracle.PMDW_MGR.DW_BA_CM_LOSSREJGRPDTL_M S1
-    INNER JOIN oracle.PMDW_MGR.DW_BA_CM_LOSSREJGRP_M S2
-    ON S1.TEAMGRP_CD = S2.TEAMGRP_CD
-    AND S1.WAF_SIZE = S2.WAF_SIZE
-    AND S1.OPER_DIV_L = S2.OPER_DIV_L
-    WHERE
-        S1.TARGET_DIV_CD IN ('A', 'L')
-        AND S1.WAF_SIZE = '{waf_size}'
-        AND S1.OPER_DIV_L = '{oper_div_l}'
-        AND S1.ED_DT >= '{target_date}'
-        AND S1.ST_DT <= '{target_date}'
-        AND S1.DPT_CD = Z.REAL_DPT_GROUP
-    ORDER BY S1.ST_DT DESC
-    LIMIT 1
-) X ON TRUE
+--  Step 5: 팀부서그룹 매핑 (행의 BASE_DT 기준)
+LEFT JOIN TEAM_MAP X
+ON X.BASE_DT = Z.BASE_DT
+AND X.DPT_CD = Z.REAL_DPT_GROUP
 --  Step 4: EQP_NM 매핑
 LEFT JOIN oracle.PMDW_MGR.DW_BA_CM_STDPEQP_H X1
 ON X1.FAC_ID = Z.FAC_ID
@@ -1091,14 +1295,75 @@ AND X2.APPLY_YN = 'Y'
 """
 
 
+# ===================================================================
+# 서버 측 사전 집계 쿼리 (Ref / 집계 저장소용)
+# - 상세 쿼리를 그대로 감싸 GROUP BY를 Trino에서 수행 → 일자별 compact cube만 전송
+# - 결과 컬럼은 data_cache 일별 집계(AGG_*)의 원본 입력과 동일 (ROWS = 원본 행 수)
+# ===================================================================
+
+SCHEMA_DATA_LOT_3210_wafering_300_agg = {
+    **_CODE_COLUMNS_SCHEMA,
+    'GRD_CD_NM_CS': 'category',
+    'LOSS_QTY': 'float64',
+    'IN_QTY': 'float64',
+    'ROWS': 'int32',
+}
+
+def _aggregate_query(detail_query, keys, sums, extra_from=""):
+    """상세 쿼리 → GROUP BY keys, SUM(sums) + COUNT(*) AS ROWS"""
+    select_keys = ",\n    ".join(keys)
+    select_sums = ",\n    ".join(f"SUM(D.{col}) AS {col}" for col in sums)
+    return f"""
+SELECT
+    {select_keys},
+    {select_sums},
+    COUNT(*) AS ROWS
+FROM (
+{detail_query}
+) D
+{extra_from}
+GROUP BY
+    {select_keys}
+"""
+
+
+def DATA_LOT_3210_wafering_300_agg(target_date, config, end_date=None, params=None):
+    """
+    DATA_LOT_3210_wafering_300 서버 집계
+    → (BASE_DT, REJ_GROUP, CRET_CD, 등급, PROD_ID, AFT_BAD_RSN_CD) LOSS_QTY / IN_QTY 합계
+    → PRODUCT_TYPE / MID_GROUP은 클라이언트에서 PROD_ID / 코드로 부여
+    """
+    keys = ['D.BASE_DT', 'D.REJ_GROUP', 'D.CRET_CD', 'D.GRD_CD_NM_CS', 'D.PROD_ID', 'D.AFT_BAD_RSN_CD']
+    return _aggregate_query(DATA_LOT_3210_wafering_300(target_date, config, end_date, params), keys,
+                            ['LOSS_QTY', 'IN_QTY'])
+
+
+# 집계 저장소 데이터셋 → 서버 집계 쿼리 (리포트 일일 조회 대상 아님, 부족한 Ref 일자 보충용)
+# - WAF 집계는 서버 집계 대신 불량 기간 조회 + 로컬 공정 이력 조인으로 보충 (data_loader.load_3210_aggregates)
+#   (상세 쿼리는 기준일마다 30일 공정 이력을 재스캔 → 기간 조회 불가, 1일 단위 조회는 반복 스캔)
+AGGREGATE_QUERIES = {
+    'AGG_LOT_3210_daily': {'query': DATA_LOT_3210_wafering_300_agg, 'schema': SCHEMA_DATA_LOT_3210_wafering_300_agg},
+}
+
+
 # 쿼리 그룹화
+# 각 항목: {'query': 쿼리 생성 함수, 'schema': 컬럼 타입 선언}
 QUERIES_BY_CATALOG = {
     'oracle': {
-        'DATA_3010_wafering_300' : DATA_3010_wafering_300,
-        'DATA_WAF_3210_wafering_300': DATA_WAF_3210_wafering_300,
-        'DATA_3210_wafering_300': DATA_3210_wafering_300,
-        'DATA_3210_wafering_300_3months' : DATA_3210_wafering_300_3months, #3개월 쿼리 추가
-        'DATA_LOT_3210_wafering_300' : DATA_LOT_3210_wafering_300,
-        'DATA_1511_SMAX_wafering_300' : DATA_1511_SMAX_wafering_300
+        'DATA_3010_wafering_300' : {'query': DATA_3010_wafering_300, 'schema': SCHEMA_DATA_3010_wafering_300},
+        'DATA_WAF_3210_wafering_300': {'query': DATA_WAF_3210_wafering_300, 'schema': SCHEMA_DATA_WAF_3210_wafering_300},
+        'DATA_3210_wafering_300': {'query': DATA_3210_wafering_300, 'schema': SCHEMA_DATA_3210_wafering_300},
+        'DATA_3210_wafering_300_3months' : {'query': DATA_3210_wafering_300_3months, 'schema': SCHEMA_DATA_3210_wafering_300_3months}, #3개월 쿼리 추가
+        'DATA_LOT_3210_wafering_300' : {'query': DATA_LOT_3210_wafering_300, 'schema': SCHEMA_DATA_LOT_3210_wafering_300},
+        'DATA_1511_SMAX_wafering_300' : {'query': DATA_1511_SMAX_wafering_300, 'schema': SCHEMA_DATA_1511_SMAX_wafering_300}
     }
 }
+
+
+def get_query_schema(query_name):
+    """쿼리명으로 컬럼 타입 선언 조회 (없으면 빈 dict)"""
+    for queries in list(QUERIES_BY_CATALOG.values()) + [AGGREGATE_QUERIES]:
+        entry = queries.get(query_name)
+        if isinstance(entry, dict):
+            return entry.get('schema', {})
+    return {}